@@ -89,18 +89,20 @@ Write-Host "Resource Group: $resourceGroupName`n"
 
 # Define image names and paths
 $images = @(
-    @{ name = "sales-mcp"; path = ".\src\MCP\sales" }
+    # Built from src so the image can include the shared modules (src\shared)
+    @{ name = "sales-mcp"; path = ".\src"; dockerfile = "MCP/sales/Dockerfile" }
 )
 
 # Build images
 foreach ($image in $images) {
     Write-Host "Building image '$($image.name):latest' from '$($image.path)'..."
-    Write-Host "az acr build --resource-group $resourceGroupName --registry $containerRegistryName --image $($image.name):latest $image.path"
+    Write-Host "az acr build --resource-group $resourceGroupName --registry $containerRegistryName --image $($image.name):latest --file $($image.dockerfile) $($image.path)"
 
     az acr build `
         --resource-group $resourceGroupName `
         --registry $containerRegistryName `
         --image "$($image.name):latest" `
+        --file $image.dockerfile `
         $image.path
 }
 
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+
+# Modules used by more than one of the API, the MCP server and the notebooks
+# live once in src/shared, which the deploy packages add at their root. A
+# component directory comes first on the path, so a module of the same name
+# there would silently shadow the shared one.
+SHARED_DIR = "src/shared"
+COMPONENT_DIRS = ("src/api", "src/MCP/sales", "src/Notebooks")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def shared_modules(root=REPO_DIR):
+    """The module file names in src/shared, sorted."""
+    return sorted(name for name in os.listdir(os.path.join(root, SHARED_DIR)) if name.endswith(".py"))
+
+
+def shadowing_copies(root=REPO_DIR):
+    """Paths (relative to root) of component modules named like a shared module."""
+    shared = set(shared_modules(root))
+    return [
+        f"{directory}/{name}"
+        for directory in COMPONENT_DIRS
+        if os.path.isdir(os.path.join(root, directory))
+        for name in sorted(os.listdir(os.path.join(root, directory)))
+        if name in shared
+    ]
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Check that src/api, src/MCP/sales and src/Notebooks hold no copies of the src/shared modules."
+    ).parse_args()
+
+    copies = shadowing_copies()
+    for path in copies:
+        print(f"{path} shadows {SHARED_DIR}/{os.path.basename(path)}; import the shared module instead")
+    print(f"{len(shared_modules())} shared modules, {len(copies)} shadowing copies")
+    sys.exit(1 if copies else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,9 @@ $tempDir = "artifacts\api\temp"
 $zipFilePath = "artifacts\api\app.zip"
 
 # Construct the argument list
-$args = "$pythonAppPath $zipFilePath $tempDir --exclude_dirs venv --exclude_files .env *.md"
+# The modules shared with the MCP server (src/shared) go to the root of the zip
+$sharedPath = Join-Path $pythonAppPath "..\shared"
+$args = "$pythonAppPath $zipFilePath $tempDir --exclude_dirs venv --exclude_files .env *.md --include_dirs $sharedPath"
 
 # Execute the Python script
 Start-Process "python" -ArgumentList "directory_zipper.py $args" -NoNewWindow -Wait
@@ -1,49 +1,230 @@
 import os
-import shutil
+import json
+import time
+import zlib
+import struct
+import hashlib
+import fnmatch
 import zipfile
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Fixed member timestamp (1980-01-01, the earliest a zip can store) and
+# permissions, so identical inputs always produce byte-identical archives.
+_DOS_TIME = 0
+_DOS_DATE = (1 << 5) | 1
+_FILE_ATTRIBUTES = (0o100644 << 16)
+_UTF8_FLAG = 0x0800
+_VERSION = 20
+_ZIP32_LIMIT = 0xFFFFFFFF
+_READ_CHUNK = 1024 * 1024
+
+
+class _RawZipWriter:
+    """
+    Minimal zip writer for members that are already deflated, so compression
+    can run in parallel and unchanged members can be copied from the previous
+    archive as raw bytes. Zip64 is not needed for app packages and is rejected.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.entries = []
+
+    def write_member(self, name, crc, compress_type, data, file_size):
+        offset = self.fp.tell()
+        if max(offset, len(data), file_size) > _ZIP32_LIMIT or len(self.entries) >= 0xFFFF:
+            raise ValueError("Archive too large for a zip32 package")
+        encoded_name = name.encode("utf-8")
+        self.fp.write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, _VERSION, _UTF8_FLAG, compress_type,
+            _DOS_TIME, _DOS_DATE, crc, len(data), file_size, len(encoded_name), 0,
+        ))
+        self.fp.write(encoded_name)
+        self.fp.write(data)
+        self.entries.append((encoded_name, crc, compress_type, len(data), file_size, offset))
+
+    def close(self):
+        start = self.fp.tell()
+        for encoded_name, crc, compress_type, compressed_size, file_size, offset in self.entries:
+            self.fp.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, _VERSION | (3 << 8), _VERSION, _UTF8_FLAG,
+                compress_type, _DOS_TIME, _DOS_DATE, crc, compressed_size, file_size,
+                len(encoded_name), 0, 0, 0, 0, _FILE_ATTRIBUTES, offset,
+            ))
+            self.fp.write(encoded_name)
+        size = self.fp.tell() - start
+        self.fp.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(self.entries), len(self.entries), size, start, 0,
+        ))
+
+
+def _read_raw_member(archive, info):
+    """Returns the compressed bytes of a member without decompressing them."""
+    archive.seek(info.header_offset)
+    header = archive.read(30)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    archive.seek(info.header_offset + 30 + name_length + extra_length)
+    return archive.read(info.compress_size)
+
 
 class DirectoryZipper:
-    def __init__(self, source_dir, zip_file_path, temp_dir, exclude_dirs, exclude_files):
+    def __init__(self, source_dir, zip_file_path, temp_dir=None, exclude_dirs=(), exclude_files=(),
+                 workers=None, compresslevel=6, manifest_path=None, include_dirs=()):
         self.source_dir = source_dir
+        # Further directories whose contents are added at the root of the
+        # archive, next to source_dir's (such as src/shared)
+        self.include_dirs = include_dirs
         self.zip_file_path = zip_file_path
+        # No longer used: files are streamed from source_dir. Kept so existing
+        # deploy scripts passing a temp directory keep working.
         self.temp_dir = temp_dir
         self.exclude_dirs = exclude_dirs
         self.exclude_files = exclude_files
+        self.workers = workers or os.cpu_count()
+        self.compresslevel = compresslevel
+        self.manifest_path = manifest_path or zip_file_path + ".manifest.json"
+        self.stats = {}
+
+    def _excluded(self, file):
+        # Names also match as suffixes (".env" excludes "prod.env"), as they always have
+        return any(
+            file.endswith(pattern) or fnmatch.fnmatch(file, pattern) for pattern in self.exclude_files
+        )
+
+    def list_files(self):
+        """Walks the source trees, applying exclusions while walking. Sorted for reproducibility."""
+        members = {}
+        for source_dir in (self.source_dir, *self.include_dirs):
+            for root, dirs, files in os.walk(source_dir):
+                # Exclude specified directories
+                dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
+                for file in files:
+                    # Exclude specified files (names or glob patterns such as *.md)
+                    if self._excluded(file):
+                        continue
+                    src_file = os.path.join(root, file)
+                    arcname = os.path.relpath(src_file, source_dir).replace(os.sep, "/")
+                    if arcname in members:
+                        raise ValueError(f"{src_file} and {members[arcname]} would both be stored as {arcname}")
+                    members[arcname] = src_file
+        return sorted(members.items())
 
-    def copy_files(self, src, dst):
-        for root, dirs, files in os.walk(src):
-            # Exclude specified directories
-            dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
-            for file in files:
-                # Exclude specified files
-                if file in self.exclude_files or any(file.endswith(ext) for ext in self.exclude_files):
-                    continue
-                src_file = os.path.join(root, file)
-                dst_file = os.path.join(dst, os.path.relpath(src_file, src))
-                os.makedirs(os.path.dirname(dst_file), exist_ok=True)
-                shutil.copy2(src_file, dst_file)
+    def _load_manifest(self):
+        if not (os.path.exists(self.manifest_path) and os.path.exists(self.zip_file_path)):
+            return {}
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("compresslevel") != self.compresslevel:
+            return {}
+        return manifest.get("members", {})
+
+    def _prepare(self, arcname, src_file, previous):
+        """Reads and hashes a file, and deflates it unless the previous archive has it."""
+        digest = hashlib.sha256()
+        crc = 0
+        size = 0
+        chunks = []
+        with open(src_file, "rb") as f:
+            while True:
+                chunk = f.read(_READ_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                chunks.append(chunk)
+        sha256 = digest.hexdigest()
+
+        entry = previous.get(arcname)
+        if entry and entry["sha256"] == sha256:
+            return arcname, src_file, sha256, crc, size, None
+
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        data = b"".join(compressor.compress(c) for c in chunks) + compressor.flush()
+        return arcname, src_file, sha256, crc, size, data
 
     def create_zip(self):
-        os.makedirs(self.temp_dir, exist_ok=True)
-        self.copy_files(self.source_dir, self.temp_dir)
+        started = time.perf_counter()
+        members = self.list_files()
+        previous = self._load_manifest()
+        walked = time.perf_counter()
 
-        with zipfile.ZipFile(self.zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(self.temp_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    zipf.write(file_path, os.path.relpath(file_path, self.temp_dir))
+        previous_archive = zipfile.ZipFile(self.zip_file_path) if previous else None
+        previous_infos = {i.filename: i for i in previous_archive.infolist()} if previous_archive else {}
+        previous_fp = open(self.zip_file_path, "rb") if previous_archive else None
+
+        manifest = {}
+        reused = 0
+        bytes_in = 0
+        partial_path = self.zip_file_path + ".partial"
+        os.makedirs(os.path.dirname(os.path.abspath(self.zip_file_path)), exist_ok=True)
+
+        try:
+            with open(partial_path, "wb") as out, ThreadPoolExecutor(max_workers=self.workers) as executor:
+                writer = _RawZipWriter(out)
+                pending = deque()
+                members_iter = iter(members)
+                # Bounded window: members are compressed in parallel but written
+                # in order, without holding the whole archive in memory
+                window = self.workers * 4
+
+                def submit_next():
+                    member = next(members_iter, None)
+                    if member is not None:
+                        pending.append(executor.submit(self._prepare, *member, previous))
+
+                for _ in range(window):
+                    submit_next()
+
+                while pending:
+                    arcname, src_file, sha256, crc, size, data = pending.popleft().result()
+                    submit_next()
+                    info = previous_infos.get(arcname)
+                    if data is None and info is not None and info.CRC == crc:
+                        data = _read_raw_member(previous_fp, info)
+                        reused += 1
+                    elif data is None:
+                        # Manifest and previous archive disagree; compress after all
+                        _, _, sha256, crc, size, data = self._prepare(arcname, src_file, {})
+                    writer.write_member(arcname, crc, zipfile.ZIP_DEFLATED, data, size)
+                    manifest[arcname] = {"sha256": sha256, "size": size}
+                    bytes_in += size
+
+                writer.close()
+        finally:
+            if previous_fp:
+                previous_fp.close()
+            if previous_archive:
+                previous_archive.close()
+
+        os.replace(partial_path, self.zip_file_path)
+        with open(self.manifest_path, "w") as f:
+            json.dump({"compresslevel": self.compresslevel, "members": manifest}, f, indent=1, sort_keys=True)
 
-        # Clean up the temporary directory
-        shutil.rmtree(self.temp_dir)
+        finished = time.perf_counter()
+        self.stats = {
+            "files": len(members),
+            "reused": reused,
+            "compressed": len(members) - reused,
+            "bytes_in": bytes_in,
+            "bytes_out": os.path.getsize(self.zip_file_path),
+            "walk_seconds": round(walked - started, 3),
+            "total_seconds": round(finished - started, 3),
+        }
+        return self.stats
 
 def main():
     parser = argparse.ArgumentParser(description="Zip a directory excluding specified files and directories.")
     parser.add_argument("source_dir", help="The source directory to zip.")
     parser.add_argument("zip_file_path", help="The path to the output zip file.")
-    parser.add_argument("temp_dir", help="The temporary directory to use.")
+    parser.add_argument("temp_dir", nargs="?", default=None, help="Unused; kept for compatibility with existing deploy scripts.")
     parser.add_argument("--exclude_dirs", nargs='*', default=[], help="Directories to exclude.")
-    parser.add_argument("--exclude_files", nargs='*', default=[], help="Files to exclude.")
+    parser.add_argument("--exclude_files", nargs='*', default=[], help="Files to exclude (names or glob patterns).")
+    parser.add_argument("--include_dirs", nargs='*', default=[], help="Further directories added at the root of the zip.")
+    parser.add_argument("--workers", type=int, default=None, help="Compression threads (default: CPU count).")
+    parser.add_argument("--compresslevel", type=int, default=6, help="Deflate level 0-9.")
 
     args = parser.parse_args()
 
@@ -52,9 +233,13 @@ def main():
         zip_file_path=args.zip_file_path,
         temp_dir=args.temp_dir,
         exclude_dirs=args.exclude_dirs,
-        exclude_files=args.exclude_files
+        exclude_files=args.exclude_files,
+        workers=args.workers,
+        compresslevel=args.compresslevel,
+        include_dirs=args.include_dirs,
     )
-    zipper.create_zip()
+    stats = zipper.create_zip()
+    print(", ".join(f"{k}={v}" for k, v in stats.items()))
 
 if __name__ == "__main__":
     main()
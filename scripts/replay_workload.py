@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import difflib
+import hashlib
+import json
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+
+# Must match src/shared/workload_capture.py
+VOLATILE_FIELDS = ("artifact_id", "expires_at")
+
+
+def _without_volatile(value):
+    if isinstance(value, dict):
+        return {k: _without_volatile(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_without_volatile(v) for v in value]
+    return value
+
+
+def _canonical(value):
+    return _without_volatile(json.loads(json.dumps(value, default=str)))
+
+
+def _hash(value):
+    encoded = json.dumps(_canonical(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def load_workload(paths, kinds=("http", "tool"), limit=None):
+    """Captured calls from one or more capture files, oldest first."""
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            entries.extend(e for e in (json.loads(line) for line in f if line.strip()) if e["kind"] in kinds)
+    entries.sort(key=lambda e: e["ts"])
+    return entries[:limit] if limit else entries
+
+
+class WorkloadReplayer:
+    """
+    Re-drives a workload recorded by workload_capture.py against running
+    services: HTTP calls against the API at `api_url`, tool calls against the
+    MCP server at `mcp_url` (streamable HTTP).
+
+    Calls start at their captured offsets divided by `speed` (1 = original
+    pace, 10 = ten times faster, 0 = as fast as possible), with at most
+    `concurrency` in flight. Each result is compared with the captured one;
+    conditional request headers are not replayed, so every call is a full
+    request. `http_transport` (an httpx transport, such as an ASGITransport
+    over the app) replaces the network for the HTTP calls.
+    """
+
+    def __init__(self, entries, api_url=None, mcp_url=None, speed=1.0, concurrency=8, timeout=120,
+                 http_transport=None):
+        self.entries = entries
+        self.http_transport = http_transport
+        self.api_url = api_url
+        self.mcp_url = mcp_url
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def run(self):
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        import httpx
+
+        results = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with AsyncExitStack() as stack:
+            http = await stack.enter_async_context(httpx.AsyncClient(
+                base_url=self.api_url or "", timeout=self.timeout, transport=self.http_transport
+            ))
+            session = await stack.enter_async_context(self._mcp_session()) if self.mcp_url else None
+            started = time.monotonic()
+            first_ts = self.entries[0]["ts"] if self.entries else 0
+
+            async def replay(entry):
+                if self.speed > 0:
+                    await asyncio.sleep(max(0.0, started + (entry["ts"] - first_ts) / self.speed - time.monotonic()))
+                async with semaphore:
+                    results.append(await self._call(entry, http, session))
+
+            await asyncio.gather(*(replay(e) for e in self.entries))
+            elapsed = time.monotonic() - started
+        return results, elapsed
+
+    @asynccontextmanager
+    async def _mcp_session(self):
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        async with streamablehttp_client(self.mcp_url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+    async def _call(self, entry, http, session):
+        clock = time.perf_counter()
+        try:
+            if entry["kind"] == "http":
+                status, value, sha = await self._call_http(entry, http)
+            elif session is not None:
+                status, value, sha = await self._call_tool(entry, session)
+            else:
+                return {"entry": entry, "skipped": True}
+        except Exception as e:
+            status, value, sha = "exception", str(e), None
+        return {
+            "entry": entry,
+            "ms": (time.perf_counter() - clock) * 1000,
+            "status": status,
+            "value": value,
+            "matches": sha == entry["sha"],
+        }
+
+    async def _call_http(self, entry, http):
+        method, path = entry["name"].split(" ", 1)
+        params = entry["params"]
+        headers = {"accept": params["accept"]} if "accept" in params else {}
+        response = await http.request(
+            method, path, params=params.get("query", []), headers=headers,
+            content=params.get("body", "").encode() or None,
+        )
+        if response.headers.get("content-type", "").startswith("application/json") and response.content:
+            value = _canonical(response.json())
+            return response.status_code, value, _hash(value)
+        return response.status_code, None, hashlib.sha256(response.content).hexdigest()[:16]
+
+    async def _call_tool(self, entry, session):
+        result = await session.call_tool(entry["name"], entry["params"])
+        value = result.structuredContent
+        if isinstance(value, dict) and list(value) == ["result"]:
+            # FastMCP wraps non-object return values
+            value = value["result"]
+        if value is None:
+            text = "".join(getattr(c, "text", "") for c in result.content)
+            try:
+                value = json.loads(text)
+            except ValueError:
+                value = text
+        value = _canonical(value)
+        status = "error" if result.isError or _is_error_payload(value) else "ok"
+        return status, value, _hash(value)
+
+
+def _is_error_payload(result):
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and len(result) == 1 and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
+
+
+def _diff(captured, replayed, max_lines=20):
+    before = json.dumps(captured, indent=1, sort_keys=True).splitlines()
+    after = json.dumps(replayed, indent=1, sort_keys=True).splitlines()
+    lines = list(difflib.unified_diff(before, after, "captured", "replayed", lineterm="", n=1))
+    return lines[:max_lines] + (["..."] if len(lines) > max_lines else [])
+
+
+def report(results, elapsed, show_diffs=5):
+    by_name = defaultdict(list)
+    for r in results:
+        if not r.get("skipped"):
+            by_name[r["entry"]["name"]].append(r)
+
+    summary = {}
+    print(f"{'call':<40} {'n':>6} {'err':>5} {'diff':>5} {'cap p50':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, calls in sorted(by_name.items()):
+        latencies = [c["ms"] for c in calls]
+        row = {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c["status"] not in (200, "ok")),
+            "mismatches": sum(1 for c in calls if not c["matches"]),
+            "captured_p50_ms": _percentile([c["entry"]["ms"] for c in calls], 50),
+            "p50_ms": _percentile(latencies, 50),
+            "p90_ms": _percentile(latencies, 90),
+            "p99_ms": _percentile(latencies, 99),
+            "max_ms": max(latencies),
+        }
+        summary[name] = row
+        print(f"{name[:40]:<40} {row['calls']:>6} {row['errors']:>5} {row['mismatches']:>5} "
+              f"{row['captured_p50_ms']:>8.1f} {row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+
+    replayed = sum(len(c) for c in by_name.values())
+    skipped = len(results) - replayed
+    print(f"\n{replayed} calls in {elapsed:.1f}s ({replayed / elapsed if elapsed else 0:.1f}/s)"
+          + (f", {skipped} skipped (no URL for their service)" if skipped else ""))
+
+    shown = 0
+    for r in results:
+        if shown >= show_diffs or r.get("skipped") or r["matches"]:
+            continue
+        shown += 1
+        entry = r["entry"]
+        print(f"\n--- {entry['name']} {json.dumps(entry['params'], default=str)[:200]}")
+        if r["status"] == "exception":
+            print(f"failed: {r['value']}")
+        elif "result" in entry and r["value"] is not None:
+            print("\n".join(_diff(entry["result"], r["value"])))
+        else:
+            print("result differs (capture with WORKLOAD_CAPTURE_RESULTS=true to see how)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured API/MCP workload and compare latencies and results.")
+    parser.add_argument("capture", nargs="+", help="Capture files written with WORKLOAD_CAPTURE_PATH.")
+    parser.add_argument("--api_url", default=None, help="Base URL of the API, e.g. http://localhost:8000.")
+    parser.add_argument("--mcp_url", default=None, help="MCP endpoint, e.g. http://localhost:80/mcp.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pace relative to the capture (0: as fast as possible).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum calls in flight.")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N calls.")
+    parser.add_argument("--show_diffs", type=int, default=5, help="Number of result differences to print.")
+    parser.add_argument("--report", default=None, help="Write the per-call summary to this JSON file.")
+    args = parser.parse_args()
+
+    if not args.api_url and not args.mcp_url:
+        parser.error("give --api_url and/or --mcp_url")
+
+    kinds = tuple(k for k, url in (("http", args.api_url), ("tool", args.mcp_url)) if url)
+    entries = load_workload(args.capture, kinds, args.limit)
+    replayer = WorkloadReplayer(entries, args.api_url, args.mcp_url, args.speed, args.concurrency)
+    results, elapsed = replayer.run()
+    summary = report(results, elapsed, args.show_diffs)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_seconds": elapsed, "calls": summary}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
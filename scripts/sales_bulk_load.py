@@ -0,0 +1,315 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+# Schema of the four tables created by data/sales_data_load.dbc. Columns that
+# the denormalized export does not carry are filled in (see below) so the
+# loaded tables satisfy the API models.
+TABLES = {
+    "customers": {
+        "columns": ["customer_id", "customer_name", "region", "industry", "account_manager"],
+        "key": ["customer_id"],
+    },
+    "products": {
+        "columns": ["product_id", "product_name", "product_category", "unit_cost", "unit_price"],
+        "key": ["product_id"],
+    },
+    "sales_orders": {
+        "columns": ["order_id", "customer_id", "order_date", "ship_date", "sales_channel", "region"],
+        "key": ["order_id"],
+    },
+    "order_lines": {
+        "columns": ["order_line_id", "order_id", "product_id", "quantity", "unit_price", "discount", "line_total"],
+        "key": ["order_line_id"],
+    },
+}
+
+# Attributes of the customers and products created by data/sales_data_load.dbc,
+# by name. Other customers (e.g. generated ones) keep the region of their first
+# order; other attributes are UNKNOWN.
+KNOWN_CUSTOMERS = {
+    "Ford": ("NA", "OEM", "Alice Johnson"),
+    "GM": ("NA", "OEM", "Bob Smith"),
+    "AutoZone": ("NA", "Distributor", "Carol Lee"),
+    "Bosch": ("EU", "OEM", "David Wong"),
+    "NAPA": ("NA", "Distributor", "Ellen Garcia"),
+}
+KNOWN_PRODUCTS = {
+    "Brake Pad": ("Braking", 20.0),
+    "Oil Filter": ("Engine", 5.0),
+    "Spark Plug": ("Electrical", 2.0),
+    "Alternator": ("Electrical", 90.0),
+    "Transmission Kit": ("Transmission", 500.0),
+}
+
+UNKNOWN = "Unknown"
+
+CSV_DTYPES = {
+    "order_id": "int64",
+    "customer_id": "int64",
+    "customer_name": "string",
+    "order_date": "string",
+    "region": "string",
+    "product_id": "int64",
+    "product_name": "string",
+    "quantity": "int64",
+    "unit_price": "float64",
+    "line_total": "float64",
+}
+
+_SQL_TYPES = {
+    "int64": "INTEGER",
+    "float64": "REAL",
+}
+
+
+class SqliteSink:
+    """Inserts into a local SQLite database; rows already present are ignored."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self._created = set()
+
+    def _create(self, table, df):
+        columns = ", ".join(
+            f"{c} {_SQL_TYPES.get(str(df[c].dtype), 'TEXT')}" for c in TABLES[table]["columns"]
+        )
+        key = ", ".join(TABLES[table]["key"])
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns}, PRIMARY KEY ({key}))")
+        self._created.add(table)
+
+    def write(self, table, df):
+        if table not in self._created:
+            self._create(table, df)
+        columns = TABLES[table]["columns"]
+        placeholders = ", ".join("?" for _ in columns)
+        # NaN/NA become NULL
+        values = df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None)
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class DuckDbSink(SqliteSink):
+    """Inserts into a local DuckDB database file."""
+
+    def __init__(self, path):
+        import duckdb
+
+        self.conn = duckdb.connect(path)
+        self._created = set()
+
+    def write(self, table, df):
+        if table not in self._created:
+            self._create(table, df)
+        self.conn.register("chunk", df[TABLES[table]["columns"]])
+        self.conn.execute(f"INSERT OR IGNORE INTO {table} SELECT * FROM chunk")
+        self.conn.unregister("chunk")
+
+
+class ParquetSink:
+    """
+    Writes one Parquet dataset per table under `path`. Fact tables are
+    partitioned by order month (from the `order_date` the loader passes along
+    with both fact tables); each chunk becomes one file per partition.
+    Deduplication across chunks relies on the loader (see SalesBulkLoader).
+    """
+
+    PARTITIONED = {"sales_orders", "order_lines"}
+
+    def __init__(self, path):
+        self.path = path
+        self._files = 0
+
+    def write(self, table, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table_dir = os.path.join(self.path, table)
+
+        if table in self.PARTITIONED:
+            month = df["order_date"].str.slice(0, 7)
+            df = df[TABLES[table]["columns"]].assign(order_month=month.values)
+            pq.write_to_dataset(
+                pa.Table.from_pandas(df, preserve_index=False),
+                root_path=table_dir,
+                partition_cols=["order_month"],
+                basename_template=f"part-{self._files:06d}-{{i}}.parquet",
+            )
+            self._files += 1
+        else:
+            df = df[TABLES[table]["columns"]]
+            os.makedirs(table_dir, exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), os.path.join(table_dir, "data.parquet"))
+
+    def close(self):
+        pass
+
+
+SINKS = {
+    "sqlite": SqliteSink,
+    "duckdb": DuckDbSink,
+    "parquet": ParquetSink,
+}
+
+
+class SalesBulkLoader:
+    """
+    Streams the denormalized sales export in chunks and normalizes each chunk
+    into customers, products, sales_orders and order_lines with vectorized
+    pandas operations.
+
+    Dimension tables are tiny and are deduplicated in memory and written once
+    at the end. Orders are deduplicated against the order IDs seen for order
+    dates that can still recur; the export is sorted by order date, so IDs for
+    dates older than the current chunk are released and memory stays flat
+    regardless of input size. A chunk with a date older than one already
+    released means the input is not sorted; loading then fails, since its
+    duplicates could no longer be detected. With `sorted_input=False` every
+    order ID is kept instead. Sinks with primary keys also ignore duplicates;
+    the Parquet sink relies on this deduplication alone.
+    """
+
+    def __init__(self, source_csv, sink, chunk_size=250_000, sorted_input=True):
+        self.source_csv = source_csv
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.sorted_input = sorted_input
+        self._customers = {}
+        self._products = {}
+        self._open_orders = {}  # order_date -> set of order_ids
+        self._released_before = None  # IDs of order dates before this one were released
+        self.stats = {"rows": 0, "orders": 0, "lines": 0, "chunks": 0}
+
+    def _normalize(self, chunk, row_offset):
+        # Order lines: the export has no line ID or discount; derive both
+        lines = pd.DataFrame({
+            "order_line_id": row_offset + pd.RangeIndex(len(chunk)),
+            "order_id": chunk["order_id"].values,
+            "product_id": chunk["product_id"].values,
+            "quantity": chunk["quantity"].values,
+            "unit_price": chunk["unit_price"].values,
+            "line_total": chunk["line_total"].values,
+            # Not a column of order_lines; lets sinks partition lines by order date
+            "order_date": chunk["order_date"].values,
+        })
+        gross = lines["quantity"] * lines["unit_price"]
+        lines["discount"] = (1 - lines["line_total"] / gross.where(gross != 0)).round(2).fillna(0.0)
+
+        orders = chunk.drop_duplicates("order_id")[["order_id", "customer_id", "order_date", "region"]]
+        # The export has no shipping data: ship on the order date, through an unknown channel
+        orders = orders.assign(ship_date=orders["order_date"], sales_channel=UNKNOWN)
+        orders = self._new_orders(orders)
+
+        customers = chunk.drop_duplicates("customer_id")[["customer_id", "customer_name", "region"]]
+        for row in customers.itertuples(index=False):
+            self._customers.setdefault(row.customer_id, row)
+
+        products = chunk.drop_duplicates("product_id")[["product_id", "product_name", "unit_price"]]
+        for row in products.itertuples(index=False):
+            self._products.setdefault(row.product_id, row)
+
+        return orders, lines
+
+    def _new_orders(self, orders):
+        oldest_date = orders["order_date"].min()
+        if self._released_before is not None and oldest_date < self._released_before:
+            raise ValueError(
+                f"{self.source_csv} is not sorted by order_date: orders from {oldest_date} follow a "
+                f"chunk starting at {self._released_before}. Sort it, or load with --unsorted."
+            )
+        if self.sorted_input:
+            for order_date in [d for d in self._open_orders if d < oldest_date]:
+                del self._open_orders[order_date]
+            self._released_before = oldest_date
+
+        seen = set()
+        for ids in self._open_orders.values():
+            seen.update(ids)
+        if seen:
+            orders = orders[~orders["order_id"].isin(seen)]
+
+        for order_date, ids in orders.groupby("order_date")["order_id"]:
+            self._open_orders.setdefault(order_date, set()).update(ids.tolist())
+        return orders
+
+    def load(self):
+        start = time.perf_counter()
+        row_offset = 0
+
+        # "NA" is the North America region code, not a missing value
+        reader = pd.read_csv(
+            self.source_csv, dtype=CSV_DTYPES, chunksize=self.chunk_size,
+            keep_default_na=False, na_values=[""],
+        )
+        for chunk in reader:
+            orders, lines = self._normalize(chunk, row_offset)
+            self.sink.write("sales_orders", orders)
+            self.sink.write("order_lines", lines)
+
+            row_offset += len(chunk)
+            self.stats["rows"] += len(chunk)
+            self.stats["orders"] += len(orders)
+            self.stats["lines"] += len(lines)
+            self.stats["chunks"] += 1
+
+        customers = pd.DataFrame(list(self._customers.values()))
+        known = customers["customer_name"].map(KNOWN_CUSTOMERS)
+        customers = customers.assign(
+            region=known.str[0].fillna(customers["region"]),
+            industry=known.str[1].fillna(UNKNOWN),
+            account_manager=known.str[2].fillna(UNKNOWN),
+        )
+        products = pd.DataFrame(list(self._products.values()))
+        known = products["product_name"].map(KNOWN_PRODUCTS)
+        products = products.assign(
+            product_category=known.str[0].fillna(UNKNOWN),
+            # Unknown costs are loaded as 0.0
+            unit_cost=known.str[1].fillna(0.0).astype("float64"),
+        )
+        self.sink.write("customers", customers)
+        self.sink.write("products", products)
+        self.sink.close()
+
+        elapsed = time.perf_counter() - start
+        self.stats["customers"] = len(customers)
+        self.stats["products"] = len(products)
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["rows_per_second"] = round(self.stats["rows"] / elapsed) if elapsed else None
+        self.stats["mb_per_second"] = round(os.path.getsize(self.source_csv) / elapsed / 1e6, 2) if elapsed else None
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize sales_data.csv into the customers, products, sales_orders and order_lines tables.")
+    parser.add_argument("source_csv", help="Path to the denormalized sales CSV export.")
+    parser.add_argument("target", help="Target database file (sqlite/duckdb) or output directory (parquet).")
+    parser.add_argument("--sink", choices=sorted(SINKS), default="sqlite", help="Where to write the tables.")
+    parser.add_argument("--chunk_size", type=int, default=250_000, help="Rows read per chunk.")
+    parser.add_argument(
+        "--unsorted", action="store_true",
+        help="The input is not sorted by order_date: keep every order ID for deduplication (more memory).",
+    )
+
+    args = parser.parse_args()
+
+    loader = SalesBulkLoader(
+        source_csv=args.source_csv,
+        sink=SINKS[args.sink](args.target),
+        chunk_size=args.chunk_size,
+        sorted_input=not args.unsorted,
+    )
+    stats = loader.load()
+    print(", ".join(f"{k}={v}" for k, v in stats.items()))
+
+if __name__ == "__main__":
+    main()
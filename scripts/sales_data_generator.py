@@ -0,0 +1,292 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+# Generated catalogs start with the customers and products of the sample
+# export, so their IDs, names and prices keep their meaning at any scale.
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sales_data.csv")
+
+# Share of generated products per category and their typical price
+CATEGORY_MIX = {
+    "Braking": (0.25, 60.0),
+    "Engine": (0.30, 25.0),
+    "Electrical": (0.25, 40.0),
+    "Transmission": (0.10, 700.0),
+    "Suspension": (0.10, 150.0),
+}
+
+# Order regions of generated customers; sample customers keep their own mix
+REGIONS = ["NA", "EU", "APAC", "LATAM"]
+REGION_WEIGHTS = [0.45, 0.35, 0.15, 0.05]
+
+# Fixed so that a seed alone determines the output
+DEFAULT_END_DATE = date(2025, 12, 31)
+
+
+def read_base_catalog(path=SAMPLE_CSV):
+    """
+    The customers and products of a sales export, by ID: customers as
+    (name, {region: share of their orders}), products as (name, unit price).
+    IDs must run from 0 without gaps, as generated IDs follow them.
+    """
+    customers, products, order_regions = {}, {}, {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            customer_id, product_id = int(row["customer_id"]), int(row["product_id"])
+            customers[customer_id] = row["customer_name"]
+            products.setdefault(product_id, (row["product_name"], float(row["unit_price"])))
+            order_regions[row["order_id"]] = (customer_id, row["region"])
+
+    region_counts = {c: {} for c in customers}
+    for customer_id, region in order_regions.values():
+        region_counts[customer_id][region] = region_counts[customer_id].get(region, 0) + 1
+    for name, ids in (("customer", customers), ("product", products)):
+        if sorted(ids) != list(range(len(ids))):
+            raise ValueError(f"{path}: {name} IDs are not 0 to {len(ids) - 1}: {sorted(ids)}")
+
+    return (
+        [
+            (customers[c], {r: n / sum(region_counts[c].values()) for r, n in sorted(region_counts[c].items())})
+            for c in range(len(customers))
+        ],
+        [products[p] for p in range(len(products))],
+    )
+
+
+class SalesDataGenerator:
+    """
+    Generates sales lines with the schema of data/sales_data.csv.
+
+    - the catalogs start with the customers and products of `base_csv`
+      (data/sales_data.csv); further ones are generated
+    - customers follow a Zipf-like popularity (a few accounts dominate volume)
+    - products are drawn from a category mix, popular items first
+    - order dates follow a yearly seasonal curve with quieter weekends
+    - each order's region is drawn from its customer's region mix
+    - lines per order are geometric (mostly 1-3, occasionally 10+)
+    - discounts are mostly small, capped at 20%
+
+    Output is split into parts covering consecutive date ranges, so the files
+    are in order-date order end to end. Each part is generated from its own
+    seed-derived random stream, so results are identical for a given seed
+    regardless of the number of worker processes.
+    """
+
+    def __init__(self, lines, output_dir, seed=42, customers=500, products=200,
+                 days=730, end_date=None, part_lines=1_000_000, file_format="csv", workers=None,
+                 base_csv=SAMPLE_CSV):
+        self.lines = lines
+        self.output_dir = output_dir
+        self.seed = seed
+        self.base_customers, self.base_products = read_base_catalog(base_csv)
+        self.customers = max(customers, len(self.base_customers))
+        self.products = max(products, len(self.base_products))
+        self.days = days
+        self.end_date = end_date or DEFAULT_END_DATE
+        self.part_lines = part_lines
+        self.file_format = file_format
+        self.workers = workers or os.cpu_count()
+
+    def _catalogs(self):
+        rng = np.random.default_rng([self.seed, 0])
+
+        base_customers, base_products = self.base_customers, self.base_products
+        customer_names = [name for name, _ in base_customers] + [
+            f"Customer {i:06d}" for i in range(len(base_customers), self.customers)
+        ]
+        # Per customer, the cumulative shares of its orders in each region
+        region_names = list(REGIONS) + sorted({r for _, mix in base_customers for r in mix} - set(REGIONS))
+        region_shares = np.zeros((self.customers, len(region_names)))
+        for customer, (_, mix) in enumerate(base_customers):
+            region_shares[customer, [region_names.index(r) for r in mix]] = list(mix.values())
+        region_shares[len(base_customers):, :len(REGIONS)] = REGION_WEIGHTS
+        region_shares /= region_shares.sum(axis=1, keepdims=True)
+        # Zipf-like popularity: weight ~ 1 / rank^1.1, in a shuffled order
+        customer_weights = 1.0 / np.arange(1, self.customers + 1) ** 1.1
+        rng.shuffle(customer_weights[len(base_customers):])
+        customer_weights /= customer_weights.sum()
+
+        categories = list(CATEGORY_MIX)
+        category_shares = np.array([CATEGORY_MIX[c][0] for c in categories])
+        extra = self.products - len(base_products)
+        extra_categories = rng.choice(categories, size=extra, p=category_shares / category_shares.sum())
+        extra_prices = np.round(
+            np.array([CATEGORY_MIX[c][1] for c in extra_categories]) * rng.lognormal(0, 0.4, size=extra), 2
+        )
+        product_names = [name for name, _ in base_products] + [
+            f"{c} Part {i:05d}" for i, c in enumerate(extra_categories, start=len(base_products))
+        ]
+        product_prices = np.concatenate([[price for _, price in base_products], extra_prices])
+        product_weights = 1.0 / np.arange(1, self.products + 1) ** 0.8
+        product_weights /= product_weights.sum()
+
+        return {
+            "customer_names": np.array(customer_names, dtype=object),
+            "region_names": np.array(region_names, dtype=object),
+            "region_cumulative_shares": np.cumsum(region_shares, axis=1),
+            "customer_weights": customer_weights,
+            "product_names": np.array(product_names, dtype=object),
+            "product_prices": product_prices,
+            "product_weights": product_weights,
+        }
+
+    def _day_weights(self):
+        start = self.end_date - timedelta(days=self.days - 1)
+        offsets = np.arange(self.days)
+        day_of_year = np.array([(start + timedelta(days=int(d))).timetuple().tm_yday for d in offsets])
+        weekday = (start.weekday() + offsets) % 7
+        # Peak in spring/early summer, trough around the year-end holidays
+        seasonal = 1.0 + 0.35 * np.sin(2 * np.pi * (day_of_year - 80) / 365.25)
+        weekend = np.where(weekday >= 5, 0.35, 1.0)
+        weights = seasonal * weekend
+        return start, weights / weights.sum()
+
+    def _plan_parts(self):
+        """Splits the date range into consecutive slices of about `part_lines` lines each."""
+        start, day_weights = self._day_weights()
+        lines_per_day = day_weights * self.lines
+        parts = []
+        first_day, acc = 0, 0.0
+        for day, expected in enumerate(lines_per_day):
+            acc += expected
+            if acc >= self.part_lines or day == self.days - 1:
+                parts.append((first_day, day + 1))
+                first_day, acc = day + 1, 0.0
+
+        # Integer line counts per part that sum exactly to the requested total
+        expected = np.array([lines_per_day[a:b].sum() for a, b in parts])
+        counts = np.floor(expected).astype(np.int64)
+        counts[np.argsort(expected - counts)[::-1][: self.lines - counts.sum()]] += 1
+        return start, day_weights, [(i, a, b, int(n)) for i, ((a, b), n) in enumerate(zip(parts, counts))]
+
+    def generate(self):
+        start_time = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        catalogs = self._catalogs()
+        start, day_weights, parts = self._plan_parts()
+        jobs = [
+            (self.seed, index, first_day, last_day, n_lines, start, day_weights, catalogs,
+             self.output_dir, self.file_format)
+            for index, first_day, last_day, n_lines in parts if n_lines
+        ]
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(_generate_part, jobs))
+
+        elapsed = time.perf_counter() - start_time
+        return {
+            "lines": sum(r["lines"] for r in results),
+            "orders": sum(r["orders"] for r in results),
+            "files": len(results),
+            "seconds": round(elapsed, 2),
+            "lines_per_second": round(sum(r["lines"] for r in results) / elapsed) if elapsed else None,
+        }
+
+
+def _generate_part(job):
+    (seed, index, first_day, last_day, n_lines, start, day_weights, catalogs, output_dir, file_format) = job
+    rng = np.random.default_rng([seed, index + 1])
+
+    # Lines per order: geometric (>= 1), so most orders have one to three lines
+    lines_per_order = rng.geometric(0.45, size=n_lines)
+    ends = np.cumsum(lines_per_order)
+    n_orders = int(np.searchsorted(ends, n_lines) + 1)
+    lines_per_order = lines_per_order[:n_orders]
+    lines_per_order[-1] -= ends[n_orders - 1] - n_lines
+
+    # Order-level attributes, sorted by date within the part
+    part_weights = day_weights[first_day:last_day]
+    order_days = np.sort(rng.choice(np.arange(first_day, last_day), size=n_orders, p=part_weights / part_weights.sum()))
+    order_customers = rng.choice(len(catalogs["customer_weights"]), size=n_orders, p=catalogs["customer_weights"])
+    # One region per order, from the customer's region mix
+    cumulative_shares = catalogs["region_cumulative_shares"][order_customers]
+    order_regions = np.minimum(
+        (rng.random(n_orders)[:, None] >= cumulative_shares).sum(axis=1), cumulative_shares.shape[1] - 1
+    )
+    # Order IDs are unique across parts: the part index occupies the high bits
+    order_ids = (np.int64(index + 1) << 32) + np.arange(n_orders, dtype=np.int64)
+
+    # Expand to lines
+    line_orders = np.repeat(np.arange(n_orders), lines_per_order)
+    products = rng.choice(len(catalogs["product_weights"]), size=n_lines, p=catalogs["product_weights"])
+    prices = catalogs["product_prices"][products]
+    # Cheaper parts are bought in larger quantities
+    quantity = np.maximum(1, rng.poisson(np.clip(400.0 / prices, 1, 60))).astype(np.int64)
+    discount = np.minimum(np.round(rng.beta(1.2, 8.0, size=n_lines) * 0.5, 2), 0.20)
+    line_total = np.round(quantity * prices * (1 - discount), 2)
+
+    dates = np.datetime64(start) + order_days.astype("timedelta64[D]")
+    customers = order_customers[line_orders]
+
+    import pyarrow as pa
+
+    table = pa.table({
+        "order_id": order_ids[line_orders],
+        "customer_id": customers,
+        "customer_name": catalogs["customer_names"][customers],
+        "order_date": dates[line_orders].astype(str),
+        "region": catalogs["region_names"][order_regions[line_orders]],
+        "product_id": products,
+        "product_name": catalogs["product_names"][products],
+        "quantity": quantity,
+        "unit_price": prices,
+        "line_total": line_total,
+    })
+
+    path = os.path.join(output_dir, f"sales_data-{index:05d}.{file_format}")
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.csv as pacsv
+        # Unquoted header and values, like data/sales_data.csv
+        with open(path, "wb") as f:
+            f.write((",".join(table.column_names) + "\n").encode())
+            pacsv.write_csv(table, f, pacsv.WriteOptions(include_header=False, quoting_style="none"))
+
+    return {"lines": n_lines, "orders": n_orders}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data with the schema of data/sales_data.csv.")
+    parser.add_argument("output_dir", help="Directory for the generated files.")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Total order lines to generate.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; output is identical for the same seed.")
+    parser.add_argument("--customers", type=int, default=500, help="Number of customers.")
+    parser.add_argument("--products", type=int, default=200, help="Number of products.")
+    parser.add_argument("--days", type=int, default=730, help="Number of days of order history.")
+    parser.add_argument("--end_date", type=date.fromisoformat, default=None, help="Last order date (default: 2025-12-31).")
+    parser.add_argument("--part_lines", type=int, default=1_000_000, help="Approximate lines per output file.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Output file format.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument(
+        "--base_csv", default=SAMPLE_CSV,
+        help="Sales export whose customers and products start the catalogs (default: data/sales_data.csv).",
+    )
+
+    args = parser.parse_args()
+
+    generator = SalesDataGenerator(
+        lines=args.lines,
+        output_dir=args.output_dir,
+        seed=args.seed,
+        customers=args.customers,
+        products=args.products,
+        days=args.days,
+        end_date=args.end_date,
+        part_lines=args.part_lines,
+        file_format=args.format,
+        workers=args.workers,
+        base_csv=args.base_csv,
+    )
+    stats = generator.generate()
+    print(", ".join(f"{k}={v}" for k, v in stats.items()))
+
+if __name__ == "__main__":
+    main()
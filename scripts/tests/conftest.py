@@ -0,0 +1,10 @@
+# tests/conftest.py
+"""
+Tests of the data scripts; they run offline on small generated inputs.
+
+Run from scripts: python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,16 @@
+from check_shared_modules import shadowing_copies, shared_modules
+
+
+def test_repository_has_no_copies():
+    modules = shared_modules()
+    assert "rollups.py" in modules and "dimensions.py" in modules
+    assert shadowing_copies() == []
+
+
+def test_copies_are_reported(tmp_path):
+    for path in ["src/shared/helpers.py", "src/shared/rollups.py", "src/api/helpers.py",
+                 "src/api/main.py", "src/Notebooks/rollups.py"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    assert shared_modules(str(tmp_path)) == ["helpers.py", "rollups.py"]
+    assert shadowing_copies(str(tmp_path)) == ["src/api/helpers.py", "src/Notebooks/rollups.py"]
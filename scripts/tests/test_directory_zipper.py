@@ -0,0 +1,91 @@
+import json
+import zipfile
+
+import pytest
+
+from directory_zipper import DirectoryZipper
+
+
+@pytest.fixture
+def source(tmp_path):
+    files = {
+        "app.py": "print('app')\n" * 200,
+        "routes/orders.py": "ORDERS = 1\n",
+        "README.md": "# docs\n",
+        ".env": "SECRET=1\n",
+        "prod.env": "SECRET=2\n",
+        "local.env": "SECRET=3\n",
+        "venv/lib/site.py": "pass\n",
+        "data/environment.json": "{}\n",
+    }
+    directory = tmp_path / "src"
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return directory
+
+
+def zip_dir(source, path, **kwargs):
+    options = dict(exclude_dirs=["venv"], exclude_files=[".env", "*.md"], workers=2)
+    options.update(kwargs)
+    zipper = DirectoryZipper(str(source), str(path), **options)
+    zipper.create_zip()
+    return zipper
+
+
+def test_exclusions(source, tmp_path):
+    zip_dir(source, tmp_path / "app.zip")
+    with zipfile.ZipFile(tmp_path / "app.zip") as archive:
+        # ".env" also excludes prod.env and local.env, as deploy_api.ps1 relies on
+        assert archive.namelist() == ["app.py", "data/environment.json", "routes/orders.py"]
+        assert archive.testzip() is None
+        assert archive.read("routes/orders.py") == b"ORDERS = 1\n"
+
+
+def test_archives_are_byte_identical(source, tmp_path):
+    zip_dir(source, tmp_path / "first.zip")
+    # Different mtimes and thread counts must not change the bytes
+    (source / "app.py").touch()
+    zip_dir(source, tmp_path / "second.zip", workers=1)
+    assert (tmp_path / "first.zip").read_bytes() == (tmp_path / "second.zip").read_bytes()
+
+
+def test_unchanged_members_are_reused(source, tmp_path):
+    path = tmp_path / "app.zip"
+    assert zip_dir(source, path).stats["reused"] == 0
+
+    (source / "routes/orders.py").write_text("ORDERS = 2\n")
+    stats = zip_dir(source, path).stats
+    assert (stats["files"], stats["reused"], stats["compressed"]) == (3, 2, 1)
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert archive.read("routes/orders.py") == b"ORDERS = 2\n"
+    manifest = json.loads((tmp_path / "app.zip.manifest.json").read_text())
+    assert sorted(manifest["members"]) == ["app.py", "data/environment.json", "routes/orders.py"]
+
+    # A rebuild from scratch yields the same archive
+    zip_dir(source, tmp_path / "fresh.zip")
+    assert path.read_bytes() == (tmp_path / "fresh.zip").read_bytes()
+
+
+def test_changed_compression_level_recompresses_everything(source, tmp_path):
+    path = tmp_path / "app.zip"
+    zip_dir(source, path)
+    assert zip_dir(source, path, compresslevel=9).stats["reused"] == 0
+
+
+def test_included_directories_are_added_at_the_root(source, tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "rollups.py").write_text("ROLLUPS = 1\n")
+    (shared / "notes.md").write_text("# notes\n")
+    zip_dir(source, tmp_path / "app.zip", include_dirs=[str(shared)])
+    with zipfile.ZipFile(tmp_path / "app.zip") as archive:
+        assert archive.read("rollups.py") == b"ROLLUPS = 1\n"
+        assert "notes.md" not in archive.namelist()
+
+    (shared / "app.py").write_text("print('shadowed')\n")
+    with pytest.raises(ValueError, match="app.py"):
+        zip_dir(source, tmp_path / "other.zip", include_dirs=[str(shared)])
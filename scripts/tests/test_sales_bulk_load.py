@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from sales_bulk_load import SalesBulkLoader
+
+HEADER = "order_id,customer_id,customer_name,order_date,region,product_id,product_name,quantity,unit_price,line_total\n"
+
+
+class MemorySink:
+    def __init__(self):
+        self.tables = {}
+
+    def write(self, table, df):
+        self.tables.setdefault(table, []).append(df)
+
+    def close(self):
+        pass
+
+    def rows(self, table):
+        return pd.concat(self.tables[table], ignore_index=True)
+
+
+def write_csv(path, lines):
+    """`lines` are (order_id, order_date) pairs; each becomes one order line."""
+    path.write_text(HEADER + "".join(
+        f"{order_id},1,Ford,{order_date},NA,0,Brake Pad,2,50.0,100\n" for order_id, order_date in lines
+    ))
+    return str(path)
+
+
+def load(path, **options):
+    sink = MemorySink()
+    stats = SalesBulkLoader(path, sink, chunk_size=2, **options).load()
+    return sink, stats
+
+
+def test_orders_split_across_chunks_are_written_once(tmp_path):
+    source = write_csv(tmp_path / "sorted.csv", [
+        (1, "2025-01-01"), (2, "2025-01-02"),
+        (2, "2025-01-02"), (3, "2025-01-02"),
+        (3, "2025-01-02"), (4, "2025-01-03"),
+        (5, "2025-01-04"), (4, "2025-01-03"),
+    ])
+    sink, stats = load(source)
+    orders = sink.rows("sales_orders")
+    assert sorted(orders["order_id"]) == [1, 2, 3, 4, 5]
+    assert stats["orders"] == 5
+    assert len(sink.rows("order_lines")) == 8
+
+
+def test_unsorted_input_fails(tmp_path):
+    source = write_csv(tmp_path / "unsorted.csv", [
+        (1, "2025-01-01"), (2, "2025-01-05"),
+        (3, "2025-01-06"), (4, "2025-01-07"),
+        (1, "2025-01-01"), (5, "2025-01-08"),
+    ])
+    with pytest.raises(ValueError, match="not sorted by order_date"):
+        load(source)
+
+
+def test_unsorted_input_keeps_every_order_id(tmp_path):
+    source = write_csv(tmp_path / "unsorted.csv", [
+        (1, "2025-01-01"), (2, "2025-01-05"),
+        (3, "2025-01-06"), (4, "2025-01-07"),
+        (1, "2025-01-01"), (5, "2025-01-08"),
+    ])
+    sink, stats = load(source, sorted_input=False)
+    assert sorted(sink.rows("sales_orders")["order_id"]) == [1, 2, 3, 4, 5]
+    assert stats["orders"] == 5
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from sales_data_generator import SAMPLE_CSV, SalesDataGenerator, read_base_catalog
+from test_sales_bulk_load import HEADER
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("generated")
+    SalesDataGenerator(lines=30_000, output_dir=str(directory), customers=40, products=20, days=120, workers=1).generate()
+    # "NA" is the North America region code, not a missing value
+    return pd.concat(
+        [pd.read_csv(path, keep_default_na=False) for path in sorted(directory.glob("*.csv"))], ignore_index=True
+    )
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return pd.read_csv(SAMPLE_CSV, keep_default_na=False)
+
+
+def test_catalogs_start_with_the_sample_customers_and_products(generated, sample):
+    for columns in (["customer_id", "customer_name"], ["product_id", "product_name", "unit_price"]):
+        known = sample[columns].drop_duplicates()
+        merged = generated[generated[columns[0]] <= known[columns[0]].max()][columns].drop_duplicates()
+        assert sorted(map(tuple, merged.values)) == sorted(map(tuple, known.values))
+    # Generated products follow the sample's, which have no others
+    assert not generated["product_name"].isin(["Alternator", "Transmission Kit"]).any()
+
+
+def test_region_is_sampled_per_order(generated, sample):
+    orders = generated.drop_duplicates("order_id")
+    assert generated.groupby("order_id")["region"].nunique().max() == 1
+    # Customers order in several regions, sample customers only in their own
+    assert (orders.groupby("customer_id")["region"].nunique() > 1).all()
+    for customer_id, regions in orders.groupby("customer_id")["region"]:
+        if customer_id <= sample["customer_id"].max():
+            assert set(regions) <= set(sample.loc[sample["customer_id"] == customer_id, "region"])
+
+
+def test_base_catalog_ids_must_be_contiguous(tmp_path):
+    path = tmp_path / "gap.csv"
+    path.write_text(HEADER + "1,0,Ford,2025-01-01,NA,2,Spark Plug,1,8.0,8.0\n")
+    with pytest.raises(ValueError, match="product IDs"):
+        read_base_catalog(str(path))
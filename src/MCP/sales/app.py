@@ -1,7 +1,27 @@
+# Modules shared with the API live in src/shared; the image copies
+# them next to app.py, a checkout adds the directory to the path
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "shared"))
+
 from mcp.server.fastmcp import FastMCP
 import logging
-from typing import List, Optional
-from db import run_dbquery  
+from typing import Dict, List, Optional, Union
+from db import DB_POOL_SIZE, pool, resilience, run_dbquery
+from tracing import set_up_tracing, traced_tool
+from workload_capture import captured_tool
+from rollups import RollupCatalog, SummaryRequest, approximate_summary_rows, approximate_summary_sql, with_averages
+from sampling import MAX_RELATIVE_ERROR, SAMPLE_PERCENT, sample_clause, sample_fraction
+from lookups import keyed, lookup_dimension, order_lookup_sql, parse_ids
+from dimensions import DimensionCache, closest_value
+from scatter_gather import ScatterGather
+from customer_overview import CustomerOverview
+from customer_profiles import CustomerProfileStore, ProfileRequest, profile_rows
+from artifacts import MAX_SPILL_ROWS, SPILL_ROWS, ArtifactStore
+from warmup import LAZY_IMPORTS, WARMUP_CONNECTIONS, WARMUP_TIMEOUT_SECONDS, Warmup, import_modules
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from opentelemetry import trace
 from os import environ
 from dotenv import load_dotenv
 
@@ -12,6 +32,90 @@ load_dotenv(override=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+set_up_tracing(environ.get("SERVICE_NAME", "sales-mcp"))
+
+rollup_catalog = RollupCatalog(
+    run_dbquery, enabled=environ.get("SALES_ROLLUPS_ENABLED", "true").lower() == "true"
+)
+
+# Splits wide date ranges into concurrently scanned partitions
+scatter_gather = ScatterGather(run_dbquery, DB_POOL_SIZE)
+
+# Started with the server (see __main__), or by the first lookup that needs it
+dimension_cache = DimensionCache(
+    run_dbquery, enabled=environ.get("DIMENSION_CACHE_ENABLED", "true").lower() == "true"
+)
+
+# Profile, totals, recent orders, top products and category mix in one call
+customer_overview = CustomerOverview(run_dbquery, dimension_cache, DB_POOL_SIZE)
+
+# Precomputed RFM profiles of every customer, refreshed by customer_profiles.py
+profile_store = CustomerProfileStore(
+    run_dbquery, enabled=environ.get("CUSTOMER_PROFILES_ENABLED", "true").lower() == "true"
+)
+
+# Large get_orders results are written here and analyzed with query_artifact
+artifact_store = ArtifactStore()
+
+
+# get_orders expand value -> dimension columns added to each row
+ORDER_EXPANSIONS = {
+    "customer": ("customers", ["customer_name", "industry", "account_manager"]),
+    "product": ("products", ["product_name", "product_category", "unit_cost"]),
+}
+# Added when expand is not given, matching what get_orders has always returned
+ORDER_NAME_COLUMNS = {"customers": ["customer_name"], "products": ["product_name"]}
+# get_orders leaves out lines whose customer or product is unknown, as its inner joins did
+ORDER_JOINS = {"customers": [], "products": []}
+# get_orders row columns, for looking orders up by ID (see lookups.order_lookup_sql)
+ORDER_LOOKUP_COLUMNS = {
+    "order_id": "o.order_id",
+    "customer_id": "o.customer_id",
+    "order_date": "o.order_date",
+    "region": "o.region",
+    "product_id": "l.product_id",
+    "quantity": "l.quantity",
+    "unit_price": "l.unit_price",
+    "line_unit_price": "ROUND((l.quantity * l.unit_price) * (1 - l.discount), 2)",
+}
+
+
+def _cached_dimension(name: str):
+    """The in-memory dimension table, recording its staleness on the tool span; None to query the warehouse."""
+    table = dimension_cache.table(name)
+    if table is not None:
+        trace.get_current_span().set_attribute("data.staleness_seconds", _data_staleness(name, table))
+    return table
+
+
+def _data_staleness(name: str, table) -> float:
+    """
+    How far the served `name` data may lag the warehouse, like the API's
+    X-Data-Staleness: seconds since the cached table was last confirmed
+    current, 0 when it was read from the warehouse.
+    """
+    return round(dimension_cache.staleness(name), 1) if table is not None else 0.0
+
+
+def _with_staleness(rows, name: str, table) -> dict:
+    return {"rows": rows, "data_staleness_seconds": _data_staleness(name, table)}
+
+
+def _orders_by_id(order_ids, columns) -> Dict[int, Optional[List[dict]]]:
+    """get_orders rows grouped by order ID in request order (one query); None for unknown IDs."""
+    ids = parse_ids(order_ids)
+    if not ids:
+        return {}
+    rows = dimension_cache.enrich(run_dbquery(*order_lookup_sql(ids, ORDER_LOOKUP_COLUMNS)), columns)
+    lines: Dict[int, List[dict]] = {}
+    for row in rows:
+        # An order without lines comes back as one row without a product
+        order_lines = lines.setdefault(row["order_id"], [])
+        if row["product_id"] is not None:
+            order_lines.append(row)
+    return keyed(ids, lines)
+
+
 app = FastMCP(
     name="Server for Automotive Sales Data",
     host="0.0.0.0",
@@ -19,17 +123,49 @@ app = FastMCP(
 )
 
 
+def _load_dimensions():
+    if not dimension_cache.wait_loaded(WARMUP_TIMEOUT_SECONDS):
+        raise TimeoutError("dimension tables not loaded yet")
+
+
+# Done in the background at server startup instead of on the first tool calls; see /ready
+warmup = Warmup([
+    ("imports", lambda: import_modules(LAZY_IMPORTS)),
+    ("connections", lambda: pool.prewarm(WARMUP_CONNECTIONS)),
+    ("dimensions", _load_dimensions),
+    ("rollups", lambda: sorted(rollup_catalog.watermarks()) if rollup_catalog.enabled else None),
+    ("customer_profiles", lambda: profile_store.watermark() if profile_store.enabled else None),
+])
+
+
+@app.custom_route("/ready", methods=["GET"])
+async def get_readiness(request: Request) -> JSONResponse:
+    """
+    Readiness probe: 200 once the startup warm-up finished (or timed out),
+    503 while it runs. Also reports the warehouse retry, hedging and circuit
+    breaker counters.
+    """
+    status = dict(warmup.status(), db=resilience.stats())
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @app.tool()
+@traced_tool
+@captured_tool
 def get_orders(
     customer_id: Optional[int] = None,
     product_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     region: Optional[str] = None,
-    limit: int = 100
-) -> List[dict]:
+    limit: int = 100,
+    expand: Optional[List[str]] = None,
+    approximate: bool = False,
+    spill: bool = False,
+    order_ids: Optional[List[int]] = None
+) -> Union[List[dict], Dict[int, Optional[List[dict]]]]:
     """
-    Retrieve sales orders, including nested order lines and product details.
+    Retrieve sales order lines with customer and product names.
 
     Use this tool when the question is about sales, revenue, discounts,
     customer purchasing behavior, or product sales. Supports filters:
@@ -38,76 +174,117 @@ def get_orders(
     - product_id: only return orders containing a specific product
     - start_date / end_date: restrict to an order date range (YYYY-MM-DD)
     - region: filter by sales region (e.g., 'NA', 'EU')
-    - limit: maximum number of rows to return (default: 100)
-
-    Always includes order_id, customer_id, customer_name, order_date, region,
-    product_id, quantity, unit_price, and line_unit_price.
+    - limit: maximum number of rows to return (default: 100, at most
+      ARTIFACT_MAX_SPILL_ROWS, default 500,000)
+    - expand: details to add instead of just the names: 'customer' (customer_name,
+      industry, account_manager) and/or 'product' (product_name, product_category,
+      unit_cost); [] returns IDs only
+    - approximate: read from a sample of orders, faster for exploratory
+      questions; rows then carry sample_fraction (the fraction of orders
+      sampled). Falls back to all orders if the sample has fewer than limit rows.
+      Only the fraction is reported, no error bound: for totals or averages
+      with bounds use get_sales_summary with approximate.
+    - order_ids: look up several orders at once (at most 500); returns
+      {order_id: [rows of its lines] or null if unknown}, ignoring the other
+      filters and limit
+    - spill: write the rows to an artifact and return only its handle. Results
+      with more than ARTIFACT_SPILL_ROWS (default 1000) rows are always spilled.
+
+    Always includes order_id, customer_id, order_date, region, product_id,
+    quantity, unit_price and line_unit_price; customer_name and product_name
+    unless expand says otherwise. Lines whose customer or product is unknown
+    are left out.
+
+    A spilled result is returned as a single handle: artifact_id, row_count,
+    columns, expires_at and a few preview rows. Analyze it with query_artifact
+    instead of retrieving the rows.
     """
     try:
+        if expand is None:
+            columns = ORDER_NAME_COLUMNS
+        else:
+            unknown = sorted(set(expand) - set(ORDER_EXPANSIONS))
+            if unknown:
+                return [{"error": f"Unknown expand value(s) {unknown}; expected any of {sorted(ORDER_EXPANSIONS)}"}]
+            columns = dict(ORDER_EXPANSIONS[e] for e in expand)
+
+        if order_ids:
+            return _orders_by_id(order_ids, columns)
+        # Every row is held in memory before it is spilled, as in the API's /orders/orders/artifact
+        if not 0 < limit <= MAX_SPILL_ROWS:
+            return [{"error": f"limit must be between 1 and {MAX_SPILL_ROWS}, got {limit}"}]
+
         filters = []
         params = {}
 
         if customer_id is not None:
-            filters.append("c.customer_id = %(customer_id)s")
+            filters.append("o.customer_id = %(customer_id)s")
             params["customer_id"] = customer_id
 
         if product_id is not None:
-            filters.append("p.product_id = %(product_id)s")
+            filters.append("ol.product_id = %(product_id)s")
             params["product_id"] = product_id
 
-        if start_date:
-            filters.append("o.order_date >= %(start_date)s")
-            params["start_date"] = start_date
-
-        if end_date:
-            filters.append("o.order_date <= %(end_date)s")
-            params["end_date"] = end_date
-
         if region:
             filters.append("o.region = %(region)s")
             params["region"] = region
 
-        where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-
-        sql = f"""
-        SELECT 
-            o.order_id,
-            c.customer_id,
-            c.customer_name,
-            o.order_date,
-            o.region,
-            p.product_id,
-            p.product_name,
-            ol.quantity,
-            ol.unit_price,
-            ROUND((ol.quantity * ol.unit_price) * (1 - ol.discount), 2) AS line_unit_price
-        FROM sales_orders o
-        JOIN customers c ON o.customer_id = c.customer_id
-        JOIN order_lines ol ON o.order_id = ol.order_id
-        JOIN products p ON ol.product_id = p.product_id
-        {where_clause}
-        ORDER BY o.order_date DESC
-        LIMIT %(limit)s
-        """
         params["limit"] = limit
 
-        rows = run_dbquery(sql, params)
-
-        return [
-            {
-                "order_id": r["order_id"],
-                "customer_id": r["customer_id"],
-                "customer_name": r["customer_name"],
-                "order_date": r["order_date"],
-                "region": r["region"],
-                "product_id": r["product_id"],
-                "product_name": r["product_name"],
-                "quantity": r["quantity"],
-                "unit_price": r["unit_price"],
-                "line_unit_price": r["line_unit_price"],
-            }
-            for r in rows
-        ]
+        def build_query(range_start, range_end, sample=""):
+            range_filters = list(filters)
+            range_params = dict(params)
+            if range_start:
+                range_filters.append("o.order_date >= %(start_date)s")
+                range_params["start_date"] = range_start
+            if range_end:
+                range_filters.append("o.order_date <= %(end_date)s")
+                range_params["end_date"] = range_end
+
+            where_clause = f"WHERE {' AND '.join(range_filters)}" if range_filters else ""
+
+            sql = f"""
+            SELECT
+                o.order_id,
+                o.customer_id,
+                o.order_date,
+                o.region,
+                ol.product_id,
+                ol.quantity,
+                ol.unit_price,
+                ROUND((ol.quantity * ol.unit_price) * (1 - ol.discount), 2) AS line_unit_price
+            FROM sales_orders {sample} o
+            JOIN order_lines ol ON o.order_id = ol.order_id
+            {where_clause}
+            ORDER BY o.order_date DESC
+            LIMIT %(limit)s
+            """
+            return sql, range_params
+
+        def fetch(sample=""):
+            query = lambda range_start, range_end: build_query(range_start, range_end, sample)
+            ranges = scatter_gather.plan(start_date, end_date)
+            if ranges:
+                # Newest partitions first; older ones are skipped once `limit` rows arrived
+                return scatter_gather.run(query, ranges, limit, date_order="desc")
+            return run_dbquery(*query(start_date, end_date))
+
+        fraction = None
+        if approximate:
+            rows = fetch(sample_clause())
+            if len(rows) >= limit:
+                fraction = sample_fraction()
+                for row in rows:
+                    row["sample_fraction"] = fraction
+        if fraction is None:
+            rows = fetch()
+
+        # Names and details come from the in-memory dimension cache, not a warehouse join;
+        # dropping unknown customers and products after the LIMIT can return fewer rows
+        rows = dimension_cache.enrich(rows, {**ORDER_JOINS, **columns}, inner=True)
+        if rows and (spill or len(rows) > SPILL_ROWS):
+            return [artifact_store.spill(rows, "get_orders")]
+        return rows
 
     except Exception as e:
         logger.exception("Error in get_orders tool")
@@ -115,12 +292,53 @@ def get_orders(
 
 
 @app.tool()
+@traced_tool
+@captured_tool
+def query_artifact(
+    artifact_id: str,
+    filters: Optional[List[dict]] = None,
+    group_by: Optional[List[str]] = None,
+    aggregates: Optional[dict] = None,
+    columns: Optional[List[str]] = None,
+    order_by: Optional[List[str]] = None,
+    limit: int = 100
+) -> dict:
+    """
+    Filter, group, aggregate and sort a result that get_orders spilled to an
+    artifact, without querying the warehouse again. Supports:
+
+    - artifact_id: from the get_orders handle
+    - filters: [{"column": ..., "op": ..., "value": ...}], all must hold; op is
+      one of =, !=, <, <=, >, >=, in, not in, is null, is not null
+      (e.g. {"column": "order_date", "op": ">=", "value": "2024-01-01"})
+    - group_by: columns to group by
+    - aggregates: {column: function}, function one of sum, mean, min, max,
+      count, count_distinct, stddev (e.g. {"line_unit_price": "sum"}); outputs
+      are named <column>_<function>, plus row_count per group
+    - columns: columns to return when not aggregating (default: all)
+    - order_by: output columns, prefix with '-' for descending
+    - limit: maximum number of rows to return (default: 100, at most 1000)
+
+    Returns {"artifact_id", "row_count" (matching rows before the limit), "rows"}.
+    """
+    try:
+        return artifact_store.query(artifact_id, filters, group_by, aggregates, columns, order_by, limit)
+
+    except Exception as e:
+        logger.exception("Error in query_artifact tool")
+        return {"error": str(e)}
+
+
+@app.tool()
+@traced_tool
+@captured_tool
 def get_customers(
     customer_id: Optional[int] = None,
     industry: Optional[str] = None,
     region: Optional[str] = None,
-    limit: int = 100
-) -> List[dict]:
+    limit: int = 100,
+    customer_ids: Optional[List[int]] = None
+) -> dict:
     """
     Retrieve customer information.
 
@@ -131,17 +349,34 @@ def get_customers(
     - industry: filter customers by industry (e.g., 'Automotive', 'Aerospace')
     - region: filter customers by sales region (e.g., 'NA', 'EU')
     - limit: maximum number of customers to return (default: 100)
+    - customer_ids: look up several customers at once (at most 500); returns
+      {customer_id: customer or null if unknown}, ignoring the other filters
+
+    Returns {"rows": customers, "data_staleness_seconds": seconds the data
+    may lag the warehouse (0 when read from it)}.
 
     Always return customer_id and customer_name.
 
     Example use cases:
     - "Who are our top aerospace industry customers?"
     - "Get customer 42's details."
+    - "Get the details of customers 3, 17 and 42."
     """
 
     try:
         logger.info("Get Customers called")
 
+        customers = _cached_dimension("customers")
+        if customer_ids:
+            return _with_staleness(lookup_dimension(dimension_cache, "customers", customer_ids), "customers", customers)
+        if customers is not None:
+            return _with_staleness(customers.lookup(
+                limit=limit,
+                customer_id=customer_id or None,
+                industry=industry or None,
+                region=region or None,
+            ), "customers", customers)
+
         filters = []
         params = {}
 
@@ -179,7 +414,7 @@ def get_customers(
         logger.info(f"Returned {len(rows)} rows")
         logger.info([dict(r) for r in rows])
 
-        return [
+        return _with_staleness([
         {
             "customer_id": r["customer_id"],
             "customer_name": r["customer_name"],
@@ -188,7 +423,10 @@ def get_customers(
             "account_manager": r["account_manager"],
         }
         for r in rows
-    ]
+    ], "customers", None)
+
+    except ValueError as e:
+        return [{"error": str(e)}]
 
     except Exception as e:
         logger.exception("Error in get_customers tool: %s", e)
@@ -200,6 +438,89 @@ def get_customers(
 
 
 @app.tool()
+@traced_tool
+@captured_tool
+def get_customer_overview(
+    customer_ids: List[int],
+    recent_orders: int = 5,
+    top_products: int = 5,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Union[dict, List[dict]]:
+    """
+    Retrieve a complete overview of one or more customers in a single call.
+
+    Prefer this tool over calling get_customers, get_orders and get_products
+    one after another when analyzing customers' purchasing behavior (e.g.
+    "analyze the purchasing behavior of our top 5 customers"). Supports:
+
+    - customer_ids: up to 50 customer IDs
+    - recent_orders: number of most recent orders per customer (default: 5)
+    - top_products: number of top products by revenue per customer (default: 5)
+    - start_date / end_date: only consider orders in this date range (YYYY-MM-DD)
+
+    Returns {"rows": one entry per customer, "data_staleness_seconds":
+    seconds the profiles may lag the warehouse}. Each entry has customer
+    (profile, null if unknown), totals (order_count, line_count, quantity,
+    revenue, average_discount, first_order_date, last_order_date),
+    recent_orders, top_products (with product_name and product_category) and
+    category_mix (revenue, quantity and revenue_share per product category).
+    """
+    try:
+        customers = _cached_dimension("customers")
+        overviews = customer_overview.get(customer_ids, recent_orders, top_products, start_date, end_date)
+        return _with_staleness(overviews, "customers", customers)
+
+    except Exception as e:
+        logger.exception("Error in get_customer_overview tool")
+        return [{"error": str(e)}]
+
+
+@app.tool()
+@traced_tool
+@captured_tool
+def get_customer_profiles(
+    customer_ids: Optional[List[int]] = None,
+    segment: Optional[str] = None,
+    sort_by: str = "revenue",
+    limit: int = 20
+) -> dict:
+    """
+    Retrieve precomputed purchasing-behavior profiles of customers (RFM).
+
+    Prefer this tool over get_orders or get_customer_overview for ranking,
+    segmenting or profiling customers (e.g. "who are our best customers",
+    "which customers are at risk of churning"). Supports:
+
+    - customer_ids: only these customers (up to 500); default all customers
+    - segment: 'champions', 'loyal', 'new', 'promising', 'cant_lose',
+      'at_risk', 'hibernating' or 'lost'
+    - sort_by: 'revenue' (default), 'order_count', 'average_order_value' or
+      'recency' (most recent buyers first)
+    - limit: number of profiles to return, top-N by sort_by (default: 20)
+
+    Returns {"source": ..., "as_of": ..., "profiles": [...]}. Each profile has
+    order_count, line_count, quantity, revenue, average_order_value,
+    average_discount, first_order_date, last_order_date, average_interval_days,
+    interval_stddev_days and max_interval_days (days between orders),
+    category_mix (revenue share per product category), recency_days (before
+    as_of, the latest order date), recency_score, frequency_score and
+    monetary_score (1-5 quintiles over all customers, 5 is best) and segment.
+    """
+    try:
+        request = ProfileRequest(customer_ids=customer_ids or [], segment=segment, sort_by=sort_by, limit=limit)
+        sql, params, source = profile_store.plan_profiles(request)
+        profiles = profile_rows(run_dbquery(sql, params))
+        return {"source": source, "as_of": profiles[0]["as_of"] if profiles else None, "profiles": profiles}
+
+    except Exception as e:
+        logger.exception("Error in get_customer_profiles tool")
+        return {"error": str(e)}
+
+
+@app.tool()
+@traced_tool
+@captured_tool
 def get_product_category(name: str) -> dict:
     """
     Resolve a user-provided product category string into the canonical category 
@@ -212,10 +533,25 @@ def get_product_category(name: str) -> dict:
         {
             "input": "Brake Pads",
             "resolved_category": "Brake Pad",
-            "confidence": 0.92
+            "confidence": 0.92,
+            "data_staleness_seconds": 12.5
         }
     """
     try:
+        products = _cached_dimension("products")
+        if products is not None:
+            category, distance = closest_value(products.values("product_category"), name)
+            staleness = _data_staleness("products", products)
+            if category is None:
+                return {"input": name, "resolved_category": None, "confidence": 0.0, "data_staleness_seconds": staleness}
+            max_len = max(len(name), len(category))
+            return {
+                "input": name,
+                "resolved_category": category,
+                "confidence": 1 - (distance / max_len),
+                "data_staleness_seconds": staleness,
+            }
+
         sql = """
         SELECT p.product_category,
                levenshtein(lower(p.product_category), lower(%(name)s)) AS distance
@@ -227,7 +563,7 @@ def get_product_category(name: str) -> dict:
         rows = run_dbquery(sql, {"name": name})
 
         if not rows:
-            return {"input": name, "resolved_category": None, "confidence": 0.0}
+            return {"input": name, "resolved_category": None, "confidence": 0.0, "data_staleness_seconds": 0.0}
 
         row = rows[0]
         max_len = max(len(name), len(row["product_category"]))
@@ -237,6 +573,7 @@ def get_product_category(name: str) -> dict:
             "input": name,
             "resolved_category": row["product_category"],
             "confidence": confidence,
+            "data_staleness_seconds": 0.0,
         }
 
     except Exception as e:
@@ -244,11 +581,14 @@ def get_product_category(name: str) -> dict:
         return {"input": name, "resolved_category": None, "error": str(e)}
 
 @app.tool()
+@traced_tool
+@captured_tool
 def get_products(
     product_id: Optional[int] = None,
     category: Optional[str] = None,
-    limit: int = 100
-) -> List[dict]:
+    limit: int = 100,
+    product_ids: Optional[List[int]] = None
+) -> dict:
     """
     Retrieve product catalog data.
 
@@ -258,6 +598,11 @@ def get_products(
     - product_id: return a specific product
     - category: filter by category (e.g., 'Brakes', 'Tires')
     - limit: maximum number of products to return (default: 100)
+    - product_ids: look up several products at once (at most 500); returns
+      {product_id: product or null if unknown}, ignoring the other filters
+
+    Returns {"rows": products, "data_staleness_seconds": seconds the data
+    may lag the warehouse (0 when read from it)}.
 
     Always return product_id, product_name, product_category, unit_cost, and unit_price.
 
@@ -266,6 +611,15 @@ def get_products(
     - "List all products in the 'Brakes' category."
     """
     try:
+        products = _cached_dimension("products")
+        if product_ids:
+            return _with_staleness(lookup_dimension(dimension_cache, "products", product_ids), "products", products)
+        if products is not None:
+            return _with_staleness(
+                products.lookup(limit=limit, product_id=product_id, product_category=category or None),
+                "products", products,
+            )
+
         filters = []
         params = {}
 
@@ -295,7 +649,7 @@ def get_products(
 
         rows = run_dbquery(sql, params)
 
-        return [
+        return _with_staleness([
             {
                 "product_id": r["product_id"],
                 "product_name": r["product_name"],
@@ -304,7 +658,7 @@ def get_products(
                 "unit_price": r["unit_price"],
             }
             for r in rows
-        ]
+        ], "products", None)
 
     except Exception as e:
         logger.exception("Error in get_products tool")
@@ -313,7 +667,82 @@ def get_products(
 
 
 
+@app.tool()
+@traced_tool
+@captured_tool
+def get_sales_summary(
+    group_by: Optional[List[str]] = None,
+    grain: str = "total",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    region: Optional[str] = None,
+    product_category: Optional[str] = None,
+    limit: int = 100,
+    approximate: bool = False,
+    max_relative_error: float = MAX_RELATIVE_ERROR
+) -> dict:
+    """
+    Retrieve aggregated sales metrics: revenue, quantity, line_count and
+    order_count, and avg_order_value (revenue per order).
+
+    Prefer this tool over get_orders for questions about totals, rankings or
+    trends (e.g. "revenue by customer", "monthly orders per region",
+    "top product categories"). Supports:
+
+    - group_by: any of 'customer_id', 'region', 'product_id', 'product_category'
+    - grain: 'day', 'month' or 'total' (default)
+    - start_date / end_date: restrict to an order date range (YYYY-MM-DD)
+    - customer_id, product_id, region, product_category: filters
+    - limit: maximum number of rows to return (default: 100)
+    - approximate: estimate from a sample of orders, much faster on large
+      date ranges; each metric, avg_order_value included, then has a
+      <metric>_error 95% bound
+    - max_relative_error: with approximate, the widest acceptable revenue
+      bound relative to its estimate (default: 0.05); wider bounds fall back
+      to exact figures
+
+    Returns {"source": ..., "rows": [...]}, rows sorted by period then revenue,
+    plus "approximate" and "sample_fraction" when the rows are estimates.
+    """
+    try:
+        request = SummaryRequest(
+            group_by=group_by or [],
+            grain=grain,
+            start_date=start_date,
+            end_date=end_date,
+            customer_id=customer_id,
+            product_id=product_id,
+            region=region,
+            product_category=product_category,
+            limit=limit,
+        )
+        if approximate:
+            request.validate()
+            sql, params = approximate_summary_sql(request, SAMPLE_PERCENT)
+            fraction = sample_fraction(SAMPLE_PERCENT)
+            estimated = approximate_summary_rows(run_dbquery(sql, params), request, fraction, max_relative_error)
+            # Otherwise the sample is too small for the requested precision
+            if estimated is not None:
+                return {"source": "sample", "rows": estimated, "approximate": True, "sample_fraction": fraction}
+
+        sql, params, source = rollup_catalog.plan_summary(request)
+        rows = [with_averages(row) for row in run_dbquery(sql, params)]
+        return {"source": source, "rows": rows}
+
+    except Exception as e:
+        logger.exception("Error in get_sales_summary tool")
+        return {"error": str(e)}
+
+
 if __name__ == "__main__":
     logger.info("Starting the FastMCP Sales...")
     logger.info(f"Service name: {environ.get('SERVICE_NAME', 'unknown')}")   
-    app.run(transport="streamable-http")
+    # Load customers/products into memory in the background and keep them fresh
+    dimension_cache.start()
+    warmup.start()
+    try:
+        app.run(transport="streamable-http")
+    finally:
+        dimension_cache.stop()
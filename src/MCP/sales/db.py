@@ -1,26 +1,135 @@
 # db.py
-from databricks import sql
 from os import environ
 from dotenv import load_dotenv
 from typing import Any, Dict, List, Tuple
+from contextlib import contextmanager
+from tracing import tracer
+from resilience import FaultInjector, Resilience
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
 
 # Load .env variables
 load_dotenv()
 
+# Maximum number of open warehouse connections (and concurrent queries) per process
+DB_POOL_SIZE = int(environ.get("DB_POOL_SIZE", 8))
+
+# "databricks", or "sqlite" to run against a local copy of the tables (SQLITE_PATH)
+DB_BACKEND = environ.get("DB_BACKEND", "databricks")
+
+# Fault injection for resilience testing, e.g. "error=0.05,slow=0.02,slow_seconds=3" (see resilience.py)
+DB_FAULTS = environ.get("DB_FAULTS")
+
 def get_connection():
     """
     Returns a Databricks SQL connection using environment variables.
     """
+    if DB_BACKEND == "sqlite":
+        from sqlite_backend import connect
+        return connect(environ.get("SQLITE_PATH", "sales.db"))
+
+    from databricks import sql
     return sql.connect(
         server_hostname=environ.get("DATABRICKS_SERVER"),
         http_path=environ.get("DATABRICKS_HTTP_PATH"),
         access_token=environ.get("DATABRICKS_TOKEN")
     )
 
+
+class ConnectionPool:
+    """
+    Keeps Databricks connections open between queries so each request does not
+    pay the connection handshake. At most `size` connections are checked out
+    at once; callers wait for a free slot beyond that.
+    """
+
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with tracer.start_as_current_span("db.pool_wait") as span:
+            self._slots.acquire()
+            try:
+                conn = self._idle.get_nowait()
+                span.set_attribute("db.pool.reused", True)
+            except queue.Empty:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    self._slots.release()
+                    raise
+                span.set_attribute("db.pool.reused", False)
+
+        try:
+            yield conn
+        except Exception:
+            # The connection may be in an unknown state; do not hand it out again
+            _close_quietly(conn)
+            conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def prewarm(self, count: int) -> int:
+        """
+        Opens up to `count` connections concurrently and leaves them idle in
+        the pool, so the first queries do not pay the handshake. Returns how
+        many were opened; raises if none could be.
+        """
+        slots = 0
+        while slots < count and self._slots.acquire(blocking=False):
+            slots += 1
+        if not slots:
+            return 0
+        try:
+            with ThreadPoolExecutor(max_workers=slots) as executor:
+                futures = [executor.submit(self._factory) for _ in range(slots)]
+            opened = [f.result() for f in futures if f.exception() is None]
+            for conn in opened:
+                self._idle.put(conn)
+            if not opened:
+                futures[0].result()
+            return len(opened)
+        finally:
+            for _ in range(slots):
+                self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+pool = ConnectionPool(
+    FaultInjector.from_spec(DB_FAULTS).wrap(get_connection) if DB_FAULTS else get_connection, DB_POOL_SIZE
+)
+
+# Retries transient failures, hedges slow reads and trips a circuit breaker
+resilience = Resilience(max_workers=2 * DB_POOL_SIZE)
+
+
 def run_dbquery(query: str, params: Dict[str, Any] = {}) -> List[Tuple]:
     """
     Executes a SQL query with optional named parameters and returns all rows.
 
+    Transient warehouse failures are retried and slow reads may be hedged
+    (resilience.py); WarehouseUnavailableError is raised when that fails.
+
     Args:
         query: SQL query string using optional named parameters e.g. %(param)s
         params: Dictionary of parameter values, e.g. {'customer_id': 42}
@@ -28,8 +137,16 @@ def run_dbquery(query: str, params: Dict[str, Any] = {}) -> List[Tuple]:
     Returns:
         List of tuples representing rows.
     """
-    with get_connection() as conn:
+    return resilience.run(_execute, query, params)
+
+
+def _execute(query: str, params: Dict[str, Any]) -> List[Tuple]:
+    with pool.connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(query, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with tracer.start_as_current_span("db.execute", attributes={"db.system": "databricks"}):
+                cursor.execute(query, params)
+            with tracer.start_as_current_span("db.fetch") as span:
+                columns = [col[0] for col in cursor.description or []]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                span.set_attribute("db.response.returned_rows", len(rows))
+            return rows
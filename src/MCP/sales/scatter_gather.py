@@ -0,0 +1,150 @@
+# scatter_gather.py
+"""
+Scatter-gather execution of order queries over wide date ranges.
+
+A query for a long `start_date`..`end_date` range with a high limit is one big
+warehouse scan and sort. Instead, the range is split into sub-ranges aligned
+to calendar partitions (ORDER_SCAN_GRANULARITY: day, week, month, quarter or
+year), each sub-range runs as its own query and the results are
+concatenated. Only queries ordered by date (newest or oldest first) are
+split: the sub-ranges are disjoint in date, so they are read in date order
+with up to ORDER_SCAN_CONCURRENCY queries in flight, and once `limit` rows
+have arrived the remaining sub-ranges are cancelled without running.
+
+A query ordered by another key (e.g. order_id) cannot stop early: every
+sub-range would have to return its first `limit` rows before they could be
+merged, which scans more than the single query does. Such queries run as
+one query.
+
+Concurrency is capped by the connection pool size, which is the admission
+limit of the process. Ranges that fall within one partition, or open-ended
+ranges, run as a single query.
+
+Used by get_orders, which returns the newest orders first. The API's /orders
+is ordered by order_id and runs as one query.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import islice
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRANULARITY = environ.get("ORDER_SCAN_GRANULARITY", "month")
+CONCURRENCY = int(environ.get("ORDER_SCAN_CONCURRENCY", 4))
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+# (sql, params) for one inclusive sub-range of order dates
+QueryBuilder = Callable[[date, date], Tuple[str, Dict[str, Any]]]
+
+
+def _next_boundary(day: date, granularity: str) -> date:
+    """First day of the partition after the one containing `day`."""
+    if granularity == "day":
+        return day + timedelta(days=1)
+    if granularity == "week":
+        return day + timedelta(days=7 - day.weekday())
+    months = {"month": 1, "quarter": 3, "year": 12}[granularity]
+    index = day.year * 12 + day.month - 1
+    index = (index // months + 1) * months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_ranges(start: date, end: date, granularity: str = GRANULARITY) -> List[Tuple[date, date]]:
+    """Inclusive (first, last) sub-ranges of start..end aligned to partitions, oldest first."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'; expected one of {GRANULARITIES}")
+    ranges = []
+    first = start
+    while first <= end:
+        following = _next_boundary(first, granularity)
+        last = min(end, following - timedelta(days=1))
+        ranges.append((first, last))
+        first = following
+    return ranges
+
+
+def as_date(value) -> Optional[date]:
+    if value is None or value == "" or isinstance(value, date):
+        return value or None
+    return date.fromisoformat(str(value))
+
+
+class ScatterGather:
+    """
+    Runs a date-ordered query over partition-aligned date sub-ranges
+    concurrently.
+
+    `run_query(sql, params)` is the db module's query function; `pool_size`
+    is the number of warehouse connections the process may use at once.
+    """
+
+    def __init__(
+        self,
+        run_query: Callable[[str, Dict[str, Any]], List[Any]],
+        pool_size: int,
+        granularity: str = GRANULARITY,
+        concurrency: int = CONCURRENCY,
+    ):
+        self._run_query = run_query
+        self.granularity = granularity
+        self.concurrency = max(1, min(concurrency, pool_size))
+
+    def plan(self, start_date, end_date) -> Optional[List[Tuple[date, date]]]:
+        """The sub-ranges to run, or None if the range should run as a single query."""
+        start_date, end_date = as_date(start_date), as_date(end_date)
+        if start_date is None or end_date is None or self.concurrency < 2:
+            return None
+        ranges = partition_ranges(start_date, end_date, self.granularity)
+        return ranges if len(ranges) > 1 else None
+
+    def run(
+        self,
+        build_query: QueryBuilder,
+        ranges: List[Tuple[date, date]],
+        limit: int,
+        date_order: str,
+    ) -> List[Any]:
+        """
+        Args:
+            build_query: returns (sql, params) for one sub-range; the SQL must
+                apply the same ORDER BY and LIMIT as the single query.
+            ranges: sub-ranges from `plan`, oldest first.
+            limit: rows to return.
+            date_order: "asc" or "desc", the order date direction of the
+                query's ORDER BY; sub-ranges are read in that order.
+        """
+        if date_order not in ("asc", "desc"):
+            raise ValueError(f"Unknown date_order '{date_order}'; expected 'asc' or 'desc'")
+        ordered = list(reversed(ranges)) if date_order == "desc" else list(ranges)
+        return self._run_in_order(build_query, ordered, limit)
+
+    def _submit(self, executor, build_query: QueryBuilder, sub_range: Tuple[date, date]):
+        sql, params = build_query(*sub_range)
+        # Keep the caller's trace context so sub-query spans nest under the request
+        return executor.submit(contextvars.copy_context().run, self._run_query, sql, params)
+
+    def _run_in_order(self, build_query: QueryBuilder, ranges, limit: int) -> List[Any]:
+        rows: List[Any] = []
+        pending = iter(ranges)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            futures = [self._submit(executor, build_query, r) for r in islice(pending, self.concurrency)]
+            completed = 0
+            while futures:
+                rows.extend(futures.pop(0).result())
+                completed += 1
+                if len(rows) >= limit:
+                    break
+                following = next(pending, None)
+                if following is not None:
+                    futures.append(self._submit(executor, build_query, following))
+        finally:
+            # Sub-ranges that have not started are not needed any more
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.debug("Read %s of %s date partitions for %s rows", completed, len(ranges), len(rows))
+        return rows[:limit]
@@ -0,0 +1,55 @@
+# tests/conftest.py
+"""
+The MCP server tests run offline: db.py uses the SQLite backend
+(sqlite_backend.py) on a copy of data/sales_data.csv loaded by
+scripts/sales_bulk_load.py, so no warehouse is needed.
+
+Run from src/MCP/sales: python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(MCP_DIR)))
+NOTEBOOKS_DIR = os.path.join(REPO_DIR, "src", "Notebooks")
+sys.path[:0] = [MCP_DIR, os.path.join(REPO_DIR, "src", "shared"), os.path.join(REPO_DIR, "scripts")]
+
+# Read when db.py is imported; the tests must never reach a real warehouse
+os.environ["DB_BACKEND"] = "sqlite"
+
+SALES_CSV = os.path.join(REPO_DIR, "data", "sales_data.csv")
+
+
+def notebook_module(name: str):
+    """
+    Imports src/Notebooks/<name>.py as notebook_<name>; several Notebooks
+    modules share their names with the server's, so the directory is only
+    searched after the server's for the modules they import.
+    """
+    if NOTEBOOKS_DIR not in sys.path:
+        sys.path.append(NOTEBOOKS_DIR)
+    spec = importlib.util.spec_from_file_location(f"notebook_{name}", os.path.join(NOTEBOOKS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def sales_db(tmp_path_factory):
+    from sales_bulk_load import SalesBulkLoader, SqliteSink
+
+    path = str(tmp_path_factory.mktemp("db") / "sales.db")
+    SalesBulkLoader(SALES_CSV, SqliteSink(path)).load()
+    os.environ["SQLITE_PATH"] = path
+    return path
+
+
+@pytest.fixture(scope="session")
+def server(sales_db):
+    """The FastMCP server of app.py."""
+    import app
+
+    return app.app
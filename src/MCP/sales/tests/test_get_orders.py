@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def tools(server):
+    import app
+
+    return app
+
+
+@pytest.mark.parametrize("limit", [0, -1, 500_001])
+def test_limits_beyond_the_spill_cap_are_rejected(tools, monkeypatch, limit):
+    queries = []
+    monkeypatch.setattr(tools, "run_dbquery", lambda sql, params: queries.append(sql) or [])
+    (result,) = tools.get_orders(limit=limit)
+    assert "limit must be between 1 and 500000" in result["error"]
+    assert queries == []
+
+
+def test_large_results_are_spilled(tools, monkeypatch):
+    monkeypatch.setattr(tools, "SPILL_ROWS", 10)
+    (handle,) = tools.get_orders(limit=50)
+    assert handle["row_count"] == 50
+    assert handle["artifact_id"]
+
+
+def test_lines_with_unknown_customers_or_products_are_left_out(tools, monkeypatch):
+    from dimensions import DIMENSIONS, DimensionCache
+
+    known = {"customers": {1: "Contoso"}, "products": {7: "Widget"}}
+
+    def run_query(sql, params):
+        name = "customers" if "FROM customers" in sql else "products"
+        columns = DIMENSIONS[name]["columns"]
+        return [
+            tuple(key if c == columns[0] else known[name][key] if c.endswith("_name") else None for c in columns)
+            for key in params.values() if key in known[name]
+        ]
+
+    lines = [
+        {"order_id": 1, "customer_id": 1, "product_id": 7},
+        {"order_id": 2, "customer_id": 2, "product_id": 7},
+        {"order_id": 3, "customer_id": 1, "product_id": 8},
+    ]
+    monkeypatch.setattr(tools, "dimension_cache", DimensionCache(run_query, enabled=False))
+    monkeypatch.setattr(tools, "run_dbquery", lambda sql, params: [dict(line) for line in lines])
+
+    rows = tools.get_orders()
+    assert [(r["order_id"], r["customer_name"], r["product_name"]) for r in rows] == [(1, "Contoso", "Widget")]
+    # Also without the name columns
+    assert [r["order_id"] for r in tools.get_orders(expand=[])] == [1]
@@ -0,0 +1,56 @@
+from datetime import date
+import threading
+
+import pytest
+
+from scatter_gather import ScatterGather, partition_ranges
+
+
+class FakeWarehouse:
+    """run_query answering each sub-range query with `rows_per_range` rows of its first date."""
+
+    def __init__(self, rows_per_range):
+        self.rows_per_range = rows_per_range
+        self.queried = []
+        self._lock = threading.Lock()
+
+    def run_query(self, sql, params):
+        with self._lock:
+            self.queried.append(params["start_date"])
+        return [(params["start_date"], i) for i in range(self.rows_per_range)]
+
+
+def build_query(first, last):
+    return "SELECT ... ORDER BY o.order_date DESC LIMIT %(limit)s", {"start_date": first, "end_date": last}
+
+
+def test_partition_ranges():
+    assert partition_ranges(date(2024, 11, 15), date(2025, 2, 3)) == [
+        (date(2024, 11, 15), date(2024, 11, 30)),
+        (date(2024, 12, 1), date(2024, 12, 31)),
+        (date(2025, 1, 1), date(2025, 1, 31)),
+        (date(2025, 2, 1), date(2025, 2, 3)),
+    ]
+
+
+@pytest.mark.parametrize("date_order", ["desc", "asc"])
+def test_date_ordered_queries_stop_early(date_order):
+    warehouse = FakeWarehouse(rows_per_range=10)
+    scatter_gather = ScatterGather(warehouse.run_query, pool_size=2, concurrency=2)
+    ranges = scatter_gather.plan(date(2024, 1, 1), date(2024, 12, 31))
+    assert len(ranges) == 12
+
+    rows = scatter_gather.run(build_query, ranges, limit=25, date_order=date_order)
+    months = [r[0].month for r in rows]
+    expected = [12, 11, 10] if date_order == "desc" else [1, 2, 3]
+    assert months == [m for m in expected for _ in range(10)][:25]
+    # Three partitions fill the limit; at most `concurrency` more were already running
+    assert len(warehouse.queried) <= 5
+
+
+def test_only_date_ordered_queries_are_split():
+    scatter_gather = ScatterGather(FakeWarehouse(1).run_query, pool_size=2)
+    ranges = scatter_gather.plan(date(2024, 1, 1), date(2024, 12, 31))
+    with pytest.raises(ValueError):
+        scatter_gather.run(build_query, ranges, limit=10, date_order="order_id")
+
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def tools(server):
+    import app
+
+    return app
+
+
+@pytest.mark.parametrize("call", [
+    lambda app: app.get_customers(limit=3),
+    lambda app: app.get_customers(customer_ids=[0, 1]),
+    lambda app: app.get_products(limit=3),
+    lambda app: app.get_products(product_ids=[0]),
+    lambda app: app.get_customer_overview(customer_ids=[0, 1]),
+], ids=["customers", "customer_lookup", "products", "product_lookup", "customer_overview"])
+def test_dimension_tools_report_data_staleness(tools, call):
+    assert tools.dimension_cache.wait_loaded(30)
+    result = call(tools)
+    assert result["rows"]
+    assert 0 <= result["data_staleness_seconds"] < tools.dimension_cache.max_staleness_seconds
+
+
+def test_warehouse_reads_are_not_stale(tools, monkeypatch):
+    # Without a servable cached table the tool queries the warehouse
+    monkeypatch.setattr(tools.dimension_cache, "table", lambda name: None)
+    result = tools.get_products(limit=3)
+    assert len(result["rows"]) == 3
+    assert result["data_staleness_seconds"] == 0.0
+
+
+def test_product_category_reports_data_staleness(tools):
+    assert tools.dimension_cache.wait_loaded(30)
+    result = tools.get_product_category("Brakng")
+    assert result["resolved_category"] == "Braking"
+    assert result["data_staleness_seconds"] >= 0
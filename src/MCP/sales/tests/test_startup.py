@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import MCP_DIR
+
+IMPORT_APP = """
+import json, threading
+import app
+print(json.dumps(sorted(t.name for t in threading.enumerate())))
+"""
+
+
+def test_importing_the_server_starts_no_background_threads(sales_db):
+    # In a fresh interpreter: the tests' own tool calls start the dimension cache lazily
+    env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=sales_db)
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP], cwd=MCP_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    threads = json.loads(result.stdout.splitlines()[-1])
+    assert not {"dimension-cache", "warmup"} & set(threads), threads
+
+
+def test_warmup_waits_for_server_startup(server):
+    import app
+
+    assert app.warmup.status()["status"] == "starting"
+    assert not app.warmup.ready
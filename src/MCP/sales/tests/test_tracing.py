@@ -0,0 +1,68 @@
+import json
+
+import anyio
+from mcp import types
+from mcp.shared.memory import create_connected_server_and_client_session
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+import pytest
+
+from conftest import notebook_module
+
+STALE_TRACEPARENT = "00-11111111111111111111111111111111-2222222222222222-01"
+
+
+@pytest.fixture
+def exporter(server):
+    # app.py installed the SDK tracer provider on import
+    exporter = InMemorySpanExporter()
+    trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(exporter))
+    yield exporter
+    exporter.shutdown()
+
+
+@pytest.fixture(scope="module")
+def instrumented_client():
+    notebook_module("tracing").instrument_mcp_client()
+
+
+def call_tool(server, name, arguments, meta=None):
+    """Calls a tool as the agent would, from inside an agent span; returns (result, agent span)."""
+    request = types.ClientRequest(types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(
+            name=name, arguments=arguments, _meta=types.RequestParams.Meta(**(meta or {})),
+        ),
+    ))
+
+    async def run():
+        async with create_connected_server_and_client_session(server._mcp_server) as session:
+            with trace.get_tracer("tests").start_as_current_span("agent") as agent:
+                return await session.send_request(request, types.CallToolResult), agent
+
+    return anyio.run(run)
+
+
+def ancestors(span, spans_by_id):
+    while span.parent is not None and span.parent.span_id in spans_by_id:
+        span = spans_by_id[span.parent.span_id]
+        yield span
+
+
+@pytest.mark.parametrize("meta", [{}, {"traceparent": STALE_TRACEPARENT}], ids=["no_meta", "stale_traceparent"])
+def test_db_spans_nest_under_the_agent_span(server, exporter, instrumented_client, meta):
+    result, agent = call_tool(server, "get_sales_summary", {"group_by": ["region"]}, meta)
+    assert not result.isError
+    assert "rows" in json.loads(result.content[0].text)
+
+    spans = [s for s in exporter.get_finished_spans() if s.context.trace_id == agent.context.trace_id]
+    by_id = {s.context.span_id: s for s in spans}
+    (tool,) = [s for s in spans if s.name == "execute_tool get_sales_summary"]
+    assert tool.kind == trace.SpanKind.SERVER
+    assert tool.parent.span_id == agent.context.span_id
+
+    db_spans = [s for s in spans if s.name.startswith("db.")]
+    assert {"db.pool_wait", "db.execute", "db.fetch"} <= {s.name for s in db_spans}
+    for span in db_spans:
+        assert tool in ancestors(span, by_id), span.name
@@ -0,0 +1,92 @@
+# tracing.py
+from opentelemetry import context, trace
+from opentelemetry.propagate import extract
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.semconv.attributes.service_attributes import SERVICE_NAME
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from functools import wraps
+from os import environ
+from typing import Dict
+
+tracer = trace.get_tracer("sales.mcp")
+
+_TRACE_KEYS = ("traceparent", "tracestate")
+
+
+def set_up_tracing(service_name: str = "sales-mcp"):
+    """
+    Installs a tracer provider exporting to Application Insights when
+    APPLICATIONINSIGHTS_CONNECTION_STRING is set.
+    """
+    tracer_provider = TracerProvider(resource=Resource.create({SERVICE_NAME: service_name}))
+
+    connection_string = environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING")
+    if connection_string:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorTraceExporter
+        tracer_provider.add_span_processor(
+            BatchSpanProcessor(AzureMonitorTraceExporter(connection_string=connection_string))
+        )
+
+    trace.set_tracer_provider(tracer_provider)
+
+
+def _trace_carrier() -> Dict[str, str]:
+    """
+    Reads the caller's W3C trace context for the tool call being handled.
+
+    The client places `traceparent`/`tracestate` in the request `_meta`
+    (see Notebooks/tracing.py); the HTTP headers of the streamable-HTTP
+    request are used as a fallback.
+    """
+    try:
+        from mcp.server.lowlevel.server import request_ctx
+        request_context = request_ctx.get()
+    except (ImportError, LookupError):
+        return {}
+
+    carrier = {}
+    meta = request_context.meta
+    if meta is not None:
+        extra = meta.model_extra or {}
+        carrier = {key: extra[key] for key in _TRACE_KEYS if key in extra}
+
+    request = getattr(request_context, "request", None)
+    if not carrier and request is not None:
+        carrier = {key: request.headers[key] for key in _TRACE_KEYS if key in request.headers}
+
+    return carrier
+
+
+def traced_tool(func):
+    """
+    Wraps a tool handler in a server span parented to the calling agent's span.
+    Apply it below `@app.tool()` so FastMCP still sees the original signature.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = context.attach(extract(_trace_carrier()))
+        try:
+            with tracer.start_as_current_span(
+                f"execute_tool {func.__name__}",
+                kind=SpanKind.SERVER,
+                attributes={"gen_ai.tool.name": func.__name__},
+            ) as span:
+                result = func(*args, **kwargs)
+                # Tools report failures as error payloads rather than raising
+                if _is_error_payload(result):
+                    span.set_status(Status(StatusCode.ERROR))
+                return result
+        finally:
+            context.detach(token)
+
+    return wrapper
+
+
+def _is_error_payload(result) -> bool:
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and len(result) == 1 and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
@@ -0,0 +1,87 @@
+############# Telemetry overhead benchmark ###########
+#
+# Measures the per-request cost of each telemetry profile in telemetry_config.py.
+# A simulated request opens a root span with a few child spans (mirroring an
+# agent invocation with tool calls) and emits log records. Spans are exported
+# to a null exporter, so the numbers isolate the SDK overhead (sampling,
+# recording, batching) from network cost.
+#
+#   python bench_telemetry.py --requests 20000
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import NoOpTracerProvider, Status, StatusCode
+from telemetry_config import PROFILES, build_sampler, build_span_processor
+import argparse
+import logging
+import time
+
+
+class _NullSpanExporter(SpanExporter):
+    def __init__(self):
+        self.exported = 0
+
+    def export(self, spans):
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _simulate_request(tracer, logger, index: int, child_spans: int, error_every: int):
+    with tracer.start_as_current_span("invoke_agent") as root:
+        root.set_attribute("gen_ai.operation.name", "invoke_agent")
+        for i in range(child_spans):
+            with tracer.start_as_current_span("execute_tool") as span:
+                span.set_attribute("gen_ai.tool.name", f"tool_{i}")
+                span.set_attribute("db.rows", 100)
+                logger.info("tool %s completed", i)
+        if error_every and index % error_every == 0:
+            root.set_status(Status(StatusCode.ERROR))
+
+
+def _run(name: str, tracer_provider, exporter, requests: int, child_spans: int, error_every: int, log_level: int):
+    tracer = tracer_provider.get_tracer("bench")
+    logger = logging.getLogger("semantic_kernel.bench")
+    logger.setLevel(log_level)
+
+    start = time.perf_counter()
+    for i in range(requests):
+        _simulate_request(tracer, logger, i, child_spans, error_every)
+    elapsed = time.perf_counter() - start
+
+    if hasattr(tracer_provider, "force_flush"):
+        tracer_provider.force_flush()
+    exported = exporter.exported if exporter else 0
+
+    print(f"{name:<10} {elapsed / requests * 1e6:>10.1f} us/request {exported:>10} spans exported")
+
+    if hasattr(tracer_provider, "shutdown"):
+        tracer_provider.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-request overhead of each telemetry profile.")
+    parser.add_argument("--requests", type=int, default=10000, help="Number of simulated requests per profile.")
+    parser.add_argument("--child-spans", type=int, default=5, help="Child spans per request.")
+    parser.add_argument("--error-every", type=int, default=100, help="Mark every Nth request as an error (0 disables).")
+    args = parser.parse_args()
+
+    # Records are created and discarded by a null handler, so logging cost is measured without I/O
+    logging.getLogger("semantic_kernel").addHandler(logging.NullHandler())
+    logging.getLogger("semantic_kernel").propagate = False
+
+    print(f"{'profile':<10} {'overhead':>10} {'':<10} {'exported':>10}")
+    _run("disabled", NoOpTracerProvider(), None, args.requests, args.child_spans, args.error_every, logging.WARNING)
+
+    for name, config in PROFILES.items():
+        exporter = _NullSpanExporter()
+        tracer_provider = TracerProvider(resource=Resource.create({}), sampler=build_sampler(config))
+        tracer_provider.add_span_processor(build_span_processor(exporter, config))
+        _run(name, tracer_provider, exporter, args.requests, args.child_spans, args.error_every, config.log_level)
+
+
+if __name__ == "__main__":
+    main()
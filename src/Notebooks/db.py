@@ -3,6 +3,11 @@ from databricks import sql
 from os import environ
 from dotenv import load_dotenv
 from typing import Any, Dict, List, Tuple
+from metrics import get_metrics
+from opentelemetry import trace
+import time
+
+tracer = trace.get_tracer("sales.notebooks")
 
 # Load .env variables
 load_dotenv()
@@ -28,8 +33,17 @@ def run_dbquery(query: str, params: Dict[str, Any] = {}) -> List[Tuple]:
     Returns:
         List of tuples representing rows.
     """
-    with get_connection() as conn:
+    start = time.perf_counter()
+    with tracer.start_as_current_span("db.connect"):
+        conn = get_connection()
+    with conn:
         with conn.cursor() as cursor:
-            cursor.execute(query, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            with tracer.start_as_current_span("db.execute", attributes={"db.system": "databricks"}):
+                cursor.execute(query, params)
+            with tracer.start_as_current_span("db.fetch") as span:
+                columns = [col[0] for col in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                span.set_attribute("db.response.returned_rows", len(rows))
+
+    get_metrics().record_query((time.perf_counter() - start) * 1000, rows)
+    return rows
@@ -3,13 +3,30 @@ import json
 from dotenv import load_dotenv
 from os import environ
 from semantic_kernel.contents import ChatHistory 
+from typing import Union
+from evaluation_runner import EvaluationRecord, EvaluationRunner, context_from_history
+from grounding_check import NumericGroundingEvaluator, tool_results_from_history
 
 
 load_dotenv(override=True)
 
 
+# How groundedness is scored:
+#   "llm"         - GroundednessEvaluator only (one LLM call)
+#   "local_first" - the local numeric check decides when the response makes enough
+#                   checkable claims; otherwise fall back to GroundednessEvaluator
+#   "local"       - the local numeric check only, no LLM call; a response without
+#                   checkable figures is reported as not evaluated (score None)
+GROUNDEDNESS_MODES = ("llm", "local_first", "local")
+
+
 class Evaluation:
-    def __init__(self):
+    def __init__(self, groundedness_mode: str = "llm", min_local_claims: int = 3):
+        if groundedness_mode not in GROUNDEDNESS_MODES:
+            raise ValueError(f"Unknown groundedness mode: {groundedness_mode}")
+        self.groundedness_mode = groundedness_mode
+        self.min_local_claims = min_local_claims
+        self.numeric_grounding_evaluator = NumericGroundingEvaluator()
 
         model_config = {
             "azure_endpoint": environ["AZURE_OPENAI_ENDPOINT"],
@@ -23,37 +40,54 @@ class Evaluation:
         self.relevance_evaluator = RelevanceEvaluator(model_config=model_config)
 
 
-    def __get_conext_from_history(self, history:ChatHistory):
-        context = ""
-        for message in history.messages:
-            if message.role != "assistant":
-                continue
-            context += message.content + "\n"
-        return context
-
-    def evaluate(self, user_query: str, response: str, history:ChatHistory):
-        context = self.__get_conext_from_history(history)
-        return self.evaluate(user_query, response, context)
-
-    def evaluate(self, user_query: str, response: str, context: str):
-        groundedness_result = self.groundedness_evaluator(
-            query=user_query,
-            response=response,
-            context=context
-        )
-        coherence_result = self.coherence_evaluator(
-            query=user_query,
-            response=response,
-            context=context
-        )
-
-        relevance_result = self.relevance_evaluator(
-            query=user_query,
-            response=response
-        )
-
+    def evaluators(self):
+        """
+        Returns the evaluators keyed by metric name, each callable as
+        evaluator(query=..., response=..., context=...) for EvaluationRunner.
+        """
         return {
-            "groundedness": groundedness_result,
-            "coherence": coherence_result,
-            "relevance": relevance_result
-        }
\ No newline at end of file
+            "groundedness": self.groundedness_evaluator,
+            "coherence": self.coherence_evaluator,
+            # Relevance is judged from the query and response only
+            "relevance": lambda query, response, context: self.relevance_evaluator(
+                query=query, response=response
+            ),
+        }
+
+    def evaluate(self, user_query: str, response: str, context: Union[str, ChatHistory, list]):
+        """
+        Scores a single response. `context` is either the grounding text or the
+        ChatHistory (or its messages) whose assistant messages provide it. The
+        LLM evaluators run concurrently.
+        """
+        if isinstance(context, str):
+            tool_results = [context]
+        else:
+            tool_results = tool_results_from_history(context)
+            context = context_from_history(context)
+
+        evaluators = self.evaluators()
+        local_groundedness = None
+
+        if self.groundedness_mode != "llm":
+            local = self.numeric_grounding_evaluator(response=response, tool_results=tool_results)
+            if self.groundedness_mode == "local" or local["claims"] >= max(1, self.min_local_claims):
+                local_groundedness = _as_groundedness(local)
+                del evaluators["groundedness"]
+
+        runner = EvaluationRunner(evaluators, max_concurrency=3)
+        results = runner.evaluate_one(EvaluationRecord(query=user_query, response=response, context=context))
+        if local_groundedness is not None:
+            results["groundedness"] = local_groundedness
+        return results
+
+
+def _as_groundedness(local: dict) -> dict:
+    """Maps the local 0-1 numeric grounding score onto the evaluator's 1-5 scale (None if not evaluated)."""
+    score = None if local["numeric_grounding"] is None else 1 + 4 * local["numeric_grounding"]
+    return {
+        "groundedness": score,
+        "groundedness_result": local["numeric_grounding_result"],
+        "groundedness_source": "local",
+        **local,
+    }
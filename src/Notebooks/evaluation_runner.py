@@ -0,0 +1,226 @@
+############# Batched evaluation of agent responses ###########
+#
+# Scores a dataset of (query, response, context) records with a set of
+# evaluators. Evaluator calls run concurrently with bounded parallelism, scores
+# are cached by content hash so reruns only pay for new or changed records,
+# and results are streamed to JSONL as each record completes.
+#
+# Evaluators are plain callables `evaluator(query=..., response=..., context=...)`
+# returning a dict, so the Azure AI evaluators from `Evaluation.evaluators()`
+# can be swapped for stubs when running offline.
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+Evaluator = Callable[..., Dict[str, Any]]
+
+
+@dataclass
+class EvaluationRecord:
+    query: str
+    response: str
+    context: str = ""
+    id: Optional[str] = None
+
+    @classmethod
+    def from_history(cls, query: str, response: str, history, id: Optional[str] = None) -> "EvaluationRecord":
+        return cls(query=query, response=response, context=context_from_history(history), id=id)
+
+
+@dataclass
+class EvaluationSummary:
+    records: int = 0
+    evaluator_calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    wall_clock_seconds: float = 0.0
+    metrics: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def context_from_history(history) -> str:
+    """
+    Concatenates the assistant messages of a ChatHistory (or a list of its
+    messages) into a grounding context. Messages without text content (e.g.
+    tool calls) are skipped.
+    """
+    messages = getattr(history, "messages", history)
+    context = ""
+    for message in messages:
+        if message.role != "assistant" or not message.content:
+            continue
+        context += message.content + "\n"
+    return context
+
+
+def load_records(path: str) -> List[EvaluationRecord]:
+    """Reads records from a JSONL file with query, response and optional context/id fields."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            records.append(EvaluationRecord(
+                query=item["query"],
+                response=item["response"],
+                context=item.get("context", ""),
+                id=item.get("id"),
+            ))
+    return records
+
+
+def content_hash(evaluator_name: str, record: EvaluationRecord) -> str:
+    digest = hashlib.sha256()
+    for part in (evaluator_name, record.query, record.response, record.context):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """Append-only JSONL cache of evaluator results keyed by content hash."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._scores: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._scores[entry["key"]] = entry["result"]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._scores.get(key)
+
+    def put(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._scores[key] = result
+            if self._path:
+                with open(self._path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "result": result}, default=str) + "\n")
+
+
+class EvaluationRunner:
+    def __init__(
+        self,
+        evaluators: Dict[str, Evaluator],
+        max_concurrency: int = 4,
+        cache_path: Optional[str] = None,
+    ):
+        self._evaluators = evaluators
+        self._max_concurrency = max_concurrency
+        self._cache = ScoreCache(cache_path)
+
+    def evaluate_one(self, record: EvaluationRecord) -> Dict[str, Dict[str, Any]]:
+        """Scores a single record, running its evaluators concurrently; raises if an evaluator fails."""
+        results, _ = self._run([record], output_path=None, raise_errors=True)
+        return results[0]
+
+    def run(self, records: Iterable[EvaluationRecord], output_path: Optional[str] = None) -> EvaluationSummary:
+        """
+        Scores every record and returns aggregate metrics. When `output_path` is
+        given, one JSON line per record is written as soon as it is complete.
+        A failing evaluator call is counted in `errors` and recorded as
+        {"error": ...} in that record's scores, so one failure does not stop
+        the run.
+        """
+        _, summary = self._run(list(records), output_path)
+        return summary
+
+    def _run(self, records: List[EvaluationRecord], output_path: Optional[str], raise_errors: bool = False):
+        start = time.perf_counter()
+        summary = EvaluationSummary(records=len(records))
+        results: List[Dict[str, Dict[str, Any]]] = [{} for _ in records]
+        pending = [len(self._evaluators) for _ in records]
+        output = open(output_path, "w", encoding="utf-8") if output_path else None
+
+        def complete(index: int, name: str, result: Dict[str, Any]):
+            results[index][name] = result
+            pending[index] -= 1
+            if pending[index] == 0 and output:
+                record = records[index]
+                output.write(json.dumps({
+                    "id": record.id if record.id is not None else index,
+                    "query": record.query,
+                    "scores": results[index],
+                }, default=str) + "\n")
+                output.flush()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self._max_concurrency) as executor:
+                futures = {}
+                for index, record in enumerate(records):
+                    for name, evaluator in self._evaluators.items():
+                        key = content_hash(name, record)
+                        cached = self._cache.get(key)
+                        if cached is not None:
+                            summary.cache_hits += 1
+                            complete(index, name, cached)
+                            continue
+                        future = executor.submit(
+                            evaluator, query=record.query, response=record.response, context=record.context
+                        )
+                        futures[future] = (index, name, key)
+
+                for future in as_completed(futures):
+                    index, name, key = futures[future]
+                    summary.evaluator_calls += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if raise_errors:
+                            raise
+                        summary.errors += 1
+                        complete(index, name, {"error": str(e)})
+                        continue
+                    self._cache.put(key, result)
+                    complete(index, name, result)
+        finally:
+            if output:
+                output.close()
+
+        summary.metrics = aggregate_metrics(results, self._evaluators.keys())
+        summary.wall_clock_seconds = time.perf_counter() - start
+        return results, summary
+
+
+def aggregate_metrics(results: List[Dict[str, Dict[str, Any]]], names: Iterable[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Computes mean/min/max of each evaluator's score and, when the evaluator
+    reports a "<name>_result" of pass/fail, the pass rate.
+    """
+    metrics = {}
+    for name in names:
+        scores = []
+        passed = 0
+        judged = 0
+        for record_results in results:
+            result = record_results.get(name) or {}
+            score = result.get(name)
+            if isinstance(score, (int, float)):
+                scores.append(float(score))
+            verdict = result.get(f"{name}_result")
+            if verdict in ("pass", "fail"):
+                judged += 1
+                passed += verdict == "pass"
+
+        entry: Dict[str, float] = {"count": len(scores)}
+        if scores:
+            entry.update(mean=sum(scores) / len(scores), min=min(scores), max=max(scores))
+        if judged:
+            entry["pass_rate"] = passed / judged
+        metrics[name] = entry
+    return metrics
@@ -0,0 +1,368 @@
+############# Local numeric grounding check ###########
+#
+# A deterministic, rule-based alternative to the LLM GroundednessEvaluator for
+# the common case where an agent answer is mostly figures taken from tool
+# output. Dollar amounts, counts, percentages, dates, IDs and names are
+# extracted from the response and looked up in the tool results captured in
+# the ChatHistory, including aggregates recomputed from the returned rows
+# (totals, averages, per-customer/product/region sums and shares).
+#
+# Figures are matched by kind: a percentage only against ratio columns
+# (discounts, rates, shares) and recomputed shares, a currency amount only
+# against amount columns (revenue, prices, totals, costs), so "5% discount"
+# is not supported by a quantity of 5.
+#
+# No network calls are made. Building the evidence dominates: with 100 result
+# rows of 11 columns it takes 2-4 ms, while checking a ten-figure response
+# against it takes about 0.1 ms. The evaluator keeps the evidence of recent
+# tool results (keyed by their hash), so scoring several responses, runs or
+# metrics over the same conversation builds it once.
+#
+# A response without any checkable figure is not evaluated: its score is
+# None and its result "not_evaluated", rather than a pass.
+
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import ast
+import hashlib
+import json
+import re
+import threading
+
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "b": 1e9, "billion": 1e9}
+
+_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_ID_RE = re.compile(
+    r"\b(order|customer|product|line)(?:[ _]?(?:id|number|no\.?))?\s*[:#]?\s*(\d+)\b",
+    re.IGNORECASE,
+)
+_NUMBER_RE = re.compile(
+    r"(?P<currency>[$€£])?\s?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?:\s?(?P<suffix>[kKmMbB]\b|thousand\b|million\b|billion\b))?"
+    r"(?P<percent>\s?%)?"
+)
+_NAME_RE = re.compile(r"\b([A-Z][A-Za-z0-9&\-]*(?:\s+[A-Z][A-Za-z0-9&\-]*)*)\b")
+_RAW_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_RAW_PERCENT_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s?%")
+
+# Column names whose values are ratios (quoted as percentages) or amounts of money
+_RATIO_COLUMN_RE = re.compile(r"discount|rate|ratio|share|margin|pct|percent", re.IGNORECASE)
+_AMOUNT_COLUMN_RE = re.compile(r"revenue|price|total|cost|amount|spend|monetary|sales|value", re.IGNORECASE)
+
+# Kinds of figures, each looked up in its own evidence
+PERCENT, AMOUNT, NUMBER = "percent", "amount", "number"
+
+_ID_COLUMNS = {
+    "order": ("order_id",),
+    "customer": ("customer_id",),
+    "product": ("product_id",),
+    "line": ("order_line_id",),
+}
+
+# Words that start sentences or headings and are never entity names
+_NAME_STOPWORDS = {
+    "the", "a", "an", "in", "on", "for", "of", "and", "or", "to", "this", "that", "these",
+    "total", "top", "order", "orders", "customer", "customers", "product", "products",
+    "revenue", "sales", "region", "quantity", "price", "unit", "discount", "average",
+    "here", "based", "summary", "analysis", "note", "overall", "key", "insights", "id",
+}
+
+
+class Evidence:
+    """
+    Values available in the tool results, prepared for fast lookups. Numbers
+    are kept per kind: PERCENT (ratio columns as percentages, shares), AMOUNT
+    (amount columns and their aggregates) and NUMBER (everything that is not
+    a percentage, amounts included).
+    """
+
+    def __init__(self):
+        self.numbers: Dict[str, List[float]] = {PERCENT: [], AMOUNT: [], NUMBER: []}
+        self.strings: Set[str] = set()
+        self.ids: Dict[str, Set[str]] = defaultdict(set)
+
+    def finalize(self):
+        self.numbers = {kind: sorted(set(values)) for kind, values in self.numbers.items()}
+
+    def has_number(self, value: float, decimals: int, rel_tolerance: float, kind: str = NUMBER) -> bool:
+        numbers = self.numbers[kind]
+        tolerance = max(0.5 * 10 ** -decimals, abs(value) * rel_tolerance)
+        index = bisect_left(numbers, value - tolerance)
+        return index < len(numbers) and numbers[index] <= value + tolerance
+
+
+def tool_results_from_history(history) -> List[Any]:
+    """Returns the payload of every tool result in a ChatHistory (or list of its messages)."""
+    payloads = []
+    for message in getattr(history, "messages", history):
+        if message.role != "tool":
+            continue
+        found = False
+        for item in getattr(message, "items", []) or []:
+            if hasattr(item, "result"):
+                payloads.append(item.result)
+                found = True
+        if not found and message.content:
+            payloads.append(message.content)
+    return payloads
+
+
+def _parse_payload(payload: Any) -> Tuple[List[Dict[str, Any]], str]:
+    """Returns (rows, raw_text) for a tool payload in any of the shapes we see."""
+    if isinstance(payload, (list, dict)):
+        data = payload
+    else:
+        text = str(payload)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            try:
+                data = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return [], text
+    if isinstance(data, dict) and "rows" in data:
+        # {"rows": ..., "source"/"data_staleness_seconds": ...} tool results; lookups key rows by ID
+        data = data["rows"]
+        if isinstance(data, dict):
+            data = list(data.values())
+    if isinstance(data, dict):
+        data = [data]
+    rows = [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+    return rows, "" if rows else str(payload)
+
+
+def _payloads_key(payloads: Iterable[Any]) -> str:
+    digest = hashlib.sha256()
+    for payload in payloads:
+        text = payload if isinstance(payload, str) else json.dumps(payload, sort_keys=True, default=str)
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_evidence(payloads: Iterable[Any]) -> Evidence:
+    evidence = Evidence()
+    all_rows: List[Dict[str, Any]] = []
+
+    for payload in payloads:
+        rows, raw = _parse_payload(payload)
+        all_rows.extend(rows)
+        if raw:
+            # Unstructured text does not say what a number is, except for percentages
+            values = [float(n) for n in _RAW_NUMBER_RE.findall(raw)]
+            evidence.numbers[NUMBER].extend(values)
+            evidence.numbers[AMOUNT].extend(values)
+            evidence.numbers[PERCENT].extend(float(n) for n in _RAW_PERCENT_RE.findall(raw))
+            evidence.strings.update(s.lower() for s in _DATE_RE.findall(raw))
+
+    _add_rows(evidence, all_rows)
+    evidence.finalize()
+    return evidence
+
+
+def _add_rows(evidence: Evidence, rows: List[Dict[str, Any]]):
+    if not rows:
+        return
+
+    numeric_columns: Dict[str, List[float]] = defaultdict(list)
+    string_columns: Dict[str, List[str]] = defaultdict(list)
+
+    for row in rows:
+        for column, value in row.items():
+            if isinstance(value, bool) or value is None:
+                continue
+            if isinstance(value, (int, float)):
+                if column.endswith("_id"):
+                    evidence.ids[column].add(str(value))
+                    string_columns[column].append(str(value))
+                else:
+                    numeric_columns[column].append(float(value))
+            else:
+                text = str(value)
+                evidence.strings.add(text.lower())
+                string_columns[column].append(text)
+
+    numbers, percents, amounts = evidence.numbers[NUMBER], evidence.numbers[PERCENT], evidence.numbers[AMOUNT]
+    numbers.append(float(len(rows)))
+
+    # Line revenue when the rows carry quantity and price but no total
+    if "quantity" in numeric_columns and "unit_price" in numeric_columns \
+            and len(numeric_columns["quantity"]) == len(numeric_columns["unit_price"]):
+        numeric_columns["_quantity_x_price"] = [
+            q * p for q, p in zip(numeric_columns["quantity"], numeric_columns["unit_price"])
+        ]
+
+    for column, values in numeric_columns.items():
+        total = sum(values)
+        aggregates = [*values, total, total / len(values), min(values), max(values)]
+        if _RATIO_COLUMN_RE.search(column):
+            # Fractions such as discounts are quoted as percentages
+            scale = 100 if all(abs(v) <= 1 for v in values) else 1
+            percents.extend(v * scale for v in aggregates)
+            continue
+        numbers.extend(aggregates)
+        if _AMOUNT_COLUMN_RE.search(column) or column == "_quantity_x_price":
+            amounts.extend(aggregates)
+
+    for column, values in string_columns.items():
+        distinct = set(values)
+        numbers.append(float(len(distinct)))
+
+    # Per-group aggregates: e.g. revenue per customer_name, quantity per region
+    for group_column, keys in string_columns.items():
+        if len(keys) != len(rows):
+            continue
+        for value_column, values in numeric_columns.items():
+            if len(values) != len(rows) or _RATIO_COLUMN_RE.search(value_column):
+                continue
+            is_amount = _AMOUNT_COLUMN_RE.search(value_column) or value_column == "_quantity_x_price"
+            sums: Dict[str, float] = defaultdict(float)
+            counts: Dict[str, int] = defaultdict(int)
+            for key, value in zip(keys, values):
+                sums[key] += value
+                counts[key] += 1
+            grand_total = sum(sums.values())
+            for key, group_sum in sums.items():
+                numbers.extend((group_sum, group_sum / counts[key]))
+                if is_amount:
+                    amounts.extend((group_sum, group_sum / counts[key]))
+                if grand_total:
+                    percents.append(group_sum / grand_total * 100)
+        counts = [float(c) for c in _group_counts(keys, string_columns.get("order_id"))]
+        numbers.extend(counts)
+        # Shares of rows or orders per group
+        percents.extend(c / len(rows) * 100 for c in counts)
+
+
+def _group_counts(keys: List[str], order_ids: Optional[List[str]]) -> Iterable[int]:
+    """Rows per group and, when available, distinct orders per group."""
+    rows_per_group: Dict[str, int] = defaultdict(int)
+    orders_per_group: Dict[str, Set[str]] = defaultdict(set)
+    for i, key in enumerate(keys):
+        rows_per_group[key] += 1
+        if order_ids is not None:
+            orders_per_group[key].add(order_ids[i])
+    yield from rows_per_group.values()
+    yield from (len(ids) for ids in orders_per_group.values())
+
+
+class NumericGroundingEvaluator:
+    """
+    Scores the fraction of figures, dates, IDs and names in a response that are
+    supported by tool output. Callable like the Azure AI evaluators, so it can
+    be used with EvaluationRunner or in place of GroundednessEvaluator.
+
+    `context` may be tool output text, or pass `tool_results` (payloads) /
+    `history` (a ChatHistory) directly.
+    """
+
+    def __init__(self, threshold: float = 0.8, rel_tolerance: float = 0.005, min_number: float = 10,
+                 evidence_cache_size: int = 128):
+        self.threshold = threshold
+        self.rel_tolerance = rel_tolerance
+        # Integers at or below this value ("top 5", list numbering) are not treated as claims
+        self.min_number = min_number
+        self.evidence_cache_size = evidence_cache_size
+        # Evidence by hash of the tool results, least recently used first
+        self._evidence: "OrderedDict[str, Evidence]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(
+        self,
+        *,
+        response: str,
+        query: Optional[str] = None,
+        context: Optional[str] = None,
+        tool_results: Optional[List[Any]] = None,
+        history=None,
+    ) -> Dict[str, Any]:
+        if tool_results is None:
+            tool_results = tool_results_from_history(history) if history is not None else [context or ""]
+        return self.check(response, self.evidence(tool_results))
+
+    def evidence(self, tool_results: List[Any]) -> Evidence:
+        """The evidence of `tool_results`, built once per distinct set of payloads."""
+        key = _payloads_key(tool_results)
+        with self._lock:
+            evidence = self._evidence.get(key)
+            if evidence is not None:
+                self._evidence.move_to_end(key)
+                return evidence
+        evidence = build_evidence(tool_results)
+        with self._lock:
+            self._evidence[key] = evidence
+            while len(self._evidence) > self.evidence_cache_size:
+                self._evidence.popitem(last=False)
+        return evidence
+
+    def check(self, response: str, evidence: Evidence) -> Dict[str, Any]:
+        supported = 0
+        unsupported: List[str] = []
+
+        def claim(ok: bool, text: str):
+            nonlocal supported
+            if ok:
+                supported += 1
+            else:
+                unsupported.append(text)
+
+        # Spans already consumed by dates and IDs are not re-read as numbers
+        consumed: List[Tuple[int, int]] = []
+
+        for match in _DATE_RE.finditer(response):
+            consumed.append(match.span())
+            claim(match.group(1).lower() in evidence.strings, match.group(0))
+
+        for match in _ID_RE.finditer(response):
+            consumed.append(match.span(2))
+            kind, value = match.group(1).lower(), match.group(2)
+            columns = _ID_COLUMNS[kind]
+            known = any(value in evidence.ids.get(c, ()) for c in columns)
+            claim(known, match.group(0))
+
+        for match in _NUMBER_RE.finditer(response):
+            start, end = match.span("number")
+            if any(s <= start < e for s, e in consumed):
+                continue
+            text = match.group("number").replace(",", "")
+            value = float(text)
+            decimals = len(text.split(".")[1]) if "." in text else 0
+            is_currency = match.group("currency") is not None
+            is_percent = match.group("percent") is not None
+            suffix = (match.group("suffix") or "").lower()
+            if suffix:
+                value *= _MULTIPLIERS[suffix]
+                decimals -= len(str(int(_MULTIPLIERS[suffix]))) - 1
+            if not is_currency and not suffix and not is_percent \
+                    and decimals == 0 and value <= self.min_number:
+                continue
+            kind = PERCENT if is_percent else AMOUNT if is_currency else NUMBER
+            claim(evidence.has_number(value, decimals, self.rel_tolerance, kind), match.group(0).strip())
+
+        numeric_claims = supported + len(unsupported)
+        # Nothing to check is not evidence of grounding
+        score = supported / numeric_claims if numeric_claims else None
+        if score is None:
+            result = "not_evaluated"
+        else:
+            result = "pass" if score >= self.threshold else "fail"
+
+        names = [
+            n for n in _NAME_RE.findall(response)
+            if n.lower() not in _NAME_STOPWORDS and not n.isdigit()
+        ]
+        name_hits = sum(1 for n in names if n.lower() in evidence.strings)
+
+        return {
+            "numeric_grounding": score,
+            "numeric_grounding_result": result,
+            "numeric_grounding_threshold": self.threshold,
+            "claims": numeric_claims,
+            "supported_claims": supported,
+            "unsupported_claims": unsupported,
+            # Names are reported separately: capitalised phrases are a noisy signal
+            "names_checked": len(names),
+            "names_supported": name_hits,
+        }
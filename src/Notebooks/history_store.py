@@ -5,6 +5,7 @@ import uuid
 import os
 
 from dotenv import load_dotenv
+from metrics import get_metrics
 
 
 load_dotenv(override=True)
@@ -34,18 +35,19 @@ class CosmosChatHistoryStore:
         chat_history = ChatHistory()
         query = "SELECT * FROM c WHERE c.sessionid = @sid"
         params = [{"name": "@sid", "value": session_id}]
-        results = self._container.query_items(query, parameters=params)
+        with get_metrics().time_history("load"):
+            results = self._container.query_items(query, parameters=params)
 
-        async for item in results:
-            role = item.get("role")
-            if role == "user":
-                chat_history.add_user_message(item["message"])
-            elif role == "assistant":
-                chat_history.add_assistant_message(item["message"])
-            elif role == "system":
-                chat_history.add_system_message(item["message"])
-            elif role == "tool":
-                chat_history.add_tool_message(item["message"])
+            async for item in results:
+                role = item.get("role")
+                if role == "user":
+                    chat_history.add_user_message(item["message"])
+                elif role == "assistant":
+                    chat_history.add_assistant_message(item["message"])
+                elif role == "system":
+                    chat_history.add_system_message(item["message"])
+                elif role == "tool":
+                    chat_history.add_tool_message(item["message"])
         return chat_history
 
     async def add_message(
@@ -82,5 +84,6 @@ class CosmosChatHistoryStore:
             "function_name": function_name,
             "Timestamp": datetime.utcnow().isoformat()
         }
-        await self._container.create_item(item)
+        with get_metrics().time_history("add_message"):
+            await self._container.create_item(item)
        
\ No newline at end of file
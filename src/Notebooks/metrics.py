@@ -0,0 +1,207 @@
+############# Project performance metrics ###########
+#
+# `tracing.set_up_metrics` drops every instrument that is not emitted by
+# Semantic Kernel. The instruments defined here are kept alongside them so we
+# can record our own latency and payload histograms for the data layer,
+# the chat history store and the agent tools.
+
+from opentelemetry.metrics import get_meter, set_meter_provider
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import time
+
+
+METER_NAME = "sales_agents"
+
+# Instrument names. Every project instrument lives under the "sales." prefix so
+# a single view pattern can keep them when everything else is dropped.
+DB_QUERY_DURATION = "sales.db.query.duration"
+DB_QUERY_ROWS = "sales.db.query.rows"
+DB_QUERY_BYTES = "sales.db.query.bytes"
+HISTORY_OPERATION_DURATION = "sales.history.operation.duration"
+TOOL_TOKENS = "sales.tool.tokens"
+CACHE_REQUESTS = "sales.cache.requests"
+
+# Explicit histogram bucket boundaries. The SDK defaults are tuned for
+# request latencies in seconds and are far too coarse for our values.
+LATENCY_MS_BUCKETS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+ROW_COUNT_BUCKETS = [0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 1000000]
+BYTE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864]
+TOKEN_BUCKETS = [50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000]
+
+_HISTOGRAM_BUCKETS = {
+    DB_QUERY_DURATION: LATENCY_MS_BUCKETS,
+    DB_QUERY_ROWS: ROW_COUNT_BUCKETS,
+    DB_QUERY_BYTES: BYTE_BUCKETS,
+    HISTORY_OPERATION_DURATION: LATENCY_MS_BUCKETS,
+    TOOL_TOKENS: TOKEN_BUCKETS,
+}
+
+# Rough characters-per-token ratio for English/JSON payloads.
+CHARS_PER_TOKEN = 4
+
+# Number of rows used to extrapolate the size of a result set.
+_SIZE_SAMPLE_ROWS = 32
+
+
+def project_views() -> List[View]:
+    """
+    Returns the views that keep the project instruments, with explicit
+    histogram bucket boundaries for each histogram.
+    """
+    views = [
+        View(
+            instrument_name=name,
+            aggregation=ExplicitBucketHistogramAggregation(boundaries=boundaries),
+        )
+        for name, boundaries in _HISTOGRAM_BUCKETS.items()
+    ]
+    # Counters keep their default (sum) aggregation
+    views.append(View(instrument_name=CACHE_REQUESTS))
+    return views
+
+
+class SalesMetrics:
+    """Holds the project instruments created from a meter."""
+
+    def __init__(self, meter=None):
+        meter = meter or get_meter(METER_NAME)
+
+        self.query_duration = meter.create_histogram(
+            DB_QUERY_DURATION, unit="ms", description="Databricks SQL query duration"
+        )
+        self.query_rows = meter.create_histogram(
+            DB_QUERY_ROWS, unit="{row}", description="Rows returned by a Databricks SQL query"
+        )
+        self.query_bytes = meter.create_histogram(
+            DB_QUERY_BYTES, unit="By", description="Estimated size of a query result set"
+        )
+        self.history_duration = meter.create_histogram(
+            HISTORY_OPERATION_DURATION, unit="ms", description="Chat history store operation duration"
+        )
+        self.tool_tokens = meter.create_histogram(
+            TOOL_TOKENS, unit="{token}", description="Estimated tokens in a tool result payload"
+        )
+        self.cache_requests = meter.create_counter(
+            CACHE_REQUESTS, unit="{request}", description="Dimension cache lookups by result (hit/miss)"
+        )
+
+    def record_query(self, duration_ms: float, rows: List[Any], attributes: Optional[Dict[str, Any]] = None):
+        self.query_duration.record(duration_ms, attributes)
+        self.query_rows.record(len(rows), attributes)
+        self.query_bytes.record(estimate_payload_bytes(rows), attributes)
+
+    def record_cache(self, cache: str, hit: bool):
+        self.cache_requests.add(1, {"cache": cache, "result": "hit" if hit else "miss"})
+
+    @contextmanager
+    def time_history(self, operation: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.history_duration.record(
+                (time.perf_counter() - start) * 1000, {"operation": operation}
+            )
+
+
+_metrics: Optional[SalesMetrics] = None
+
+
+def get_metrics() -> SalesMetrics:
+    """
+    Returns the process-wide instruments. They are created lazily so that
+    the meter provider configured by `tracing.set_up_metrics` (or
+    `set_up_local_metrics`) is picked up when it is set before first use.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = SalesMetrics()
+    return _metrics
+
+
+def estimate_payload_bytes(rows: List[Any]) -> int:
+    """
+    Estimates the serialized size of a result set by measuring a sample of
+    rows and extrapolating, so large results are not serialized twice.
+    """
+    if not rows:
+        return 0
+    sample = rows[:_SIZE_SAMPLE_ROWS]
+    sample_bytes = sum(len(repr(r)) for r in sample)
+    return int(sample_bytes * len(rows) / len(sample))
+
+
+def estimate_tokens(payload: Any) -> int:
+    """Estimates the number of model tokens a tool payload will consume."""
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    return len(text) // CHARS_PER_TOKEN
+
+
+def record_tool_payload(tool_name: str):
+    """
+    Decorator recording the estimated token count of a tool's return value.
+    Apply it below `@kernel_function` so the function signature is preserved.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            get_metrics().tool_tokens.record(estimate_tokens(result), {"tool": tool_name})
+            return result
+        return wrapper
+    return decorator
+
+
+def set_up_local_metrics(resource=None) -> InMemoryMetricReader:
+    """
+    Installs a meter provider that keeps the project and Semantic Kernel
+    instruments in memory, for inspecting metrics offline without an
+    Application Insights connection. Use `snapshot` to read the values.
+    """
+    from tracing import resource as default_resource, metric_views
+
+    reader = InMemoryMetricReader()
+    meter_provider = MeterProvider(
+        metric_readers=[reader],
+        resource=resource or default_resource,
+        views=metric_views(),
+    )
+    set_meter_provider(meter_provider)
+    return reader
+
+
+def snapshot(reader: InMemoryMetricReader) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Collects the current metric values from an in-memory reader and returns
+    them as plain dictionaries keyed by instrument name.
+    """
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    data = reader.get_metrics_data()
+    if data is None:
+        return result
+
+    for resource_metrics in data.resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points = result.setdefault(metric.name, [])
+                for point in metric.data.data_points:
+                    entry = {"attributes": dict(point.attributes or {})}
+                    if hasattr(point, "bucket_counts"):
+                        entry.update(
+                            count=point.count,
+                            sum=point.sum,
+                            min=point.min,
+                            max=point.max,
+                            boundaries=list(point.explicit_bounds),
+                            bucket_counts=list(point.bucket_counts),
+                        )
+                    else:
+                        entry["value"] = point.value
+                    points.append(entry)
+    return result
@@ -0,0 +1,262 @@
+############# Telemetry configuration ###########
+#
+# Controls how much telemetry `tracing.set_up_all` produces. The "full" profile
+# matches the original behaviour (every trace, INFO logs, 5 second metric
+# export). The "lean" profile is meant for production load: head-based ratio
+# sampling, a tail-style rule that still keeps whole traces with a slow or
+# failing span, larger export batches and less frequent metric export.
+
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags, get_current_span
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from os import environ
+from typing import Dict, List, Optional
+import logging
+import threading
+
+
+@dataclass(frozen=True)
+class TelemetryConfig:
+    # Tracing
+    sample_ratio: float = 1.0
+    # Tail-style rule: traces dropped by the head sampler are still exported,
+    # whole, when one of their spans is slower than this threshold or ends
+    # with an error.
+    keep_slow_ms: Optional[float] = None
+    keep_errors: bool = False
+
+    # Batch processors (spans and log records)
+    max_queue_size: int = 2048
+    max_export_batch_size: int = 512
+    schedule_delay_millis: int = 5000
+
+    # Metrics
+    metric_export_interval_millis: int = 5000
+
+    # Logging
+    log_level: int = logging.INFO
+    # Attach the export handler to the root logger (and set its level), or
+    # only to the "semantic_kernel" logger hierarchy.
+    log_to_root: bool = True
+
+    @property
+    def tail_sampling(self) -> bool:
+        return self.keep_slow_ms is not None or self.keep_errors
+
+
+PROFILES = {
+    "full": TelemetryConfig(),
+    "lean": TelemetryConfig(
+        sample_ratio=0.1,
+        keep_slow_ms=2000,
+        keep_errors=True,
+        max_queue_size=8192,
+        max_export_batch_size=1024,
+        schedule_delay_millis=10000,
+        metric_export_interval_millis=60000,
+        log_level=logging.WARNING,
+        log_to_root=False,
+    ),
+}
+
+
+def get_profile(name: str) -> TelemetryConfig:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown telemetry profile: {name}. Expected one of {sorted(PROFILES)}")
+
+
+def config_from_env() -> TelemetryConfig:
+    """
+    Builds a configuration from TELEMETRY_PROFILE (default "full"), with
+    individual settings overridable through environment variables.
+    """
+    config = get_profile(environ.get("TELEMETRY_PROFILE", "full"))
+    overrides = {}
+
+    if "TELEMETRY_SAMPLE_RATIO" in environ:
+        overrides["sample_ratio"] = float(environ["TELEMETRY_SAMPLE_RATIO"])
+    if "TELEMETRY_KEEP_SLOW_MS" in environ:
+        overrides["keep_slow_ms"] = float(environ["TELEMETRY_KEEP_SLOW_MS"])
+    if "TELEMETRY_KEEP_ERRORS" in environ:
+        overrides["keep_errors"] = environ["TELEMETRY_KEEP_ERRORS"].lower() == "true"
+    if "TELEMETRY_MAX_QUEUE_SIZE" in environ:
+        overrides["max_queue_size"] = int(environ["TELEMETRY_MAX_QUEUE_SIZE"])
+    if "TELEMETRY_MAX_EXPORT_BATCH_SIZE" in environ:
+        overrides["max_export_batch_size"] = int(environ["TELEMETRY_MAX_EXPORT_BATCH_SIZE"])
+    if "TELEMETRY_METRIC_EXPORT_INTERVAL_MS" in environ:
+        overrides["metric_export_interval_millis"] = int(environ["TELEMETRY_METRIC_EXPORT_INTERVAL_MS"])
+
+    return replace(config, **overrides)
+
+
+class _RecordOnlySampler(Sampler):
+    """Records the span (so processors see it) without marking it sampled."""
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        parent_state = get_current_span(parent_context).get_span_context().trace_state
+        return SamplingResult(Decision.RECORD_ONLY, attributes, parent_state)
+
+    def get_description(self) -> str:
+        return "RecordOnlySampler"
+
+
+class _RatioOrRecordOnlySampler(Sampler):
+    """
+    Head-based ratio sampler that records, instead of dropping, the traces it
+    does not select so the tail rule can still keep their slow or failing spans.
+    """
+
+    def __init__(self, ratio: float):
+        self._ratio_sampler = TraceIdRatioBased(ratio)
+        self._record_only = _RecordOnlySampler()
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        result = self._ratio_sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        if result.decision == Decision.DROP:
+            return self._record_only.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return f"RatioOrRecordOnly{{{self._ratio_sampler.rate}}}"
+
+
+def build_sampler(config: TelemetryConfig) -> Sampler:
+    if not config.tail_sampling:
+        return ParentBased(root=TraceIdRatioBased(config.sample_ratio))
+
+    record_only = _RecordOnlySampler()
+    return ParentBased(
+        root=_RatioOrRecordOnlySampler(config.sample_ratio),
+        remote_parent_not_sampled=record_only,
+        local_parent_not_sampled=record_only,
+    )
+
+
+class TailKeepSpanProcessor(SpanProcessor):
+    """
+    Forwards sampled spans to the wrapped processor, plus every span of an
+    unsampled trace in which a span was slower than `keep_slow_ms` or ended
+    with an error status.
+
+    Spans of unsampled traces are buffered per trace until the local root
+    span (no parent, or a remote one) ends, and then forwarded or dropped
+    together. Spans that end after their kept root are forwarded directly.
+    At most `max_traces` traces are buffered (the oldest is dropped first),
+    with at most `max_spans_per_trace` spans each.
+    """
+
+    def __init__(self, delegate: SpanProcessor, keep_slow_ms: Optional[float], keep_errors: bool,
+                 max_traces: int = 2048, max_spans_per_trace: int = 512):
+        self._delegate = delegate
+        self._keep_slow_ns = None if keep_slow_ms is None else int(keep_slow_ms * 1_000_000)
+        self._keep_errors = keep_errors
+        self._max_traces = max_traces
+        self._max_spans_per_trace = max_spans_per_trace
+        self._lock = threading.Lock()
+        # trace_id -> ended spans, and the rule that keeps the trace (if any yet)
+        self._buffers: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._rules: Dict[int, str] = {}
+        # trace_id -> rule, for traces already kept whose late spans are forwarded
+        self._kept: "OrderedDict[int, str]" = OrderedDict()
+
+    def on_start(self, span, parent_context=None):
+        if span.context.trace_flags.sampled:
+            self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        if span.context.trace_flags.sampled:
+            self._delegate.on_end(span)
+            return
+
+        trace_id = span.context.trace_id
+        rule = self._rule(span)
+        local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            kept_rule = self._kept.get(trace_id)
+            if kept_rule is not None:
+                spans = [span]
+            elif not local_root:
+                buffer = self._buffers.get(trace_id)
+                if buffer is None:
+                    buffer = self._buffers[trace_id] = []
+                    if len(self._buffers) > self._max_traces:
+                        oldest, _ = self._buffers.popitem(last=False)
+                        self._rules.pop(oldest, None)
+                if len(buffer) < self._max_spans_per_trace:
+                    buffer.append(span)
+                if rule:
+                    self._rules.setdefault(trace_id, rule)
+                return
+            else:
+                # The local root ended: the trace is complete
+                spans = self._buffers.pop(trace_id, []) + [span]
+                kept_rule = self._rules.pop(trace_id, rule)
+                if kept_rule is None:
+                    return
+                self._kept[trace_id] = kept_rule
+                if len(self._kept) > self._max_traces:
+                    self._kept.popitem(last=False)
+
+        for kept_span in spans:
+            self._delegate.on_end(_as_sampled(kept_span, kept_rule))
+
+    def _rule(self, span: ReadableSpan) -> Optional[str]:
+        if self._keep_errors and span.status.status_code == StatusCode.ERROR:
+            return "error"
+        if self._keep_slow_ns is not None and span.end_time - span.start_time >= self._keep_slow_ns:
+            return "slow"
+        return None
+
+    def shutdown(self):
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+
+def _as_sampled(span: ReadableSpan, rule: str) -> ReadableSpan:
+    context = span.context
+    sampled_context = SpanContext(
+        trace_id=context.trace_id,
+        span_id=context.span_id,
+        is_remote=context.is_remote,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        trace_state=context.trace_state,
+    )
+    return ReadableSpan(
+        name=span.name,
+        context=sampled_context,
+        parent=span.parent,
+        resource=span.resource,
+        attributes={**(span.attributes or {}), "sampling.tail_rule": rule},
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+def build_span_processor(exporter, config: TelemetryConfig) -> SpanProcessor:
+    processor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=config.max_queue_size,
+        max_export_batch_size=config.max_export_batch_size,
+        schedule_delay_millis=config.schedule_delay_millis,
+    )
+    if config.tail_sampling:
+        return TailKeepSpanProcessor(processor, config.keep_slow_ms, config.keep_errors)
+    return processor
@@ -0,0 +1,12 @@
+# tests/conftest.py
+"""
+Tests of the notebook helpers that run offline, without Azure AI or a
+warehouse (evaluators and tool results are stubs).
+
+Run from src/Notebooks: python -m pytest tests
+"""
+import os
+import sys
+
+NOTEBOOKS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [NOTEBOOKS_DIR, os.path.join(os.path.dirname(NOTEBOOKS_DIR), "shared")]
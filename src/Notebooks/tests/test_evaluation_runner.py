@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+import json
+import threading
+import time
+
+import pytest
+
+from evaluation_runner import (
+    EvaluationRecord,
+    EvaluationRunner,
+    aggregate_metrics,
+    context_from_history,
+    load_records,
+)
+
+
+class Concurrency:
+    """Counts the evaluator calls running at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.running -= 1
+
+
+class CountingEvaluator:
+    """Scores len(response) % 5 + 1 after `delay` seconds, counting its calls."""
+
+    def __init__(self, name, delay=0.0, concurrency=None):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+        self.concurrency = concurrency or Concurrency()
+        self._lock = threading.Lock()
+
+    def __call__(self, query, response, context):
+        with self._lock:
+            self.calls += 1
+        with self.concurrency:
+            time.sleep(self.delay)
+        score = len(response) % 5 + 1
+        return {self.name: score, f"{self.name}_result": "pass" if score >= 3 else "fail"}
+
+
+def records(count):
+    return [EvaluationRecord(query=f"q{i}", response="r" * i, context="c", id=f"id{i}") for i in range(count)]
+
+
+def test_concurrency_is_bounded():
+    concurrency = Concurrency()
+    evaluators = {
+        name: CountingEvaluator(name, delay=0.02, concurrency=concurrency) for name in ("relevance", "coherence")
+    }
+    summary = EvaluationRunner(evaluators, max_concurrency=3).run(records(12))
+    assert summary.evaluator_calls == 24
+    assert concurrency.peak == 3
+
+
+def test_rerun_hits_the_cache(tmp_path):
+    cache = str(tmp_path / "scores.jsonl")
+    evaluator = CountingEvaluator("relevance")
+    first = EvaluationRunner({"relevance": evaluator}, cache_path=cache).run(records(5))
+    assert (first.evaluator_calls, first.cache_hits) == (5, 0)
+
+    # A new runner reads the cache file; only the changed record is scored again
+    changed = records(5)
+    changed[2].response = "changed"
+    second = EvaluationRunner({"relevance": evaluator}, cache_path=cache).run(changed)
+    assert (second.evaluator_calls, second.cache_hits) == (1, 4)
+    assert evaluator.calls == 6
+    assert second.metrics["relevance"]["count"] == 5
+
+
+def test_results_stream_to_jsonl(tmp_path):
+    output = tmp_path / "results.jsonl"
+    seen_while_running = []
+
+    def slow(query, response, context):
+        # Records finished earlier are already on disk while later ones run
+        if query == "q3":
+            time.sleep(0.1)
+            seen_while_running.append(len(output.read_text().splitlines()))
+        return {"relevance": 4}
+
+    runner = EvaluationRunner({"relevance": slow}, max_concurrency=4)
+    runner.run(records(4), output_path=str(output))
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(line["id"] for line in lines) == ["id0", "id1", "id2", "id3"]
+    assert lines[-1]["id"] == "id3"
+    assert all(line["scores"] == {"relevance": {"relevance": 4}} for line in lines)
+    assert seen_while_running == [3]
+
+
+def test_errors_are_counted_and_not_cached(tmp_path):
+    def failing(query, response, context):
+        if query == "q1":
+            raise RuntimeError("rate limited")
+        return {"relevance": 5}
+
+    runner = EvaluationRunner({"relevance": failing}, cache_path=str(tmp_path / "scores.jsonl"))
+    summary = runner.run(records(3))
+    assert summary.errors == 1
+    assert summary.metrics["relevance"]["count"] == 2
+    assert runner.run(records(3)).cache_hits == 2
+
+
+def test_evaluate_one_raises_evaluator_errors():
+    def failing(query, response, context):
+        raise RuntimeError("rate limited")
+
+    runner = EvaluationRunner({"relevance": CountingEvaluator("relevance"), "fluency": failing})
+    with pytest.raises(RuntimeError, match="rate limited"):
+        runner.evaluate_one(records(1)[0])
+
+
+def test_aggregate_metrics():
+    results = [
+        {"relevance": {"relevance": 5, "relevance_result": "pass"}},
+        {"relevance": {"relevance": 2, "relevance_result": "fail"}},
+        {"relevance": {"error": "timeout"}},
+        {"relevance": {"relevance": 3.5, "relevance_result": "pass"}},
+    ]
+    metrics = aggregate_metrics(results, ["relevance", "groundedness"])
+    assert metrics["relevance"] == {"count": 3, "mean": 3.5, "min": 2.0, "max": 5.0, "pass_rate": 2 / 3}
+    assert metrics["groundedness"] == {"count": 0}
+
+
+def test_summary_metrics_match_the_records():
+    summary = EvaluationRunner({"relevance": CountingEvaluator("relevance")}).run(records(10))
+    scores = [i % 5 + 1 for i in range(10)]
+    assert summary.metrics["relevance"]["mean"] == sum(scores) / 10
+    assert summary.metrics["relevance"]["pass_rate"] == sum(s >= 3 for s in scores) / 10
+
+
+def test_load_records(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    path.write_text('{"query": "q", "response": "r"}\n\n{"query": "q2", "response": "r2", "context": "c", "id": "x"}\n')
+    assert load_records(str(path)) == [
+        EvaluationRecord(query="q", response="r"),
+        EvaluationRecord(query="q2", response="r2", context="c", id="x"),
+    ]
+
+
+def test_context_from_history_skips_messages_without_content():
+    messages = [
+        SimpleNamespace(role="user", content="Top customers?"),
+        SimpleNamespace(role="assistant", content=None),  # a function call
+        SimpleNamespace(role="tool", content='[{"customer_id": 1}]'),
+        SimpleNamespace(role="assistant", content="Customer 1 leads."),
+        SimpleNamespace(role="assistant", content=""),
+    ]
+    assert context_from_history(messages) == "Customer 1 leads.\n"
+    assert context_from_history(SimpleNamespace(messages=messages)) == "Customer 1 leads.\n"
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from grounding_check import NumericGroundingEvaluator
+
+ROWS = [
+    {"order_id": 1001, "customer_id": 3, "order_date": "2025-03-05", "region": "NA",
+     "product_id": 0, "quantity": 5, "unit_price": 40.0, "discount": 0.1, "line_total": 180.0},
+    {"order_id": 1001, "customer_id": 3, "order_date": "2025-03-05", "region": "NA",
+     "product_id": 1, "quantity": 12, "unit_price": 7.5, "discount": 0.0, "line_total": 90.0},
+    {"order_id": 1002, "customer_id": 4, "order_date": "2025-03-06", "region": "EU",
+     "product_id": 2, "quantity": 2, "unit_price": 15.0, "discount": 0.0, "line_total": 30.0},
+]
+
+
+def check(response, rows=ROWS):
+    return NumericGroundingEvaluator()(response=response, tool_results=[json.dumps(rows)])
+
+
+@pytest.mark.parametrize("response", [
+    "Order 1001 got a 10% discount.",
+    "Total revenue was $300.00.",
+    "The average line total was $100.",
+    "NA accounted for 90% of revenue.",
+    "Customer 3 bought 17 units on 2025-03-05.",
+    "Customer 3 placed 2 of the 3 lines, 66.7% of them.",
+])
+def test_supported_claims(response):
+    result = check(response)
+    assert result["unsupported_claims"] == [], result
+    assert result["claims"] > 0
+
+
+@pytest.mark.parametrize("response, claim", [
+    # The quantity 5 and the unit price 7.5 are not discounts
+    ("Order 1001 got a 5% discount.", "5%"),
+    ("Order 1002 got a 7.5% discount.", "7.5%"),
+    # Nor are quantities amounts of money
+    ("The largest quantity was worth $12.", "$12"),
+    ("Revenue was 14% higher.", "14%"),
+    ("Order 1003 shipped on 2025-03-07.", "2025-03-07"),
+])
+def test_unsupported_claims(response, claim):
+    assert claim in " ".join(check(response)["unsupported_claims"])
+
+
+def test_discounts_already_in_percent():
+    rows = [dict(r, discount=r["discount"] * 100) for r in ROWS]
+    assert check("Order 1001 got a 10% discount.", rows)["unsupported_claims"] == []
+
+
+def test_percentages_in_text_results():
+    result = NumericGroundingEvaluator()(
+        response="Returns ran at 4.5% and revenue was 12,400.",
+        tool_results=["Return rate: 4.5%. Revenue: 12400"],
+    )
+    assert result["unsupported_claims"] == []
+
+
+def test_response_without_figures_is_not_evaluated():
+    result = check("Order history looks healthy overall.")
+    assert result["claims"] == 0
+    assert (result["numeric_grounding"], result["numeric_grounding_result"]) == (None, "not_evaluated")
+
+
+def test_evidence_is_built_once_per_tool_results(monkeypatch):
+    import grounding_check
+
+    built = []
+    build_evidence = grounding_check.build_evidence
+    monkeypatch.setattr(grounding_check, "build_evidence", lambda payloads: built.append(1) or build_evidence(payloads))
+
+    evaluator = NumericGroundingEvaluator(evidence_cache_size=2)
+    payload = json.dumps(ROWS)
+    for response in ("Total revenue was $300.00.", "Order 1001 got a 10% discount."):
+        assert evaluator(response=response, tool_results=[payload])["unsupported_claims"] == []
+    assert len(built) == 1
+    evaluator(response="Total revenue was $300.00.", tool_results=[ROWS[:2]])
+    assert len(built) == 2
+
+    # Least recently used evidence is dropped first
+    evaluator(response="Total revenue was $300.00.", tool_results=["a"])
+    evaluator(response="Total revenue was $300.00.", tool_results=["b"])
+    evaluator(response="Total revenue was $300.00.", tool_results=[payload])
+    assert len(built) == 5
+
+
+@pytest.mark.parametrize("payload", [
+    {"rows": ROWS, "data_staleness_seconds": 12.5},
+    {"rows": {str(i): row for i, row in enumerate(ROWS)}, "data_staleness_seconds": 0.0},
+    {"source": "rollup_sales_customer_day", "rows": ROWS},
+], ids=["rows", "lookup", "summary"])
+def test_wrapped_tool_results(payload):
+    result = NumericGroundingEvaluator()(response="Total revenue was $300.00.", tool_results=[json.dumps(payload)])
+    assert (result["claims"], result["unsupported_claims"]) == (1, [])
@@ -0,0 +1,61 @@
+from opentelemetry.metrics import get_meter
+
+import pytest
+
+import metrics
+from dimensions import DimensionCache
+from metrics import (
+    BYTE_BUCKETS, CACHE_REQUESTS, DB_QUERY_BYTES, DB_QUERY_DURATION, DB_QUERY_ROWS, LATENCY_MS_BUCKETS,
+    ROW_COUNT_BUCKETS, TOOL_TOKENS, TOKEN_BUCKETS, get_metrics, set_up_local_metrics, snapshot,
+)
+
+
+@pytest.fixture(scope="module")
+def reader():
+    # The global meter provider can only be set once per process
+    reader = set_up_local_metrics()
+    metrics._metrics = None
+    return reader
+
+
+def test_views_keep_the_project_instruments_with_their_buckets(reader):
+    sales_metrics = get_metrics()
+    sales_metrics.record_query(12.0, [{"order_id": 1}] * 20)
+    sales_metrics.tool_tokens.record(300, {"tool": "get_orders"})
+    get_meter("azure.cosmos").create_counter("cosmos.requests").add(1)
+
+    values = snapshot(reader)
+    assert "cosmos.requests" not in values
+    for name, buckets, value in [
+        (DB_QUERY_DURATION, LATENCY_MS_BUCKETS, 12.0),
+        (DB_QUERY_ROWS, ROW_COUNT_BUCKETS, 20),
+        (TOOL_TOKENS, TOKEN_BUCKETS, 300),
+    ]:
+        (point,) = values[name]
+        assert point["boundaries"] == buckets
+        assert (point["count"], point["sum"]) == (1, value)
+    assert values[DB_QUERY_BYTES][0]["boundaries"] == BYTE_BUCKETS
+
+
+def test_dimension_cache_lookups_are_counted(reader):
+    def run_query(sql, params):
+        if sql.startswith("DESCRIBE HISTORY"):
+            raise RuntimeError("not a Delta table")
+        if "FROM customers" in sql:
+            return [(3, "Contoso", "NA", "Retail", "Ann")]
+        return []
+
+    cache = DimensionCache(run_query, on_lookup=lambda name, hit: get_metrics().record_cache(name, hit))
+    cache.refresh()
+    try:
+        assert cache.get_many("customers", [3])[3]["customer_name"] == "Contoso"
+        # Too stale to serve: the warehouse answers
+        cache.max_staleness_seconds = -1
+        assert cache.get_many("customers", [3])[3]["customer_name"] == "Contoso"
+    finally:
+        cache.stop()
+
+    counts = {
+        (p["attributes"]["cache"], p["attributes"]["result"]): p["value"] for p in snapshot(reader)[CACHE_REQUESTS]
+    }
+    assert counts == {("customers", "miss"): 1, ("customers", "hit"): 1}
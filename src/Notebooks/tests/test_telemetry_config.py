@@ -0,0 +1,111 @@
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import Decision
+from opentelemetry.trace import Status, StatusCode
+
+import pytest
+
+from telemetry_config import TailKeepSpanProcessor, TelemetryConfig, build_sampler
+
+MS = 1_000_000
+# Trace IDs below ratio * 2**64 (in their low 64 bits) are selected by TraceIdRatioBased
+SELECTED_TRACE_ID = 1
+UNSELECTED_TRACE_ID = 2**64 - 1
+
+
+def decision(config, trace_id):
+    return build_sampler(config).should_sample(None, trace_id, "request").decision
+
+
+@pytest.mark.parametrize("config, unselected", [
+    (TelemetryConfig(sample_ratio=0.5), Decision.DROP),
+    (TelemetryConfig(sample_ratio=0.5, keep_errors=True), Decision.RECORD_ONLY),
+    (TelemetryConfig(sample_ratio=0.5, keep_slow_ms=100), Decision.RECORD_ONLY),
+])
+def test_ratio_sampling(config, unselected):
+    assert decision(config, SELECTED_TRACE_ID) == Decision.RECORD_AND_SAMPLE
+    assert decision(config, UNSELECTED_TRACE_ID) == unselected
+
+
+def test_full_profile_samples_everything():
+    assert decision(TelemetryConfig(), UNSELECTED_TRACE_ID) == Decision.RECORD_AND_SAMPLE
+
+
+def tracer_and_exporter(sample_ratio=0.0, **kwargs):
+    config = TelemetryConfig(sample_ratio=sample_ratio, keep_slow_ms=100, keep_errors=True)
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=build_sampler(config))
+    provider.add_span_processor(TailKeepSpanProcessor(
+        SimpleSpanProcessor(exporter), config.keep_slow_ms, config.keep_errors, **kwargs
+    ))
+    return provider.get_tracer("test"), exporter
+
+
+def run_trace(tracer, child_ms=1, child_error=False, late_ms=None):
+    """A root span with a child and a grandchild; `late_ms` adds a child ending after the root."""
+    with tracer.start_as_current_span("request", start_time=0, end_on_exit=False) as root:
+        with tracer.start_as_current_span("tool"):
+            child = tracer.start_span("db.execute", start_time=0)
+            if child_error:
+                child.set_status(Status(StatusCode.ERROR))
+            child.end(end_time=child_ms * MS)
+        late = tracer.start_span("late", start_time=0) if late_ms is not None else None
+    root.end(end_time=5 * MS)
+    if late:
+        late.end(end_time=late_ms * MS)
+
+
+def exported(exporter):
+    return {span.name: span.attributes.get("sampling.tail_rule") for span in exporter.get_finished_spans()}
+
+
+def test_fast_unsampled_traces_are_dropped():
+    tracer, exporter = tracer_and_exporter()
+    run_trace(tracer)
+    assert exported(exporter) == {}
+
+
+@pytest.mark.parametrize("kwargs, rule", [
+    ({"child_error": True}, "error"),
+    ({"child_ms": 250}, "slow"),
+])
+def test_whole_trace_is_kept_by_a_slow_or_failing_span(kwargs, rule):
+    tracer, exporter = tracer_and_exporter()
+    run_trace(tracer, **kwargs)
+    assert exported(exporter) == {"db.execute": rule, "tool": rule, "request": rule}
+    assert all(span.context.trace_flags.sampled for span in exporter.get_finished_spans())
+    assert len({span.context.trace_id for span in exporter.get_finished_spans()}) == 1
+
+
+def test_spans_ending_after_a_kept_root_are_forwarded():
+    tracer, exporter = tracer_and_exporter()
+    run_trace(tracer, child_error=True, late_ms=50)
+    assert exported(exporter)["late"] == "error"
+
+
+def test_sampled_traces_are_forwarded_unchanged():
+    tracer, exporter = tracer_and_exporter(sample_ratio=1.0)
+    run_trace(tracer)
+    assert exported(exporter) == {"db.execute": None, "tool": None, "request": None}
+
+
+def test_buffered_traces_are_bounded():
+    tracer, exporter = tracer_and_exporter(max_traces=1)
+    # Two traces whose roots are still open; the first one's buffer is dropped
+    roots = [tracer.start_span("request", start_time=0) for _ in range(2)]
+    for root in roots:
+        child = tracer.start_span("db.execute", context=_context(root), start_time=0)
+        child.set_status(Status(StatusCode.ERROR))
+        child.end(end_time=MS)
+    for root in roots:
+        root.end(end_time=MS)
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == ["db.execute", "request"]
+    assert {span.context.trace_id for span in spans} == {roots[1].context.trace_id}
+
+
+def _context(span):
+    from opentelemetry.trace import set_span_in_context
+
+    return set_span_in_context(span)
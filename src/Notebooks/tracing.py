@@ -7,12 +7,16 @@ from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.metrics.view import DropAggregation, View
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.semconv.resource import ResourceAttributes
 from opentelemetry.trace import set_tracer_provider
+from opentelemetry.propagate import inject
 from opentelemetry.semconv.attributes.service_attributes import SERVICE_NAME
 
 import logging
+from typing import Optional
+
+from metrics import project_views
+from telemetry_config import TelemetryConfig, build_sampler, build_span_processor, config_from_env
 
 
 from azure.monitor.opentelemetry.exporter import (
@@ -26,57 +30,144 @@ from azure.monitor.opentelemetry.exporter import (
 
 # Create a resource to represent the service/sample
 resource = Resource.create({SERVICE_NAME: "telemetry-application-insights-quickstart"})
-def set_up_all(connection_string:str):
-    set_up_logging(connection_string=connection_string)
-    set_up_tracing(connection_string=connection_string)
-    set_up_metrics(connection_string=connection_string)
-
-def set_up_logging(connection_string:str):
+def set_up_all(connection_string:str, config:Optional[TelemetryConfig]=None):
+    # Defaults to the TELEMETRY_PROFILE environment variable ("full" when unset)
+    config = config or config_from_env()
+    set_up_logging(connection_string=connection_string, config=config)
+    set_up_tracing(connection_string=connection_string, config=config)
+    set_up_metrics(connection_string=connection_string, config=config)
+
+def set_up_logging(connection_string:str, config:Optional[TelemetryConfig]=None):
+    config = config or config_from_env()
     exporter = AzureMonitorLogExporter(connection_string=connection_string)
 
     # Create and set a global logger provider for the application.
     logger_provider = LoggerProvider(resource=resource)
     # Log processors are initialized with an exporter which is responsible
     # for sending the telemetry data to a particular backend.
-    logger_provider.add_log_record_processor(BatchLogRecordProcessor(exporter))
+    logger_provider.add_log_record_processor(BatchLogRecordProcessor(
+        exporter,
+        max_queue_size=config.max_queue_size,
+        max_export_batch_size=config.max_export_batch_size,
+        schedule_delay_millis=config.schedule_delay_millis,
+    ))
     # Sets the global default logger provider
     set_logger_provider(logger_provider)
 
     # Create a logging handler to write logging records, in OTLP format, to the exporter.
-    handler = LoggingHandler()
+    handler = LoggingHandler(level=config.log_level)
     # Add filters to the handler to only process records from semantic_kernel.
     handler.addFilter(logging.Filter("semantic_kernel"))
-    # Attach the handler to the root logger. `getLogger()` with no arguments returns the root logger.
-    # Events from all child loggers will be processed by this handler.
-    logger = logging.getLogger()
+    if config.log_to_root:
+        # Attach the handler to the root logger. `getLogger()` with no arguments returns the root logger.
+        # Events from all child loggers will be processed by this handler.
+        logger = logging.getLogger()
+    else:
+        # Attach only to the semantic_kernel hierarchy so records from other
+        # libraries are never created at this level, let alone filtered.
+        logger = logging.getLogger("semantic_kernel")
     logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(config.log_level)
 
 
-def set_up_tracing(connection_string:str):
+def set_up_tracing(connection_string:str, config:Optional[TelemetryConfig]=None):
+    config = config or config_from_env()
     exporter = AzureMonitorTraceExporter(connection_string=connection_string)
 
     # Initialize a trace provider for the application. This is a factory for creating tracers.
-    tracer_provider = TracerProvider(resource=resource)
+    # The sampler applies head-based ratio sampling (and record-only spans for the tail rule).
+    tracer_provider = TracerProvider(resource=resource, sampler=build_sampler(config))
     # Span processors are initialized with an exporter which is responsible
     # for sending the telemetry data to a particular backend.
-    tracer_provider.add_span_processor(BatchSpanProcessor(exporter))
+    tracer_provider.add_span_processor(build_span_processor(exporter, config))
     # Sets the global default tracer provider
     set_tracer_provider(tracer_provider)
 
 
-def set_up_metrics(connection_string:str):
+def set_up_metrics(connection_string:str, config:Optional[TelemetryConfig]=None):
+    config = config or config_from_env()
     exporter = AzureMonitorMetricExporter(connection_string=connection_string)
 
     # Initialize a metric provider for the application. This is a factory for creating meters.
     meter_provider = MeterProvider(
-        metric_readers=[PeriodicExportingMetricReader(exporter, export_interval_millis=5000)],
+        metric_readers=[PeriodicExportingMetricReader(
+            exporter, export_interval_millis=config.metric_export_interval_millis
+        )],
         resource=resource,
-        views=[
-            # Dropping all instrument names except for those starting with "semantic_kernel"
-            View(instrument_name="*", aggregation=DropAggregation()),
-            View(instrument_name="semantic_kernel*"),
-        ],
+        views=metric_views(),
     )
     # Sets the global default meter provider
-    set_meter_provider(meter_provider)
\ No newline at end of file
+    set_meter_provider(meter_provider)
+
+
+def metric_views():
+    return [
+        # Dropping all instrument names except for those starting with "semantic_kernel"
+        # and the project instruments defined in metrics.py
+        View(instrument_name="*", aggregation=DropAggregation()),
+        View(instrument_name="semantic_kernel*"),
+        *project_views(),
+    ]
+
+
+def trace_headers() -> dict:
+    """Returns the W3C `traceparent`/`tracestate` headers for the current span."""
+    carrier = {}
+    inject(carrier)
+    return carrier
+
+
+async def _inject_trace_context(request):
+    # httpx request hook: runs in the caller's task, so the current span is the tool call
+    inject(request.headers)
+
+
+def traced_http_client(**kwargs):
+    """
+    Returns an httpx.AsyncClient that propagates the current trace context on
+    every request. Pass it to the OpenAPI plugin so the API spans nest under
+    the agent's tool call:
+
+        OpenAPIFunctionExecutionParameters(http_client=traced_http_client(), ...)
+    """
+    import httpx
+
+    event_hooks = kwargs.pop("event_hooks", {})
+    event_hooks.setdefault("request", []).append(_inject_trace_context)
+    return httpx.AsyncClient(event_hooks=event_hooks, **kwargs)
+
+
+_mcp_client_instrumented = False
+
+
+def instrument_mcp_client():
+    """
+    Propagates the current trace context on MCP tool calls.
+
+    The streamable-HTTP transport sends requests from its own background task,
+    where the agent's span is no longer current, so HTTP headers cannot carry
+    it. Instead the `traceparent`/`tracestate` values are added to the
+    `_meta` of each `tools/call` request, which the sales MCP server reads
+    (see MCP/sales/tracing.py). Call once before creating MCP plugins.
+    """
+    global _mcp_client_instrumented
+    if _mcp_client_instrumented:
+        return
+
+    from mcp import types
+    from mcp.client.session import ClientSession
+
+    send_request = ClientSession.send_request
+
+    async def send_request_with_trace_context(self, request, *args, **kwargs):
+        if isinstance(request.root, types.CallToolRequest):
+            carrier = trace_headers()
+            if carrier:
+                params = request.root.params
+                meta = params.meta.model_dump() if params.meta is not None else {}
+                # The current context replaces any trace context already in _meta
+                params.meta = types.RequestParams.Meta(**{**meta, **carrier})
+        return await send_request(self, request, *args, **kwargs)
+
+    ClientSession.send_request = send_request_with_trace_context
+    _mcp_client_instrumented = True
@@ -1,29 +1,110 @@
 ############# Plugins User by Semantic Kernel ###########
 
+# Modules shared with the API and the MCP server live in src/shared
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
 from semantic_kernel.functions import kernel_function
 from typing import Annotated
-from typing import List, Optional,Annotated
+from typing import Dict, List, Optional, Union, Annotated
 from db import run_dbquery  
+from metrics import get_metrics, record_tool_payload
+from dimensions import DimensionCache, closest_value
+from sampling import sample_clause, sample_fraction
+from lookups import keyed, lookup_dimension, order_lookup_sql, parse_ids
+from opentelemetry import trace
 from os import environ
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# Loaded in the background on first use; until then tools query the warehouse.
+# Lookups are counted as hits or misses (sales.cache.requests).
+dimension_cache = DimensionCache(
+    run_dbquery,
+    enabled=environ.get("DIMENSION_CACHE_ENABLED", "true").lower() == "true",
+    on_lookup=lambda name, hit: get_metrics().record_cache(name, hit),
+)
+
+
+# get_orders expand value -> dimension columns added to each row
+ORDER_EXPANSIONS = {
+    "customer": ("customers", ["customer_name", "industry", "account_manager"]),
+    "product": ("products", ["product_name", "product_category", "unit_cost"]),
+}
+# Added when expand is not given, matching what get_orders has always returned
+ORDER_NAME_COLUMNS = {"customers": ["customer_name"], "products": ["product_name"]}
+# get_orders leaves out lines whose customer or product is unknown, as its inner joins did
+ORDER_JOINS = {"customers": [], "products": []}
+# get_orders row columns, for looking orders up by ID (see lookups.order_lookup_sql)
+ORDER_LOOKUP_COLUMNS = {
+    "order_id": "o.order_id",
+    "customer_id": "o.customer_id",
+    "order_date": "o.order_date",
+    "region": "o.region",
+    "product_id": "l.product_id",
+    "quantity": "l.quantity",
+    "unit_price": "l.unit_price",
+    "line_unit_price": "ROUND((l.quantity * l.unit_price) * (1 - l.discount), 2)",
+}
+
+
+def _cached_dimension(name: str):
+    """The in-memory dimension table, recording its staleness on the tool span; None to query the warehouse."""
+    table = dimension_cache.table(name)
+    if table is not None:
+        trace.get_current_span().set_attribute("data.staleness_seconds", _data_staleness(name, table))
+    return table
+
+
+def _data_staleness(name: str, table) -> float:
+    """
+    How far the served `name` data may lag the warehouse, like the API's
+    X-Data-Staleness: seconds since the cached table was last confirmed
+    current, 0 when it was read from the warehouse.
+    """
+    return round(dimension_cache.staleness(name), 1) if table is not None else 0.0
+
+
+def _with_staleness(rows, name: str, table) -> dict:
+    return {"rows": rows, "data_staleness_seconds": _data_staleness(name, table)}
+
+
+def _orders_by_id(order_ids, columns) -> Dict[int, Optional[List[dict]]]:
+    """get_orders rows grouped by order ID in request order (one query); None for unknown IDs."""
+    ids = parse_ids(order_ids)
+    if not ids:
+        return {}
+    rows = dimension_cache.enrich(run_dbquery(*order_lookup_sql(ids, ORDER_LOOKUP_COLUMNS)), columns)
+    lines: Dict[int, List[dict]] = {}
+    for row in rows:
+        # An order without lines comes back as one row without a product
+        order_lines = lines.setdefault(row["order_id"], [])
+        if row["product_id"] is not None:
+            order_lines.append(row)
+    return keyed(ids, lines)
+
+
 class SalesPlugin:
     """Plugin for accessing sales data"""
 
     
     @kernel_function
+    @record_tool_payload("get_orders")
     def get_orders(
         customer_id: Optional[int] = None,
         product_id: Optional[int] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         region: Optional[str] = None,
-        limit: int = 100
-    ) -> List[dict]:
+        limit: int = 100,
+        expand: Optional[List[str]] = None,
+        approximate: bool = False,
+        order_ids: Optional[List[int]] = None
+    ) -> Union[List[dict], Dict[int, Optional[List[dict]]]]:
         """
-        Retrieve sales orders, including nested order lines and product details.
+        Retrieve sales order lines with customer and product names.
 
         Use this tool when the question is about sales, revenue, discounts,
         customer purchasing behavior, or product sales. Supports filters:
@@ -33,20 +114,44 @@ class SalesPlugin:
         - start_date / end_date: restrict to an order date range (YYYY-MM-DD)
         - region: filter by sales region (e.g., 'NA', 'EU')
         - limit: maximum number of rows to return (default: 100)
-
-        Always includes order_id, customer_id, customer_name, order_date, region,
-        product_id, quantity, unit_price, and line_unit_price.
+        - expand: details to add instead of just the names: 'customer' (customer_name,
+          industry, account_manager) and/or 'product' (product_name, product_category,
+          unit_cost); [] returns IDs only
+        - approximate: read from a sample of orders, faster for exploratory
+          questions; rows then carry sample_fraction (the fraction of orders
+          sampled). Falls back to all orders if the sample has fewer than limit rows.
+          Only the fraction is reported, no error bound: the rows are a sample,
+          not estimates.
+        - order_ids: look up several orders at once (at most 500); returns
+          {order_id: [rows of its lines] or null if unknown}, ignoring the other
+          filters and limit
+
+        Always includes order_id, customer_id, order_date, region, product_id,
+        quantity, unit_price and line_unit_price; customer_name and product_name
+        unless expand says otherwise. Lines whose customer or product is unknown
+        are left out.
         """
         try:
+            if expand is None:
+                columns = ORDER_NAME_COLUMNS
+            else:
+                unknown = sorted(set(expand) - set(ORDER_EXPANSIONS))
+                if unknown:
+                    return [{"error": f"Unknown expand value(s) {unknown}; expected any of {sorted(ORDER_EXPANSIONS)}"}]
+                columns = dict(ORDER_EXPANSIONS[e] for e in expand)
+
+            if order_ids:
+                return _orders_by_id(order_ids, columns)
+
             filters = []
             params = {}
 
             if customer_id is not None:
-                filters.append("c.customer_id = %(customer_id)s")
+                filters.append("o.customer_id = %(customer_id)s")
                 params["customer_id"] = customer_id
 
             if product_id is not None:
-                filters.append("p.product_id = %(product_id)s")
+                filters.append("ol.product_id = %(product_id)s")
                 params["product_id"] = product_id
 
             if start_date:
@@ -62,46 +167,39 @@ class SalesPlugin:
                 params["region"] = region
 
             where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-
-            sql = f"""
-            SELECT 
-                o.order_id,
-                c.customer_id,
-                c.customer_name,
-                o.order_date,
-                o.region,
-                p.product_id,
-                p.product_name,
-                ol.quantity,
-                ol.unit_price,
-                ROUND((ol.quantity * ol.unit_price) * (1 - ol.discount), 2) AS line_unit_price
-            FROM sales_orders o
-            JOIN customers c ON o.customer_id = c.customer_id
-            JOIN order_lines ol ON o.order_id = ol.order_id
-            JOIN products p ON ol.product_id = p.product_id
-            {where_clause}
-            ORDER BY o.order_date DESC
-            LIMIT %(limit)s
-            """
             params["limit"] = limit
 
-            rows = run_dbquery(sql, params)
-
-            return [
-                {
-                    "order_id": r["order_id"],
-                    "customer_id": r["customer_id"],
-                    "customer_name": r["customer_name"],
-                    "order_date": r["order_date"],
-                    "region": r["region"],
-                    "product_id": r["product_id"],
-                    "product_name": r["product_name"],
-                    "quantity": r["quantity"],
-                    "unit_price": r["unit_price"],
-                    "line_unit_price": r["line_unit_price"],
-                }
-                for r in rows
-            ]
+            def build_query(sample=""):
+                return f"""
+                SELECT
+                    o.order_id,
+                    o.customer_id,
+                    o.order_date,
+                    o.region,
+                    ol.product_id,
+                    ol.quantity,
+                    ol.unit_price,
+                    ROUND((ol.quantity * ol.unit_price) * (1 - ol.discount), 2) AS line_unit_price
+                FROM sales_orders {sample} o
+                JOIN order_lines ol ON o.order_id = ol.order_id
+                {where_clause}
+                ORDER BY o.order_date DESC
+                LIMIT %(limit)s
+                """
+
+            fraction = None
+            if approximate:
+                rows = run_dbquery(build_query(sample_clause()), params)
+                if len(rows) >= limit:
+                    fraction = sample_fraction()
+                    for row in rows:
+                        row["sample_fraction"] = fraction
+            if fraction is None:
+                rows = run_dbquery(build_query(), params)
+
+            # Names and details come from the in-memory dimension cache, not a warehouse join;
+            # dropping unknown customers and products after the LIMIT can return fewer rows
+            return dimension_cache.enrich(rows, {**ORDER_JOINS, **columns}, inner=True)
 
         except Exception as e:
             print("Error in get_orders tool")
@@ -109,12 +207,14 @@ class SalesPlugin:
 
 
     @kernel_function
+    @record_tool_payload("get_customers")
     def get_customers(
         customer_id: Optional[int] = None,
         industry: Optional[str] = None,
         region: Optional[str] = None,
-        limit: int = 100
-    ) -> List[dict]:
+        limit: int = 100,
+        customer_ids: Optional[List[int]] = None
+    ) -> dict:
         """
         Retrieve customer information.
 
@@ -125,17 +225,34 @@ class SalesPlugin:
         - industry: filter customers by industry (e.g., 'Automotive', 'Aerospace')
         - region: filter customers by sales region (e.g., 'NA', 'EU')
         - limit: maximum number of customers to return (default: 100)
+        - customer_ids: look up several customers at once (at most 500); returns
+          {customer_id: customer or null if unknown}, ignoring the other filters
+
+        Returns {"rows": customers, "data_staleness_seconds": seconds the data
+        may lag the warehouse (0 when read from it)}.
 
         Always return customer_id and customer_name.
 
         Example use cases:
         - "Who are our top aerospace industry customers?"
         - "Get customer 42's details."
+        - "Get the details of customers 3, 17 and 42."
         """
 
         try:
             print("Get Customers called")
 
+            customers = _cached_dimension("customers")
+            if customer_ids:
+                return _with_staleness(lookup_dimension(dimension_cache, "customers", customer_ids), "customers", customers)
+            if customers is not None:
+                return _with_staleness(customers.lookup(
+                    limit=limit,
+                    customer_id=customer_id or None,
+                    industry=industry or None,
+                    region=region or None,
+                ), "customers", customers)
+
             filters = []
             params = {}
 
@@ -173,7 +290,7 @@ class SalesPlugin:
             print(f"Returned {len(rows)} rows")
             print([dict(r) for r in rows])
 
-            return [
+            return _with_staleness([
             {
                 "customer_id": r["customer_id"],
                 "customer_name": r["customer_name"],
@@ -182,7 +299,10 @@ class SalesPlugin:
                 "account_manager": r["account_manager"],
             }
             for r in rows
-        ]
+        ], "customers", None)
+
+        except ValueError as e:
+            return [{"error": str(e)}]
 
         except Exception as e:
             print("Error in get_customers tool: %s", e)
@@ -194,6 +314,7 @@ class SalesPlugin:
 
 
     @kernel_function
+    @record_tool_payload("get_product_category")
     def get_product_category(name: str) -> dict:
         """
         Resolve a user-provided product category string into the canonical category 
@@ -206,10 +327,25 @@ class SalesPlugin:
             {
                 "input": "Brake Pads",
                 "resolved_category": "Brake Pad",
-                "confidence": 0.92
+                "confidence": 0.92,
+                "data_staleness_seconds": 12.5
             }
         """
         try:
+            products = _cached_dimension("products")
+            if products is not None:
+                category, distance = closest_value(products.values("product_category"), name)
+                staleness = _data_staleness("products", products)
+                if category is None:
+                    return {"input": name, "resolved_category": None, "confidence": 0.0, "data_staleness_seconds": staleness}
+                max_len = max(len(name), len(category))
+                return {
+                    "input": name,
+                    "resolved_category": category,
+                    "confidence": 1 - (distance / max_len),
+                    "data_staleness_seconds": staleness,
+                }
+
             sql = """
             SELECT p.product_category,
                 levenshtein(lower(p.product_category), lower(%(name)s)) AS distance
@@ -221,7 +357,7 @@ class SalesPlugin:
             rows = run_dbquery(sql, {"name": name})
 
             if not rows:
-                return {"input": name, "resolved_category": None, "confidence": 0.0}
+                return {"input": name, "resolved_category": None, "confidence": 0.0, "data_staleness_seconds": 0.0}
 
             row = rows[0]
             max_len = max(len(name), len(row["product_category"]))
@@ -231,6 +367,7 @@ class SalesPlugin:
                 "input": name,
                 "resolved_category": row["product_category"],
                 "confidence": confidence,
+                "data_staleness_seconds": 0.0,
             }
 
         except Exception as e:
@@ -238,11 +375,13 @@ class SalesPlugin:
             return {"input": name, "resolved_category": None, "error": str(e)}
 
     @kernel_function
+    @record_tool_payload("get_products")
     def get_products(
         product_id: Optional[int] = None,
         category: Optional[str] = None,
-        limit: int = 100
-    ) -> List[dict]:
+        limit: int = 100,
+        product_ids: Optional[List[int]] = None
+    ) -> dict:
         """
         Retrieve product catalog data.
 
@@ -252,6 +391,11 @@ class SalesPlugin:
         - product_id: return a specific product
         - category: filter by category (e.g., 'Brakes', 'Tires')
         - limit: maximum number of products to return (default: 100)
+        - product_ids: look up several products at once (at most 500); returns
+          {product_id: product or null if unknown}, ignoring the other filters
+
+        Returns {"rows": products, "data_staleness_seconds": seconds the data
+        may lag the warehouse (0 when read from it)}.
 
         Always return product_id, product_name, product_category, unit_cost, and unit_price.
 
@@ -260,6 +404,15 @@ class SalesPlugin:
         - "List all products in the 'Brakes' category."
         """
         try:
+            products = _cached_dimension("products")
+            if product_ids:
+                return _with_staleness(lookup_dimension(dimension_cache, "products", product_ids), "products", products)
+            if products is not None:
+                return _with_staleness(
+                    products.lookup(limit=limit, product_id=product_id, product_category=category or None),
+                    "products", products,
+                )
+
             filters = []
             params = {}
 
@@ -289,7 +442,7 @@ class SalesPlugin:
 
             rows = run_dbquery(sql, params)
 
-            return [
+            return _with_staleness([
                 {
                     "product_id": r["product_id"],
                     "product_name": r["product_name"],
@@ -298,7 +451,7 @@ class SalesPlugin:
                     "unit_price": r["unit_price"],
                 }
                 for r in rows
-            ]
+            ], "products", None)
 
         except Exception as e:
             print("Error in get_products tool")
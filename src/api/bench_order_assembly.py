@@ -0,0 +1,115 @@
+# Modules shared with the MCP server live in src/shared; the deploy zip
+# holds them at its root, a checkout adds the directory to the path
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
+############# Order assembly benchmark ###########
+#
+# Compares services.order_assembly.assemble_orders with the row-by-row
+# _map_orders it replaced, on synthetic rows shaped like the /orders query
+# result (sorted by order_id, a few lines per order, some orders without
+# lines) and reports time and peak allocations for each. That both produce
+# the same orders is checked by tests/test_order_assembly.py.
+#
+#   python bench_order_assembly.py --lines 300000
+
+from datetime import date, timedelta
+from models.orders import Order
+from models.order_lines import OrderLine
+from services.order_assembly import assemble_orders
+from services.order_service import ORDER_COLUMNS
+import argparse
+import random
+import time
+import tracemalloc
+
+
+def _legacy_map_orders(rows):
+    """The previous _map_orders from order_service.py, kept as the reference."""
+    orders_dict = {}
+
+    for r in rows:
+        order_id = r["order_id"]
+
+        if order_id not in orders_dict:
+            orders_dict[order_id] = Order(
+                order_id=r["order_id"],
+                customer_id=r["customer_id"],
+                order_date=r["order_date"],
+                ship_date=r["ship_date"],
+                sales_channel=r["sales_channel"],
+                region=r["region"],
+                order_lines=[]
+            )
+
+        if r["order_line_id"] is not None:
+            orders_dict[order_id].order_lines.append(OrderLine(
+                order_line_id=r["order_line_id"],
+                quantity=r["quantity"],
+                discount=r["discount"],
+                unit_price=r["line_unit_price"],
+                line_total=r["line_total"],
+                product_id=r["product_id"]
+            ))
+
+    return list(orders_dict.values())
+
+
+def _legacy(rows, columns):
+    # The old path also zipped every row into a dict first
+    return _legacy_map_orders([dict(zip(columns, r)) for r in rows])
+
+
+def make_rows(lines: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = []
+    order_id = 1000
+    line_id = 1
+    start = date(2024, 1, 1)
+    while len(rows) < lines:
+        order_id += 1
+        order_date = start + timedelta(days=rng.randrange(700))
+        header = (order_id, rng.randrange(500), order_date, order_date + timedelta(days=rng.randrange(1, 10)),
+                  rng.choice(["Online", "Distributor", "Direct"]), rng.choice(["NA", "EU", "APAC"]))
+        if rng.random() < 0.02:
+            rows.append(header + (None,) * 6)
+            continue
+        for _ in range(min(rng.randrange(1, 6), lines - len(rows))):
+            product_id = rng.randrange(200)
+            quantity = rng.randrange(1, 50)
+            price = round(rng.uniform(5, 900), 2)
+            discount = round(rng.uniform(0, 0.2), 2)
+            rows.append(header + (line_id, product_id, quantity, price, discount,
+                                  round(quantity * price * (1 - discount), 2)))
+            line_id += 1
+    return rows
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nested order assembly against the legacy mapper.")
+    parser.add_argument("--lines", type=int, default=300_000, help="Number of flat result rows.")
+    args = parser.parse_args()
+
+    columns = list(ORDER_COLUMNS)
+    rows = make_rows(args.lines)
+
+    _, legacy_seconds, legacy_peak = _measure(_legacy, rows, columns)
+    assembled, seconds, peak = _measure(assemble_orders, rows, columns)
+
+    print(f"rows={len(rows)}, orders={len(assembled)}")
+    print(f"legacy:    {legacy_seconds:.3f}s, peak {legacy_peak / 1e6:.1f} MB")
+    print(f"columnar:  {seconds:.3f}s, peak {peak / 1e6:.1f} MB, {legacy_seconds / seconds:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+############# Response format benchmark ###########
+#
+# Serializes a large /orders result (synthetic rows from
+# bench_order_assembly.py, assembled and validated like the route does) in
+# each negotiable format and content encoding, and reports the payload size
+# and the time to encode and to compress it.
+#
+#   python bench_response_formats.py --lines 300000
+
+from bench_order_assembly import make_rows
+from models.orders import Order
+from response_formats import ARROW, JSON, MSGPACK, NegotiatedResponse, compressor, msgpack, response_format, zstandard
+from services.order_assembly import assemble_orders
+from services.order_service import ORDER_COLUMNS
+import argparse
+import time
+
+
+def _encode(content, media_type: str):
+    token = response_format.set(media_type)
+    try:
+        started = time.perf_counter()
+        response = NegotiatedResponse(content)
+        return response.body, response.media_type, time.perf_counter() - started
+    finally:
+        response_format.reset(token)
+
+
+def _compress(body: bytes, encoding: str):
+    started = time.perf_counter()
+    if encoding == "identity":
+        return body, 0.0
+    c = compressor(encoding)
+    compressed = c.compress(body) + c.flush()
+    return compressed, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare payload size and encode time per response format.")
+    parser.add_argument("--lines", type=int, default=300_000, help="Number of order lines.")
+    args = parser.parse_args()
+
+    orders = assemble_orders(make_rows(args.lines), list(ORDER_COLUMNS))
+    # What FastAPI hands to the response class for response_model=List[Order]
+    content = [Order(**o).model_dump(mode="json", exclude_unset=True) for o in orders]
+
+    formats = [JSON] + ([MSGPACK] if msgpack is not None else []) + [ARROW]
+    encodings = ["identity", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+    print(f"orders={len(orders)}, lines={args.lines}")
+    print(f"{'format':<38} {'encoding':<9} {'bytes':>12} {'vs json':>8} {'encode ms':>10} {'compress ms':>12}")
+    json_bytes = None
+    for media_type in formats:
+        body, rendered_as, encode_seconds = _encode(content, media_type)
+        for encoding in encodings:
+            payload, compress_seconds = _compress(body, encoding)
+            json_bytes = json_bytes or len(payload)
+            print(f"{rendered_as:<38} {encoding:<9} {len(payload):>12,} {len(payload) / json_bytes:>8.0%} "
+                  f"{encode_seconds * 1000:>10.1f} {compress_seconds * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+############# Cold start benchmark ###########
+#
+# Measures what a scale-from-zero replica pays before it serves:
+#
+# - import: wall time of importing the app in a fresh interpreter, and the
+#   modules it imports directly with the largest cumulative time (-X importtime)
+# - first response: process start until GET / answers
+# - ready: process start until GET /ready answers 200 (warm-up finished)
+# - first/second request: latency of the first and a repeated request to
+#   --path once ready (API only)
+#
+# Each run starts a new process; the medians over --runs are reported, and
+# appended as one JSON line to --history so results can be tracked over time.
+# With --mcp the MCP server in ../MCP/sales is measured instead of the API.
+#
+#   python bench_startup.py --runs 5 --history startup_history.jsonl
+
+from datetime import datetime, timezone
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+MCP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MCP", "sales")
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(port: int, path: str):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def _poll(port: int, path: str, accept, deadline: float) -> float:
+    """Polls until `accept(status)`; returns the monotonic time it did."""
+    while time.monotonic() < deadline:
+        try:
+            if accept(_get(port, path)):
+                return time.monotonic()
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise SystemExit(f"GET {path} on port {port} did not succeed in time")
+
+
+def measure_import(module: str, cwd: str, top: int = 10):
+    """Wall seconds to import `module` in a new interpreter, and the slowest imports it made directly."""
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=cwd, check=True, capture_output=True)
+    seconds = time.monotonic() - started
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nesting shown by indentation
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # " module" at depth 0 (the one imported), "   module" at depth 1, ...
+        if (len(name) - len(name.lstrip()) - 1) // 2 != 1:
+            continue
+        modules.append((int(cumulative) / 1e6, name.strip()))
+    return seconds, sorted(modules, reverse=True)[:top]
+
+
+def measure_start(mcp: bool, path: str, timeout: float):
+    port = _free_port()
+    if mcp:
+        command, cwd = [sys.executable, "app.py"], MCP_DIR
+        env = dict(os.environ, MCP_PORT=str(port))
+    else:
+        command, cwd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"], API_DIR
+        env = dict(os.environ, WEB_CONCURRENCY="1", PORT=str(port), LOG_LEVEL="warning", ACCESS_LOG="")
+
+    started = time.monotonic()
+    server = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        # The MCP server has no plain status route; any answer from /ready means it is serving
+        first = _poll(port, "/ready" if mcp else "/", lambda status: mcp or status == 200, deadline)
+        ready = _poll(port, "/ready", lambda status: status == 200, deadline)
+        result = {"first_response_s": first - started, "ready_s": ready - started}
+        if not mcp:
+            for name in ("first_request_ms", "second_request_ms"):
+                clock = time.perf_counter()
+                status = _get(port, path)
+                result[name] = (time.perf_counter() - clock) * 1000
+                if status != 200:
+                    print(f"GET {path} returned {status}")
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time, time to first response and time to ready.")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure.")
+    parser.add_argument("--mcp", action="store_true", help="Measure the MCP server instead of the API.")
+    parser.add_argument("--path", default="/customers/customers?limit=50", help="Request timed once ready (API).")
+    parser.add_argument("--timeout", type=float, default=180, help="Seconds to wait for a start.")
+    parser.add_argument("--history", default=None, help="Append the medians as a JSON line to this file.")
+    args = parser.parse_args()
+
+    module, cwd = ("app", MCP_DIR) if args.mcp else ("main", API_DIR)
+    import_seconds, slowest = measure_import(module, cwd)
+    print(f"import {module}: {import_seconds:.2f}s; slowest imports made by {module}:")
+    for seconds, name in slowest:
+        print(f"  {seconds:>6.2f}s  {name}")
+
+    runs = [measure_start(args.mcp, args.path, args.timeout) for _ in range(args.runs)]
+    medians = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+    print(f"\n{'run':>4} " + " ".join(f"{key:>18}" for key in medians))
+    for i, r in enumerate(runs, 1):
+        print(f"{i:>4} " + " ".join(f"{r[key]:>18.2f}" for key in medians))
+    print(f"{'p50':>4} " + " ".join(f"{medians[key]:>18.2f}" for key in medians))
+
+    if args.history:
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "service": "mcp" if args.mcp else "api",
+            "runs": args.runs,
+            "import_s": round(import_seconds, 3),
+            **{key: round(value, 3) for key, value in medians.items()},
+        }
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+############# API throughput benchmark ###########
+#
+# Starts the API under gunicorn.conf.py with 1, 2, 4, ... workers and drives
+# it with keep-alive HTTP clients running in separate processes, reporting
+# requests/second, latency percentiles and scaling efficiency relative to the
+# per-worker throughput of the first worker count. The default path is served
+# from the dimension cache, so the numbers reflect the serving stack rather
+# than warehouse latency (the warehouse settings in .env are still needed to
+# load the cache).
+#
+#   python bench_throughput.py --workers 1 2 4 8 --path "/customers/customers?limit=50"
+
+from multiprocessing import Pool
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _wait_until_ready(port: int, path: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            # Wait for the dimension cache, otherwise the warehouse is measured
+            if response.status == 200 and response.getheader("X-Data-Staleness") not in (None, "0"):
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"API on port {port} did not become ready within {timeout}s")
+
+
+def _client(args):
+    port, path, seconds = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run(workers: int, clients: int, seconds: float, path: str):
+    port = _free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), LOG_LEVEL="warning", ACCESS_LOG="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+    try:
+        _wait_until_ready(port, path)
+        with Pool(clients) as pool:
+            results = pool.map(_client, [(port, path, seconds)] * clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = sorted(l for result, _ in results for l in result)
+    errors = sum(e for _, e in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / seconds,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput as the number of gunicorn workers grows.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to measure.")
+    parser.add_argument("--clients", type=int, default=None, help="Concurrent client processes (default: 4 x max workers).")
+    parser.add_argument("--seconds", type=float, default=15, help="Measurement time per worker count.")
+    parser.add_argument("--path", default="/customers/customers?limit=50", help="Request path.")
+    args = parser.parse_args()
+
+    clients = args.clients or 4 * max(args.workers)
+    baseline = None
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'scaling':>8}")
+    for workers in args.workers:
+        result = run(workers, clients, args.seconds, args.path)
+        baseline = baseline or result["rps"] / workers
+        efficiency = result["rps"] / (baseline * workers)
+        print(f"{workers:>7} {result['rps']:>9.0f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['errors']:>6} {efficiency:>8.0%}")
+
+if __name__ == "__main__":
+    main()
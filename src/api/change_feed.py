@@ -0,0 +1,181 @@
+# change_feed.py
+"""
+Incremental order changes for systems that mirror sales_orders and
+order_lines, from the Delta change data feed of both tables.
+
+A consumer keeps the watermark of its last sync and asks what changed since:
+the feed reads table_changes() from the version after the watermark, so a
+sync costs in proportion to the changes rather than to the tables.
+
+- watermark: an opaque token holding, per table, the last Delta version
+             already delivered. Without `since` the feed returns the current
+             watermark and no changes, the starting point after a full load.
+- pages:     a sync reads up to the versions current at its first page;
+             each page lists up to `limit` changed order IDs in order, and its
+             token continues after the last one. The page that exhausts the
+             range returns a plain watermark of those versions and has_more
+             false.
+- cost:      `changes` serves one page per call and tokens carry no state, so
+             every page reads the whole version range again (keeping the IDs
+             after the token's): a sync of N changed orders in pages of P
+             reads the changes about N/P times. `pages` reads the range once
+             and pages through it in memory (the IDs only), as the streaming
+             route does.
+- errors:    a malformed token is a ValueError. A watermark older than the
+             change data the table retains (VACUUM, or the feed was enabled
+             later) or a table without the feed enabled raises
+             ChangeFeedUnavailableError: resync from /orders and start over
+             from a new watermark. Tables without a Delta history (not Delta
+             tables, or the SQLite backend) raise ChangeFeedNotSupportedError.
+
+Enable the feed once with `python change_feed.py enable`.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import base64
+import json
+import re
+
+from resilience import WarehouseUnavailableError
+
+TABLES = ("sales_orders", "order_lines")
+
+# Delta errors for a version range the change feed cannot serve
+_UNAVAILABLE = re.compile(r"CHANGE_DATA_FEED|MISSING_CHANGE_DATA|VersionNotFound|VERSION_NOT_FOUND|CDC_READ", re.IGNORECASE)
+
+
+class ChangeFeedUnavailableError(Exception):
+    """The changes since a watermark cannot be read from the change data feed."""
+
+
+class ChangeFeedNotSupportedError(Exception):
+    """The tables have no Delta version history to read changes from."""
+
+
+def encode_watermark(versions: Dict[str, int], to: Optional[Dict[str, int]] = None, after: Optional[int] = None) -> str:
+    state: Dict[str, Any] = {"v": versions}
+    if to is not None:
+        state.update(to=to, after=after)
+    encoded = base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode())
+    return encoded.decode().rstrip("=")
+
+
+def decode_watermark(token: str) -> Tuple[Dict[str, int], Optional[Dict[str, int]], Optional[int]]:
+    """(versions delivered, versions the sync reads up to or None, last order_id delivered or None)."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        versions = {t: int(state["v"][t]) for t in TABLES}
+        to = {t: int(state["to"][t]) for t in TABLES} if "to" in state else None
+        after = int(state["after"]) if state.get("after") is not None else None
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid watermark; use the watermark returned by a previous call")
+    return versions, to, after
+
+
+class ChangeFeed:
+    """`run_query(sql, params)` is the db module's query function."""
+
+    def __init__(self, run_query: Callable[[str, Dict[str, Any]], List[Any]]):
+        self._run_query = run_query
+
+    def current(self) -> Dict[str, int]:
+        """Latest Delta version of each table."""
+        versions = {}
+        for table in TABLES:
+            try:
+                rows = self._run_query(f"DESCRIBE HISTORY {table} LIMIT 1", {})
+                versions[table] = int(_value(rows[0], 0, "version"))
+            except WarehouseUnavailableError:
+                raise
+            except Exception as e:
+                raise ChangeFeedNotSupportedError(
+                    f"{table} has no Delta version history to read changes from ({e})"
+                ) from e
+        return versions
+
+    def changes(self, since: Optional[str], limit: int) -> Tuple[List[int], str, bool]:
+        """(IDs of orders changed after `since`, in order; the token to continue from; has_more)."""
+        if since is None:
+            return [], encode_watermark(self.current()), False
+        versions, to, after = self._range(since)
+        rows = self._changed_ids(versions, to, after, limit + 1)
+        ids = rows[:limit]
+        if len(rows) > limit:
+            return ids, encode_watermark(versions, to, ids[-1]), True
+        return ids, encode_watermark(to), False
+
+    def pages(self, since: str, limit: int) -> Iterator[Tuple[List[int], str, bool]]:
+        """Every page of `changes` from `since` on, reading the changes once."""
+        versions, to, after = self._range(since)
+        ids = self._changed_ids(versions, to, after)
+        for start in range(0, max(len(ids), 1), limit):
+            page = ids[start:start + limit]
+            if start + limit < len(ids):
+                yield page, encode_watermark(versions, to, page[-1]), True
+            else:
+                yield page, encode_watermark(to), False
+
+    def _range(self, since: str) -> Tuple[Dict[str, int], Dict[str, int], Optional[int]]:
+        versions, to, after = decode_watermark(since)
+        return versions, to if to is not None else self.current(), after
+
+    def _changed_ids(
+        self, versions: Dict[str, int], to: Dict[str, int], after: Optional[int], limit: Optional[int] = None
+    ) -> List[int]:
+        """Distinct IDs of the orders changed in (versions, to], after `after`, in order."""
+        ranges = {t: (versions[t] + 1, to[t]) for t in TABLES if versions[t] < to[t]}
+        if not ranges:
+            return []
+
+        branches = [
+            f"SELECT order_id FROM table_changes('{table}', {start}, {end})"
+            for table, (start, end) in ranges.items()
+        ]
+        params: Dict[str, Any] = {}
+        where = ""
+        if after is not None:
+            where = "WHERE order_id > %(after)s"
+            params["after"] = after
+        sql = f"""
+        SELECT DISTINCT order_id
+        FROM ({" UNION ALL ".join(branches)}) c
+        {where}
+        ORDER BY order_id
+        """
+        if limit is not None:
+            sql += "LIMIT %(limit)s"
+            params["limit"] = limit
+        try:
+            rows = self._run_query(sql, params)
+        except Exception as e:
+            if _UNAVAILABLE.search(str(e)):
+                raise ChangeFeedUnavailableError(
+                    f"Changes since this watermark are not available ({e}); "
+                    "resync from /orders and continue from a new watermark"
+                ) from e
+            raise
+        return [int(_value(r, 0, "order_id")) for r in rows]
+
+
+def _value(row, index: int, name: str):
+    return row[name] if isinstance(row, dict) else row[index]
+
+
+def main():
+    from db import run_query
+
+    parser = argparse.ArgumentParser(description="Manage the order change feed.")
+    parser.add_argument("command", choices=["enable", "watermark"])
+    args = parser.parse_args()
+
+    if args.command == "enable":
+        for table in TABLES:
+            run_query(f"ALTER TABLE {table} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)", {})
+            print(f"Change data feed enabled on {table}")
+    else:
+        # The watermark to start syncing from after a full load
+        print(encode_watermark(ChangeFeed(run_query).current()))
+
+
+if __name__ == "__main__":
+    main()
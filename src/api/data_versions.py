@@ -0,0 +1,95 @@
+# data_versions.py
+"""
+Current data version of the tables behind each API response, for ETags.
+
+A response only changes when the data it is computed from changes (or the
+API itself does), so a hash of the request and the versions of the tables it
+reads is a strong validator for the response body:
+
+- customers, products: the Delta version of the table held by the
+  dimension cache, i.e. the version actually being served
+- other tables: the latest Delta version from DESCRIBE HISTORY, probed at
+  most every ETAG_VERSION_TTL_SECONDS per table
+- "rollups": the rollup watermarks, which decide whether a summary is served
+  from a rollup (its `source`)
+
+A table without a known version (not a Delta table, or the probe failed)
+makes the response unversioned: it gets no ETag rather than a wrong one.
+"""
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+VERSION_TTL_SECONDS = float(environ.get("ETAG_VERSION_TTL_SECONDS", 10))
+
+
+class DataVersions:
+    """
+    `run_query(sql, params)` is the db module's query function, `dimensions`
+    the DimensionCache and `rollups` the RollupCatalog of the process.
+    """
+
+    def __init__(
+        self,
+        run_query: Callable[[str, Dict[str, Any]], List[Any]],
+        dimensions,
+        rollups,
+        ttl_seconds: float = VERSION_TTL_SECONDS,
+    ):
+        self._run_query = run_query
+        self._dimensions = dimensions
+        self._rollups = rollups
+        self.ttl_seconds = ttl_seconds
+        self._probed: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, table: str) -> Optional[str]:
+        if table == "rollups":
+            return repr(sorted(self._rollups.watermarks().items()))
+        cached = self._dimensions.table(table) if table in ("customers", "products") else None
+        if cached is not None and cached.version is not None:
+            return str(cached.version)
+        version = self._probe(table)
+        return None if version is None else str(version)
+
+    def _probe(self, table: str) -> Optional[int]:
+        with self._lock:
+            probed = self._probed.get(table)
+            if probed is not None and time.monotonic() - probed[0] < self.ttl_seconds:
+                return probed[1]
+        try:
+            rows = self._run_query(f"DESCRIBE HISTORY {table} LIMIT 1", {})
+            row = rows[0] if rows else None
+            version = None if row is None else (row["version"] if isinstance(row, dict) else row[0])
+        except Exception:
+            logger.warning("Could not read the version of %s; its responses get no ETag", table)
+            version = None
+        with self._lock:
+            self._probed[table] = (time.monotonic(), version)
+        return version
+
+    def etag(self, tables: Sequence[str], *parts: str) -> Optional[str]:
+        """Strong ETag over the versions of `tables` and the request `parts`, or None if any version is unknown."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        for table in tables:
+            version = self.version(table)
+            if version is None:
+                return None
+            digest.update(f"{table}={version}\0".encode())
+        return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
@@ -0,0 +1,40 @@
+# gunicorn.conf.py
+#
+# Multi-process serving profile: gunicorn managing uvicorn workers, one per
+# CPU core by default. Used by startup.sh and the App Service start command:
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# Each worker has its own warehouse connection pool (DB_POOL_SIZE), so the
+# total number of warehouse connections is workers x DB_POOL_SIZE.
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+
+# Requests wait on warehouse queries, which can take a while on a cold warehouse
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# ACCESS_LOG="" turns request logging off (e.g. for benchmarks)
+accesslog = os.environ.get("ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info")
+
+# Workers share read-mostly data (the customers/products dimension tables
+# and exact /sales/summary answers) through memory-mapped files here; see
+# snapshot_store.py
+snapshot_dir = os.environ.setdefault(
+    "SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), f"sales-api-snapshots-{bind.rsplit(':', 1)[1]}")
+)
+
+
+def on_starting(server):
+    # Snapshots from a previous run may be arbitrarily old; start clean
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.makedirs(snapshot_dir, exist_ok=True)
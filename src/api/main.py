@@ -1,6 +1,22 @@
-from routes import orders, products, customers
-import uvicorn
-from fastapi import FastAPI
+# Modules shared with the MCP server live in src/shared; the deploy zip
+# holds them at its root, a checkout adds the directory to the path
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+
+from routes import orders, products, customers, sales, artifacts
+from tracing import TraceContextMiddleware, set_up_tracing
+from response_formats import NegotiatedResponse, ResponseFormatMiddleware
+from workload_capture import WorkloadCaptureMiddleware, recorder
+from services.dimension_service import dimension_cache
+from services.sales_service import rollup_catalog
+from services.customer_service import profile_store
+from warmup import LAZY_IMPORTS, WARMUP_CONNECTIONS, WARMUP_TIMEOUT_SECONDS, Warmup, import_modules
+from db import pool, resilience
+from resilience import DeadlineMiddleware, WarehouseUnavailableError
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from fastapi.logger import logger
@@ -19,13 +35,43 @@ logger.setLevel(gunicorn_logger.level)
 
 server_url = environ.get("SERVER_URL")
 
+set_up_tracing()
+
+
+def _load_dimensions():
+    if not dimension_cache.wait_loaded(WARMUP_TIMEOUT_SECONDS):
+        raise TimeoutError("dimension tables not loaded yet")
+
+
+# Done in the background at startup instead of on the first requests; see /ready
+warmup = Warmup([
+    ("imports", lambda: import_modules(LAZY_IMPORTS)),
+    ("connections", lambda: pool.prewarm(WARMUP_CONNECTIONS)),
+    ("dimensions", _load_dimensions),
+    ("rollups", lambda: sorted(rollup_catalog.watermarks()) if rollup_catalog.enabled else None),
+    ("customer_profiles", lambda: profile_store.watermark() if profile_store.enabled else None),
+    ("openapi", lambda: len(app.openapi()["paths"])),
+])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load customers/products into memory in the background and keep them fresh
+    dimension_cache.start()
+    warmup.start()
+    yield
+    dimension_cache.stop()
+
 
 app = FastAPI(
     title="Automotive Sales Service",
     description="API for analyzing sales data",
     servers=[
         {"url": server_url, "description": "Lab environment"}
-    ]
+    ],
+    lifespan=lifespan,
+    # JSON, MessagePack or Arrow IPC depending on the Accept header
+    default_response_class=NegotiatedResponse
 )
 
 # Configure CORS
@@ -37,10 +83,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bounds the warehouse retries and hedges of each request (DB_DEADLINE_SECONDS)
+app.add_middleware(DeadlineMiddleware)
+
+# Records requests for offline replay when WORKLOAD_CAPTURE_PATH is set
+if recorder is not None:
+    app.add_middleware(WorkloadCaptureMiddleware, recorder=recorder)
+
+# Negotiates the response format and compresses large bodies (gzip/zstd)
+app.add_middleware(ResponseFormatMiddleware)
+
+# Continue the caller's W3C trace context so API and warehouse spans nest under the agent's span
+app.add_middleware(TraceContextMiddleware)
+
 # Register routes
 app.include_router(customers.router, prefix="/customers", tags=["Customers"])
 app.include_router(products.router, prefix="/products", tags=["Products"])
 app.include_router(orders.router, prefix="/orders", tags=["Orders"])
+app.include_router(sales.router, prefix="/sales", tags=["Sales"])
+app.include_router(artifacts.router, prefix="/artifacts", tags=["Artifacts"])
+
+
+@app.exception_handler(WarehouseUnavailableError)
+def warehouse_unavailable(request: Request, exc: WarehouseUnavailableError):
+    # Transient: retries were exhausted or the circuit breaker is open
+    return JSONResponse(
+        {"detail": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
 @app.get("/")
@@ -49,6 +118,19 @@ def get_status() -> str:
     logger.info("**Logging - RUNNING**")
     return "running"
 
+
+@app.get("/ready", include_in_schema=False)
+def get_readiness():
+    """
+    Readiness probe: 200 once the startup warm-up finished (or timed out),
+    503 while it runs. The body lists each warm-up step's state and duration,
+    and the warehouse retry, hedging and circuit breaker counters.
+    """
+    status = dict(warmup.status(), db=resilience.stats())
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 # Run the application using Uvicorn when executed directly
 if __name__ == "__main__":
+    # Only needed here; gunicorn's uvicorn worker imports it itself
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class ArtifactColumn(BaseModel):
+    name: str
+    type: str
+
+class ArtifactHandle(BaseModel):
+    artifact_id: str
+    source: Optional[str] = None
+    row_count: int
+    columns: List[ArtifactColumn]
+    size_bytes: int
+    expires_at: datetime
+    preview: List[Dict[str, Any]] = []
+
+class ArtifactFilter(BaseModel):
+    column: str
+    op: str = "="
+    value: Any = None
+
+class ArtifactQuery(BaseModel):
+    filters: List[ArtifactFilter] = []
+    group_by: List[str] = []
+    aggregates: Dict[str, str] = {}
+    columns: List[str] = []
+    order_by: List[str] = []
+    limit: int = 100
+
+class ArtifactResult(BaseModel):
+    artifact_id: str
+    row_count: int
+    rows: List[Dict[str, Any]] = []
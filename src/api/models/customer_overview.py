@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+from models.customers import Customer
+
+class CustomerTotals(BaseModel):
+    order_count: int
+    line_count: int
+    quantity: int
+    revenue: float
+    average_discount: Optional[float] = None
+    first_order_date: Optional[date] = None
+    last_order_date: Optional[date] = None
+
+class RecentOrder(BaseModel):
+    order_id: int
+    order_date: date
+    region: str
+    sales_channel: str
+    line_count: int
+    revenue: float
+
+class TopProduct(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    product_category: Optional[str] = None
+    order_count: int
+    quantity: int
+    revenue: float
+
+class CategoryShare(BaseModel):
+    product_category: Optional[str] = None
+    quantity: int
+    revenue: float
+    revenue_share: Optional[float] = None
+
+class CustomerOverview(BaseModel):
+    customer_id: int
+    customer: Optional[Customer] = None
+    totals: CustomerTotals
+    recent_orders: List[RecentOrder] = []
+    top_products: List[TopProduct] = []
+    category_mix: List[CategoryShare] = []
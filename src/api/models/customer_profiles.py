@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, List, Optional
+
+class CustomerProfile(BaseModel):
+    customer_id: int
+    order_count: int
+    line_count: int
+    quantity: int
+    revenue: float
+    average_order_value: float
+    average_discount: Optional[float] = None
+    first_order_date: date
+    last_order_date: date
+    # Days between consecutive orders; None with a single order
+    average_interval_days: Optional[float] = None
+    interval_stddev_days: Optional[float] = None
+    max_interval_days: Optional[int] = None
+    # Product category -> share of the customer's revenue
+    category_mix: Dict[str, Optional[float]] = {}
+    # Days between the last order and as_of, the latest order date of any customer
+    recency_days: int
+    # RFM quintiles over all customers, 5 is best
+    recency_score: int
+    frequency_score: int
+    monetary_score: int
+    segment: str
+
+class CustomerProfiles(BaseModel):
+    source: str
+    as_of: Optional[date] = None
+    profiles: List[CustomerProfile] = []
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+from models.orders import Order
+
+class OrderChanges(BaseModel):
+    # Current state of each order inserted or updated since the watermark
+    orders: List[Order] = []
+    # Orders deleted since the watermark
+    deleted_order_ids: List[int] = []
+    # Pass as `since` to continue; store it once has_more is false
+    watermark: str
+    has_more: bool
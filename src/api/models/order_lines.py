@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from typing import Optional
+from models.products import Product
 
 class OrderLine(BaseModel):
     order_line_id: int
@@ -6,4 +8,6 @@ class OrderLine(BaseModel):
     quantity: int
     unit_price: float
     discount: float
-    line_total: float
\ No newline at end of file
+    line_total: float
+    # Only present with expand=product
+    product: Optional[Product] = None
\ No newline at end of file
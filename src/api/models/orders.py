@@ -1,7 +1,8 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import List
+from typing import List, Optional
 from models.order_lines import OrderLine
+from models.customers import Customer
 
 class Order(BaseModel):
     order_id: int
@@ -10,4 +11,6 @@ class Order(BaseModel):
     ship_date: date
     sales_channel: str
     region: str
-    order_lines: List[OrderLine] = []
\ No newline at end of file
+    order_lines: List[OrderLine] = []
+    # Only present with expand=customer
+    customer: Optional[Customer] = None
\ No newline at end of file
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SalesSummaryRow(BaseModel):
+    period: Optional[str] = None
+    customer_id: Optional[int] = None
+    region: Optional[str] = None
+    product_id: Optional[int] = None
+    product_category: Optional[str] = None
+    revenue: float
+    quantity: int
+    line_count: int
+    order_count: int
+    # revenue / order_count
+    avg_order_value: Optional[float] = None
+    # 95% error bounds, set when the row is estimated from a sample
+    revenue_error: Optional[float] = None
+    quantity_error: Optional[float] = None
+    line_count_error: Optional[float] = None
+    order_count_error: Optional[float] = None
+    avg_order_value_error: Optional[float] = None
+
+class SalesSummary(BaseModel):
+    source: str
+    rows: List[SalesSummaryRow] = []
+    approximate: bool = False
+    sample_fraction: Optional[float] = None
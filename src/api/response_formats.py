@@ -0,0 +1,218 @@
+# response_formats.py
+"""
+Content negotiation and compression for every API response.
+
+- format:   the Accept header picks JSON (default), MessagePack
+            (application/msgpack) or Arrow IPC stream
+            (application/vnd.apache.arrow.stream). NegotiatedResponse, the
+            app's default response class, renders the route's result in the
+            format ResponseFormatMiddleware negotiated for the request. Arrow
+            is only offered for tabular results (a list of objects, or an
+            object, sent as one row); nested lists such as order_lines become
+            list<struct> columns.
+- encoding: Accept-Encoding picks zstd or gzip for bodies of at least
+            COMPRESSION_MIN_BYTES; the body is compressed chunk by chunk as
+            the app sends it, without buffering the whole response.
+
+Both depend on request headers, so responses carry Vary: Accept,
+Accept-Encoding, and ETags (services/etag_service.py) include the
+negotiated format and encoding.
+
+MessagePack and zstd need the msgpack and zstandard packages; without them
+those options are simply not offered.
+"""
+from contextvars import ContextVar
+from os import environ
+from typing import Any, Dict, List, Optional, Tuple
+import zlib
+
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_BYTES = int(environ.get("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Media type (and aliases) -> format, in server preference order for equal q-values
+_FORMATS = {
+    JSON: JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    ARROW: ARROW,
+}
+
+response_format: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def _parse_accept(header: Optional[str]) -> List[Tuple[str, float]]:
+    """(value, q) pairs of an Accept or Accept-Encoding header, highest q first, q=0 dropped."""
+    values = []
+    for position, item in enumerate((header or "").split(",")):
+        value, *params = [p.strip() for p in item.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            values.append((value.lower(), q, position))
+    values.sort(key=lambda v: (-v[1], v[2]))
+    return [(value, q) for value, q, _ in values]
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    for value, _ in _parse_accept(accept):
+        media_type = _FORMATS.get(value)
+        if media_type == MSGPACK and msgpack is None:
+            continue
+        if media_type is not None:
+            return media_type
+    return JSON
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    for value, _ in _parse_accept(accept_encoding):
+        if value == "zstd" and zstandard is not None:
+            return "zstd"
+        if value in ("gzip", "*"):
+            return "gzip"
+    return None
+
+
+def _render_arrow(content: Any) -> Optional[bytes]:
+    import pyarrow as pa
+
+    if isinstance(content, dict):
+        content = [content]
+    if not isinstance(content, list) or not all(isinstance(r, dict) for r in content):
+        return None
+    table = pa.Table.from_pylist(content)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSONResponse that renders MessagePack or Arrow IPC when the request negotiated them."""
+
+    def render(self, content: Any) -> bytes:
+        media_type = response_format.get()
+        if media_type == MSGPACK:
+            self.media_type = MSGPACK
+            return msgpack.packb(content, use_bin_type=True)
+        if media_type == ARROW:
+            body = _render_arrow(content)
+            if body is not None:
+                self.media_type = ARROW
+                return body
+        return super().render(content)
+
+
+def compressor(encoding: str):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class ResponseFormatMiddleware:
+    """
+    ASGI middleware that negotiates the response format for NegotiatedResponse
+    and compresses response bodies.
+    """
+
+    def __init__(self, app, min_bytes: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers: Dict[bytes, str] = {
+            key: value.decode("latin-1") for key, value in scope.get("headers", [])
+            if key in (b"accept", b"accept-encoding")
+        }
+        encoding = negotiate_encoding(headers.get(b"accept-encoding"))
+        token = response_format.set(negotiate_format(headers.get(b"accept")))
+        try:
+            await self.app(scope, receive, _CompressingSender(send, encoding, self.min_bytes))
+        finally:
+            response_format.reset(token)
+
+
+class _CompressingSender:
+    """Wraps `send`: holds the response start until it knows whether the body is large enough to compress."""
+
+    def __init__(self, send, encoding: Optional[str], min_bytes: int):
+        self._send = send
+        self._encoding = encoding
+        self._min_bytes = min_bytes
+        self._start: Optional[Dict[str, Any]] = None
+        self._buffer = b""
+        self._compressor = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            headers = [(k, v) for k, v in message.get("headers", []) if k != b"vary"]
+            vary = [v.decode("latin-1") for k, v in message.get("headers", []) if k == b"vary"]
+            headers.append((b"vary", ", ".join(vary + ["Accept", "Accept-Encoding"]).encode("latin-1")))
+            message = dict(message, headers=headers)
+            already_encoded = any(k == b"content-encoding" for k, _ in headers)
+            if self._encoding is None or already_encoded or message["status"] in (204, 304):
+                self._encoding = None
+                await self._send(message)
+            else:
+                self._start = message
+            return
+
+        if message["type"] != "http.response.body" or self._start is None and self._compressor is None:
+            await self._send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self._compressor is None:
+            self._buffer += body
+            if len(self._buffer) < self._min_bytes:
+                if more_body:
+                    return
+                # Too small to be worth compressing
+                await self._send(self._start)
+                self._start = None
+                await self._send({"type": "http.response.body", "body": self._buffer})
+                return
+            await self._start_compressing()
+            body, self._buffer = self._buffer, b""
+
+        chunk = self._compressor.compress(body)
+        if not more_body:
+            chunk += self._compressor.flush()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _start_compressing(self):
+        headers = [(k, v) for k, v in self._start["headers"] if k != b"content-length"]
+        headers.append((b"content-encoding", self._encoding.encode("latin-1")))
+        await self._send(dict(self._start, headers=headers))
+        self._start = None
+        self._compressor = compressor(self._encoding)
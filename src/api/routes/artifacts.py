@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Path
+from services.artifact_service import get_artifact, query_artifact
+from models.artifacts import ArtifactHandle, ArtifactQuery, ArtifactResult
+
+router = APIRouter(tags=["Artifacts"])
+
+@router.get(
+    "/{artifact_id}",
+    response_model=ArtifactHandle,
+    summary="Describe an artifact",
+    description="Retrieve the schema, row count, expiry and first rows of a spilled result.",
+)
+def describe_artifact(artifact_id: str = Path(..., description="Artifact ID from a spill response")):
+    try:
+        return get_artifact(artifact_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post(
+    "/{artifact_id}/query",
+    response_model=ArtifactResult,
+    summary="Query an artifact",
+    description=(
+        "Filter, group, aggregate and sort a spilled result without querying the warehouse again. "
+        "filters: [{column, op, value}] with op one of =, !=, <, <=, >, >=, in, not in, is null, is not null. "
+        "aggregates: {column: sum|mean|min|max|count|count_distinct|stddev}, output as <column>_<function> "
+        "plus row_count. order_by: output columns, '-' prefix for descending. At most 1000 rows are returned."
+    ),
+)
+def query(
+    query: ArtifactQuery,
+    artifact_id: str = Path(..., description="Artifact ID from a spill response"),
+):
+    try:
+        return query_artifact(artifact_id, query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
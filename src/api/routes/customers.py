@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional
-from services.customer_service import get_customers
+from fastapi import APIRouter, HTTPException, Path, Query, Response
+from typing import Dict, List, Optional
+from datetime import date
+from services.customer_service import get_customer_overviews, get_customer_profiles, get_customers, lookup_customers
 from models.customers import Customer
+from models.customer_overview import CustomerOverview
+from models.customer_profiles import CustomerProfiles
+from services.dimension_service import data_staleness
+from services.etag_service import conditional_get
 
 router = APIRouter(tags=["Customers"])
 
 @router.get(
     "/customers",
     response_model=List[Customer],
+    dependencies=[conditional_get("customers")],
     summary="Retrieve customers",
     description=(
         "Retrieve a list of customers with optional filters for industry and account manager. "
@@ -15,8 +21,109 @@ router = APIRouter(tags=["Customers"])
     ),
 )
 def list_customers(
+    response: Response,
     industry: Optional[str] = Query(None, description="Filter by industry"),
     account_manager: Optional[str] = Query(None, description="Filter by account manager"),
     limit: int = Query(100, description="Maximum number of customers to return")
 ):
-    return get_customers(industry, account_manager, limit)
\ No newline at end of file
+    customers = get_customers(industry, account_manager, limit)
+    # Seconds since the in-memory dimension data was last confirmed current
+    response.headers["X-Data-Staleness"] = f"{data_staleness('customers'):.0f}"
+    return customers
+
+@router.get(
+    "/lookup",
+    response_model=Dict[int, Optional[Customer]],
+    dependencies=[conditional_get("customers")],
+    summary="Retrieve customers by ID",
+    description=(
+        "Retrieve several customers in one call, keyed by customer ID in request order. "
+        "Unknown IDs map to null; duplicate IDs are returned once."
+    ),
+)
+def lookup_customers_by_id(
+    response: Response,
+    ids: List[str] = Query(..., description="Customer IDs (repeated or comma-separated, at most 500)"),
+):
+    try:
+        customers = lookup_customers(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["X-Data-Staleness"] = f"{data_staleness('customers'):.0f}"
+    return customers
+
+@router.get(
+    "/profiles",
+    response_model=CustomerProfiles,
+    dependencies=[conditional_get("sales_orders", "order_lines", "products", "customer_profiles")],
+    summary="Retrieve customer behavior profiles",
+    description=(
+        "Precomputed purchasing-behavior profiles: order count, revenue, average order value, average "
+        "discount, first and last order date, days between orders, revenue share per product category, "
+        "and RFM scores (1-5, recency/frequency/monetary quintiles over all customers) with a segment: "
+        "champions, loyal, new, promising, cant_lose, at_risk, hibernating or lost. "
+        "Prefer this over retrieving orders when ranking, segmenting or profiling customers. "
+        "Returns the top `limit` profiles by sort_by: revenue, order_count, average_order_value or recency."
+    ),
+)
+def customer_profiles(
+    customer_id: List[str] = Query([], description="Only these customer IDs (repeated or comma-separated, at most 500)"),
+    segment: Optional[str] = Query(None, description="Only customers in this segment"),
+    sort_by: str = Query("revenue", description="Rank by revenue, order_count, average_order_value or recency"),
+    limit: int = Query(20, gt=0, le=1000, description="Maximum number of profiles to return"),
+):
+    try:
+        return get_customer_profiles(customer_id, segment, sort_by, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+OVERVIEW_TABLES = ("customers", "products", "sales_orders", "order_lines")
+
+OVERVIEW_DESCRIPTION = (
+    "Profile, order totals, most recent orders, top products by revenue and revenue by product "
+    "category in one call, computed with concurrent queries. Prefer this over calling customers, "
+    "orders and products separately when analyzing a customer's purchasing behavior."
+)
+
+@router.get(
+    "/overview",
+    response_model=List[CustomerOverview],
+    dependencies=[conditional_get(*OVERVIEW_TABLES)],
+    summary="Retrieve overviews of several customers",
+    description=OVERVIEW_DESCRIPTION + " Accepts up to 50 customer IDs.",
+)
+def customer_overviews(
+    response: Response,
+    customer_id: List[str] = Query(..., description="Customer IDs (repeated or comma-separated, at most 50)"),
+    recent_orders: int = Query(5, ge=0, description="Number of most recent orders per customer"),
+    top_products: int = Query(5, ge=0, description="Number of top products per customer"),
+    start_date: Optional[date] = Query(None, description="Only consider orders on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only consider orders on or before this date"),
+):
+    try:
+        overviews = get_customer_overviews(customer_id, recent_orders, top_products, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["X-Data-Staleness"] = f"{data_staleness('customers'):.0f}"
+    return overviews
+
+@router.get(
+    "/{customer_id}/overview",
+    response_model=CustomerOverview,
+    dependencies=[conditional_get(*OVERVIEW_TABLES)],
+    summary="Retrieve a customer overview",
+    description=OVERVIEW_DESCRIPTION,
+)
+def customer_overview(
+    response: Response,
+    customer_id: int = Path(..., description="Customer ID"),
+    recent_orders: int = Query(5, ge=0, description="Number of most recent orders"),
+    top_products: int = Query(5, ge=0, description="Number of top products"),
+    start_date: Optional[date] = Query(None, description="Only consider orders on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only consider orders on or before this date"),
+):
+    overview = get_customer_overviews([customer_id], recent_orders, top_products, start_date, end_date)[0]
+    if overview.customer is None:
+        raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
+    response.headers["X-Data-Staleness"] = f"{data_staleness('customers'):.0f}"
+    return overview
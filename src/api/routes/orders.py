@@ -1,28 +1,154 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from datetime import date
-from services.order_service import get_orders_filtered
+from services.order_service import (
+    get_order_changes, get_orders_filtered, iter_order_changes, lookup_orders, spill_orders,
+)
+from change_feed import ChangeFeedNotSupportedError, ChangeFeedUnavailableError
 from models.orders import Order
+from models.order_changes import OrderChanges
+from models.artifacts import ArtifactHandle
+from artifacts import MAX_SPILL_ROWS
+from services.etag_service import conditional_get
 
 router = APIRouter(tags=["Orders"])
 
 @router.get(
     "/orders",
     response_model=List[Order],
+    dependencies=[conditional_get("sales_orders", "order_lines", "customers", "products")],
+    # Leave out customer/product unless they were asked for with expand
+    response_model_exclude_unset=True,
     summary="Retrieve orders with filters",
     description=(
-        "Retrieve a list of orders with nested order lines and products. "
-        "Supports filtering by customer, product, date range, and region."
+        "Retrieve a list of orders with nested order lines. "
+        "Supports filtering by customer, product, date range, and region. "
+        "Use expand=customer and/or expand=product to include customer and product details. "
+        "With approximate=true the orders come from a sample of all orders (faster for exploratory "
+        "questions); the X-Sample-Fraction header then gives the fraction sampled. The orders are "
+        "sampled rows, not estimates: no error bound is reported, so use /sales/summary?approximate=true "
+        "for totals or averages with bounds."
     ),
 )
 def list_orders(
+    response: Response,
     customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
     product_id: Optional[int] = Query(None, description="Filter by product ID"),
     start_date: Optional[date] = Query(None, description="Filter orders on or after this date"),
     end_date: Optional[date] = Query(None, description="Filter orders on or before this date"),
     region: Optional[str] = Query(None, description="Filter by region"),
     limit: int = Query(100, description="Maximum number of orders to return"),
+    expand: List[str] = Query([], description="Details to include: customer, product (repeated or comma-separated)"),
+    approximate: bool = Query(False, description="Read from a sample of orders instead of all orders"),
+):
+    try:
+        orders, fraction = get_orders_filtered(
+            customer_id, product_id, start_date, end_date, region, limit, expand, approximate
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fraction is not None:
+        response.headers["X-Sample-Fraction"] = f"{fraction:g}"
+    return orders
+
+@router.get(
+    "/lookup",
+    response_model=Dict[int, Optional[Order]],
+    dependencies=[conditional_get("sales_orders", "order_lines", "customers", "products")],
+    response_model_exclude_unset=True,
+    summary="Retrieve orders by ID",
+    description=(
+        "Retrieve several orders with their order lines in one call, keyed by order ID in request order. "
+        "Unknown IDs map to null; duplicate IDs are returned once. "
+        "Use expand=customer and/or expand=product to include customer and product details."
+    ),
+)
+def lookup_orders_by_id(
+    ids: List[str] = Query(..., description="Order IDs (repeated or comma-separated, at most 500)"),
+    expand: List[str] = Query([], description="Details to include: customer, product (repeated or comma-separated)"),
+):
+    try:
+        return lookup_orders(ids, expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get(
+    "/changes",
+    response_model=OrderChanges,
+    response_model_exclude_unset=True,
+    summary="Retrieve orders changed since a watermark",
+    description=(
+        "Retrieve the orders (with their order lines) inserted or updated after the `since` watermark, "
+        "and the IDs of orders deleted since, from the change history of sales_orders and order_lines. "
+        "Without `since` no changes are returned, only the current watermark to sync from after a full load. "
+        "Call again with the returned watermark while has_more is true; keep the last one for the next sync. "
+        "410 means the changes since the watermark are no longer available: resync from /orders. "
+        "503 means the tables keep no change history to read from."
+    ),
+)
+def list_order_changes(
+    since: Optional[str] = Query(None, description="Watermark returned by a previous call"),
+    limit: int = Query(500, gt=0, le=500, description="Maximum number of changed orders per page"),
+    expand: List[str] = Query([], description="Details to include: customer, product (repeated or comma-separated)"),
+):
+    try:
+        return get_order_changes(since, limit, expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChangeFeedUnavailableError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ChangeFeedNotSupportedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get(
+    "/changes/stream",
+    response_class=StreamingResponse,
+    summary="Stream all orders changed since a watermark",
+    description=(
+        "Like /orders/changes, but reads the changes once and streams every page as newline-delimited "
+        "JSON, one page per line; "
+        "the last line has has_more false and the watermark for the next sync."
+    ),
+)
+def stream_order_changes(
+    since: str = Query(..., description="Watermark returned by a previous call"),
+    page_size: int = Query(500, gt=0, le=500, description="Maximum number of changed orders per line"),
+    expand: List[str] = Query([], description="Details to include: customer, product (repeated or comma-separated)"),
 ):
-    return get_orders_filtered(customer_id, product_id, start_date, end_date, region, limit)
+    pages = iter_order_changes(since, page_size, expand)
+    try:
+        # Fail with a status code before streaming if the first page does
+        first = next(pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChangeFeedUnavailableError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ChangeFeedNotSupportedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
+    def lines():
+        yield first
+        yield from pages
 
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get(
+    "/orders/artifact",
+    response_model=ArtifactHandle,
+    summary="Spill order lines to a queryable artifact",
+    description=(
+        "Write up to `limit` order lines matching the filters (one flat row per line) to a Parquet "
+        "artifact and return a small handle with its schema, row count and first rows. Use this instead "
+        "of retrieving many orders, then analyze the artifact with /artifacts/{artifact_id}/query."
+    ),
+)
+def spill_order_lines(
+    customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
+    product_id: Optional[int] = Query(None, description="Filter by product ID"),
+    start_date: Optional[date] = Query(None, description="Filter orders on or after this date"),
+    end_date: Optional[date] = Query(None, description="Filter orders on or before this date"),
+    region: Optional[str] = Query(None, description="Filter by region"),
+    limit: int = Query(100000, gt=0, le=MAX_SPILL_ROWS, description="Maximum number of order lines to write (at most 500,000)"),
+):
+    return spill_orders(customer_id, product_id, start_date, end_date, region, limit)
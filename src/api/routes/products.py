@@ -1,18 +1,46 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional
-from services.product_service import get_products_filtered
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Dict, List, Optional
+from services.product_service import get_products_filtered, lookup_products
 from models.products import Product
+from services.dimension_service import data_staleness
+from services.etag_service import conditional_get
 
 router = APIRouter(tags=["Products"])
 
 @router.get(
     "/products",
     response_model=List[Product],
+    dependencies=[conditional_get("products")],
     summary="Retrieve products",
     description="Retrieve a list of products with optional category filtering.",
 )
 def list_products(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by product category"),
     limit: int = Query(100, description="Maximum number of products to return"),
 ):
-    return get_products_filtered(category, limit)
\ No newline at end of file
+    products = get_products_filtered(category, limit)
+    # Seconds since the in-memory dimension data was last confirmed current
+    response.headers["X-Data-Staleness"] = f"{data_staleness('products'):.0f}"
+    return products
+
+@router.get(
+    "/lookup",
+    response_model=Dict[int, Optional[Product]],
+    dependencies=[conditional_get("products")],
+    summary="Retrieve products by ID",
+    description=(
+        "Retrieve several products in one call, keyed by product ID in request order. "
+        "Unknown IDs map to null; duplicate IDs are returned once."
+    ),
+)
+def lookup_products_by_id(
+    response: Response,
+    ids: List[str] = Query(..., description="Product IDs (repeated or comma-separated, at most 500)"),
+):
+    try:
+        products = lookup_products(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["X-Data-Staleness"] = f"{data_staleness('products'):.0f}"
+    return products
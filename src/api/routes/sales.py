@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import date
+from services.sales_service import get_sales_summary
+from models.sales_summary import SalesSummary
+from sampling import MAX_RELATIVE_ERROR
+from services.etag_service import conditional_get
+
+router = APIRouter(tags=["Sales"])
+
+@router.get(
+    "/summary",
+    response_model=SalesSummary,
+    dependencies=[conditional_get("sales_orders", "order_lines", "products", "rollups")],
+    summary="Retrieve aggregated sales metrics",
+    description=(
+        "Retrieve revenue, quantity, line and order counts and revenue per order (avg_order_value) "
+        "grouped by any of customer_id, region, product_id and product_category, per day, per month "
+        "or in total. Prefer this over retrieving individual orders when answering aggregate questions. "
+        "With approximate=true the metrics, avg_order_value included, are estimated from a sample of "
+        "orders, with 95% error bounds, unless the bounds would be wider than max_relative_error."
+    ),
+)
+def sales_summary(
+    group_by: List[str] = Query([], description="Dimensions to group by: customer_id, region, product_id, product_category"),
+    grain: str = Query("total", description="Time grain: day, month or total"),
+    start_date: Optional[date] = Query(None, description="Include orders on or after this date"),
+    end_date: Optional[date] = Query(None, description="Include orders on or before this date"),
+    customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
+    product_id: Optional[int] = Query(None, description="Filter by product ID"),
+    region: Optional[str] = Query(None, description="Filter by region"),
+    product_category: Optional[str] = Query(None, description="Filter by product category"),
+    limit: int = Query(100, description="Maximum number of rows to return"),
+    approximate: bool = Query(False, description="Estimate from a sample of orders instead of all orders"),
+    max_relative_error: float = Query(
+        MAX_RELATIVE_ERROR, gt=0, description="Largest acceptable 95% error bound relative to the estimated revenue"
+    ),
+):
+    try:
+        return get_sales_summary(
+            group_by, grain, start_date, end_date, customer_id, product_id, region, product_category, limit,
+            approximate, max_relative_error,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
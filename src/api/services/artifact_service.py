@@ -0,0 +1,21 @@
+# app/services/artifact_service.py
+from artifacts import ArtifactStore
+from models.artifacts import ArtifactHandle, ArtifactQuery, ArtifactResult
+
+# Parquet artifacts of large results, shared by the worker processes of this host
+artifact_store = ArtifactStore()
+
+def get_artifact(artifact_id: str) -> ArtifactHandle:
+    return ArtifactHandle(**artifact_store.describe(artifact_id))
+
+def query_artifact(artifact_id: str, query: ArtifactQuery) -> ArtifactResult:
+    result = artifact_store.query(
+        artifact_id,
+        filters=[f.model_dump() for f in query.filters],
+        group_by=query.group_by,
+        aggregates=query.aggregates,
+        columns=query.columns,
+        order_by=query.order_by,
+        limit=query.limit,
+    )
+    return ArtifactResult(**result)
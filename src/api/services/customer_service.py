@@ -1,12 +1,37 @@
-from typing import List, Optional
-from db import run_query
+from typing import Any, Dict, List, Optional
+from datetime import date
+from os import environ
+from db import DB_POOL_SIZE, run_query
+from customer_overview import CustomerOverview as OverviewBuilder
+from customer_profiles import CustomerProfileStore, ProfileRequest, profile_rows
+from lookups import lookup_dimension
 from models.customers import Customer
+from models.customer_overview import CustomerOverview
+from models.customer_profiles import CustomerProfile, CustomerProfiles
+from services.dimension_service import dimension_cache
+
+# Runs the overview sections as concurrent warehouse queries
+overview_builder = OverviewBuilder(run_query, dimension_cache, DB_POOL_SIZE)
+
+# Precomputed RFM profiles of every customer, refreshed by customer_profiles.py
+profile_store = CustomerProfileStore(
+    run_query, enabled=environ.get("CUSTOMER_PROFILES_ENABLED", "true").lower() == "true"
+)
 
 def get_customers(
     customer_industry: Optional[str] = None,
     customer_account_manager: Optional[str] = None,
     limit: int = 100
 ) -> List[Customer]:
+    customers = dimension_cache.table("customers")
+    if customers is not None:
+        rows = customers.lookup(
+            limit=limit,
+            industry=customer_industry or None,
+            account_manager=customer_account_manager or None,
+        )
+        return [Customer(**r) for r in rows]
+
     filters = []
     params = {}
 
@@ -45,3 +70,36 @@ def get_customers(
         )
         for r in rows
     ]
+
+
+def lookup_customers(ids: List[str]) -> Dict[int, Optional[Customer]]:
+    """Customers keyed by ID in request order; None for unknown IDs."""
+    customers = lookup_dimension(dimension_cache, "customers", ids)
+    return {i: Customer(**r) if r is not None else None for i, r in customers.items()}
+
+
+def get_customer_overviews(
+    customer_ids: List[Any],
+    recent_orders: int = 5,
+    top_products: int = 5,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[CustomerOverview]:
+    overviews = overview_builder.get(customer_ids, recent_orders, top_products, start_date, end_date)
+    return [CustomerOverview(**o) for o in overviews]
+
+
+def get_customer_profiles(
+    customer_ids: Optional[List[str]] = None,
+    segment: Optional[str] = None,
+    sort_by: str = "revenue",
+    limit: int = 20
+) -> CustomerProfiles:
+    request = ProfileRequest(customer_ids=customer_ids or [], segment=segment, sort_by=sort_by, limit=limit)
+    sql, params, source = profile_store.plan_profiles(request)
+    profiles = profile_rows(run_query(sql, params))
+    return CustomerProfiles(
+        source=source,
+        as_of=profiles[0]["as_of"] if profiles else None,
+        profiles=[CustomerProfile(**p) for p in profiles],
+    )
@@ -0,0 +1,21 @@
+# app/services/dimension_service.py
+from db import run_query
+from dimensions import DimensionCache
+from snapshot_store import SnapshotStore
+from os import environ
+
+# Set by gunicorn.conf.py so worker processes share one copy of the dimension
+# tables, loaded from the warehouse by a single elected worker
+snapshot_dir = environ.get("SNAPSHOT_DIR")
+
+dimension_cache = DimensionCache(
+    run_query,
+    enabled=environ.get("DIMENSION_CACHE_ENABLED", "true").lower() == "true",
+    store=SnapshotStore(snapshot_dir) if snapshot_dir else None,
+)
+
+def data_staleness(name: str) -> float:
+    """Age in seconds of the data served for a dimension table (0 when read from the warehouse)."""
+    if dimension_cache.table(name) is None:
+        return 0.0
+    return dimension_cache.staleness(name) or 0.0
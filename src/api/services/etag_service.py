@@ -0,0 +1,66 @@
+# app/services/etag_service.py
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from data_versions import etag_matches
+from response_formats import negotiate_encoding, negotiate_format
+from services.sales_service import data_versions
+from os import environ
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How long clients and proxies may reuse a response before revalidating it
+CACHE_MAX_AGE_SECONDS = int(environ.get("CACHE_MAX_AGE_SECONDS", 0))
+
+_api_fingerprint = None
+
+def _fingerprint(app) -> str:
+    """
+    Hash of the routes and the JSON schemas of their response models, so ETags
+    change when response shapes do. Unlike app.openapi() this does not depend
+    on settings such as SERVER_URL; if it still fails, responses get no ETag.
+    """
+    global _api_fingerprint
+    if _api_fingerprint is None:
+        try:
+            routes = [
+                (route.path, sorted(route.methods), TypeAdapter(route.response_model).json_schema())
+                for route in app.routes
+                if isinstance(route, APIRoute) and route.response_model is not None
+            ]
+            document = json.dumps(routes, sort_keys=True, default=str)
+            _api_fingerprint = hashlib.sha256(document.encode()).hexdigest()
+        except Exception:
+            logger.exception("Could not fingerprint the API; responses get no ETag")
+            _api_fingerprint = ""
+    return _api_fingerprint
+
+def conditional_get(*tables: str):
+    """
+    Route dependency: sets an ETag computed from the data versions of `tables`,
+    the request URL and the negotiated format and encoding, and answers a matching If-None-Match with 304 before
+    the route runs its query.
+    """
+    def check(request: Request, response: Response):
+        fingerprint = _fingerprint(request.app)
+        etag = fingerprint and data_versions.etag(
+            tables,
+            fingerprint,
+            request.url.path,
+            request.url.query,
+            # Each representation needs its own strong ETag
+            negotiate_format(request.headers.get("accept")),
+            negotiate_encoding(request.headers.get("accept-encoding")) or "identity",
+        )
+        if not etag:
+            response.headers["Cache-Control"] = "no-cache"
+            return
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE_SECONDS}, must-revalidate"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(check)
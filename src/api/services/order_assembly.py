@@ -0,0 +1,103 @@
+# app/services/order_assembly.py
+from itertools import compress, repeat
+from operator import is_not, itemgetter, ne
+from typing import Any, Dict, List, Optional, Sequence
+
+# Output field -> result column, for the order header and each order line
+ORDER_FIELDS = {
+    "order_id": "order_id",
+    "customer_id": "customer_id",
+    "order_date": "order_date",
+    "ship_date": "ship_date",
+    "sales_channel": "sales_channel",
+    "region": "region",
+}
+LINE_FIELDS = {
+    "order_line_id": "order_line_id",
+    "product_id": "product_id",
+    "quantity": "quantity",
+    "unit_price": "line_unit_price",
+    "discount": "discount",
+    "line_total": "line_total",
+}
+
+
+def _runs(keys: Sequence[Any]) -> List[int]:
+    """Start offsets of each run of equal consecutive keys, plus the end offset."""
+    n = len(keys)
+    if not n:
+        return [0]
+    changes = compress(range(1, n), map(ne, keys[1:], keys[:-1]))
+    return [0, *changes, n]
+
+
+def _getter(indexes: List[int]):
+    """itemgetter that always returns a tuple, even for a single index."""
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+def assemble_orders(
+    rows: Sequence[Sequence[Any]],
+    columns: Sequence[str],
+    order_fields: Optional[Sequence[str]] = None,
+    line_fields: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Builds nested orders (plain dicts shaped like models.orders.Order) from flat
+    order/line rows, in the order each order ID first appears. Rows sorted, or
+    at least grouped, by order_id are used as they are; others are grouped
+    with one stable sort first.
+
+    Order boundaries are found by comparing neighbouring order IDs, headers are
+    read from the first row of each run and each order's lines are sliced out
+    of one list built with C-level itemgetter/map pipelines, so there is no
+    per-row key lookup, Python-level loop or model construction.
+    Rows with a NULL order_line_id (orders without lines) contribute no line.
+
+    Args:
+        rows: Result rows (tuples) in the order of `columns`.
+        columns: Result column names.
+        order_fields: Order fields to return (default: all of ORDER_FIELDS).
+        line_fields: Line fields to return (default: all of LINE_FIELDS); an
+            empty list omits order_lines entirely.
+    """
+    if not rows:
+        return []
+
+    order_fields = list(ORDER_FIELDS if order_fields is None else order_fields)
+    line_fields = list(LINE_FIELDS if line_fields is None else line_fields)
+    position = {c: i for i, c in enumerate(columns)}
+
+    order_id = itemgetter(position["order_id"])
+    order_ids = list(map(order_id, rows))
+    bounds = _runs(order_ids)
+    if len(bounds) - 1 != len(set(order_ids)):
+        # Not grouped by order_id: group the rows (stably), orders in first-seen order
+        rank = {k: i for i, k in enumerate(dict.fromkeys(order_ids))}
+        rows = sorted(rows, key=lambda row: rank[order_id(row)])
+        order_ids = list(map(order_id, rows))
+        bounds = _runs(order_ids)
+    starts = bounds[:-1]
+
+    header_rows = map(rows.__getitem__, starts)
+    header_getter = _getter([position[ORDER_FIELDS[f]] for f in order_fields])
+    orders = list(map(dict, map(zip, repeat(order_fields), map(header_getter, header_rows))))
+
+    if not line_fields:
+        return orders
+
+    line_getter = _getter([position[LINE_FIELDS[f]] for f in line_fields])
+    lines = list(map(dict, map(zip, repeat(line_fields), map(line_getter, rows))))
+    has_line = list(map(is_not, map(itemgetter(position["order_line_id"]), rows), repeat(None)))
+    all_lines = all(has_line)
+
+    for order, start, end in zip(orders, starts, bounds[1:]):
+        order_lines = lines[start:end]
+        if not all_lines:
+            order_lines = list(compress(order_lines, has_line[start:end]))
+        order["order_lines"] = order_lines
+
+    return orders
@@ -1,50 +1,91 @@
 # app/services/order_service.py
 from db import run_query
-from models.orders import Order
-from models.order_lines import OrderLine
-from models.products import Product
-from typing import Optional
+from sampling import sample_clause, sample_fraction
+from lookups import keyed, order_lookup_sql, parse_ids
+from services.order_assembly import assemble_orders
+from services.dimension_service import dimension_cache
+from services.artifact_service import artifact_store
+from change_feed import ChangeFeed
+from models.artifacts import ArtifactHandle
+from models.order_changes import OrderChanges
+from typing import Dict, List, Optional
 from datetime import date
 
-def _map_orders(rows):
-    """Helper: transform SQL rows into nested Order objects."""
-    orders_dict = {}
-
-    for r in rows:
-        order_id = r["order_id"]
-
-        if order_id not in orders_dict:
-            orders_dict[order_id] = Order(
-                order_id=r["order_id"],
-                customer_id=r["customer_id"],
-                order_date=r["order_date"],
-                ship_date=r["ship_date"],
-                sales_channel=r["sales_channel"],
-                region=r["region"],
-                order_lines=[]
-            )
-
-        if r["order_line_id"] is not None:
-          
-            orders_dict[order_id].order_lines.append(OrderLine(
-                order_line_id=r["order_line_id"],
-                quantity=r["quantity"],
-                discount=r["discount"],
-                unit_price=r["line_unit_price"],
-                line_total=r["line_total"],
-                product_id=r["product_id"]
-            ))
-
-    return list(orders_dict.values())
+# Result column -> SQL expression. The SELECT list and the column names passed
+# to the assembler are both built from this, so they cannot drift apart.
+ORDER_COLUMNS = {
+    "order_id": "o.order_id",
+    "customer_id": "o.customer_id",
+    "order_date": "o.order_date",
+    "ship_date": "o.ship_date",
+    "sales_channel": "o.sales_channel",
+    "region": "o.region",
+    "order_line_id": "l.order_line_id",
+    "product_id": "l.product_id",
+    "quantity": "l.quantity",
+    "line_unit_price": "l.unit_price",
+    "discount": "l.discount",
+    "line_total": "l.line_total",
+}
 
-def get_orders_filtered(
-    customer_id: Optional[int] = None,
-    product_id: Optional[int] = None,
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    region: Optional[str] = None,
-    limit: int = 100
+# Arrow types of ORDER_COLUMNS, for spilling an empty result
+ORDER_COLUMN_TYPES = {
+    "order_id": "int64",
+    "customer_id": "int64",
+    "order_date": "date32",
+    "ship_date": "date32",
+    "sales_channel": "string",
+    "region": "string",
+    "order_line_id": "int64",
+    "product_id": "int64",
+    "quantity": "int64",
+    "line_unit_price": "float64",
+    "discount": "float64",
+    "line_total": "float64",
+}
+
+# expand= option -> dimension table; enrichment is done in-process from the
+# dimension cache instead of joining customers/products in the warehouse
+EXPANSIONS = {
+    "customer": "customers",
+    "product": "products",
+}
+
+# Orders changed since a watermark, from the Delta change data feed
+change_feed = ChangeFeed(run_query)
+
+def parse_expand(expand: Optional[List[str]]) -> List[str]:
+    """Accepts repeated and/or comma-separated values, e.g. ["product,customer"]."""
+    values = [v.strip() for item in expand or [] for v in item.split(",") if v.strip()]
+    unknown = sorted(set(values) - set(EXPANSIONS))
+    if unknown:
+        raise ValueError(f"Unknown expand value(s) {unknown}; expected any of {sorted(EXPANSIONS)}")
+    return sorted(set(values))
+
+def _expand_orders(orders, expand: List[str]):
+    if "customer" in expand:
+        customers = dimension_cache.get_many(EXPANSIONS["customer"], (o["customer_id"] for o in orders))
+        for order in orders:
+            order["customer"] = customers.get(order["customer_id"])
+    if "product" in expand:
+        products = dimension_cache.get_many(
+            EXPANSIONS["product"], (l["product_id"] for o in orders for l in o.get("order_lines", ()))
+        )
+        for order in orders:
+            for line in order.get("order_lines", ()):
+                line["product"] = products.get(line["product_id"])
+    return orders
+
+def _order_rows(
+    customer_id: Optional[int],
+    product_id: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    region: Optional[str],
+    row_limit: int,
+    approximate: bool = False
 ):
+    """(rows with the ORDER_COLUMNS, sample_fraction or None), ordered by order_id."""
     filters = []
     params = {}
 
@@ -54,51 +95,109 @@ def get_orders_filtered(
     if product_id:
         filters.append("l.product_id = %(product_id)s")
         params["product_id"] = product_id
-    if start_date:
-        filters.append("o.order_date >= %(start_date)s")
-        params["start_date"] = start_date
-    if end_date:
-        filters.append("o.order_date <= %(end_date)s")
-        params["end_date"] = end_date
     if region:
         filters.append("o.region = %(region)s")
         params["region"] = region
 
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-
-    sql = f"""
-    SELECT 
-        o.order_id AS order_id,
-        o.customer_id AS customer_id,
-        o.order_date AS order_date,
-        o.ship_date AS ship_date,
-        o.sales_channel AS sales_channel,
-        o.region AS region,
-        l.order_line_id AS order_line_id,
-        l.product_id AS product_id,
-        l.quantity AS quantity,
-        l.unit_price AS line_unit_price,
-        l.discount AS discount,
-        l.line_total AS line_total,
-        p.product_name AS product_name,
-        p.product_category AS product_category,
-        p.unit_price AS unit_price,
-        p.unit_cost AS unit_cost
-    FROM sales_orders o
-    LEFT JOIN order_lines l ON o.order_id = l.order_id
-    LEFT JOIN products p ON l.product_id = p.product_id
-    {where_clause}
-    ORDER BY o.order_id
-    LIMIT %(limit)s
+    select_list = ",\n            ".join(f"{expr} AS {name}" for name, expr in ORDER_COLUMNS.items())
+    params["limit"] = row_limit
+
+    def build_query(range_start: Optional[date], range_end: Optional[date], sample: str = ""):
+        range_filters = list(filters)
+        range_params = dict(params)
+        if range_start:
+            range_filters.append("o.order_date >= %(start_date)s")
+            range_params["start_date"] = range_start
+        if range_end:
+            range_filters.append("o.order_date <= %(end_date)s")
+            range_params["end_date"] = range_end
+
+        where_clause = f"WHERE {' AND '.join(range_filters)}" if range_filters else ""
+
+        sql = f"""
+        SELECT
+            {select_list}
+        FROM sales_orders {sample} o
+        LEFT JOIN order_lines l ON o.order_id = l.order_id
+        {where_clause}
+        ORDER BY o.order_id
+        LIMIT %(limit)s
+        """
+        return sql, range_params
+
+    # Ordered by order_id, so this is not split by date (see the MCP server's scatter_gather.py):
+    # partitions could not stop early and would scan more than one query
+    def fetch(sample: str = ""):
+        return run_query(*build_query(start_date, end_date, sample))
+
+    fraction = None
+    if approximate:
+        rows = fetch(sample_clause())
+        if len(rows) >= params["limit"]:
+            fraction = sample_fraction()
+    if fraction is None:
+        rows = fetch()
+    return rows, fraction
+
+def get_orders_filtered(
+    customer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    region: Optional[str] = None,
+    limit: int = 100,
+    expand: Optional[List[str]] = None,
+    approximate: bool = False
+):
     """
-    params["limit"] = limit * 5  # adjust to return enough rows for nested order lines
+    Returns (orders, sample_fraction). With `approximate` the orders are read
+    from a sample of sales_orders and sample_fraction is the fraction sampled;
+    if the sample cannot fill `limit` the exact query runs and it is None.
+    """
+    expand = parse_expand(expand)
+    # adjust to return enough rows for nested order lines
+    rows, fraction = _order_rows(customer_id, product_id, start_date, end_date, region, limit * 5, approximate)
+    return _expand_orders(assemble_orders(rows, list(ORDER_COLUMNS)), expand), fraction
+
+def lookup_orders(ids: List[str], expand: Optional[List[str]] = None) -> Dict[int, Optional[dict]]:
+    """Orders with their lines keyed by order ID in request order (one query); None for unknown IDs."""
+    expand = parse_expand(expand)
+    ids = parse_ids(ids)
+    if not ids:
+        return {}
+    rows = run_query(*order_lookup_sql(ids, ORDER_COLUMNS))
+    orders = _expand_orders(assemble_orders(rows, list(ORDER_COLUMNS)), expand)
+    return keyed(ids, {o["order_id"]: o for o in orders})
 
-    rows = run_query(sql, params)
+def get_order_changes(since: Optional[str] = None, limit: int = 500, expand: Optional[List[str]] = None) -> OrderChanges:
+    """One page of the orders inserted, updated or deleted after the `since` watermark."""
+    return _order_changes(*change_feed.changes(since, limit), parse_expand(expand))
 
-    # If run_query returns list of tuples, map columns explicitly:
-    columns = ["order_id","customer_id","order_date","ship_date","sales_channel","region",
-               "order_line_id","product_id","quantity","line_unit_price","discount","line_total",
-               "product_name","product_category","product_unit_price"]
-    rows_dicts = [dict(zip(columns, r)) for r in rows]
+def iter_order_changes(since: str, page_size: int = 500, expand: Optional[List[str]] = None):
+    """Every page of changes after `since`, one OrderChanges JSON line per page; the changes are read once."""
+    expand = parse_expand(expand)
+    for ids, watermark, has_more in change_feed.pages(since, page_size):
+        yield _order_changes(ids, watermark, has_more, expand).model_dump_json(exclude_unset=True) + "\n"
 
-    return _map_orders(rows_dicts)
+def _order_changes(ids: List[int], watermark: str, has_more: bool, expand: List[str]) -> OrderChanges:
+    orders = lookup_orders(ids, expand) if ids else {}
+    return OrderChanges(
+        orders=[o for o in orders.values() if o is not None],
+        # Changed but gone now
+        deleted_order_ids=[i for i, o in orders.items() if o is None],
+        watermark=watermark,
+        has_more=has_more,
+    )
+
+def spill_orders(
+    customer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    region: Optional[str] = None,
+    limit: int = 100000
+) -> ArtifactHandle:
+    """Writes up to `limit` order lines (one flat row per line) to an artifact and returns its handle."""
+    rows, _ = _order_rows(customer_id, product_id, start_date, end_date, region, limit)
+    columns = list(ORDER_COLUMNS)
+    return ArtifactHandle(**artifact_store.spill([dict(zip(columns, r)) for r in rows], "orders", ORDER_COLUMN_TYPES))
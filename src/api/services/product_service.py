@@ -1,9 +1,16 @@
 # app/services/product_service.py
 from db import run_query
-from typing import List, Optional
+from typing import Dict, List, Optional
+from lookups import lookup_dimension
 from models.products import Product
+from services.dimension_service import dimension_cache
 
 def get_products_filtered(category: Optional[str] = None, limit: int = 100) -> List[Product]:
+    products = dimension_cache.table("products")
+    if products is not None:
+        rows = products.lookup(limit=limit, product_category=category or None)
+        return [Product(**r) for r in rows]
+
     filters = []
     params = {}
 
@@ -38,3 +45,8 @@ def get_products_filtered(category: Optional[str] = None, limit: int = 100) -> L
         )
         for r in rows
     ]
+
+def lookup_products(ids: List[str]) -> Dict[int, Optional[Product]]:
+    """Products keyed by ID in request order; None for unknown IDs."""
+    products = lookup_dimension(dimension_cache, "products", ids)
+    return {i: Product(**r) if r is not None else None for i, r in products.items()}
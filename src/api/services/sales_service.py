@@ -0,0 +1,89 @@
+# app/services/sales_service.py
+from db import run_query
+from data_versions import DataVersions
+from rollups import (
+    METRICS, RollupCatalog, SummaryRequest, approximate_summary_rows, approximate_summary_sql, with_averages,
+)
+from sampling import MAX_RELATIVE_ERROR, SAMPLE_PERCENT, sample_fraction
+from snapshot_store import SharedResults
+from models.sales_summary import SalesSummary, SalesSummaryRow
+from services.dimension_service import dimension_cache, snapshot_dir
+from typing import List, Optional
+from datetime import date
+from os import environ
+import os
+
+rollup_catalog = RollupCatalog(
+    run_query, enabled=environ.get("SALES_ROLLUPS_ENABLED", "true").lower() == "true"
+)
+
+# Versions of the tables behind each response (ETags, shared answers)
+data_versions = DataVersions(run_query, dimension_cache, rollup_catalog)
+
+# Tables a summary is computed from
+SUMMARY_TABLES = ("sales_orders", "order_lines", "products", "rollups")
+
+# With several worker processes (gunicorn.conf.py sets SNAPSHOT_DIR) an exact
+# summary computed by one worker is served to the others from a shared file
+shared_results = SharedResults(os.path.join(snapshot_dir, "results")) if snapshot_dir else None
+
+def _summary_rows(sql: str, params: dict):
+    if shared_results is None:
+        return run_query(sql, params)
+    versions = [data_versions.version(t) for t in SUMMARY_TABLES]
+    # Without known versions a shared answer could be stale
+    if None in versions:
+        return run_query(sql, params)
+    key = shared_results.key(sql, repr(sorted(params.items())), *versions)
+    rows = shared_results.get(key)
+    if rows is None:
+        rows = run_query(sql, params)
+        shared_results.put(key, rows)
+    return rows
+
+def get_sales_summary(
+    group_by: Optional[List[str]] = None,
+    grain: str = "total",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    region: Optional[str] = None,
+    product_category: Optional[str] = None,
+    limit: int = 100,
+    approximate: bool = False,
+    max_relative_error: float = MAX_RELATIVE_ERROR,
+) -> SalesSummary:
+    request = SummaryRequest(
+        group_by=group_by or [],
+        grain=grain,
+        start_date=start_date,
+        end_date=end_date,
+        customer_id=customer_id,
+        product_id=product_id,
+        region=region,
+        product_category=product_category,
+        limit=limit,
+    )
+    if approximate:
+        request.validate()
+        sql, params = approximate_summary_sql(request, SAMPLE_PERCENT)
+        fraction = sample_fraction(SAMPLE_PERCENT)
+        estimated = approximate_summary_rows(run_query(sql, params), request, fraction, max_relative_error)
+        # Otherwise the sample is too small for the requested precision
+        if estimated is not None:
+            return SalesSummary(
+                source="sample",
+                rows=[SalesSummaryRow(**r) for r in estimated],
+                approximate=True,
+                sample_fraction=fraction,
+            )
+
+    sql, params, source = rollup_catalog.plan_summary(request)
+    rows = _summary_rows(sql, params)
+
+    columns = (["period"] if grain != "total" else []) + list(request.group_by) + list(METRICS)
+    return SalesSummary(
+        source=source,
+        rows=[SalesSummaryRow(**with_averages(dict(zip(columns, r)))) for r in rows],
+    )
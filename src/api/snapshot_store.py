@@ -0,0 +1,181 @@
+# snapshot_store.py
+"""
+File-backed snapshots of read-mostly tables, shared by the worker processes
+of one host (see gunicorn.conf.py).
+
+One process is elected writer by holding an exclusive flock on a lock file;
+it loads from the warehouse and publishes each table as an Arrow IPC file,
+written to a temporary name and moved into place with os.replace, so readers
+never see a partial file. Refreshes that find the data unchanged only touch
+the file, so its mtime is the time the data was last confirmed current.
+
+The other processes poll the file: a new inode means a new snapshot, which
+they memory-map (pages are shared through the OS page cache, not copied per
+process) and read. If the writer exits its lock is released and the next
+process to poll takes over.
+
+Tables are identified by name, so any small read-mostly result can be
+shared this way; DimensionCache uses it for customers and products.
+
+SharedResults shares query answers (e.g. /sales/summary) the same way, except
+that any process may publish: an answer is keyed by its query and the data
+versions it reads, so it never needs refreshing and the first worker to
+compute it saves the others the warehouse query.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no election, every process loads for itself
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# How often readers look for a newer snapshot
+POLL_SECONDS = float(os.environ.get("SNAPSHOT_POLL_SECONDS", 5))
+
+# Answers kept by SharedResults; the least recently published are removed first
+SHARED_RESULTS_MAX_ENTRIES = int(os.environ.get("SHARED_RESULTS_MAX_ENTRIES", 1000))
+
+
+class SnapshotStore:
+    def __init__(self, directory: str, poll_seconds: float = POLL_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self._lock_file = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.arrow")
+
+    def is_writer(self) -> bool:
+        """True if this process holds (or just acquired) the writer lock."""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.directory, "writer.lock"), "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Kept open for the life of the process; the OS releases it on exit
+        self._lock_file = lock_file
+        logger.info("Process %s is the snapshot writer for %s", os.getpid(), self.directory)
+        return True
+
+    def publish(self, name: str, rows: List[Dict[str, Any]], columns: List[str], version: Optional[int]):
+        import pyarrow as pa
+
+        table = pa.Table.from_pydict(
+            {c: [r[c] for r in rows] for c in columns},
+            metadata={"version": "" if version is None else str(version)},
+        )
+        path = self._path(name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+
+    def touch(self, name: str):
+        """Marks the current snapshot as confirmed current."""
+        try:
+            os.utime(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def token(self, name: str) -> Optional[Tuple[int, int]]:
+        """Identifies the current snapshot file (changes on every publish), or None if there is none."""
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since the snapshot was published or last confirmed current."""
+        try:
+            return max(0.0, time.time() - os.stat(self._path(name)).st_mtime)
+        except FileNotFoundError:
+            return None
+
+    def load(self, name: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """(rows, version) of the current snapshot, read through a memory map."""
+        import pyarrow as pa
+
+        with pa.memory_map(self._path(name), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            rows = table.to_pylist()
+        version = (table.schema.metadata or {}).get(b"version", b"").decode()
+        return rows, int(version) if version else None
+
+
+class SharedResults:
+    """
+    Query results shared through Arrow IPC files in `directory`, one per key.
+    Callers build keys with `key()` from everything the answer depends on,
+    including the data versions, so a stored answer is never stale.
+    """
+
+    def __init__(self, directory: str, max_entries: int = SHARED_RESULTS_MAX_ENTRIES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_entries = max_entries
+        self._published = 0
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.arrow")
+
+    def get(self, key: str) -> Optional[List[Tuple]]:
+        """The stored rows (as tuples), or None if no process has published the answer."""
+        import pyarrow as pa
+
+        try:
+            with pa.memory_map(self._path(key), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+        return list(zip(*(column.to_pylist() for column in table.columns)))
+
+    def put(self, key: str, rows: Sequence[Sequence[Any]]):
+        import pyarrow as pa
+
+        columns = list(zip(*rows)) if rows else []
+        table = pa.table({f"c{i}": list(values) for i, values in enumerate(columns)})
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+        self._published += 1
+        if self._published % 50 == 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".arrow"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process evicted it first
+                pass
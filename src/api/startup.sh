@@ -1 +1 @@
-python -m uvicorn main:app --host 0.0.0.0
\ No newline at end of file
+python -m gunicorn -c gunicorn.conf.py main:app
\ No newline at end of file
@@ -0,0 +1,70 @@
+# tests/conftest.py
+"""
+The API tests run offline: db.py uses the SQLite backend (sqlite_backend.py)
+on a copy of data/sales_data.csv loaded by scripts/sales_bulk_load.py, so no
+warehouse is needed.
+
+Run from src/api: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(API_DIR))
+sys.path[:0] = [API_DIR, os.path.join(REPO_DIR, "src", "shared"), os.path.join(REPO_DIR, "scripts")]
+
+# Read when db.py is imported; the tests must never reach a real warehouse
+os.environ["DB_BACKEND"] = "sqlite"
+
+SALES_CSV = os.path.join(REPO_DIR, "data", "sales_data.csv")
+
+
+def load_sales_db(path: str, source_csv: str = SALES_CSV) -> str:
+    """Loads a sales export (default data/sales_data.csv) into a new SQLite database at `path`."""
+    from sales_bulk_load import SalesBulkLoader, SqliteSink
+
+    SalesBulkLoader(source_csv, SqliteSink(path)).load()
+    return path
+
+
+def sqlite_query(path: str):
+    """A run_query for the SQLite database at `path`, without the connection pool of db.py."""
+    from sqlite_backend import connect
+
+    connection = connect(path)
+
+    def run_query(query, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(query, params or {})
+            return cursor.fetchall()
+
+    return run_query
+
+
+@pytest.fixture(scope="session")
+def sales_db(tmp_path_factory):
+    path = load_sales_db(str(tmp_path_factory.mktemp("db") / "sales.db"))
+    os.environ["SQLITE_PATH"] = path
+    return path
+
+
+@pytest.fixture(scope="session")
+def generated_db(tmp_path_factory):
+    """About 20,000 order lines of 60 customers from scripts/sales_data_generator.py."""
+    from sales_data_generator import SalesDataGenerator
+
+    directory = tmp_path_factory.mktemp("generated")
+    SalesDataGenerator(lines=20_000, output_dir=str(directory), customers=60, products=30, days=365, workers=1).generate()
+    (source_csv,) = directory.glob("*.csv")
+    return load_sales_db(str(directory / "sales.db"), str(source_csv))
+
+
+@pytest.fixture(scope="session")
+def client(sales_db):
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
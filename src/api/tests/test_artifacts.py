@@ -0,0 +1,35 @@
+from services.order_service import ORDER_COLUMNS
+
+
+def test_spill_and_query_order_lines(client):
+    handle = client.get("/orders/orders/artifact", params={"customer_id": 1, "limit": 50}).json()
+    assert handle["row_count"] == 50
+    assert [c["name"] for c in handle["columns"]] == list(ORDER_COLUMNS)
+    assert len(handle["preview"]) == 5
+
+    result = client.post(
+        f"/artifacts/{handle['artifact_id']}/query",
+        json={"group_by": ["product_id"], "aggregates": {"quantity": "sum"}},
+    )
+    assert result.status_code == 200, result.text
+    assert result.json()["rows"]
+
+
+def test_spill_without_matching_rows_keeps_the_columns(client):
+    response = client.get("/orders/orders/artifact", params={"customer_id": 999_999})
+    assert response.status_code == 200, response.text
+    handle = response.json()
+    assert handle["row_count"] == 0
+    assert [c["name"] for c in handle["columns"]] == list(ORDER_COLUMNS)
+    assert handle["preview"] == []
+
+    result = client.post(
+        f"/artifacts/{handle['artifact_id']}/query",
+        json={"filters": [{"column": "quantity", "op": ">", "value": 5}], "aggregates": {"line_total": "sum"}},
+    )
+    assert result.status_code == 200, result.text
+    assert result.json()["row_count"] <= 1
+
+
+def test_spill_limit_is_bounded(client):
+    assert client.get("/orders/orders/artifact", params={"limit": 10_000_000}).status_code == 422
@@ -0,0 +1,182 @@
+import json
+import re
+
+import pytest
+
+from change_feed import (
+    ChangeFeed,
+    ChangeFeedNotSupportedError,
+    ChangeFeedUnavailableError,
+    decode_watermark,
+    encode_watermark,
+)
+from resilience import FakeConnection, WarehouseUnavailableError
+
+# Order IDs changed in each Delta version of each table
+HISTORY = {
+    "sales_orders": {1: [10, 11], 2: [12], 3: [13, 10]},
+    "order_lines": {1: [10], 2: [14, 15], 3: [], 4: [16, 11]},
+}
+CURRENT = {table: max(versions) for table, versions in HISTORY.items()}
+START = {"sales_orders": 1, "order_lines": 1}
+
+_DESCRIBE = re.compile(r"DESCRIBE HISTORY (\w+)")
+_CHANGES = re.compile(r"table_changes\('(\w+)', (\d+), (\d+)\)")
+
+
+class Warehouse:
+    """Answers DESCRIBE HISTORY and table_changes() queries from HISTORY through a FakeConnection."""
+
+    def __init__(self, error=None, history_error=None):
+        self.connection = FakeConnection(respond=self.respond)
+        self.error = error
+        self.history_error = history_error
+
+    @property
+    def change_reads(self):
+        return sum(1 for query, _ in self.connection.executed if "table_changes" in query)
+
+    def respond(self, query, params):
+        describe = _DESCRIBE.search(query)
+        if describe:
+            if self.history_error:
+                raise self.history_error
+            return [(CURRENT[describe.group(1)],)]
+        if self.error:
+            raise self.error
+        ids = {
+            order_id
+            for table, start, end in _CHANGES.findall(query)
+            for version in range(int(start), int(end) + 1)
+            for order_id in HISTORY[table].get(version, [])
+        }
+        ids = sorted(i for i in ids if params.get("after") is None or i > params["after"])
+        return [(i,) for i in ids[:params.get("limit")]]
+
+    def run_query(self, query, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+
+def sync(feed, since, limit):
+    ids, pages = [], 0
+    while True:
+        page, since, has_more = feed.changes(since, limit)
+        ids += page
+        pages += 1
+        if not has_more:
+            return ids, since, pages
+
+
+def test_watermark_round_trip():
+    assert decode_watermark(encode_watermark(CURRENT)) == (CURRENT, None, None)
+    assert decode_watermark(encode_watermark(START, CURRENT, 12)) == (START, CURRENT, 12)
+
+
+@pytest.mark.parametrize("token", ["", "not a token", encode_watermark({"sales_orders": 1})])
+def test_invalid_watermarks(token):
+    with pytest.raises(ValueError, match="Invalid watermark"):
+        decode_watermark(token)
+
+
+def test_without_since_returns_the_current_watermark():
+    warehouse = Warehouse()
+    ids, watermark, has_more = ChangeFeed(warehouse.run_query).changes(None, 10)
+    assert (ids, decode_watermark(watermark), has_more) == ([], (CURRENT, None, None), False)
+    assert warehouse.change_reads == 0
+
+
+def test_changes_after_the_watermark_in_pages():
+    feed = ChangeFeed(Warehouse().run_query)
+    ids, watermark, has_more = feed.changes(encode_watermark(START), 2)
+    assert (ids, has_more) == ([10, 11], True)
+    assert decode_watermark(watermark) == (START, CURRENT, 11)
+
+    ids, watermark, pages = sync(feed, encode_watermark(START), 2)
+    # Version 1 of each table was delivered before
+    assert ids == [10, 11, 12, 13, 14, 15, 16]
+    assert pages == 4
+    assert decode_watermark(watermark) == (CURRENT, None, None)
+    assert feed.changes(watermark, 2) == ([], watermark, False)
+
+
+def test_pages_read_the_changes_once():
+    warehouse = Warehouse()
+    feed = ChangeFeed(warehouse.run_query)
+    pages = list(feed.pages(encode_watermark(START), 2))
+    assert warehouse.change_reads == 1
+    # The same pages and tokens as paging with changes()
+    since, expected = encode_watermark(START), []
+    while True:
+        expected.append(feed.changes(since, 2))
+        since, has_more = expected[-1][1:]
+        if not has_more:
+            break
+    assert pages == expected
+    assert [has_more for _, _, has_more in pages] == [True, True, True, False]
+
+
+def test_pages_without_changes():
+    pages = list(ChangeFeed(Warehouse().run_query).pages(encode_watermark(CURRENT), 2))
+    assert pages == [([], encode_watermark(CURRENT), False)]
+
+
+def test_expired_watermark_is_unavailable():
+    warehouse = Warehouse(error=RuntimeError("[DELTA_MISSING_CHANGE_DATA] Error getting change data for range [1, 4]"))
+    with pytest.raises(ChangeFeedUnavailableError, match="resync"):
+        ChangeFeed(warehouse.run_query).changes(encode_watermark(START), 10)
+
+
+def test_tables_without_history_are_not_supported():
+    warehouse = Warehouse(history_error=RuntimeError("DESCRIBE HISTORY is only supported for Delta tables"))
+    with pytest.raises(ChangeFeedNotSupportedError, match="sales_orders"):
+        ChangeFeed(warehouse.run_query).changes(None, 10)
+
+
+def test_warehouse_outages_are_not_reclassified():
+    warehouse = Warehouse(history_error=WarehouseUnavailableError("circuit open", retry_after=5))
+    with pytest.raises(WarehouseUnavailableError):
+        ChangeFeed(warehouse.run_query).changes(None, 10)
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    import services.order_service as order_service
+
+    warehouse = Warehouse()
+    monkeypatch.setattr(order_service, "change_feed", ChangeFeed(warehouse.run_query))
+    return warehouse
+
+
+def changed_ids(page):
+    return sorted([o["order_id"] for o in page["orders"]] + page["deleted_order_ids"])
+
+
+def test_changes_route(client, feed):
+    response = client.get("/orders/changes", params={"since": encode_watermark(START), "limit": 3})
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert (changed_ids(page), page["has_more"]) == ([10, 11, 12], True)
+
+
+def test_stream_route(client, feed):
+    response = client.get("/orders/changes/stream", params={"since": encode_watermark(START), "page_size": 3})
+    assert response.status_code == 200, response.text
+    pages = [json.loads(line) for line in response.text.splitlines()]
+    assert [changed_ids(p) for p in pages] == [[10, 11, 12], [13, 14, 15], [16]]
+    assert decode_watermark(pages[-1]["watermark"]) == (CURRENT, None, None)
+    assert feed.change_reads == 1
+
+
+@pytest.mark.parametrize("path", ["/orders/changes", "/orders/changes/stream"])
+def test_error_statuses(client, feed, path):
+    assert client.get(path, params={"since": "not a token"}).status_code == 400
+    feed.error = RuntimeError("VersionNotFoundException: version 1 was vacuumed")
+    assert client.get(path, params={"since": encode_watermark(START)}).status_code == 410
+
+
+def test_sqlite_backend_has_no_change_feed(client):
+    response = client.get("/orders/changes")
+    assert response.status_code == 503
+    assert "no Delta version history" in response.json()["detail"]
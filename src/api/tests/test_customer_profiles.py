@@ -0,0 +1,178 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from customer_profiles import (
+    PROFILE_TABLE, CustomerProfileStore, ProfileRequest, profile_rows, profile_select,
+)
+from rollups import WATERMARK_TABLE
+from tests.conftest import sqlite_query
+
+# Decimal places the profile SQL rounds each column to
+ROUNDED = {"revenue": 2, "average_discount": 4, "average_interval_days": 1, "interval_stddev_days": 1}
+
+
+def ntile(position: int, count: int, buckets: int = 5) -> int:
+    """SQL NTILE for the 0-based `position` of `count` ordered rows."""
+    size, larger = divmod(count, buckets)
+    if position < larger * (size + 1):
+        return position // (size + 1) + 1
+    return larger + (position - larger * (size + 1)) // size + 1
+
+
+def expected_segment(r: int, f: int) -> str:
+    if r >= 4 and f >= 4:
+        return "champions"
+    if r >= 3 and f >= 3:
+        return "loyal"
+    if r >= 4:
+        return "new"
+    if r == 3:
+        return "promising"
+    if f >= 4:
+        return "cant_lose"
+    if f == 3:
+        return "at_risk"
+    if r == 2:
+        return "hibernating"
+    return "lost"
+
+
+@pytest.fixture(scope="module")
+def expected(generated_db):
+    """Profiles computed with pandas from the raw tables."""
+    with sqlite3.connect(generated_db) as conn:
+        lines = pd.read_sql(
+            "SELECT o.customer_id, o.order_id, o.order_date, l.line_total, l.quantity, l.discount, p.product_category "
+            "FROM sales_orders o JOIN order_lines l ON o.order_id = l.order_id "
+            "LEFT JOIN products p ON l.product_id = p.product_id",
+            conn,
+        )
+    orders = lines.groupby(["customer_id", "order_id", "order_date"], as_index=False)["line_total"].sum()
+    orders = orders.sort_values(["customer_id", "order_date", "order_id"])
+    orders["interval"] = pd.to_datetime(orders["order_date"]).groupby(orders["customer_id"]).diff().dt.days
+
+    profiles = {}
+    for customer_id, group in orders.groupby("customer_id"):
+        customer_lines = lines[lines["customer_id"] == customer_id]
+        revenue = customer_lines["line_total"].sum()
+        mix = customer_lines.groupby("product_category")["line_total"].sum() / revenue
+        profiles[customer_id] = {
+            "order_count": len(group),
+            "line_count": len(customer_lines),
+            "revenue": revenue,
+            "average_discount": customer_lines["discount"].mean(),
+            "last_order_date": group["order_date"].max(),
+            "average_interval_days": None if len(group) < 2 else group["interval"].mean(),
+            "interval_stddev_days": None if len(group) < 3 else group["interval"].std(),
+            "max_interval_days": None if len(group) < 2 else int(group["interval"].max()),
+            "category_mix": mix.round(4).to_dict(),
+        }
+    return profiles
+
+
+def all_profiles(store, **request):
+    sql, params, source = store.plan_profiles(ProfileRequest(limit=100_000, **request))
+    return profile_rows(store._run_query(sql, params)), source
+
+
+@pytest.fixture(scope="module")
+def store(generated_db):
+    return CustomerProfileStore(sqlite_query(generated_db))
+
+
+def test_raw_profiles_match_pandas(store, expected):
+    profiles, source = all_profiles(store)
+    assert source == "raw"
+    assert {p["customer_id"] for p in profiles} == set(expected)
+    for profile in profiles:
+        wanted = expected[profile["customer_id"]]
+        for column, value in wanted.items():
+            if column == "category_mix":
+                assert profile[column] == pytest.approx(value, abs=1e-4)
+            elif column in ROUNDED and value is not None:
+                assert profile[column] == pytest.approx(value, abs=0.5 * 10 ** -ROUNDED[column] + 1e-9), column
+            else:
+                assert profile[column] == value, column
+
+
+def test_rfm_scores_and_segments(store, expected):
+    profiles, _ = all_profiles(store)
+    count = len(profiles)
+    as_of = max(p["last_order_date"] for p in expected.values())
+    scores = {
+        "recency_score": sorted(expected, key=lambda c: (expected[c]["last_order_date"], c)),
+        "frequency_score": sorted(expected, key=lambda c: (expected[c]["order_count"], c)),
+        "monetary_score": sorted(expected, key=lambda c: (expected[c]["revenue"], c)),
+    }
+    for profile in profiles:
+        customer_id = profile["customer_id"]
+        assert profile["as_of"] == as_of
+        assert profile["recency_days"] == (
+            pd.Timestamp(as_of) - pd.Timestamp(profile["last_order_date"])
+        ).days
+        for score, ranked in scores.items():
+            assert profile[score] == ntile(ranked.index(customer_id), count), score
+        assert profile["segment"] == expected_segment(profile["recency_score"], profile["frequency_score"])
+
+
+def test_filters_and_top_n(store):
+    profiles, _ = all_profiles(store)
+    by_id = {p["customer_id"]: p for p in profiles}
+
+    top, _ = all_profiles(store, sort_by="revenue")
+    sql, params, _ = store.plan_profiles(ProfileRequest(sort_by="revenue", limit=5))
+    assert [p["customer_id"] for p in profile_rows(store._run_query(sql, params))] == [
+        p["customer_id"] for p in top[:5]
+    ]
+    assert [p["revenue"] for p in top] == sorted((p["revenue"] for p in profiles), reverse=True)
+
+    recent, _ = all_profiles(store, sort_by="recency")
+    assert [p["recency_days"] for p in recent] == sorted(p["recency_days"] for p in profiles)
+
+    segment = profiles[0]["segment"]
+    in_segment, _ = all_profiles(store, segment=segment)
+    assert {p["customer_id"] for p in in_segment} == {c for c, p in by_id.items() if p["segment"] == segment}
+
+    # Scores rank all customers, not only the requested ones
+    some = sorted(by_id)[:3]
+    selected, _ = all_profiles(store, customer_ids=[",".join(map(str, some))])
+    assert {p["customer_id"]: p for p in selected} == {c: by_id[c] for c in some}
+
+
+def test_invalid_requests(store):
+    for request in (ProfileRequest(segment="vip"), ProfileRequest(sort_by="name"), ProfileRequest(limit=0)):
+        with pytest.raises(ValueError):
+            store.plan_profiles(request)
+
+
+def test_stored_profiles_are_served_from_the_table(generated_db, store):
+    # What build() leaves behind; SQLite has no CREATE OR REPLACE or MERGE
+    run_query = sqlite_query(generated_db)
+    run_query(f"CREATE TABLE {PROFILE_TABLE} AS {profile_select()}")
+    run_query(f"CREATE TABLE {WATERMARK_TABLE} (rollup_name TEXT, watermark_date TEXT, refreshed_at TEXT)")
+    run_query(
+        f"INSERT INTO {WATERMARK_TABLE} SELECT %(name)s, MAX(last_order_date), NULL FROM {PROFILE_TABLE}",
+        {"name": PROFILE_TABLE},
+    )
+    try:
+        stored = CustomerProfileStore(run_query)
+        served, source = all_profiles(stored)
+        assert source == PROFILE_TABLE
+        raw, _ = all_profiles(store)
+        assert served == raw
+    finally:
+        run_query(f"DROP TABLE {PROFILE_TABLE}")
+        run_query(f"DROP TABLE {WATERMARK_TABLE}")
+
+
+def test_profiles_route(client):
+    response = client.get("/customers/profiles", params={"limit": 3, "sort_by": "order_count"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["source"] == "raw" and len(body["profiles"]) == 3
+    assert [p["order_count"] for p in body["profiles"]] == sorted(
+        (p["order_count"] for p in body["profiles"]), reverse=True
+    )
+    assert client.get("/customers/profiles", params={"segment": "vip"}).status_code == 400
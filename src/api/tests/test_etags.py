@@ -0,0 +1,114 @@
+import re
+
+import pytest
+
+from services.etag_service import _fingerprint
+
+
+def test_data_routes_work_without_server_url(client, monkeypatch):
+    monkeypatch.delenv("SERVER_URL", raising=False)
+    # A route with an ETag dependency
+    response = client.get("/sales/summary", params={"group_by": "region"})
+    assert response.status_code == 200
+    assert response.json()["rows"]
+
+
+def test_fingerprint_does_not_need_openapi(client):
+    def broken_openapi():
+        raise ValueError("servers.0.url: Input should be a valid string")
+
+    client.app.openapi = broken_openapi
+    try:
+        import services.etag_service as etag_service
+
+        etag_service._api_fingerprint = None
+        fingerprint = _fingerprint(client.app)
+        assert fingerprint
+        etag_service._api_fingerprint = None
+        assert _fingerprint(client.app) == fingerprint
+    finally:
+        del client.app.openapi
+
+
+SUMMARY = ("/sales/summary", {"group_by": "region", "grain": "month"})
+
+
+@pytest.fixture
+def versions(client, monkeypatch):
+    """Fixed table versions, as the SQLite backend has none."""
+    import services.etag_service as etag_service
+
+    versions = {"sales_orders": "7", "order_lines": "7", "products": "3", "rollups": "[]"}
+    monkeypatch.setattr(etag_service.data_versions, "version", versions.get)
+    return versions
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """The SQL of every summary query run."""
+    import services.sales_service as sales_service
+
+    queries = []
+    run_query = sales_service.run_query
+
+    def counting_run_query(sql, params=None):
+        queries.append(sql)
+        return run_query(sql, params)
+
+    monkeypatch.setattr(sales_service, "run_query", counting_run_query)
+    return queries
+
+
+def get(client, headers=None):
+    path, params = SUMMARY
+    return client.get(path, params=params, headers=headers or {})
+
+
+def test_versioned_response_has_a_strong_etag(client, versions):
+    response = get(client)
+    assert response.status_code == 200
+    assert re.fullmatch(r'"[0-9a-f]{32}"', response.headers["etag"])
+    assert response.headers["cache-control"] == "public, max-age=0, must-revalidate"
+
+
+def test_matching_if_none_match_skips_the_query(client, versions, queries):
+    etag = get(client).headers["etag"]
+    assert queries
+    run = len(queries)
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = get(client, {"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    assert len(queries) == run
+
+    assert get(client, {"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_each_representation_has_its_own_etag(client, versions):
+    etags = {
+        get(client, headers).headers["etag"]
+        for headers in (
+            {"Accept": "application/json", "Accept-Encoding": "identity"},
+            {"Accept": "application/json", "Accept-Encoding": "gzip"},
+            {"Accept": "application/vnd.apache.arrow.stream", "Accept-Encoding": "identity"},
+        )
+    }
+    assert len(etags) == 3
+
+
+def test_new_data_version_changes_the_etag(client, versions):
+    etag = get(client).headers["etag"]
+    versions["order_lines"] = "8"
+    response = get(client, {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_unversioned_tables_get_no_etag(client, versions):
+    versions["sales_orders"] = None
+    response = get(client)
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,74 @@
+from datetime import date
+import random
+
+import pytest
+
+from bench_order_assembly import _legacy, make_rows
+from services.order_assembly import LINE_FIELDS, ORDER_FIELDS, assemble_orders
+from services.order_service import ORDER_COLUMNS
+
+COLUMNS = list(ORDER_COLUMNS)
+
+
+def expected(rows, order_fields=None, line_fields=None):
+    """The legacy mapper's orders as the route serializes them (response_model_exclude_unset)."""
+    orders = [o.model_dump(exclude_unset=True) for o in _legacy(rows, COLUMNS)]
+    selected = []
+    for order in orders:
+        result = {f: order[f] for f in (ORDER_FIELDS if order_fields is None else order_fields)}
+        if line_fields is None or line_fields:
+            result["order_lines"] = [
+                {f: line[f] for f in (LINE_FIELDS if line_fields is None else line_fields)}
+                for line in order["order_lines"]
+            ]
+        selected.append(result)
+    return selected
+
+
+def test_sorted_rows():
+    rows = make_rows(5_000)
+    assert assemble_orders(rows, COLUMNS) == expected(rows)
+
+
+def test_unsorted_rows():
+    rows = make_rows(2_000, seed=11)
+    random.Random(3).shuffle(rows)
+    assert assemble_orders(rows, COLUMNS) == expected(rows)
+
+
+def test_grouped_rows_not_sorted_by_order_id():
+    rows = make_rows(2_000, seed=13)
+    rows.sort(key=lambda r: (r[2], r[0]))  # by order date, as the scatter-gather path returns them
+    assert assemble_orders(rows, COLUMNS) == expected(rows)
+
+
+def test_rows_with_null_lines():
+    rows = make_rows(1_000, seed=17)
+    # NULL lines within orders that have lines, and an order without lines at the end
+    rows = [r[:6] + (None,) * 6 if i % 7 == 0 else r for i, r in enumerate(rows)]
+    rows.append((99_999_999,) + rows[-1][1:6] + (None,) * 6)
+    orders = assemble_orders(rows, COLUMNS)
+    assert orders == expected(rows)
+    assert orders[-1]["order_lines"] == []
+
+
+def test_only_orders_without_lines():
+    rows = [(1, 5, date(2025, 1, 1), date(2025, 1, 2), "Web", "NA") + (None,) * 6]
+    assert assemble_orders(rows, COLUMNS) == expected(rows)
+
+
+def test_empty():
+    assert assemble_orders([], COLUMNS) == []
+
+
+@pytest.mark.parametrize("order_fields, line_fields", [
+    (["order_id", "order_date"], None),
+    (None, ["product_id", "quantity"]),
+    (["order_id"], ["line_total"]),
+    (["order_id", "region"], []),
+])
+def test_selected_fields(order_fields, line_fields):
+    rows = make_rows(2_000, seed=19)
+    random.Random(5).shuffle(rows)
+    assembled = assemble_orders(rows, COLUMNS, order_fields=order_fields, line_fields=line_fields)
+    assert assembled == expected(rows, order_fields, line_fields)
@@ -0,0 +1,19 @@
+from datetime import date
+
+
+def test_orders_by_id_run_as_one_query(sales_db, monkeypatch):
+    from services import order_service
+
+    queries = []
+    run_query = order_service.run_query
+
+    def counting_run_query(sql, params):
+        queries.append(sql)
+        return run_query(sql, params)
+
+    monkeypatch.setattr(order_service, "run_query", counting_run_query)
+    orders, _ = order_service.get_orders_filtered(start_date=date(2024, 9, 1), end_date=date(2025, 9, 30), limit=20)
+    assert len(queries) == 1
+    assert "ORDER BY o.order_id" in queries[0]
+    assert [o["order_id"] for o in orders] == sorted(o["order_id"] for o in orders)
+    assert len(orders) > 0
@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+from resilience import (
+    CircuitBreaker,
+    FakeConnection,
+    FaultInjector,
+    InjectedFault,
+    Resilience,
+    WarehouseUnavailableError,
+    deadline,
+)
+
+
+def executor(connections):
+    """An execute(query, params) like db.py's, taking the next of `connections` for each statement."""
+    connections = iter(connections)
+
+    def execute(query, params):
+        with next(connections).cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    return execute
+
+
+def faulty(injector, rows=((1,),), count=10):
+    return [injector.wrap(lambda: FakeConnection(rows=rows, columns=["n"]))() for _ in range(count)]
+
+
+def test_transient_error_is_retried_within_the_deadline():
+    injector = FaultInjector(error_rate=1.0)
+    execute = executor(faulty(injector))
+    resilience = Resilience(attempts=3, base_seconds=0.01)
+
+    def fail_once(query, params):
+        try:
+            return execute(query, params)
+        finally:
+            injector.error_rate = 0.0
+
+    assert resilience.run(fail_once, "SELECT 1", {}) == [(1,)]
+    stats = resilience.stats()
+    assert stats["transient_failures"] == 1
+    assert stats["retries"] == 1
+    assert stats["breaker"] == "closed"
+
+
+def test_non_transient_error_is_raised_at_once():
+    def syntax_error(query, params):
+        raise ValueError("[PARSE_SYNTAX_ERROR] Syntax error at or near 'FORM'")
+
+    connection = FakeConnection(respond=syntax_error)
+    resilience = Resilience(attempts=3, base_seconds=0.01)
+    with pytest.raises(ValueError):
+        resilience.run(executor([connection] * 3), "SELECT * FORM t", {})
+    assert len(connection.executed) == 1
+    assert resilience.stats()["retries"] == 0
+    assert resilience.breaker.state == "closed"
+
+
+def test_no_retry_starts_after_the_deadline():
+    connections = faulty(FaultInjector(error_rate=1.0))
+    resilience = Resilience(attempts=5, base_seconds=0.01)
+    with deadline(0):
+        with pytest.raises(WarehouseUnavailableError) as raised:
+            resilience.run(executor(connections), "SELECT 1", {})
+    assert isinstance(raised.value.__cause__, InjectedFault)
+    stats = resilience.stats()
+    assert stats["retries"] == 0
+    assert stats["retries_exhausted"] == 1
+
+
+def hedging_resilience():
+    resilience = Resilience(hedge=True, hedge_percentile=50, hedge_min_samples=1, max_workers=4)
+    resilience.latency.add(0.02)
+    return resilience
+
+
+def slow_then_fast(slow_seconds):
+    (slow,) = faulty(FaultInjector(slow_rate=1.0, slow_seconds=slow_seconds), rows=[("primary",)], count=1)
+    return [slow, FakeConnection(rows=[("hedge",)], columns=["n"])]
+
+
+def test_hedge_wins_on_a_slow_read():
+    resilience = hedging_resilience()
+    started = time.monotonic()
+    assert resilience.run(executor(slow_then_fast(1.0)), "SELECT * FROM sales_orders", {}) == [("hedge",)]
+    assert time.monotonic() - started < 0.5
+    stats = resilience.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_writes_are_never_hedged():
+    resilience = hedging_resilience()
+    started = time.monotonic()
+    rows = resilience.run(executor(slow_then_fast(0.2)), "INSERT INTO rollup_watermarks VALUES (1)", {})
+    assert rows == [("primary",)]
+    assert time.monotonic() - started >= 0.2
+    assert resilience.stats()["hedged"] == 0
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    injector = FaultInjector(error_rate=1.0)
+    connection = FakeConnection(rows=[(1,)], columns=["n"])
+    execute = executor([injector.wrap(lambda: connection)() for _ in range(10)])
+    resilience = Resilience(attempts=1, breaker=CircuitBreaker(failures=2, reset_seconds=0.2))
+
+    for _ in range(2):
+        with pytest.raises(WarehouseUnavailableError):
+            resilience.run(execute, "SELECT 1", {})
+    assert resilience.breaker.state == "open"
+
+    # Open: rejected without reaching the warehouse
+    executed = len(connection.executed)
+    with pytest.raises(WarehouseUnavailableError) as raised:
+        resilience.run(execute, "SELECT 1", {})
+    assert raised.value.retry_after >= 1
+    assert len(connection.executed) == executed
+    assert resilience.stats()["breaker_rejections"] == 1
+
+    # Half-open: a failed trial opens the circuit again
+    time.sleep(0.25)
+    assert resilience.breaker.state == "half_open"
+    with pytest.raises(WarehouseUnavailableError):
+        resilience.run(execute, "SELECT 1", {})
+    assert resilience.breaker.state == "open"
+
+    # Half-open: a successful trial closes it
+    time.sleep(0.25)
+    injector.error_rate = 0.0
+    assert resilience.run(execute, "SELECT 1", {}) == [(1,)]
+    assert resilience.breaker.state == "closed"
@@ -0,0 +1,141 @@
+import gzip
+import json
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+import msgpack
+import pyarrow as pa
+import pytest
+import zstandard
+
+import response_formats
+from response_formats import (
+    ARROW, COMPRESSION_MIN_BYTES, JSON, MSGPACK, NegotiatedResponse, ResponseFormatMiddleware,
+    negotiate_encoding, negotiate_format,
+)
+
+ROWS = [{"order_id": i, "region": "NA", "lines": [{"product_id": i, "quantity": 2}]} for i in range(100)]
+
+
+@pytest.fixture(scope="module")
+def formats_client():
+    app = FastAPI(default_response_class=NegotiatedResponse)
+    app.add_middleware(ResponseFormatMiddleware)
+
+    @app.get("/rows")
+    def rows():
+        return ROWS
+
+    @app.get("/ids")
+    def ids():
+        return [1, 2, 3]
+
+    @app.get("/text")
+    def text(size: int):
+        # JSON adds the two quotes
+        return NegotiatedResponse("x" * (size - 2), headers={"Vary": "Origin"})
+
+    @app.get("/status/{status}")
+    def status(status: int):
+        return Response(status_code=status, headers={"ETag": '"v1"'})
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("text/html", JSON),
+    ("*/*", JSON),
+    ("application/msgpack", MSGPACK),
+    ("application/x-msgpack", MSGPACK),
+    (ARROW, ARROW),
+    # Highest q wins, then the formats_client's order
+    ("application/json;q=0.5, application/msgpack", MSGPACK),
+    ("application/msgpack;q=0.2, application/json;q=0.9", JSON),
+    ("application/msgpack, application/json", MSGPACK),
+    ("application/msgpack;q=0, text/html", JSON),
+    ("application/msgpack;q=oops", JSON),
+])
+def test_negotiate_format(accept, expected):
+    assert negotiate_format(accept) == expected
+
+
+def test_msgpack_is_not_offered_without_the_package(monkeypatch):
+    monkeypatch.setattr(response_formats, "msgpack", None)
+    assert negotiate_format("application/msgpack") == JSON
+    assert negotiate_format("application/msgpack, application/vnd.apache.arrow.stream;q=0.5") == ARROW
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("br", None),
+    ("gzip", "gzip"),
+    ("*", "gzip"),
+    ("zstd", "zstd"),
+    ("gzip, zstd", "gzip"),
+    ("gzip;q=0.5, zstd", "zstd"),
+    ("gzip;q=0, br", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_zstd_is_not_offered_without_the_package(monkeypatch):
+    monkeypatch.setattr(response_formats, "zstandard", None)
+    assert negotiate_encoding("zstd") is None
+    assert negotiate_encoding("zstd, gzip;q=0.5") == "gzip"
+
+
+def test_msgpack_body(formats_client):
+    response = formats_client.get("/rows", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == ROWS
+
+
+def test_arrow_body(formats_client):
+    response = formats_client.get("/rows", headers={"Accept": ARROW})
+    assert response.headers["content-type"] == ARROW
+    assert pa.ipc.open_stream(response.content).read_all().to_pylist() == ROWS
+
+
+def test_non_tabular_bodies_fall_back_to_json_for_arrow(formats_client):
+    response = formats_client.get("/ids", headers={"Accept": ARROW})
+    assert response.headers["content-type"] == JSON
+    assert response.json() == [1, 2, 3]
+
+
+def raw(client, path, encoding, **params):
+    with client.stream("GET", path, params=params, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("encoding, decompress", [
+    ("gzip", gzip.decompress),
+    ("zstd", lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body)),
+])
+def test_bodies_at_the_threshold_are_compressed(formats_client, encoding, decompress):
+    response, body = raw(formats_client, "/text", encoding, size=COMPRESSION_MIN_BYTES)
+    assert response.headers["content-encoding"] == encoding
+    assert "content-length" not in response.headers
+    assert decompress(body) == json.dumps("x" * (COMPRESSION_MIN_BYTES - 2)).encode()
+
+
+def test_bodies_below_the_threshold_are_not_compressed(formats_client):
+    response, body = raw(formats_client, "/text", "gzip", size=COMPRESSION_MIN_BYTES - 1)
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(body) == COMPRESSION_MIN_BYTES - 1
+
+
+@pytest.mark.parametrize("size", [10, COMPRESSION_MIN_BYTES])
+def test_vary_is_merged(formats_client, size):
+    response = formats_client.get("/text", params={"size": size}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get_list("vary") == ["Origin, Accept, Accept-Encoding"]
+
+
+@pytest.mark.parametrize("status", [204, 304])
+def test_empty_statuses_pass_through_uncompressed(formats_client, status):
+    response, body = raw(formats_client, f"/status/{status}", "gzip")
+    assert response.status_code == status
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert body == b""
@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import load_sales_db, sqlite_query
+from rollups import GRAINS, ROLLUPS, WATERMARK_TABLE, RollupCatalog, SummaryRequest
+
+WATERMARK = date(2025, 3, 8)
+
+GROUP_BYS = [
+    [],
+    ["customer_id"],
+    ["region"],
+    ["product_id"],
+    ["product_category"],
+    ["customer_id", "region"],
+    ["product_category", "region"],
+    ["customer_id", "product_id"],
+]
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    """
+    Rollups built up to and including WATERMARK (as `build` leaves them), with
+    orders that arrived afterwards on the watermark day and the day after.
+    """
+    run_query = sqlite_query(load_sales_db(str(tmp_path_factory.mktemp("rollups") / "sales.db")))
+    catalog = RollupCatalog(run_query)
+
+    # SQLite has no CREATE OR REPLACE or MERGE, so build and set watermarks directly
+    run_query(f"CREATE TABLE {WATERMARK_TABLE} (rollup_name TEXT, watermark_date TEXT, refreshed_at TEXT)")
+    for rollup in ROLLUPS:
+        select = catalog._rollup_select(rollup, "WHERE o.order_date <= %(watermark)s")
+        run_query(f"CREATE TABLE {rollup.name} AS {select}", {"watermark": WATERMARK.isoformat()})
+        run_query(
+            f"INSERT INTO {WATERMARK_TABLE} VALUES (%(name)s, %(watermark)s, NULL)",
+            {"name": rollup.name, "watermark": WATERMARK.isoformat()},
+        )
+
+    late_orders = [
+        (9_000_000_001, 1, WATERMARK, "NA", [(0, 3, 50.0), (1, 2, 15.0)]),
+        (9_000_000_002, 3, WATERMARK, "EU", [(2, 1, 8.5)]),
+        (9_000_000_003, 1, WATERMARK + timedelta(days=1), "NA", [(0, 4, 50.0)]),
+    ]
+    line_id = 9_000_000_000
+    for order_id, customer_id, order_date, region, lines in late_orders:
+        run_query(
+            "INSERT INTO sales_orders VALUES (%(order_id)s, %(customer_id)s, %(order_date)s, %(order_date)s, 'Web', %(region)s)",
+            {"order_id": order_id, "customer_id": customer_id, "order_date": order_date.isoformat(), "region": region},
+        )
+        for product_id, quantity, unit_price in lines:
+            line_id += 1
+            run_query(
+                "INSERT INTO order_lines VALUES (%(line_id)s, %(order_id)s, %(product_id)s, %(quantity)s, %(unit_price)s, 0.0, %(total)s)",
+                {
+                    "line_id": line_id, "order_id": order_id, "product_id": product_id,
+                    "quantity": quantity, "unit_price": unit_price, "total": quantity * unit_price,
+                },
+            )
+    return catalog
+
+
+def assert_served_by_rollup(catalog, requests):
+    for request in requests:
+        assert catalog.plan_summary(request)[2] != "raw", request
+    assert catalog.verify(requests) == []
+
+
+@pytest.mark.parametrize("grain", GRAINS)
+@pytest.mark.parametrize("group_by", GROUP_BYS, ids=lambda g: "+".join(g) or "none")
+def test_rollup_answers_match_the_raw_join(catalog, grain, group_by):
+    assert_served_by_rollup(catalog, [SummaryRequest(group_by=group_by, grain=grain, limit=100_000)])
+
+
+@pytest.mark.parametrize("grain", GRAINS)
+def test_watermark_day_is_counted_once(catalog, grain):
+    day = timedelta(days=1)
+    assert_served_by_rollup(catalog, [
+        SummaryRequest(grain=grain, start_date=WATERMARK, end_date=WATERMARK),
+        SummaryRequest(group_by=["customer_id"], grain=grain, start_date=WATERMARK - day, end_date=WATERMARK),
+        SummaryRequest(group_by=["product_id"], grain=grain, start_date=WATERMARK, end_date=WATERMARK + day),
+        SummaryRequest(group_by=["region"], grain=grain, end_date=WATERMARK - day),
+    ])
+
+
+@pytest.mark.parametrize("grain", GRAINS)
+def test_filtered_rollup_answers_match_the_raw_join(catalog, grain):
+    assert_served_by_rollup(catalog, [
+        SummaryRequest(group_by=["product_id"], grain=grain, customer_id=1),
+        SummaryRequest(grain=grain, region="EU", start_date=date(2025, 1, 1)),
+        SummaryRequest(group_by=["region"], grain=grain, product_category="Braking"),
+        SummaryRequest(group_by=["customer_id"], grain=grain, product_id=2, end_date=WATERMARK),
+    ])
+
+
+def test_late_orders_on_the_watermark_day_are_included(catalog):
+    request = SummaryRequest(grain="day", start_date=WATERMARK, end_date=WATERMARK)
+    sql, params, source = catalog.plan_summary(request)
+    assert source == "rollup_sales_customer_day"
+    ((_, revenue, quantity, line_count, order_count),) = catalog._run_query(sql, params)
+
+    # The rollup holds the day as it was before the two late orders arrived
+    ((built_revenue, built_quantity, built_lines, built_orders),) = catalog._run_query(
+        "SELECT SUM(revenue), SUM(quantity), SUM(line_count), SUM(order_count) "
+        "FROM rollup_sales_customer_day WHERE order_date = %(day)s",
+        {"day": WATERMARK.isoformat()},
+    )
+    assert (revenue, quantity, line_count, order_count) == (
+        round(built_revenue + 188.5, 2), built_quantity + 6, built_lines + 3, built_orders + 2,
+    )
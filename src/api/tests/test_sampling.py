@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from rollups import SummaryRequest, approximate_summary_rows, approximate_summary_sql, with_averages
+from sampling import estimate_ratio, estimate_total
+
+
+def test_ratio_of_the_full_population_is_exact():
+    assert estimate_ratio(300.0, 4, 50_000.0, 4, 300.0, fraction=1.0) == (75.0, 0.0)
+
+
+def test_ratio_bound_covers_the_population_mean():
+    """Over repeated Bernoulli samples of orders, about 95% of the bounds contain the true mean."""
+    rng = random.Random(7)
+    revenues = [rng.lognormvariate(4, 1) for _ in range(5000)]
+    mean = sum(revenues) / len(revenues)
+    fraction, trials, covered = 0.1, 400, 0
+    for _ in range(trials):
+        sample = [r for r in revenues if rng.random() < fraction]
+        sum_y, sum_yy = sum(sample), sum(r * r for r in sample)
+        estimate, error = estimate_ratio(sum_y, len(sample), sum_yy, len(sample), sum_y, fraction)
+        covered += abs(estimate - mean) <= error
+    assert 0.91 <= covered / trials <= 0.99
+
+
+def test_ratio_bound_only_reflects_the_spread_of_the_values():
+    # Every sampled order has revenue 100: the mean is known exactly even though the total is not
+    estimate, error = estimate_ratio(5000.0, 50, 500_000.0, 50, 5000.0, fraction=0.05)
+    assert (estimate, error) == (100.0, 0.0)
+    assert estimate_total(5000.0, 500_000.0, 0.05)[1] > 0
+
+
+def test_approximate_rows_carry_the_average_order_value(client):
+    from db import run_query
+
+    request = SummaryRequest(group_by=["region"])
+    rows = approximate_summary_rows(run_query(*approximate_summary_sql(request, 50)), request, 0.5, 1.0)
+    assert rows
+    for row in rows:
+        assert row["avg_order_value"] == pytest.approx(row["revenue"] / row["order_count"], rel=0.01)
+        assert 0 < row["avg_order_value_error"] < row["avg_order_value"]
+
+
+def test_exact_rows_carry_the_average_order_value(client):
+    response = client.get("/sales/summary", params={"group_by": "region"})
+    assert response.status_code == 200, response.text
+    for row in response.json()["rows"]:
+        assert row["avg_order_value"] == round(row["revenue"] / row["order_count"], 2)
+        assert row["avg_order_value_error"] is None
+    assert with_averages({"revenue": 0.0, "order_count": 0})["avg_order_value"] is None
@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+
+from snapshot_store import SharedResults, SnapshotStore
+
+
+def test_snapshot_round_trip(tmp_path):
+    writer, reader = SnapshotStore(str(tmp_path)), SnapshotStore(str(tmp_path))
+    assert writer.is_writer()
+    assert not reader.is_writer()
+
+    rows = [{"customer_id": 1, "customer_name": "Ford"}, {"customer_id": 2, "customer_name": None}]
+    writer.publish("customers", rows, ["customer_id", "customer_name"], 7)
+    token = reader.token("customers")
+    assert reader.load("customers") == (rows, 7)
+
+    writer.publish("customers", rows[:1], ["customer_id", "customer_name"], None)
+    assert reader.token("customers") != token
+    assert reader.load("customers") == (rows[:1], None)
+
+
+def test_shared_results_between_processes(tmp_path):
+    first, second = SharedResults(str(tmp_path)), SharedResults(str(tmp_path))
+    key = SharedResults.key("SELECT ...", "[('limit', 100)]", "12", "3")
+    assert second.get(key) is None
+
+    rows = [("2025-01", 1, Decimal("1204.50"), 30, None), ("2025-02", 2, Decimal("99.00"), 1, date(2025, 2, 1))]
+    first.put(key, rows)
+    assert second.get(key) == rows
+
+    empty = SharedResults.key("SELECT ...", "[('limit', 0)]", "12", "3")
+    first.put(empty, [])
+    assert second.get(empty) == []
+
+
+def test_shared_results_evict_the_oldest(tmp_path):
+    results = SharedResults(str(tmp_path), max_entries=10)
+    keys = [SharedResults.key(str(i)) for i in range(100)]
+    for key in keys:
+        results.put(key, [(1,)])
+    assert len(list(tmp_path.glob("*.arrow"))) == 10
+    assert results.get(keys[-1]) == [(1,)]
+    assert results.get(keys[0]) is None
+
+
+def test_summaries_are_shared_between_workers(sales_db, tmp_path, monkeypatch):
+    from services import sales_service
+
+    queries = []
+    run_query = sales_service.run_query
+
+    def counting_run_query(sql, params):
+        queries.append(sql)
+        return run_query(sql, params)
+
+    monkeypatch.setattr(sales_service, "run_query", counting_run_query)
+    monkeypatch.setattr(sales_service, "shared_results", SharedResults(str(tmp_path)))
+
+    # SQLite tables have no Delta version: nothing is shared
+    monkeypatch.setattr(sales_service.data_versions, "version", lambda table: None)
+    sales_service.get_sales_summary(["region"])
+    sales_service.get_sales_summary(["region"])
+    assert len(queries) == 2
+
+    versions = {"sales_orders": "5", "order_lines": "5", "products": "1", "rollups": "[]"}
+    monkeypatch.setattr(sales_service.data_versions, "version", versions.get)
+    first = sales_service.get_sales_summary(["region"], grain="month")
+    # Another worker: same answer from the shared file, no query
+    assert sales_service.get_sales_summary(["region"], grain="month") == first
+    assert len(queries) == 3
+
+    versions["order_lines"] = "6"
+    assert sales_service.get_sales_summary(["region"], grain="month") == first
+    assert len(queries) == 4
@@ -0,0 +1,51 @@
+"""The API routes against a database freshly loaded by scripts/sales_bulk_load.py."""
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def order_id(sales_db):
+    with sqlite3.connect(sales_db) as conn:
+        return conn.execute("SELECT MIN(order_id) FROM sales_orders").fetchone()[0]
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/customers/customers", {}),
+    ("/customers/lookup", {"ids": "0,1,2"}),
+    ("/customers/overview", {"customer_id": [0, 1]}),
+    ("/customers/overview", {"customer_id": "0,1"}),
+    ("/products/products", {}),
+    ("/products/lookup", {"ids": "0,1"}),
+    ("/orders/orders", {"limit": 5}),
+    ("/orders/orders", {"limit": 5, "expand": "customer,product"}),
+    ("/sales/summary", {"group_by": "customer_id", "grain": "month"}),
+])
+def test_route(client, path, params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    assert response.json()
+
+
+def test_loaded_rows_satisfy_the_models(client, order_id):
+    customer = client.get("/customers/lookup", params={"ids": 0}).json()["0"]
+    assert customer["industry"] and customer["account_manager"]
+    product = client.get("/products/lookup", params={"ids": 0}).json()["0"]
+    assert product["product_category"] and product["unit_cost"] is not None
+
+    order = client.get("/orders/lookup", params={"ids": order_id}).json()[str(order_id)]
+    assert order["ship_date"] >= order["order_date"]
+    assert order["sales_channel"]
+    assert order["order_lines"]
+
+
+@pytest.mark.parametrize("customer_id", [[1, 0, 1], "1,0,1", ["1,0", "1"]], ids=["repeated", "comma_separated", "mixed"])
+def test_overview_ids_like_lookup(client, customer_id):
+    response = client.get("/customers/overview", params={"customer_id": customer_id})
+    assert response.status_code == 200, response.text
+    assert [o["customer_id"] for o in response.json()] == [1, 0]
+
+
+@pytest.mark.parametrize("customer_id", ["1,x", ",".join(map(str, range(51)))], ids=["invalid", "too_many"])
+def test_overview_rejects_bad_ids(client, customer_id):
+    assert client.get("/customers/overview", params={"customer_id": customer_id}).status_code == 400
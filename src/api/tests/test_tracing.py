@@ -0,0 +1,42 @@
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+import pytest
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture
+def exporter(client):
+    # main.py installed the SDK tracer provider when the client started
+    exporter = InMemorySpanExporter()
+    trace.get_tracer_provider().add_span_processor(SimpleSpanProcessor(exporter))
+    yield exporter
+    exporter.shutdown()
+
+
+def ancestors(span, spans_by_id):
+    while span.parent is not None and span.parent.span_id in spans_by_id:
+        span = spans_by_id[span.parent.span_id]
+        yield span
+
+
+def test_db_spans_nest_under_the_incoming_traceparent(client, exporter):
+    response = client.get(
+        "/sales/summary",
+        params={"group_by": "customer_id", "grain": "month"},
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+    assert response.status_code == 200, response.text
+
+    spans = [s for s in exporter.get_finished_spans() if format(s.context.trace_id, "032x") == TRACE_ID]
+    by_id = {s.context.span_id: s for s in spans}
+    db_spans = [s for s in spans if s.name.startswith("db.")]
+    assert {"db.pool_wait", "db.execute", "db.fetch"} <= {s.name for s in db_spans}
+    for span in db_spans:
+        # Under the middleware's server span, whose parent is the caller's span
+        (root,) = [a for a in ancestors(span, by_id) if a.parent.span_id not in by_id]
+        assert root.kind == trace.SpanKind.SERVER
+        assert root.parent.is_remote
+        assert format(root.parent.span_id, "016x") == PARENT_ID
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import uuid
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+import httpx
+import pytest
+
+import workload_capture
+from replay_workload import WorkloadReplayer, load_workload, report
+from workload_capture import WorkloadCaptureMiddleware, WorkloadRecorder, captured_tool, result_hash
+
+CSV_CHUNKS = [b"order_id,quantity\n", b"1,5\n", b"2,12\n"]
+
+
+@pytest.fixture
+def workload(tmp_path, monkeypatch):
+    """An app and a tool whose calls are captured to a file, and the prices they answer with."""
+    path = str(tmp_path / "workload.jsonl")
+    recorder = WorkloadRecorder(path, capture_results=True)
+    prices = {"unit_price": 10.0}
+
+    app = FastAPI()
+    app.add_middleware(WorkloadCaptureMiddleware, recorder=recorder)
+
+    @app.get("/products/{product_id}")
+    def product(product_id: int):
+        # artifact_id is volatile: it differs on every call without changing the hash
+        return {"product_id": product_id, "artifact_id": str(uuid.uuid4()), **prices}
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse(iter(CSV_CHUNKS), media_type="text/csv")
+
+    @app.get("/missing")
+    def missing():
+        return PlainTextResponse("not found", status_code=404)
+
+    # captured_tool records through the module's recorder (set from WORKLOAD_CAPTURE_PATH)
+    monkeypatch.setattr(workload_capture, "recorder", recorder)
+
+    @captured_tool
+    def get_products(product_id: int, limit: int = 10):
+        if product_id < 0:
+            return [{"error": "Invalid product_id"}]
+        return {"rows": [{"product_id": product_id, **prices}], "expires_at": str(uuid.uuid4())}
+
+    return path, app, get_products, prices
+
+
+def captured(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_requests_and_tool_calls_are_captured(workload):
+    path, app, get_products, _ = workload
+    client = TestClient(app)
+    assert client.get("/products/3", params={"fields": "unit_price"}, headers={"Accept": "application/json"}).status_code == 200
+    assert client.get("/export").status_code == 200
+    assert client.get("/missing").status_code == 404
+    get_products(3)
+    get_products(-1, limit=5)
+
+    product, export, missing, tool, failed_tool = captured(path)
+    assert (product["kind"], product["name"], product["status"]) == ("http", "GET /products/3", 200)
+    assert product["params"] == {"query": [["fields", "unit_price"]], "accept": "application/json"}
+    assert product["result"] == {"product_id": 3, "unit_price": 10.0}
+    assert product["sha"] == result_hash({"product_id": 3, "unit_price": 10.0, "artifact_id": "other"})
+
+    body = b"".join(CSV_CHUNKS)
+    assert (export["status"], export["bytes"]) == (200, len(body))
+    assert export["sha"] == hashlib.sha256(body).hexdigest()[:16]
+    assert "result" not in export
+    assert (missing["status"], missing["bytes"]) == (404, len("not found"))
+
+    assert (tool["kind"], tool["name"], tool["params"], tool["status"]) == ("tool", "get_products", {"product_id": 3}, "ok")
+    assert tool["result"] == {"rows": [{"product_id": 3, "unit_price": 10.0}]}
+    assert tool["bytes"] == len(json.dumps(tool["result"], separators=(",", ":")))
+    assert (failed_tool["params"], failed_tool["status"]) == ({"product_id": -1, "limit": 5}, "error")
+
+
+def test_replay_reports_latencies_and_differences(workload, capsys):
+    path, app, get_products, prices = workload
+    client = TestClient(app)
+    for product_id in (1, 2):
+        client.get(f"/products/{product_id}")
+    client.get("/export")
+    client.get("/missing")
+    get_products(1)
+
+    prices["unit_price"] = 12.5
+    entries = load_workload([path])
+    assert [e["kind"] for e in entries] == ["http"] * 4 + ["tool"]
+    replayer = WorkloadReplayer(
+        entries, api_url="http://api", speed=0, http_transport=httpx.ASGITransport(app=app)
+    )
+    results, elapsed = replayer.run()
+    # No MCP URL: the tool call is skipped
+    assert [r.get("skipped", False) for r in results].count(True) == 1
+
+    summary = report(results, elapsed)
+    assert summary["GET /products/1"]["mismatches"] == summary["GET /products/2"]["mismatches"] == 1
+    assert summary["GET /export"]["mismatches"] == 0
+    assert (summary["GET /missing"]["errors"], summary["GET /missing"]["mismatches"]) == (1, 0)
+    assert all(row["p50_ms"] >= 0 and row["max_ms"] >= row["p50_ms"] for row in summary.values())
+    assert summary["GET /export"]["captured_p50_ms"] == entries[2]["ms"]
+
+    output = capsys.readouterr().out
+    assert "4 calls in" in output and "1 skipped" in output
+    assert '- "unit_price": 10.0' in output and '+ "unit_price": 12.5' in output
@@ -0,0 +1,85 @@
+# tracing.py
+from opentelemetry import context, trace
+from opentelemetry.propagate import extract
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.semconv.attributes.service_attributes import SERVICE_NAME
+from opentelemetry.trace import ProxyTracerProvider, SpanKind, Status, StatusCode
+from os import environ
+
+tracer = trace.get_tracer("sales.api")
+
+
+def set_up_tracing(service_name: str = "sales-api"):
+    """
+    Installs a tracer provider exporting to Application Insights when
+    APPLICATIONINSIGHTS_CONNECTION_STRING is set.
+
+    App Service auto-instrumentation may already have installed a provider;
+    in that case it is kept and only the trace-context middleware is used.
+    """
+    if not isinstance(trace.get_tracer_provider(), ProxyTracerProvider):
+        return
+
+    tracer_provider = TracerProvider(resource=Resource.create({SERVICE_NAME: service_name}))
+
+    connection_string = environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING")
+    if connection_string:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorTraceExporter
+        tracer_provider.add_span_processor(
+            BatchSpanProcessor(AzureMonitorTraceExporter(connection_string=connection_string))
+        )
+
+    trace.set_tracer_provider(tracer_provider)
+
+
+class TraceContextMiddleware:
+    """
+    ASGI middleware that continues the caller's trace from the W3C
+    `traceparent`/`tracestate` headers and wraps each request in a server span.
+
+    Sync route handlers run in the threadpool with a copy of the current
+    context, so spans opened by the services and db layer nest under it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+            if key in (b"traceparent", b"tracestate")
+        }
+        token = context.attach(extract(carrier))
+
+        try:
+            with tracer.start_as_current_span(
+                f"{scope['method']} {scope['path']}",
+                kind=SpanKind.SERVER,
+                attributes={
+                    "http.request.method": scope["method"],
+                    "url.path": scope["path"],
+                },
+            ) as span:
+
+                async def send_wrapper(message):
+                    if message["type"] == "http.response.start":
+                        span.set_attribute("http.response.status_code", message["status"])
+                        if message["status"] >= 500:
+                            span.set_status(Status(StatusCode.ERROR))
+                    await send(message)
+
+                await self.app(scope, receive, send_wrapper)
+
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    span.update_name(f"{scope['method']} {route.path}")
+                    span.set_attribute("http.route", route.path)
+        finally:
+            context.detach(token)
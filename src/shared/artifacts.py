@@ -0,0 +1,237 @@
+# artifacts.py
+"""
+Large query results spilled to Parquet artifacts, queried in place.
+
+Returning tens of thousands of order lines either gets truncated at `limit`
+or floods the model context. Instead the rows are written once to a Parquet
+file and the caller gets a small handle (artifact ID, schema, row count and a
+few preview rows). Follow-up questions run filters, projections and
+aggregations against the file with Arrow's compute engine, in process, so
+they neither re-query the warehouse nor pass rows through the model:
+
+- spill:  `spill(rows, source, schema)` writes <id>.parquet (temporary name, then
+          os.replace) and returns the handle
+- query:  `query(artifact_id, filters, group_by, aggregates, ...)` pushes the
+          filters down into the Parquet read, then groups, sorts and limits
+- evict:  artifacts unused for ARTIFACT_TTL_SECONDS are removed, then the
+          least recently used ones until the directory is below
+          ARTIFACT_MAX_BYTES. Querying an artifact marks it as used.
+
+Artifacts live in ARTIFACT_DIR, which is shared by the worker processes of a
+host; point it at a mounted file share (e.g. Azure Files) to share artifacts
+between replicas.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "sales-artifacts"))
+TTL_SECONDS = float(os.environ.get("ARTIFACT_TTL_SECONDS", 3600))
+MAX_BYTES = int(os.environ.get("ARTIFACT_MAX_BYTES", 1024 ** 3))
+# Results with more rows than this are spilled instead of returned
+SPILL_ROWS = int(os.environ.get("ARTIFACT_SPILL_ROWS", 1000))
+# Largest number of rows one spill may request from the warehouse
+MAX_SPILL_ROWS = int(os.environ.get("ARTIFACT_MAX_SPILL_ROWS", 500_000))
+
+PREVIEW_ROWS = 5
+MAX_RESULT_ROWS = 1000
+
+FILTER_OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in", "not in", "is null", "is not null")
+AGGREGATES = ("sum", "mean", "min", "max", "count", "count_distinct", "stddev")
+
+_ARTIFACT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ArtifactStore:
+    def __init__(self, directory: str = ARTIFACT_DIR, ttl_seconds: float = TTL_SECONDS, max_bytes: int = MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def _path(self, artifact_id: str) -> str:
+        # IDs come from callers (the model), so never let one escape the directory
+        if not _ARTIFACT_ID.match(artifact_id or ""):
+            raise ValueError(f"Invalid artifact ID '{artifact_id}'")
+        return os.path.join(self.directory, f"{artifact_id}.parquet")
+
+    def spill(self, rows: List[Dict[str, Any]], source: str, schema: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Writes `rows` (dicts with the same keys) to a new artifact and returns
+        its handle. `schema` maps column names to Arrow type names ("int64",
+        "date32", ...) and gives an empty result its columns, so queries on
+        the artifact still work; without it there must be rows.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if rows:
+            table = pa.Table.from_pylist(rows)
+        elif schema:
+            table = pa.schema([(name, pa.type_for_alias(t)) for name, t in schema.items()]).empty_table()
+        else:
+            raise ValueError(f"No rows of {source} to spill")
+        artifact_id = uuid.uuid4().hex
+        path = self._path(artifact_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, temp_path, compression="zstd")
+        os.replace(temp_path, path)
+        logger.info("Spilled %s rows of %s to artifact %s", table.num_rows, source, artifact_id)
+        self.evict(keep=artifact_id)
+        return self._handle(artifact_id, source, table)
+
+    def describe(self, artifact_id: str) -> Dict[str, Any]:
+        """The handle of an existing artifact."""
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(self._open(artifact_id), memory_map=True)
+        return self._handle(artifact_id, None, table)
+
+    def query(
+        self,
+        artifact_id: str,
+        filters: Optional[Sequence[Dict[str, Any]]] = None,
+        group_by: Optional[Sequence[str]] = None,
+        aggregates: Optional[Dict[str, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[Sequence[str]] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        Args:
+            filters: [{"column": ..., "op": ..., "value": ...}], all must hold;
+                op is one of FILTER_OPERATORS.
+            group_by: columns to group by; with aggregates but no group_by the
+                whole (filtered) artifact is aggregated.
+            aggregates: column -> one of AGGREGATES, e.g. {"line_total": "sum"};
+                output columns are named <column>_<function>, plus row_count.
+            columns: columns to return when not aggregating (default: all).
+            order_by: output columns, "-" prefix for descending.
+            limit: rows to return, at most MAX_RESULT_ROWS.
+
+        Returns {"artifact_id", "row_count" (rows before the limit), "rows"}.
+        """
+        import pyarrow.parquet as pq
+
+        path = self._open(artifact_id)
+        schema = pq.read_schema(path)
+        expression = _filter_expression(filters or [], schema)
+        table = pq.read_table(path, filters=expression, memory_map=True)
+
+        group_by, aggregates = list(group_by or []), dict(aggregates or {})
+        _check_columns(list(group_by) + list(aggregates) + list(columns or []), schema)
+        if group_by or aggregates:
+            unknown = sorted(set(aggregates.values()) - set(AGGREGATES))
+            if unknown:
+                raise ValueError(f"Unknown aggregate(s) {unknown}; expected any of {list(AGGREGATES)}")
+            table = table.group_by(group_by).aggregate(
+                [(c, f) for c, f in aggregates.items()] + [([], "count_all")]
+            ).rename_columns(group_by + [f"{c}_{f}" for c, f in aggregates.items()] + ["row_count"])
+        elif columns:
+            table = table.select(list(columns))
+
+        if order_by:
+            keys = [(k.lstrip("-"), "descending" if k.startswith("-") else "ascending") for k in order_by]
+            _check_columns([k for k, _ in keys], table.schema)
+            table = table.sort_by(keys)
+
+        limit = max(0, min(limit, MAX_RESULT_ROWS))
+        return {"artifact_id": artifact_id, "row_count": table.num_rows, "rows": table.slice(0, limit).to_pylist()}
+
+    def _open(self, artifact_id: str) -> str:
+        path = self._path(artifact_id)
+        self.evict()
+        try:
+            # Recently queried artifacts are the last to be evicted
+            os.utime(path)
+        except FileNotFoundError:
+            raise ValueError(f"Artifact '{artifact_id}' does not exist or has expired") from None
+        return path
+
+    def _handle(self, artifact_id: str, source: Optional[str], table) -> Dict[str, Any]:
+        stat = os.stat(self._path(artifact_id))
+        handle = {
+            "artifact_id": artifact_id,
+            "row_count": table.num_rows,
+            "columns": [{"name": f.name, "type": str(f.type)} for f in table.schema],
+            "size_bytes": stat.st_size,
+            "expires_at": datetime.fromtimestamp(stat.st_mtime + self.ttl_seconds, timezone.utc),
+            "preview": table.slice(0, PREVIEW_ROWS).to_pylist(),
+        }
+        if source is not None:
+            handle["source"] = source
+        return handle
+
+    def evict(self, keep: Optional[str] = None):
+        """Removes expired artifacts, then the least recently used until under max_bytes."""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".parquet"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name[: -len(".parquet")]))
+
+        entries.sort()
+        total = sum(size for _, size, _, _ in entries)
+        for mtime, size, path, artifact_id in entries:
+            if artifact_id == keep:
+                continue
+            if now - mtime <= self.ttl_seconds and total <= self.max_bytes:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.info("Evicted artifact %s", artifact_id)
+
+
+def _check_columns(columns: Sequence[str], schema):
+    unknown = sorted(set(columns) - set(schema.names))
+    if unknown:
+        raise ValueError(f"Unknown column(s) {unknown}; expected any of {schema.names}")
+
+
+def _filter_expression(filters: Sequence[Dict[str, Any]], schema):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    expression = None
+    for f in filters:
+        column, op, value = f.get("column"), str(f.get("op", "=")).lower(), f.get("value")
+        _check_columns([column], schema)
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator '{op}'; expected one of {list(FILTER_OPERATORS)}")
+        field, column_type = pc.field(column), schema.field(column).type
+
+        if op == "is null":
+            condition = field.is_null()
+        elif op == "is not null":
+            condition = field.is_valid()
+        elif op in ("in", "not in"):
+            # Values arrive as JSON, e.g. dates as strings; compare in the column's type
+            values = pa.array(list(value if isinstance(value, (list, tuple)) else [value])).cast(column_type)
+            condition = field.isin(values)
+            if op == "not in":
+                condition = ~condition
+        else:
+            scalar = pa.scalar(value).cast(column_type)
+            condition = {
+                "=": field == scalar, "!=": field != scalar, "<": field < scalar,
+                "<=": field <= scalar, ">": field > scalar, ">=": field >= scalar,
+            }[op]
+        expression = condition if expression is None else expression & condition
+    return expression
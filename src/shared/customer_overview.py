@@ -0,0 +1,223 @@
+# customer_overview.py
+"""
+A one-call overview of customers: profile, order totals, recent orders, top
+products and category mix.
+
+Agents answering "analyze the purchasing behavior of these customers" would
+otherwise call get_customers, then get_orders per customer, then get_products,
+each with its own model round trip. Here every section is a single warehouse
+query over all requested customers (customer_id IN ...), and the sections run
+concurrently:
+
+- profile:       from the dimension cache (one IN query when it is not loaded)
+- totals:        orders, lines, quantity, revenue, average discount and the
+                 first and last order date
+- recent_orders: the newest `recent_orders` orders with their line count and
+                 revenue
+- top_products:  the `top_products` products with the most revenue, named
+                 from the dimension cache
+- category_mix:  revenue and quantity per product category, with its share of
+                 the customer's revenue
+
+Concurrency is capped by the connection pool size, the admission limit of the
+process.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import contextvars
+
+from lookups import parse_ids
+
+# Largest number of customers in one overview request
+MAX_CUSTOMERS = 50
+
+_FROM = """
+    FROM sales_orders o
+    JOIN order_lines l ON o.order_id = l.order_id
+"""
+
+_TOTALS_COLUMNS = [
+    "customer_id", "order_count", "line_count", "quantity", "revenue",
+    "average_discount", "first_order_date", "last_order_date",
+]
+_RECENT_ORDER_COLUMNS = ["customer_id", "order_id", "order_date", "region", "sales_channel", "line_count", "revenue"]
+_TOP_PRODUCT_COLUMNS = ["customer_id", "product_id", "order_count", "quantity", "revenue"]
+_CATEGORY_COLUMNS = ["customer_id", "product_category", "quantity", "revenue"]
+
+# Totals of a customer without orders in the requested range
+_NO_ORDERS = {
+    "order_count": 0, "line_count": 0, "quantity": 0, "revenue": 0.0,
+    "average_discount": None, "first_order_date": None, "last_order_date": None,
+}
+
+
+def _as_dicts(rows, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    return [{c: r[c] for c in columns} if isinstance(r, dict) else dict(zip(columns, r)) for r in rows]
+
+
+class CustomerOverview:
+    """
+    Builds overviews for a batch of customers.
+
+    `run_query(sql, params)` is the db module's query function, `dimensions`
+    the process's DimensionCache and `pool_size` the number of warehouse
+    connections the process may use at once.
+    """
+
+    def __init__(self, run_query: Callable[[str, Dict[str, Any]], List[Any]], dimensions, pool_size: int):
+        self._run_query = run_query
+        self._dimensions = dimensions
+        self.concurrency = max(1, min(4, pool_size))
+
+    def get(
+        self,
+        customer_ids: Sequence[Any],
+        recent_orders: int = 5,
+        top_products: int = 5,
+        start_date=None,
+        end_date=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        One overview per distinct customer ID, in request order. IDs may be
+        integers or comma-separated strings (see lookups.parse_ids). Unknown
+        customers get `customer: None` and empty sections.
+        """
+        customer_ids = parse_ids(customer_ids)
+        if not customer_ids:
+            return []
+        if len(customer_ids) > MAX_CUSTOMERS:
+            raise ValueError(f"At most {MAX_CUSTOMERS} customers per overview, got {len(customer_ids)}")
+        if recent_orders < 0 or top_products < 0:
+            raise ValueError("recent_orders and top_products must not be negative")
+
+        params: Dict[str, Any] = {f"customer_{i}": c for i, c in enumerate(customer_ids)}
+        conditions = [f"o.customer_id IN ({', '.join(f'%({p})s' for p in params)})"]
+        if start_date:
+            conditions.append("o.order_date >= %(start_date)s")
+            params["start_date"] = start_date
+        if end_date:
+            conditions.append("o.order_date <= %(end_date)s")
+            params["end_date"] = end_date
+        where = "WHERE " + " AND ".join(conditions)
+
+        queries = {
+            "totals": (self._totals_sql(where), params, _TOTALS_COLUMNS),
+            "recent_orders": (self._recent_orders_sql(where), dict(params, limit=recent_orders), _RECENT_ORDER_COLUMNS),
+            "top_products": (self._top_products_sql(where), dict(params, limit=top_products), _TOP_PRODUCT_COLUMNS),
+            "category_mix": (self._category_mix_sql(where), params, _CATEGORY_COLUMNS),
+        }
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Keep the caller's trace context so sub-query spans nest under the request
+            profiles = executor.submit(
+                contextvars.copy_context().run, self._dimensions.get_many, "customers", customer_ids
+            )
+            futures = {
+                section: executor.submit(contextvars.copy_context().run, self._run_query, sql, section_params)
+                for section, (sql, section_params, _) in queries.items()
+            }
+            results = {section: _as_dicts(f.result(), queries[section][2]) for section, f in futures.items()}
+            profiles = profiles.result()
+
+        self._dimensions.enrich(results["top_products"], {"products": ["product_name", "product_category"]})
+        return [self._assemble(c, profiles.get(c), results) for c in customer_ids]
+
+    @staticmethod
+    def _assemble(customer_id: int, profile: Optional[Dict[str, Any]], results) -> Dict[str, Any]:
+        def rows_of(section: str) -> List[Dict[str, Any]]:
+            return [
+                {k: v for k, v in r.items() if k != "customer_id"}
+                for r in results[section] if r["customer_id"] == customer_id
+            ]
+
+        totals = next(iter(rows_of("totals")), dict(_NO_ORDERS))
+        category_mix = rows_of("category_mix")
+        for row in category_mix:
+            row["revenue_share"] = round(row["revenue"] / totals["revenue"], 4) if totals["revenue"] else None
+        return {
+            "customer_id": customer_id,
+            "customer": profile,
+            "totals": totals,
+            "recent_orders": rows_of("recent_orders"),
+            "top_products": rows_of("top_products"),
+            "category_mix": category_mix,
+        }
+
+    @staticmethod
+    def _totals_sql(where: str) -> str:
+        return f"""
+        SELECT
+            o.customer_id,
+            COUNT(DISTINCT o.order_id) AS order_count,
+            COUNT(*) AS line_count,
+            SUM(l.quantity) AS quantity,
+            ROUND(SUM(l.line_total), 2) AS revenue,
+            ROUND(AVG(l.discount), 4) AS average_discount,
+            MIN(o.order_date) AS first_order_date,
+            MAX(o.order_date) AS last_order_date
+        {_FROM}
+        {where}
+        GROUP BY o.customer_id
+        """
+
+    @staticmethod
+    def _recent_orders_sql(where: str) -> str:
+        return f"""
+        SELECT customer_id, order_id, order_date, region, sales_channel, line_count, revenue
+        FROM (
+            SELECT
+                o.customer_id,
+                o.order_id,
+                o.order_date,
+                o.region,
+                o.sales_channel,
+                COUNT(*) AS line_count,
+                ROUND(SUM(l.line_total), 2) AS revenue,
+                ROW_NUMBER() OVER (
+                    PARTITION BY o.customer_id ORDER BY o.order_date DESC, o.order_id DESC
+                ) AS position
+            {_FROM}
+            {where}
+            GROUP BY o.customer_id, o.order_id, o.order_date, o.region, o.sales_channel
+        ) t
+        WHERE position <= %(limit)s
+        ORDER BY customer_id, position
+        """
+
+    @staticmethod
+    def _top_products_sql(where: str) -> str:
+        return f"""
+        SELECT customer_id, product_id, order_count, quantity, revenue
+        FROM (
+            SELECT
+                o.customer_id,
+                l.product_id,
+                COUNT(DISTINCT o.order_id) AS order_count,
+                SUM(l.quantity) AS quantity,
+                ROUND(SUM(l.line_total), 2) AS revenue,
+                ROW_NUMBER() OVER (
+                    PARTITION BY o.customer_id ORDER BY SUM(l.line_total) DESC, l.product_id
+                ) AS position
+            {_FROM}
+            {where}
+            GROUP BY o.customer_id, l.product_id
+        ) t
+        WHERE position <= %(limit)s
+        ORDER BY customer_id, position
+        """
+
+    @staticmethod
+    def _category_mix_sql(where: str) -> str:
+        return f"""
+        SELECT
+            o.customer_id,
+            p.product_category,
+            SUM(l.quantity) AS quantity,
+            ROUND(SUM(l.line_total), 2) AS revenue
+        {_FROM}
+        LEFT JOIN products p ON l.product_id = p.product_id
+        {where}
+        GROUP BY o.customer_id, p.product_category
+        ORDER BY o.customer_id, revenue DESC
+        """
@@ -0,0 +1,373 @@
+# customer_profiles.py
+"""
+Precomputed purchasing-behavior profiles of every customer (RFM features).
+
+Questions like "which customers are at risk" or "profile our best customers"
+otherwise mean pulling raw orders and aggregating them in the agent. Instead,
+one row per customer is kept in the customer_profiles table:
+
+- totals:    order_count, line_count, quantity, revenue, average_order_value
+             and average_discount (per order line)
+- dates:     first_order_date and last_order_date
+- intervals: average, standard deviation and longest number of days between
+             consecutive orders (NULL with a single order)
+- category:  category_mix, a map from product category to its share of the
+             customer's revenue
+
+The table is maintained like the rollups (see rollups.py), with set-based
+queries in the warehouse:
+
+- build:   CREATE OR REPLACE the table from the raw join (full rebuild)
+- refresh: recompute only the customers with orders on or after the stored
+           watermark date and MERGE them in, then advance the watermark to
+           the latest order date. Profiles aggregate a customer's whole
+           history, so recomputing those customers is exact.
+- query:   `plan_profiles` reads the table, or the same aggregation over the
+           raw join while the table has not been built.
+
+Recency and the 1-5 RFM scores are computed when queried, over all customers:
+recency_days counts back from the latest order date of any customer (`as_of`),
+so answers only change with the data. Scores are quintiles of last order date,
+order count and revenue, and the segment follows from the recency and
+frequency scores (see SEGMENTS).
+
+Run `python customer_profiles.py build|refresh|verify` as a scheduled job,
+e.g. right after the rollup refresh.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import logging
+import threading
+import time
+
+from lookups import parse_ids
+from rollups import WATERMARK_TABLE, WATERMARK_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TABLE = "customer_profiles"
+
+# Segment -> condition on recency_score `r` and frequency_score `f`; the first match applies
+SEGMENTS = {
+    "champions": "r >= 4 AND f >= 4",
+    "loyal": "r >= 3 AND f >= 3",
+    "new": "r >= 4",
+    "promising": "r = 3",
+    "cant_lose": "f >= 4",
+    "at_risk": "f = 3",
+    "hibernating": "r = 2",
+    "lost": "TRUE",
+}
+
+# sort_by -> ORDER BY, best first
+SORTS = {
+    "revenue": "revenue DESC",
+    "order_count": "order_count DESC",
+    "average_order_value": "average_order_value DESC",
+    "recency": "recency_days ASC",
+}
+
+STORED_COLUMNS = [
+    "customer_id", "order_count", "line_count", "quantity", "revenue", "average_order_value",
+    "average_discount", "first_order_date", "last_order_date", "average_interval_days",
+    "interval_stddev_days", "max_interval_days", "category_mix",
+]
+
+# Columns of the rows returned by plan_profiles, in order
+PROFILE_COLUMNS = STORED_COLUMNS + [
+    "as_of", "recency_days", "recency_score", "frequency_score", "monetary_score", "segment",
+]
+
+
+def profile_select(where: str = "") -> str:
+    """
+    One profile row per customer from the raw join; `where` filters
+    sales_orders `o` and applies to the whole history of each customer kept.
+    """
+    return f"""
+    WITH orders AS (
+        SELECT
+            o.customer_id,
+            o.order_id,
+            o.order_date,
+            SUM(l.line_total) AS revenue,
+            SUM(l.quantity) AS quantity,
+            COUNT(*) AS line_count,
+            SUM(l.discount) AS discount
+        FROM sales_orders o
+        JOIN order_lines l ON o.order_id = l.order_id
+        {where}
+        GROUP BY o.customer_id, o.order_id, o.order_date
+    ),
+    intervals AS (
+        SELECT
+            *,
+            DATEDIFF(order_date, LAG(order_date) OVER (
+                PARTITION BY customer_id ORDER BY order_date, order_id
+            )) AS interval_days
+        FROM orders
+    ),
+    totals AS (
+        SELECT
+            customer_id,
+            COUNT(*) AS order_count,
+            SUM(line_count) AS line_count,
+            SUM(quantity) AS quantity,
+            ROUND(SUM(revenue), 2) AS revenue,
+            ROUND(SUM(revenue) / COUNT(*), 2) AS average_order_value,
+            ROUND(SUM(discount) / SUM(line_count), 4) AS average_discount,
+            MIN(order_date) AS first_order_date,
+            MAX(order_date) AS last_order_date,
+            ROUND(AVG(interval_days), 1) AS average_interval_days,
+            ROUND(STDDEV_SAMP(interval_days), 1) AS interval_stddev_days,
+            MAX(interval_days) AS max_interval_days
+        FROM intervals
+        GROUP BY customer_id
+    ),
+    categories AS (
+        SELECT
+            o.customer_id,
+            COALESCE(p.product_category, 'Unknown') AS product_category,
+            SUM(l.line_total) AS revenue
+        FROM sales_orders o
+        JOIN order_lines l ON o.order_id = l.order_id
+        LEFT JOIN products p ON l.product_id = p.product_id
+        {where}
+        GROUP BY o.customer_id, COALESCE(p.product_category, 'Unknown')
+    ),
+    category_mix AS (
+        SELECT
+            c.customer_id,
+            MAP_FROM_ENTRIES(COLLECT_LIST(STRUCT(
+                c.product_category,
+                CASE WHEN t.revenue = 0 THEN NULL ELSE ROUND(c.revenue / t.revenue, 4) END
+            ))) AS category_mix
+        FROM categories c
+        JOIN totals t ON c.customer_id = t.customer_id
+        GROUP BY c.customer_id
+    )
+    SELECT t.*, m.category_mix
+    FROM totals t
+    LEFT JOIN category_mix m ON t.customer_id = m.customer_id
+    """
+
+
+@dataclass
+class ProfileRequest:
+    customer_ids: Sequence[Any] = ()
+    segment: Optional[str] = None
+    sort_by: str = "revenue"
+    limit: int = 20
+
+    def validate(self):
+        if self.segment is not None and self.segment not in SEGMENTS:
+            raise ValueError(f"Unsupported segment: {self.segment}. Expected one of {list(SEGMENTS)}")
+        if self.sort_by not in SORTS:
+            raise ValueError(f"Unsupported sort_by: {self.sort_by}. Expected one of {list(SORTS)}")
+        if self.limit <= 0:
+            raise ValueError("limit must be positive")
+
+
+def profiles_sql(request: ProfileRequest, source: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Scored profiles from `source` (the profile table or a parenthesized
+    profile_select), filtered after scoring so scores rank all customers.
+    """
+    params: Dict[str, Any] = {"limit": request.limit}
+    conditions = []
+    ids = parse_ids(request.customer_ids)
+    if ids:
+        params.update({f"customer_{i}": c for i, c in enumerate(ids)})
+        conditions.append(f"customer_id IN ({', '.join(f'%(customer_{i})s' for i in range(len(ids)))})")
+    if request.segment is not None:
+        conditions.append("segment = %(segment)s")
+        params["segment"] = request.segment
+
+    segment = "CASE " + " ".join(f"WHEN {condition} THEN '{name}'" for name, condition in SEGMENTS.items()) + " END"
+    sql = f"""
+    WITH scored AS (
+        SELECT
+            {', '.join(STORED_COLUMNS)},
+            MAX(last_order_date) OVER () AS as_of,
+            DATEDIFF(MAX(last_order_date) OVER (), last_order_date) AS recency_days,
+            NTILE(5) OVER (ORDER BY last_order_date, customer_id) AS r,
+            NTILE(5) OVER (ORDER BY order_count, customer_id) AS f,
+            NTILE(5) OVER (ORDER BY revenue, customer_id) AS m
+        FROM {source} p
+    ),
+    segmented AS (
+        SELECT *, r AS recency_score, f AS frequency_score, m AS monetary_score, {segment} AS segment
+        FROM scored
+    )
+    SELECT {', '.join(PROFILE_COLUMNS)}
+    FROM segmented
+    {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    ORDER BY {SORTS[request.sort_by]}, customer_id
+    LIMIT %(limit)s
+    """
+    return sql, params
+
+
+def profile_rows(rows) -> List[Dict[str, Any]]:
+    """Query rows as dicts of PROFILE_COLUMNS, with category_mix as a dict."""
+    profiles = []
+    for row in rows:
+        profile = {c: row[c] for c in PROFILE_COLUMNS} if isinstance(row, dict) else dict(zip(PROFILE_COLUMNS, row))
+        mix = profile["category_mix"]
+        # Drivers return MAP columns as a dict or as a list of (key, value) pairs,
+        # the SQLite backend as JSON text
+        if isinstance(mix, str):
+            mix = json.loads(mix)
+        profile["category_mix"] = dict(mix) if mix is not None else {}
+        profiles.append(profile)
+    return profiles
+
+
+class CustomerProfileStore:
+    """
+    Plans profile queries against the customer_profiles table, caching its
+    watermark read from the warehouse for WATERMARK_TTL_SECONDS.
+
+    `run_query(sql, params)` is the db module's query function.
+    """
+
+    def __init__(self, run_query: Callable[[str, Dict[str, Any]], List[Any]], enabled: bool = True):
+        self._run_query = run_query
+        self.enabled = enabled
+        self._watermark = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def watermark(self):
+        """Latest order date the table includes, or None when it has not been built."""
+        with self._lock:
+            if time.monotonic() - self._loaded_at > WATERMARK_TTL_SECONDS:
+                try:
+                    rows = self._run_query(
+                        f"SELECT watermark_date FROM {WATERMARK_TABLE} WHERE rollup_name = %(name)s",
+                        {"name": PROFILE_TABLE},
+                    )
+                    self._watermark = _value(rows[0], 0, "watermark_date") if rows else None
+                except Exception:
+                    logger.exception("Could not read the customer profile watermark; profiling raw tables")
+                    self._watermark = None
+                self._loaded_at = time.monotonic()
+            return self._watermark
+
+    def plan_profiles(self, request: ProfileRequest) -> Tuple[str, Dict[str, Any], str]:
+        """Returns (sql, params, source) where source is the profile table or "raw"."""
+        request.validate()
+        if self.enabled and self.watermark() is not None:
+            sql, params = profiles_sql(request, PROFILE_TABLE)
+            return sql, params, PROFILE_TABLE
+        sql, params = profiles_sql(request, f"({profile_select()})")
+        return sql, params, "raw"
+
+    # --- maintenance -----------------------------------------------------
+
+    def _set_watermark(self):
+        self._run_query(f"""
+        MERGE INTO {WATERMARK_TABLE} w
+        USING (SELECT %(name)s AS rollup_name, MAX(last_order_date) AS watermark_date FROM {PROFILE_TABLE}) s
+        ON w.rollup_name = s.rollup_name
+        WHEN MATCHED THEN UPDATE SET watermark_date = s.watermark_date, refreshed_at = current_timestamp()
+        WHEN NOT MATCHED THEN INSERT (rollup_name, watermark_date, refreshed_at)
+            VALUES (s.rollup_name, s.watermark_date, current_timestamp())
+        """, {"name": PROFILE_TABLE})
+
+    def build(self):
+        """Full rebuild. Use after backfills, deletions or late-arriving orders with old dates."""
+        started = time.perf_counter()
+        self._run_query(
+            f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} "
+            "(rollup_name STRING, watermark_date DATE, refreshed_at TIMESTAMP)", {}
+        )
+        self._run_query(f"CREATE OR REPLACE TABLE {PROFILE_TABLE} AS {profile_select()}", {})
+        self._set_watermark()
+        logger.info("Built %s in %.1fs", PROFILE_TABLE, time.perf_counter() - started)
+        self._loaded_at = 0.0
+
+    def refresh(self):
+        """
+        Incremental refresh: recomputes the profiles of customers with orders
+        on or after the watermark (the watermark day itself may have gained
+        orders) and merges them in. Builds the table if it has no watermark.
+        """
+        self._loaded_at = 0.0
+        watermark = self.watermark()
+        if watermark is None:
+            self.build()
+            return
+        started = time.perf_counter()
+        changed = (
+            "WHERE o.customer_id IN "
+            "(SELECT customer_id FROM sales_orders WHERE order_date >= %(watermark)s)"
+        )
+        self._run_query(f"""
+        MERGE INTO {PROFILE_TABLE} t
+        USING ({profile_select(changed)}) s
+        ON t.customer_id = s.customer_id
+        WHEN MATCHED THEN UPDATE SET *
+        WHEN NOT MATCHED THEN INSERT *
+        """, {"watermark": watermark})
+        self._set_watermark()
+        logger.info("Refreshed %s from %s in %.1fs", PROFILE_TABLE, watermark, time.perf_counter() - started)
+        self._loaded_at = 0.0
+
+    def verify(self) -> List[str]:
+        """
+        Compares every stored profile with the raw join and returns a
+        description of every mismatch (an empty list means correct).
+        """
+        rows = self._run_query(f"SELECT COUNT(*) AS customer_count FROM {PROFILE_TABLE}", {})
+        request = ProfileRequest(limit=max(1, int(_value(rows[0], 0, "customer_count"))))
+        served = _normalize(self._run_query(*profiles_sql(request, PROFILE_TABLE)))
+        expected = _normalize(self._run_query(*profiles_sql(request, f"({profile_select()})")))
+        mismatches = [
+            f"customer {c}: stored {served.get(c)} vs raw {expected.get(c)}"
+            for c in sorted(set(served) | set(expected)) if served.get(c) != expected.get(c)
+        ]
+        return mismatches
+
+
+def _value(row, index: int, name: str):
+    return row[name] if isinstance(row, dict) else row[index]
+
+
+def _normalize(rows) -> Dict[int, Dict[str, Any]]:
+    return {
+        p["customer_id"]: {k: round(float(v), 2) if isinstance(v, float) else v for k, v in p.items()}
+        for p in profile_rows(rows)
+    }
+
+
+def main():
+    try:
+        from db import run_query
+    except ImportError:
+        from db import run_dbquery as run_query
+
+    parser = argparse.ArgumentParser(description="Build, refresh or verify the customer profile table.")
+    parser.add_argument("command", choices=["build", "refresh", "verify"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = CustomerProfileStore(run_query)
+
+    if args.command == "build":
+        store.build()
+    elif args.command == "refresh":
+        store.refresh()
+    else:
+        mismatches = store.verify()
+        for mismatch in mismatches:
+            print(mismatch)
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# dimensions.py
+"""
+In-process cache of the customers and products dimension tables.
+
+Both tables are small and change rarely, so instead of querying the warehouse
+for every lookup they are loaded once, indexed in memory and refreshed in the
+background:
+
+- load:    the first `start()` (or first lookup) loads both tables on a
+           background thread; lookups fall back to the warehouse until then
+           (`wait_loaded()` blocks until it is done, for startup warm-up)
+- refresh: every DIMENSION_REFRESH_SECONDS the Delta table version is checked
+           (DESCRIBE HISTORY) and a table is reloaded only when it changed
+- lookup:  equality filters on the key or an indexed column (customers by
+           industry, account_manager and region; products by product_category)
+           return rows in the same order as the SQL they replace
+- staleness: `staleness(name)` is the age of the last successful load or
+           version check. Past DIMENSION_MAX_STALENESS_SECONDS (for example
+           while the warehouse is unreachable) the table is not served and
+           callers query the warehouse as before.
+- sharing: with a `store` (snapshot_store.SnapshotStore, used when the API
+           runs several worker processes) only the elected writer process
+           queries the warehouse; the others load its published snapshots.
+
+Shared by the API, the MCP server and the notebooks (src/shared).
+"""
+from dataclasses import dataclass, field
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(environ.get("DIMENSION_REFRESH_SECONDS", 300))
+MAX_STALENESS_SECONDS = float(environ.get("DIMENSION_MAX_STALENESS_SECONDS", 3 * REFRESH_SECONDS))
+
+# Table -> columns, key, indexed columns and the ORDER BY of the queries being replaced
+DIMENSIONS = {
+    "customers": {
+        "columns": ["customer_id", "customer_name", "region", "industry", "account_manager"],
+        "key": "customer_id",
+        "indexes": ["industry", "account_manager", "region"],
+        "order_by": "customer_name",
+    },
+    "products": {
+        "columns": ["product_id", "product_name", "product_category", "unit_cost", "unit_price"],
+        "key": "product_id",
+        "indexes": ["product_category"],
+        "order_by": "product_name",
+    },
+}
+
+
+@dataclass
+class DimensionTable:
+    """One loaded dimension table: rows sorted like the SQL, by key and by indexed column."""
+
+    name: str
+    rows: List[Dict[str, Any]]
+    version: Optional[int]
+    checked_at: float
+    by_key: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        spec = DIMENSIONS[self.name]
+        order_by = spec["order_by"]
+        # ORDER BY ... ASC puts NULLs first
+        self.rows.sort(key=lambda r: (r[order_by] is not None, r[order_by] or ""))
+        self.by_key = {r[spec["key"]]: r for r in self.rows}
+        for column in spec["indexes"]:
+            index: Dict[Any, List[Dict[str, Any]]] = {}
+            for row in self.rows:
+                index.setdefault(row[column], []).append(row)
+            self.indexes[column] = index
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        row = self.by_key.get(key)
+        return dict(row) if row is not None else None
+
+    def lookup(self, limit: Optional[int] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Rows matching all equality `filters` (None values are ignored), in
+        ORDER BY order, as copies. Filters on the key or an indexed column
+        are resolved from the index; others are checked row by row.
+        """
+        filters = {c: v for c, v in filters.items() if v is not None}
+        key = DIMENSIONS[self.name]["key"]
+
+        if key in filters:
+            row = self.by_key.get(filters.pop(key))
+            candidates = [row] if row is not None else []
+        else:
+            indexed = [c for c in filters if c in self.indexes]
+            if indexed:
+                candidates = min((self.indexes[c].get(filters[c], []) for c in indexed), key=len)
+            else:
+                candidates = self.rows
+
+        matches = []
+        for row in candidates:
+            if all(row[c] == v for c, v in filters.items()):
+                matches.append(dict(row))
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def values(self, column: str) -> List[Any]:
+        """Distinct non-NULL values of an indexed column."""
+        return [v for v in self.indexes[column] if v is not None]
+
+
+class DimensionCache:
+    """
+    Holds the DimensionTables and keeps them fresh from a daemon thread.
+
+    `run_query(sql, params)` must return rows as tuples or dicts with the
+    selected columns in order. `store`, if given, shares the loaded tables
+    between processes (see snapshot_store.py). `on_lookup(name, hit)`, if
+    given, is called for every lookup with whether it was served from memory.
+    """
+
+    def __init__(
+        self,
+        run_query: Callable[[str, Dict[str, Any]], List[Any]],
+        enabled: bool = True,
+        refresh_seconds: float = REFRESH_SECONDS,
+        max_staleness_seconds: float = MAX_STALENESS_SECONDS,
+        store=None,
+        on_lookup: Optional[Callable[[str, bool], None]] = None,
+    ):
+        self._run_query = run_query
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self._store = store
+        self._on_lookup = on_lookup
+        self._snapshots: Dict[str, Any] = {}
+        self._tables: Dict[str, DimensionTable] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loaded = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the background loader/refresher (idempotent)."""
+        with self._lock:
+            if not self.enabled or self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dimension-cache", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every table has been loaded once (starting the loader if needed); False on timeout."""
+        if not self.enabled:
+            return True
+        self.start()
+        return self._loaded.wait(timeout)
+
+    def table(self, name: str) -> Optional[DimensionTable]:
+        """The cached table, or None if it is not loaded yet or too stale to serve."""
+        if not self.enabled:
+            return None
+        if self._thread is None:
+            self.start()
+        table = self._tables.get(name)
+        if table is not None and time.monotonic() - table.checked_at > self.max_staleness_seconds:
+            table = None
+        if self._on_lookup is not None:
+            self._on_lookup(name, table is not None)
+        return table
+
+    def staleness(self, name: str) -> Optional[float]:
+        """Seconds since the table was last loaded or confirmed current, or None if not loaded."""
+        table = self._tables.get(name)
+        return time.monotonic() - table.checked_at if table is not None else None
+
+    def get_many(self, name: str, keys) -> Dict[Any, Dict[str, Any]]:
+        """
+        Rows for the given keys, by key (missing keys are absent). Served from
+        memory when the table is cached, otherwise with one IN query.
+        """
+        keys = {k for k in keys if k is not None}
+        if not keys:
+            return {}
+        table = self.table(name)
+        if table is not None:
+            return {k: row for k in keys if (row := table.get(k)) is not None}
+
+        spec = DIMENSIONS[name]
+        params = {f"key_{i}": k for i, k in enumerate(sorted(keys))}
+        placeholders = ", ".join(f"%({p})s" for p in params)
+        rows = self._run_query(
+            f"SELECT {', '.join(spec['columns'])} FROM {name} WHERE {spec['key']} IN ({placeholders})", params
+        )
+        rows = [_as_dict(r, spec["columns"]) for r in rows]
+        return {r[spec["key"]]: r for r in rows}
+
+    def enrich(
+        self, rows: List[Dict[str, Any]], columns: Dict[str, Sequence[str]], inner: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Adds dimension columns to rows that carry the dimension keys, in place;
+        e.g. {"customers": ["customer_name"]} sets row["customer_name"] from
+        row["customer_id"]. Unknown keys get None, or with `inner` their rows
+        are left out of the returned list, like an inner join with each table
+        in `columns` (which may list no columns, to only filter).
+        """
+        for name, names in columns.items():
+            key = DIMENSIONS[name]["key"]
+            found = self.get_many(name, (r[key] for r in rows))
+            if inner:
+                rows = [row for row in rows if row[key] in found]
+            for row in rows:
+                match = found.get(row[key])
+                for column in names:
+                    row[column] = match[column] if match is not None else None
+        return rows
+
+    def _is_writer(self) -> bool:
+        return self._store is None or self._store.is_writer()
+
+    def refresh(self):
+        """Reloads every table whose version changed (or that has no known version)."""
+        writer = self._is_writer()
+        for name in DIMENSIONS:
+            try:
+                if writer:
+                    self._refresh_table(name)
+                else:
+                    self._follow_snapshot(name)
+            except Exception:
+                logger.exception("Could not refresh dimension table %s", name)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            if all(name in self._tables for name in DIMENSIONS):
+                self._loaded.set()
+            # Readers poll the shared snapshot more often than the writer queries the warehouse
+            wait = self.refresh_seconds if self._is_writer() else min(self.refresh_seconds, self._store.poll_seconds)
+            self._stop.wait(wait)
+
+    def _follow_snapshot(self, name: str):
+        token = self._store.token(name)
+        if token is None:
+            return
+        if token != self._snapshots.get(name):
+            rows, version = self._store.load(name)
+            self._tables[name] = DimensionTable(name=name, rows=rows, version=version, checked_at=time.monotonic())
+            self._snapshots[name] = token
+        age = self._store.age(name)
+        if age is not None:
+            self._tables[name].checked_at = time.monotonic() - age
+
+    def _version(self, name: str) -> Optional[int]:
+        try:
+            rows = self._run_query(f"DESCRIBE HISTORY {name} LIMIT 1", {})
+        except Exception:
+            # Not a Delta table (or no permission): reload on every refresh
+            return None
+        if not rows:
+            return None
+        row = rows[0]
+        return row["version"] if isinstance(row, dict) else row[0]
+
+    def _refresh_table(self, name: str):
+        version = self._version(name)
+        current = self._tables.get(name)
+        if current is not None and version is not None and version == current.version:
+            current.checked_at = time.monotonic()
+            if self._store is not None:
+                self._store.touch(name)
+            return
+
+        spec = DIMENSIONS[name]
+        started = time.perf_counter()
+        rows = self._run_query(f"SELECT {', '.join(spec['columns'])} FROM {name}", {})
+        loaded = DimensionTable(
+            name=name,
+            rows=[_as_dict(r, spec["columns"]) for r in rows],
+            version=version,
+            checked_at=time.monotonic(),
+        )
+        # A single reference swap; readers see either the old or the new table
+        self._tables[name] = loaded
+        if self._store is not None:
+            self._store.publish(name, loaded.rows, spec["columns"], version)
+        logger.info(
+            "Loaded %s rows of %s (version %s) in %.2fs", len(loaded.rows), name, version,
+            time.perf_counter() - started,
+        )
+
+
+def _as_dict(row, columns: Sequence[str]) -> Dict[str, Any]:
+    if isinstance(row, dict):
+        return {c: row[c] for c in columns}
+    return dict(zip(columns, row))
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance, matching the warehouse's levenshtein() function."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def closest_value(values: Sequence[str], name: str):
+    """(value, distance) of the value closest to `name`, ignoring case, or (None, None)."""
+    best, best_distance = None, None
+    for value in sorted(values):
+        distance = levenshtein(value.lower(), name.lower())
+        if best_distance is None or distance < best_distance:
+            best, best_distance = value, distance
+    return best, best_distance
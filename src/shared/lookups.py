@@ -0,0 +1,68 @@
+# lookups.py
+"""
+Batch lookups by ID, so resolving many customers, products or orders is one
+call instead of one per ID.
+
+- IDs may be given as integers or comma-separated strings ("3,7"); duplicates
+  and empty values are dropped, the order of first appearance is kept, and
+  more than MAX_LOOKUP_IDS distinct IDs is an error
+- customers and products are served from the dimension cache, or with one
+  IN query while it is not loaded (DimensionCache.get_many)
+- orders are read with one IN query on sales_orders joined with order_lines
+
+Results are keyed by ID in request order, with None for unknown IDs.
+
+Shared by the API, the MCP server and the notebooks (src/shared).
+"""
+from os import environ
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MAX_LOOKUP_IDS = int(environ.get("MAX_LOOKUP_IDS", 500))
+
+
+def parse_ids(ids: Iterable[Any]) -> List[int]:
+    """Distinct integer IDs in order of first appearance; raises ValueError for bad or too many IDs."""
+    unique: Dict[int, None] = {}
+    for value in ids or []:
+        for part in value.split(",") if isinstance(value, str) else [value]:
+            if part is None or isinstance(part, str) and not part.strip():
+                continue
+            try:
+                unique[int(part)] = None
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid ID {part!r}; expected integers")
+    if len(unique) > MAX_LOOKUP_IDS:
+        raise ValueError(f"At most {MAX_LOOKUP_IDS} IDs per lookup, got {len(unique)}")
+    return list(unique)
+
+
+def lookup_dimension(dimension_cache, name: str, ids: Iterable[Any]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """Rows of the `name` dimension table (customers, products) keyed by ID; None for unknown IDs."""
+    ids = parse_ids(ids)
+    return keyed(ids, dimension_cache.get_many(name, ids))
+
+
+def order_lookup_sql(ids: List[int], columns: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    One query for the order lines of the given orders, ordered by order_id.
+    `columns` maps result columns to SQL expressions over sales_orders `o`
+    and order_lines `l`; orders without lines have one row with NULL line
+    columns.
+    """
+    params = {f"order_id_{i}": order_id for i, order_id in enumerate(ids)}
+    placeholders = ", ".join(f"%({p})s" for p in params)
+    select_list = ",\n            ".join(f"{expr} AS {name}" for name, expr in columns.items())
+    sql = f"""
+        SELECT
+            {select_list}
+        FROM sales_orders o
+        LEFT JOIN order_lines l ON o.order_id = l.order_id
+        WHERE o.order_id IN ({placeholders})
+        ORDER BY o.order_id
+    """
+    return sql, params
+
+
+def keyed(ids: List[int], found: Dict[int, Any]) -> Dict[int, Any]:
+    """`found` re-keyed in request order, with None for the IDs it lacks."""
+    return {i: found.get(i) for i in ids}
@@ -0,0 +1,445 @@
+# resilience.py
+"""
+Retries, hedged reads and a circuit breaker around warehouse queries.
+
+db.py sends every statement through `Resilience.run`:
+
+- retries:  failures classified as transient by `is_transient` (connection
+            and network errors, throttling, a warehouse that is starting or
+            temporarily unavailable) are retried, up to DB_RETRY_ATTEMPTS
+            attempts in all, after a random wait of up to
+            DB_RETRY_BASE_SECONDS * 2^(attempt - 1) ("full jitter", capped at
+            DB_RETRY_MAX_SECONDS). Other errors (SQL errors, bad parameters)
+            are raised at once.
+- deadline: no retry or hedge starts after the deadline: the end of the
+            enclosing `deadline()` scope (DeadlineMiddleware opens one per
+            API request) or else DB_DEADLINE_SECONDS after the query started.
+            A statement already running is not interrupted.
+- hedging:  with DB_HEDGE_ENABLED, a read-only statement (SELECT, WITH,
+            DESCRIBE, SHOW) still running after the DB_HEDGE_PERCENTILE
+            latency of recent queries is started again on another
+            connection, and whichever succeeds first is returned. The other
+            runs to completion in the background.
+- breaker:  DB_BREAKER_FAILURES consecutive transient failures open the
+            circuit: queries then fail fast for DB_BREAKER_RESET_SECONDS,
+            after which one trial query decides whether it closes again.
+
+Exhausted retries of a transient failure and an open circuit both raise
+WarehouseUnavailableError, which carries a retry_after hint (the API answers
+it with 503 and Retry-After). `stats()` counts retries, hedges and rejections
+and is reported on /ready.
+
+For tests, FaultInjector wraps a connection factory so that statements fail
+or stall at given rates (DB_FAULTS, e.g. "error=0.05,slow=0.02,slow_seconds=3",
+turns it on in db.py), and FakeConnection answers statements with canned rows
+without a warehouse.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import contextvars
+import math
+import random
+import re
+import threading
+import time
+
+from opentelemetry import trace
+
+RETRY_ATTEMPTS = int(environ.get("DB_RETRY_ATTEMPTS", 3))
+RETRY_BASE_SECONDS = float(environ.get("DB_RETRY_BASE_SECONDS", 0.2))
+RETRY_MAX_SECONDS = float(environ.get("DB_RETRY_MAX_SECONDS", 5))
+DEADLINE_SECONDS = float(environ.get("DB_DEADLINE_SECONDS", 60))
+HEDGE_ENABLED = environ.get("DB_HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(environ.get("DB_HEDGE_PERCENTILE", 95))
+# Recent query latencies needed before the percentile is trusted
+HEDGE_MIN_SAMPLES = int(environ.get("DB_HEDGE_MIN_SAMPLES", 50))
+BREAKER_FAILURES = int(environ.get("DB_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(environ.get("DB_BREAKER_RESET_SECONDS", 30))
+
+# Exception class names (anywhere in the MRO) of transient failures, so the
+# Databricks connector need not be imported to classify its errors
+TRANSIENT_ERROR_TYPES = {
+    "RequestError",
+    "SessionAlreadyClosedError",
+    "CursorAlreadyClosedError",
+    "MaxRetryDurationError",
+}
+TRANSIENT_MESSAGES = re.compile(
+    r"TEMPORARILY_UNAVAILABLE|Too Many Requests|\b(429|502|503|504)\b|timed? ?out|"
+    r"Connection (reset|refused|aborted)|database is locked|warehouse is (starting|stopped)",
+    re.IGNORECASE,
+)
+READ_ONLY = re.compile(r"^\s*(SELECT|WITH|DESCRIBE|SHOW)\b", re.IGNORECASE)
+
+
+class WarehouseUnavailableError(Exception):
+    """The warehouse failed transiently and retrying did not help (or the circuit is open)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InjectedFault(ConnectionError):
+    """A failure injected by FaultInjector."""
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any(t.__name__ in TRANSIENT_ERROR_TYPES for t in type(error).__mro__):
+        return True
+    return bool(TRANSIENT_MESSAGES.search(str(error)))
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("db_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Bounds the retries and hedges of the queries run in this scope (nested scopes only shorten it)."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware giving each HTTP request a query deadline of `seconds`."""
+
+    def __init__(self, app, seconds: float = DEADLINE_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with deadline(self.seconds):
+            await self.app(scope, receive, send)
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self._opened_at < self.reset_seconds else "half_open"
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a query may run now; in half-open state only one trial query at a time may."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "open":
+                return False
+            now = time.monotonic()
+            # A trial that never reported back does not block the circuit forever
+            if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                return False
+            self._trial_started = now
+            return True
+
+    def success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial_started is not None or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+                self._trial_started = None
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful queries."""
+
+    def __init__(self, size: int = 500):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+
+class Resilience:
+    """
+    Runs `execute(query, params)` with retries, hedging and a circuit breaker.
+    `max_workers` bounds the threads hedged queries run on; give it room for
+    twice the connection pool.
+    """
+
+    def __init__(
+        self,
+        attempts: int = RETRY_ATTEMPTS,
+        base_seconds: float = RETRY_BASE_SECONDS,
+        max_seconds: float = RETRY_MAX_SECONDS,
+        deadline_seconds: float = DEADLINE_SECONDS,
+        hedge: bool = HEDGE_ENABLED,
+        hedge_percentile: float = HEDGE_PERCENTILE,
+        hedge_min_samples: int = HEDGE_MIN_SAMPLES,
+        breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 16,
+    ):
+        self.attempts = max(1, attempts)
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.deadline_seconds = deadline_seconds
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-hedge") if hedge else None
+        self._counts: Dict[str, int] = {
+            "queries": 0,
+            "transient_failures": 0,
+            "retries": 0,
+            "retries_exhausted": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "breaker_rejections": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        p50 = self.latency.percentile(50)
+        hedge_after = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        return {
+            **counts,
+            "breaker": self.breaker.state,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "hedge_after_ms": round(hedge_after * 1000, 1) if self.hedge and hedge_after is not None else None,
+        }
+
+    def _unavailable(self, message: str) -> WarehouseUnavailableError:
+        retry_after = math.ceil(self.breaker.retry_after() or self.max_seconds)
+        return WarehouseUnavailableError(f"{message}; retry in {retry_after}s", retry_after)
+
+    def run(self, execute: Callable[[str, Dict[str, Any]], List[Any]], query: str, params: Dict[str, Any]) -> List[Any]:
+        self._count("queries")
+        deadline_at = _deadline.get() or time.monotonic() + self.deadline_seconds
+        span = trace.get_current_span()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("breaker_rejections")
+                raise self._unavailable("Warehouse unavailable (circuit open after repeated failures)")
+            attempt += 1
+            started = time.monotonic()
+            try:
+                rows = self._execute(execute, query, params, deadline_at)
+            except Exception as e:
+                if not is_transient(e):
+                    # The warehouse answered; the statement itself is at fault
+                    self.breaker.success()
+                    raise
+                self._count("transient_failures")
+                self.breaker.failure()
+                backoff = random.uniform(0, min(self.max_seconds, self.base_seconds * 2 ** (attempt - 1)))
+                if attempt >= self.attempts or time.monotonic() + backoff >= deadline_at:
+                    self._count("retries_exhausted")
+                    raise self._unavailable(f"Warehouse query failed after {attempt} attempt(s): {e}") from e
+                self._count("retries")
+                span.add_event(
+                    "db.retry",
+                    {"db.retry.attempt": attempt, "db.retry.backoff_ms": round(backoff * 1000), "error": str(e)},
+                )
+                time.sleep(backoff)
+                continue
+            self.breaker.success()
+            self.latency.add(time.monotonic() - started)
+            return rows
+
+    def _execute(self, execute, query: str, params: Dict[str, Any], deadline_at: float) -> List[Any]:
+        hedge_after = None
+        if self.hedge and READ_ONLY.match(query):
+            hedge_after = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        if hedge_after is None:
+            return execute(query, params)
+
+        primary = self._executor.submit(contextvars.copy_context().run, execute, query, params)
+        try:
+            return primary.result(timeout=hedge_after)
+        except FutureTimeout:
+            pass
+        if time.monotonic() >= deadline_at:
+            return primary.result()
+
+        self._count("hedged")
+        trace.get_current_span().add_event("db.hedge", {"db.hedge.after_ms": round(hedge_after * 1000)})
+        hedge = self._executor.submit(contextvars.copy_context().run, execute, query, params)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        first = done.pop()
+        other = hedge if first is primary else primary
+        if first.exception() is None:
+            if first is hedge:
+                self._count("hedge_wins")
+            return first.result()
+        # The first to finish failed; the other one decides
+        result = other.result()
+        if other is hedge:
+            self._count("hedge_wins")
+        return result
+
+
+class FaultInjector:
+    """
+    Wraps connections so that each statement fails with InjectedFault at
+    `error_rate` or stalls for `slow_seconds` first at `slow_rate`.
+    """
+
+    def __init__(self, error_rate: float = 0.0, slow_rate: float = 0.0, slow_seconds: float = 2.0, seed=None):
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "FaultInjector":
+        """From "error=0.05,slow=0.02,slow_seconds=3,seed=1" (all optional)."""
+        values = dict(item.split("=", 1) for item in spec.replace(" ", "").split(",") if "=" in item)
+        return cls(
+            error_rate=float(values.get("error", 0)),
+            slow_rate=float(values.get("slow", 0)),
+            slow_seconds=float(values.get("slow_seconds", 2)),
+            seed=int(values["seed"]) if "seed" in values else None,
+        )
+
+    def wrap(self, factory: Callable[[], Any]) -> Callable[[], Any]:
+        return lambda: _FaultyConnection(factory(), self)
+
+    def before_execute(self):
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            raise InjectedFault("Injected fault: connection reset")
+        if roll < self.error_rate + self.slow_rate:
+            time.sleep(self.slow_seconds)
+
+
+class _FaultyConnection:
+    def __init__(self, connection, injector: FaultInjector):
+        self._connection = connection
+        self._injector = injector
+
+    def cursor(self):
+        return _FaultyCursor(self._connection.cursor(), self._injector)
+
+    def close(self):
+        self._connection.close()
+
+
+class _FaultyCursor:
+    def __init__(self, cursor, injector: FaultInjector):
+        self._cursor = cursor
+        self._injector = injector
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.__exit__(*exc)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query: str, params=None):
+        self._injector.before_execute()
+        self._cursor.execute(query, params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class FakeConnection:
+    """
+    A connection answering every statement with `rows` (tuples of `columns`),
+    or with `respond(query, params)` when given. Executed statements are kept
+    in `executed`.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[tuple] = (),
+        columns: Sequence[str] = (),
+        respond: Optional[Callable[[str, Dict[str, Any]], Sequence[tuple]]] = None,
+    ):
+        self.rows = list(rows)
+        self.columns = list(columns)
+        self.respond = respond
+        self.executed: List[tuple] = []
+        self.closed = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeCursor:
+    def __init__(self, connection: FakeConnection):
+        self._connection = connection
+        self._rows: List[tuple] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    @property
+    def description(self):
+        return [(c,) for c in self._connection.columns]
+
+    def execute(self, query: str, params=None):
+        self._connection.executed.append((query, params))
+        respond = self._connection.respond
+        self._rows = list(respond(query, params) if respond is not None else self._connection.rows)
+
+    def fetchall(self):
+        return self._rows
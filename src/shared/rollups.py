@@ -0,0 +1,509 @@
+# rollups.py
+"""
+Materialized daily rollups of order_lines joined to sales_orders.
+
+Agent questions are dominated by revenue, quantity and order counts per
+customer, product, category, region and day or month. Instead of aggregating
+the raw join every time, these are answered from small daily rollup tables:
+
+- build:   CREATE OR REPLACE each rollup from the raw join (full rebuild)
+- refresh: recompute only the days on or after the stored watermark date and
+           atomically replace them (INSERT ... REPLACE WHERE), then advance
+           the watermark to the latest order date
+- query:   `plan_summary` picks a rollup that covers the requested grouping
+           and filters. Days before the watermark are read from the rollup
+           and days on or after it from the raw join, so results are exact
+           and include orders that arrived since the last refresh.
+
+`approximate_summary_sql` answers the same requests from a sample of orders
+instead (see sampling.py), with error bounds on every metric. Both add
+avg_order_value (revenue / order_count, `with_averages`), estimated from a
+sample as a ratio with its own bound.
+
+Run `python rollups.py build|refresh|verify` as a scheduled job; `verify`
+compares rollup-served answers with the raw joins for the common shapes.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import logging
+import threading
+import time
+
+from sampling import estimate_ratio, estimate_total, sample_clause, within_bound
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_TABLE = "rollup_watermarks"
+
+# How long a watermark read from the warehouse is reused for query planning
+WATERMARK_TTL_SECONDS = 60
+
+# Dimension name -> expression over the raw join
+RAW_DIMENSIONS = {
+    "customer_id": "o.customer_id",
+    "region": "o.region",
+    "product_id": "l.product_id",
+    "product_category": "p.product_category",
+}
+
+# Dimensions that vary within an order: summing distinct-order counts across
+# their values would count an order once per value.
+LINE_LEVEL_DIMENSIONS = {"product_id", "product_category"}
+
+# Dimensions fully determined by another one (each product has one category)
+DETERMINED_BY = {"product_category": "product_id"}
+
+GRAINS = ("day", "month", "total")
+
+METRICS = ("revenue", "quantity", "line_count", "order_count")
+# Means derived from the summed METRICS
+AVERAGES = ("avg_order_value",)
+
+_RAW_FROM = """
+    FROM sales_orders o
+    JOIN order_lines l ON o.order_id = l.order_id
+    LEFT JOIN products p ON l.product_id = p.product_id
+"""
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    dimensions: Tuple[str, ...]
+
+    def serves(self, dimensions: Sequence[str], with_order_count: bool) -> bool:
+        needed = set(dimensions)
+        if not needed <= set(self.dimensions):
+            return False
+        if with_order_count:
+            # order_count can only be summed when every line-level dimension of
+            # the rollup is part of (or determined by) the requested grouping
+            return all(
+                d in needed or DETERMINED_BY.get(d) in needed
+                for d in self.dimensions if d in LINE_LEVEL_DIMENSIONS
+            )
+        return True
+
+
+# Ordered from smallest to largest so the first match is the cheapest
+ROLLUPS = [
+    Rollup("rollup_sales_customer_day", ("customer_id", "region")),
+    Rollup("rollup_sales_category_day", ("product_category", "region")),
+    Rollup("rollup_sales_product_day", ("product_id", "product_category", "region")),
+    Rollup("rollup_sales_customer_product_day", ("customer_id", "product_id", "product_category", "region")),
+]
+
+
+@dataclass
+class SummaryRequest:
+    group_by: Sequence[str] = ()
+    grain: str = "total"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    customer_id: Optional[int] = None
+    product_id: Optional[int] = None
+    region: Optional[str] = None
+    product_category: Optional[str] = None
+    limit: int = 100
+
+    def filters(self) -> Dict[str, Any]:
+        return {
+            d: getattr(self, d)
+            for d in ("customer_id", "product_id", "region", "product_category")
+            if getattr(self, d) is not None
+        }
+
+    def validate(self):
+        unknown = [d for d in self.group_by if d not in RAW_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unsupported group_by dimensions: {unknown}. Expected any of {list(RAW_DIMENSIONS)}")
+        if self.grain not in GRAINS:
+            raise ValueError(f"Unsupported grain: {self.grain}. Expected one of {list(GRAINS)}")
+
+
+def _period(date_expr: str, grain: str) -> Optional[str]:
+    if grain == "day":
+        return f"CAST({date_expr} AS STRING)"
+    if grain == "month":
+        return f"DATE_FORMAT({date_expr}, 'yyyy-MM')"
+    return None
+
+
+def _where(request: SummaryRequest, columns: Dict[str, str], date_column: str, params: Dict[str, Any]) -> List[str]:
+    conditions = []
+    for dimension, value in request.filters().items():
+        conditions.append(f"{columns[dimension]} = %({dimension})s")
+        params[dimension] = value
+    if request.start_date:
+        conditions.append(f"{date_column} >= %(start_date)s")
+        params["start_date"] = request.start_date
+    if request.end_date:
+        conditions.append(f"{date_column} <= %(end_date)s")
+        params["end_date"] = request.end_date
+    return conditions
+
+
+def raw_summary_sql(request: SummaryRequest) -> Tuple[str, Dict[str, Any]]:
+    """The summary computed directly from the raw join."""
+    params: Dict[str, Any] = {"limit": request.limit}
+    conditions = _where(request, RAW_DIMENSIONS, "o.order_date", params)
+    select = [f"{RAW_DIMENSIONS[d]} AS {d}" for d in request.group_by]
+    group = [RAW_DIMENSIONS[d] for d in request.group_by]
+
+    period = _period("o.order_date", request.grain)
+    if period:
+        select.insert(0, f"{period} AS period")
+        group.insert(0, period)
+
+    sql = f"""
+    SELECT
+        {', '.join(select + [''])}
+        ROUND(SUM(l.line_total), 2) AS revenue,
+        SUM(l.quantity) AS quantity,
+        COUNT(*) AS line_count,
+        COUNT(DISTINCT o.order_id) AS order_count
+    {_RAW_FROM}
+    {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    {'GROUP BY ' + ', '.join(group) if group else ''}
+    ORDER BY {'period, ' if period else ''}revenue DESC
+    LIMIT %(limit)s
+    """
+    return sql, params
+
+
+def approximate_summary_sql(request: SummaryRequest, sample_percent: float) -> Tuple[str, Dict[str, Any]]:
+    """
+    The summary over a sample of orders. Per-order totals are computed first
+    so each metric comes with the sum of squares its error bound needs.
+    """
+    params: Dict[str, Any] = {"limit": request.limit}
+    conditions = _where(request, RAW_DIMENSIONS, "o.order_date", params)
+    dims = list(request.group_by)
+    inner_select = [f"{RAW_DIMENSIONS[d]} AS {d}" for d in dims]
+    inner_group = [RAW_DIMENSIONS[d] for d in dims]
+    outer = list(dims)
+
+    period = _period("o.order_date", request.grain)
+    if period:
+        inner_select.insert(0, f"{period} AS period")
+        inner_group.insert(0, period)
+        outer.insert(0, "period")
+
+    sampled_from = _RAW_FROM.replace("FROM sales_orders o", f"FROM sales_orders {sample_clause(sample_percent)} o")
+    sql = f"""
+    SELECT
+        {', '.join(outer + [''])}
+        SUM(revenue) AS revenue,
+        SUM(revenue * revenue) AS revenue_squares,
+        SUM(quantity) AS quantity,
+        SUM(quantity * quantity) AS quantity_squares,
+        SUM(line_count) AS line_count,
+        SUM(line_count * line_count) AS line_count_squares,
+        COUNT(*) AS order_count
+    FROM (
+        SELECT
+            {', '.join(inner_select + [''])}
+            o.order_id,
+            SUM(l.line_total) AS revenue,
+            SUM(l.quantity) AS quantity,
+            COUNT(*) AS line_count
+        {sampled_from}
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        GROUP BY {', '.join(inner_group + ['o.order_id'])}
+    ) t
+    {'GROUP BY ' + ', '.join(outer) if outer else ''}
+    ORDER BY {'period, ' if period else ''}revenue DESC
+    LIMIT %(limit)s
+    """
+    return sql, params
+
+
+def approximate_summary_rows(
+    rows: List[Any], request: SummaryRequest, fraction: float, max_relative_error: float
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Estimated summary rows, each metric (and avg_order_value) with a
+    `<metric>_error` 95% bound, or None when the sample is empty or any
+    revenue bound is wider than `max_relative_error` (the caller then runs
+    the exact query).
+    """
+    if not rows:
+        return None
+    keys = (["period"] if request.grain != "total" else []) + list(request.group_by)
+    columns = keys + [
+        "revenue", "revenue_squares", "quantity", "quantity_squares",
+        "line_count", "line_count_squares", "order_count",
+    ]
+    estimated = []
+    for row in rows:
+        values = row if isinstance(row, dict) else dict(zip(columns, row))
+        result = {k: values[k] for k in keys}
+        for metric in ("revenue", "quantity", "line_count"):
+            estimate, error = estimate_total(
+                float(values[metric] or 0), float(values[f"{metric}_squares"] or 0), fraction
+            )
+            result[metric], result[f"{metric}_error"] = estimate, error
+        # Each sampled order contributes 1, so its sum of squares is the count
+        result["order_count"], result["order_count_error"] = estimate_total(
+            values["order_count"], values["order_count"], fraction
+        )
+        # Revenue per order, a ratio of the two: with x = 1 per order the
+        # cross products are the revenues themselves
+        revenue, revenue_squares = float(values["revenue"] or 0), float(values["revenue_squares"] or 0)
+        result["avg_order_value"], result["avg_order_value_error"] = estimate_ratio(
+            revenue, values["order_count"], revenue_squares, values["order_count"], revenue, fraction
+        )
+        if not within_bound(result["revenue"], result["revenue_error"], max_relative_error):
+            return None
+        for metric in ("quantity", "line_count", "order_count"):
+            result[metric] = round(result[metric])
+        for metric in ("revenue", "revenue_error", "quantity_error", "line_count_error", "order_count_error",
+                       "avg_order_value", "avg_order_value_error"):
+            result[metric] = round(result[metric], 2)
+        estimated.append(result)
+    return estimated
+
+
+def with_averages(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds AVERAGES to an exact summary row with the METRICS, in place."""
+    row["avg_order_value"] = round(float(row["revenue"]) / row["order_count"], 2) if row["order_count"] else None
+    return row
+
+
+def rollup_summary_sql(request: SummaryRequest, rollup: Rollup, watermark: date) -> Tuple[str, Dict[str, Any]]:
+    """
+    The summary from `rollup` for days before `watermark`, combined with the
+    raw join for days on or after it.
+    """
+    params: Dict[str, Any] = {"limit": request.limit, "watermark": watermark}
+    rollup_columns = {d: d for d in rollup.dimensions}
+    rollup_conditions = _where(request, rollup_columns, "order_date", params)
+    raw_conditions = _where(request, RAW_DIMENSIONS, "o.order_date", params)
+    rollup_conditions.append("order_date < %(watermark)s")
+    raw_conditions.append("o.order_date >= %(watermark)s")
+
+    dims = list(request.group_by)
+    raw_dims = [f"{RAW_DIMENSIONS[d]} AS {d}" for d in dims]
+    raw_group = ["o.order_date"] + [RAW_DIMENSIONS[d] for d in dims]
+
+    select = list(dims)
+    group = list(dims)
+    period = _period("order_date", request.grain)
+    if period:
+        select.insert(0, f"{period} AS period")
+        group.insert(0, period)
+
+    sql = f"""
+    SELECT
+        {', '.join(select + [''])}
+        ROUND(SUM(revenue), 2) AS revenue,
+        SUM(quantity) AS quantity,
+        SUM(line_count) AS line_count,
+        SUM(order_count) AS order_count
+    FROM (
+        SELECT order_date, {', '.join(dims + [''])}revenue, quantity, line_count, order_count
+        FROM {rollup.name}
+        WHERE {' AND '.join(rollup_conditions)}
+        UNION ALL
+        SELECT
+            o.order_date AS order_date,
+            {', '.join(raw_dims + [''])}
+            SUM(l.line_total) AS revenue,
+            SUM(l.quantity) AS quantity,
+            COUNT(*) AS line_count,
+            COUNT(DISTINCT o.order_id) AS order_count
+        {_RAW_FROM}
+        WHERE {' AND '.join(raw_conditions)}
+        GROUP BY {', '.join(raw_group)}
+    ) t
+    {'GROUP BY ' + ', '.join(group) if group else ''}
+    ORDER BY {'period, ' if period else ''}revenue DESC
+    LIMIT %(limit)s
+    """
+    return sql, params
+
+
+def select_rollup(request: SummaryRequest) -> Optional[Rollup]:
+    dimensions = set(request.group_by) | set(request.filters())
+    for rollup in ROLLUPS:
+        if rollup.serves(dimensions, with_order_count=True):
+            return rollup
+    return None
+
+
+class RollupCatalog:
+    """
+    Plans summary queries against the rollups, caching the watermarks read
+    from the warehouse for WATERMARK_TTL_SECONDS.
+
+    `run_query(sql, params)` must return rows as tuples or dicts with the
+    selected columns in order.
+    """
+
+    def __init__(self, run_query: Callable[[str, Dict[str, Any]], List[Any]], enabled: bool = True):
+        self._run_query = run_query
+        self.enabled = enabled
+        self._watermarks: Dict[str, date] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def watermarks(self) -> Dict[str, date]:
+        with self._lock:
+            if time.monotonic() - self._loaded_at > WATERMARK_TTL_SECONDS:
+                try:
+                    rows = self._run_query(
+                        f"SELECT rollup_name, watermark_date FROM {WATERMARK_TABLE}", {}
+                    )
+                    self._watermarks = {_value(r, 0, "rollup_name"): _value(r, 1, "watermark_date") for r in rows}
+                except Exception:
+                    logger.exception("Could not read rollup watermarks; answering from raw tables")
+                    self._watermarks = {}
+                self._loaded_at = time.monotonic()
+            return dict(self._watermarks)
+
+    def plan_summary(self, request: SummaryRequest) -> Tuple[str, Dict[str, Any], str]:
+        """Returns (sql, params, source) where source is the rollup name or "raw"."""
+        request.validate()
+        if self.enabled:
+            rollup = select_rollup(request)
+            if rollup is not None:
+                watermark = self.watermarks().get(rollup.name)
+                if watermark is not None:
+                    sql, params = rollup_summary_sql(request, rollup, watermark)
+                    return sql, params, rollup.name
+        sql, params = raw_summary_sql(request)
+        return sql, params, "raw"
+
+    # --- maintenance -----------------------------------------------------
+
+    def _rollup_select(self, rollup: Rollup, where: str = "") -> str:
+        dims = [f"{RAW_DIMENSIONS[d]} AS {d}" for d in rollup.dimensions]
+        group = ["o.order_date"] + [RAW_DIMENSIONS[d] for d in rollup.dimensions]
+        return f"""
+        SELECT
+            o.order_date AS order_date,
+            {', '.join(dims)},
+            SUM(l.line_total) AS revenue,
+            SUM(l.quantity) AS quantity,
+            COUNT(*) AS line_count,
+            COUNT(DISTINCT o.order_id) AS order_count
+        {_RAW_FROM}
+        {where}
+        GROUP BY {', '.join(group)}
+        """
+
+    def _ensure_watermark_table(self):
+        self._run_query(
+            f"CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} "
+            "(rollup_name STRING, watermark_date DATE, refreshed_at TIMESTAMP)", {}
+        )
+
+    def _set_watermark(self, rollup: Rollup):
+        self._run_query(f"""
+        MERGE INTO {WATERMARK_TABLE} w
+        USING (SELECT %(name)s AS rollup_name, MAX(order_date) AS watermark_date FROM {rollup.name}) s
+        ON w.rollup_name = s.rollup_name
+        WHEN MATCHED THEN UPDATE SET watermark_date = s.watermark_date, refreshed_at = current_timestamp()
+        WHEN NOT MATCHED THEN INSERT (rollup_name, watermark_date, refreshed_at)
+            VALUES (s.rollup_name, s.watermark_date, current_timestamp())
+        """, {"name": rollup.name})
+
+    def build(self, rollups: Sequence[Rollup] = ROLLUPS):
+        """Full rebuild. Use after backfills or late-arriving orders with old dates."""
+        self._ensure_watermark_table()
+        for rollup in rollups:
+            started = time.perf_counter()
+            self._run_query(f"CREATE OR REPLACE TABLE {rollup.name} AS {self._rollup_select(rollup)}", {})
+            self._set_watermark(rollup)
+            logger.info("Built %s in %.1fs", rollup.name, time.perf_counter() - started)
+        self._loaded_at = 0.0
+
+    def refresh(self, rollups: Sequence[Rollup] = ROLLUPS):
+        """
+        Incremental refresh: recomputes the days on or after each rollup's
+        watermark (the watermark day itself may have gained orders) and
+        replaces them atomically. Rollups without a watermark are built.
+        """
+        self._loaded_at = 0.0
+        watermarks = self.watermarks()
+        for rollup in rollups:
+            watermark = watermarks.get(rollup.name)
+            if watermark is None:
+                self.build([rollup])
+                continue
+            started = time.perf_counter()
+            self._run_query(
+                f"INSERT INTO {rollup.name} REPLACE WHERE order_date >= %(watermark)s "
+                f"{self._rollup_select(rollup, 'WHERE o.order_date >= %(watermark)s')}",
+                {"watermark": watermark},
+            )
+            self._set_watermark(rollup)
+            logger.info("Refreshed %s from %s in %.1fs", rollup.name, watermark, time.perf_counter() - started)
+        self._loaded_at = 0.0
+
+    def verify(self, requests: Optional[Sequence[SummaryRequest]] = None) -> List[str]:
+        """
+        Runs common summary shapes through the rollups and the raw join and
+        returns a description of every mismatch (an empty list means correct).
+        """
+        requests = requests or [
+            SummaryRequest(group_by=["customer_id"], limit=10000),
+            SummaryRequest(group_by=["customer_id"], grain="month", limit=10000),
+            SummaryRequest(group_by=["region"], grain="day", limit=100000),
+            SummaryRequest(group_by=["product_id"], limit=10000),
+            SummaryRequest(group_by=["product_category", "region"], grain="month", limit=10000),
+            SummaryRequest(group_by=["customer_id", "product_id"], limit=100000),
+        ]
+        mismatches = []
+        for request in requests:
+            sql, params, source = self.plan_summary(request)
+            raw_sql, raw_params = raw_summary_sql(request)
+            served = _normalize(self._run_query(sql, params))
+            expected = _normalize(self._run_query(raw_sql, raw_params))
+            if served != expected:
+                mismatches.append(f"{request} via {source}: {len(served)} rows vs {len(expected)} raw rows")
+        return mismatches
+
+
+def _value(row, index: int, name: str):
+    return row[name] if isinstance(row, dict) else row[index]
+
+
+def _normalize(rows) -> List[Tuple]:
+    normalized = []
+    for row in rows:
+        values = list(row.values()) if isinstance(row, dict) else list(row)
+        normalized.append(tuple(round(float(v), 2) if isinstance(v, float) else v for v in values))
+    return sorted(normalized, key=repr)
+
+
+def main():
+    try:
+        from db import run_query
+    except ImportError:
+        from db import run_dbquery as run_query
+
+    parser = argparse.ArgumentParser(description="Build, refresh or verify the sales rollup tables.")
+    parser.add_argument("command", choices=["build", "refresh", "verify"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = RollupCatalog(run_query)
+
+    if args.command == "build":
+        catalog.build()
+    elif args.command == "refresh":
+        catalog.refresh()
+    else:
+        mismatches = catalog.verify()
+        for mismatch in mismatches:
+            print(mismatch)
+        raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
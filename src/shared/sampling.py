@@ -0,0 +1,66 @@
+# sampling.py
+"""
+Approximate answers from a sample of orders, for exploratory questions that
+do not need every order line ("what's the typical discount by region?").
+
+Orders are sampled with TABLESAMPLE on sales_orders, so each sampled order
+brings all of its lines (a cluster sample) and the scan only reads a fraction
+of the data. A total over the population is estimated as the sampled total
+divided by the sample fraction f (Horvitz-Thompson), with a 95% error bound
+of 1.96 * sqrt((1 - f) / f^2 * sum of the squared per-order values). A mean,
+such as revenue per order, is a ratio R = Y / X of two totals: it is
+estimated as the ratio of the sampled sums, with the linearized bound
+1.96 * sqrt((1 - f) * sum of (y - R x)^2) / sum of x over sampled orders.
+
+Callers fall back to the exact query when a bound is wider than
+`max_relative_error` of its estimate (APPROXIMATE_MAX_RELATIVE_ERROR), or when
+the sample is too small to answer at all.
+
+Shared by the API, the MCP server and the notebooks (src/shared).
+"""
+from os import environ
+from typing import Tuple
+import math
+
+SAMPLE_PERCENT = float(environ.get("APPROXIMATE_SAMPLE_PERCENT", 5))
+MAX_RELATIVE_ERROR = float(environ.get("APPROXIMATE_MAX_RELATIVE_ERROR", 0.05))
+
+# Fixed so repeated questions get the same sample (and the same answer)
+SAMPLE_SEED = 42
+
+Z_95 = 1.96
+
+
+def sample_fraction(percent: float = SAMPLE_PERCENT) -> float:
+    return percent / 100
+
+
+def sample_clause(percent: float = SAMPLE_PERCENT) -> str:
+    """Goes between a table name and its alias: FROM sales_orders <clause> o."""
+    return f"TABLESAMPLE ({percent:g} PERCENT) REPEATABLE ({SAMPLE_SEED})"
+
+
+def estimate_total(sampled_sum: float, sampled_sum_of_squares: float, fraction: float) -> Tuple[float, float]:
+    """(estimate, 95% error bound) of a population total from a sample of orders."""
+    estimate = sampled_sum / fraction
+    variance = (1 - fraction) / fraction ** 2 * sampled_sum_of_squares
+    return estimate, Z_95 * math.sqrt(max(variance, 0.0))
+
+
+def estimate_ratio(
+    sampled_y: float,
+    sampled_x: float,
+    sampled_y_squares: float,
+    sampled_x_squares: float,
+    sampled_xy: float,
+    fraction: float,
+) -> Tuple[float, float]:
+    """(estimate, 95% error bound) of the ratio of two population totals, such as a mean per order."""
+    ratio = sampled_y / sampled_x
+    residual_squares = sampled_y_squares - 2 * ratio * sampled_xy + ratio ** 2 * sampled_x_squares
+    variance = (1 - fraction) * residual_squares / sampled_x ** 2
+    return ratio, Z_95 * math.sqrt(max(variance, 0.0))
+
+
+def within_bound(estimate: float, error: float, max_relative_error: float = MAX_RELATIVE_ERROR) -> bool:
+    return estimate != 0 and error / abs(estimate) <= max_relative_error
@@ -0,0 +1,147 @@
+# sqlite_backend.py
+"""
+A local SQLite stand-in for the Databricks warehouse, for offline runs such as
+workload replays (see workload_capture.py).
+
+Set DB_BACKEND=sqlite and SQLITE_PATH to a database with the customers,
+products, sales_orders and order_lines tables, e.g. one written by
+scripts/sales_bulk_load.py --sink sqlite (optionally from the output of
+scripts/sales_data_generator.py).
+
+Connections look like Databricks SQL connections to db.py. Queries are
+translated from the Databricks dialect where the services need it:
+
+- %(name)s parameters -> :name
+- CAST(... AS STRING) -> CAST(... AS TEXT)
+- DATE_FORMAT(date, 'yyyy-MM[-dd]'), DATEDIFF(end, start) and STDDEV_SAMP
+  -> registered functions
+- MAP_FROM_ENTRIES(COLLECT_LIST(STRUCT(key, value))) -> json_group_object,
+  so map columns come back as JSON text
+- TABLESAMPLE (p PERCENT) REPEATABLE (seed) -> a deterministic hash sample
+  of the table's rows
+
+Statements SQLite does not know (DESCRIBE HISTORY, rollup maintenance) fail
+as they would on a non-Delta table, and the callers fall back accordingly.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from datetime import date
+import math
+import re
+import sqlite3
+
+_PARAMETER = re.compile(r"%\((\w+)\)s")
+_AS_STRING = re.compile(r"\bAS\s+STRING\b", re.IGNORECASE)
+_MAP_AGGREGATE = re.compile(r"\bMAP_FROM_ENTRIES\s*\(\s*COLLECT_LIST\s*\(\s*STRUCT\s*\(", re.IGNORECASE)
+_TABLESAMPLE = re.compile(
+    r"\b(\w+)\s+TABLESAMPLE\s*\(\s*([\d.]+)\s+PERCENT\s*\)\s*(?:REPEATABLE\s*\(\s*(\d+)\s*\))?\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+def translate(query: str) -> str:
+    query = _PARAMETER.sub(r":\1", query)
+    query = _AS_STRING.sub("AS TEXT", query)
+    query = _translate_map_aggregates(query)
+    return _TABLESAMPLE.sub(_sample_subquery, query)
+
+
+def _translate_map_aggregates(query: str) -> str:
+    while True:
+        match = _MAP_AGGREGATE.search(query)
+        if match is None:
+            return query
+        # The STRUCT arguments end at the parenthesis that closes STRUCT(
+        depth, end = 1, match.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(query[end], 0)
+            end += 1
+        arguments = query[match.end():end - 1]
+        closing = re.match(r"\s*\)\s*\)", query[end:])
+        query = f"{query[:match.start()]}json_group_object({arguments}){query[end + closing.end():]}"
+
+
+def _sample_subquery(match) -> str:
+    table, percent, seed, alias = match.group(1), float(match.group(2)), int(match.group(3) or 0), match.group(4)
+    # Multiplicative hash of the rowid, so a seed always samples the same rows; the
+    # rowid is reduced first to keep the product within 64-bit integers
+    return (
+        f"(SELECT * FROM {table} "
+        f"WHERE (((rowid % 1000000007) * 48271 + {seed}) % 1000000) < {int(percent * 10000)}) {alias}"
+    )
+
+
+def _date_format(value, pattern):
+    if value is None:
+        return None
+    text = str(value)
+    return pattern.replace("yyyy", text[0:4]).replace("MM", text[5:7]).replace("dd", text[8:10])
+
+
+def _datediff(end, start):
+    if end is None or start is None:
+        return None
+    return (date.fromisoformat(str(end)[:10]) - date.fromisoformat(str(start)[:10])).days
+
+
+class _StddevSamp:
+    def __init__(self):
+        self._values = []
+
+    def step(self, value):
+        if value is not None:
+            self._values.append(float(value))
+
+    def finalize(self):
+        n = len(self._values)
+        if n < 2:
+            return None
+        mean = sum(self._values) / n
+        return math.sqrt(sum((v - mean) ** 2 for v in self._values) / (n - 1))
+
+
+def _levenshtein(a, b):
+    from dimensions import levenshtein
+
+    return None if a is None or b is None else levenshtein(a, b)
+
+
+class _Cursor:
+    def __init__(self, connection: sqlite3.Connection):
+        self._cursor = connection.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query: str, params=None):
+        self._cursor.execute(translate(query), params or {})
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class SqliteConnection:
+    def __init__(self, path: str):
+        # The connection pool hands a connection to one thread at a time
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+        self._connection.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+        self._connection.create_aggregate("STDDEV_SAMP", 1, _StddevSamp)
+        self._connection.create_function("levenshtein", 2, _levenshtein, deterministic=True)
+
+    def cursor(self) -> _Cursor:
+        return _Cursor(self._connection)
+
+    def close(self):
+        self._connection.close()
+
+
+def connect(path: str) -> SqliteConnection:
+    return SqliteConnection(path)
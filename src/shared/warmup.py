@@ -0,0 +1,138 @@
+# warmup.py
+"""
+Startup warm-up and readiness for scale-from-zero.
+
+The service accepts connections as soon as it is imported; the work a cold
+process would otherwise do on its first requests runs on background threads
+instead, concurrently:
+
+- imports:     modules imported lazily at first use (pyarrow, for artifacts,
+               snapshots and Arrow responses) are imported ahead of it
+- connections: WARMUP_CONNECTIONS warehouse connections are opened into the
+               pool (importing the Databricks connector), paying the
+               handshake before a request does
+- dimensions:  waits for the dimension cache's first load
+- plus steps specific to the service (rollup watermarks, the API's OpenAPI
+  schema)
+
+`status()` backs the /ready endpoint: "starting" until every step finished,
+then "ready", or "degraded" if a step failed (the service still answers, as
+it would without the warm-up). Past WARMUP_TIMEOUT_SECONDS the service
+reports ready with the unfinished steps still running, so a slow warehouse
+start does not keep it out of rotation indefinitely.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import contextvars
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = environ.get("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_CONNECTIONS = int(environ.get("WARMUP_CONNECTIONS", 2))
+WARMUP_TIMEOUT_SECONDS = float(environ.get("WARMUP_TIMEOUT_SECONDS", 60))
+
+# Imported at first use by artifacts.py, snapshot_store.py and Arrow responses
+LAZY_IMPORTS = ["pyarrow", "pyarrow.compute", "pyarrow.parquet"]
+
+
+def import_modules(names: Sequence[str]) -> List[str]:
+    """Imports the modules that are installed; returns the names imported."""
+    imported = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+            imported.append(name)
+        except ImportError:
+            pass
+    return imported
+
+
+class Warmup:
+    """
+    Runs named warm-up steps once, on a daemon thread, and reports their
+    progress. A step is a callable whose return value (if any) is reported
+    as its result.
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[Tuple[str, Callable[[], Any]]],
+        enabled: bool = WARMUP_ENABLED,
+        timeout_seconds: float = WARMUP_TIMEOUT_SECONDS,
+    ):
+        self.enabled = enabled
+        self.timeout_seconds = timeout_seconds
+        self._steps = list(steps) if enabled else []
+        self._state: Dict[str, Dict[str, Any]] = {name: {"state": "pending"} for name, _ in self._steps}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+        self._done = threading.Event()
+
+    def start(self):
+        """Starts the warm-up (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.monotonic()
+            if not self.enabled or not self._steps:
+                self._done.set()
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every step finished; False on timeout."""
+        return self._done.wait(timeout)
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=len(self._steps), thread_name_prefix="warmup") as executor:
+            for name, step in self._steps:
+                context = contextvars.copy_context()
+                executor.submit(context.run, self._run_step, name, step)
+        self._done.set()
+        logger.info("Warm-up finished in %.2fs: %s", time.monotonic() - self._started_at, self.status()["status"])
+
+    def _run_step(self, name: str, step: Callable[[], Any]):
+        self._state[name] = {"state": "running"}
+        started = time.perf_counter()
+        try:
+            result = step()
+            self._state[name] = {"state": "ok", "seconds": round(time.perf_counter() - started, 3)}
+            if result is not None:
+                self._state[name]["result"] = result
+        except Exception as e:
+            logger.exception("Warm-up step %s failed", name)
+            self._state[name] = {
+                "state": "failed",
+                "seconds": round(time.perf_counter() - started, 3),
+                "error": str(e),
+            }
+
+    @property
+    def ready(self) -> bool:
+        if self._started_at is None:
+            return False
+        return self._done.is_set() or time.monotonic() - self._started_at > self.timeout_seconds
+
+    def status(self) -> Dict[str, Any]:
+        steps = [dict(name=name, **self._state[name]) for name, _ in self._steps]
+        if not self.ready:
+            status = "starting"
+        elif all(s["state"] == "ok" for s in steps):
+            status = "ready"
+        else:
+            status = "degraded"
+        return {
+            "status": status,
+            "ready": self.ready,
+            "seconds": round(time.monotonic() - self._started_at, 3) if self._started_at is not None else None,
+            "steps": steps,
+        }
@@ -0,0 +1,213 @@
+# workload_capture.py
+"""
+Records the calls a service receives, so real agent workloads can be replayed
+offline (scripts/replay_workload.py) against a build under test.
+
+Set WORKLOAD_CAPTURE_PATH to enable. Each call is appended to that file as
+one compact JSON line:
+
+    {"ts": <start, epoch seconds>, "kind": "http" | "tool", "name": ...,
+     "params": {...}, "status": ..., "ms": <duration>, "bytes": <result size>,
+     "sha": <result hash>}
+
+- http (WorkloadCaptureMiddleware, the API): name is "<METHOD> <path>",
+  params the query string as [name, value] pairs plus the Accept header and,
+  for requests with a body, the body
+- tool (captured_tool, the MCP server): name is the tool name, params its
+  arguments
+
+The result hash is over canonical JSON (sorted keys) without VOLATILE_FIELDS,
+which differ on every call; non-JSON bodies are hashed as is, chunk by chunk
+as they are sent, without being held in memory. With
+WORKLOAD_CAPTURE_RESULTS=true the result itself is stored too, so a replay can
+show what changed rather than only that something did.
+
+Lines are written with a single O_APPEND write, so the worker processes of a
+host can share one file.
+
+Shared by the API and the MCP server (src/shared).
+"""
+from functools import wraps
+from os import environ
+from typing import Any, Dict, Optional
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl
+
+CAPTURE_PATH = environ.get("WORKLOAD_CAPTURE_PATH")
+CAPTURE_RESULTS = environ.get("WORKLOAD_CAPTURE_RESULTS", "false").lower() == "true"
+
+# Generated per call (artifact handles), never equal between runs
+VOLATILE_FIELDS = ("artifact_id", "expires_at")
+
+# Request bodies larger than this are not recorded
+MAX_REQUEST_BODY_BYTES = 64 * 1024
+
+
+def _without_volatile(value):
+    if isinstance(value, dict):
+        return {k: _without_volatile(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_without_volatile(v) for v in value]
+    return value
+
+
+def canonical(value) -> Any:
+    """The JSON-compatible form of a result that hashes and compares equal between runs."""
+    return _without_volatile(json.loads(json.dumps(value, default=str)))
+
+
+def result_hash(value) -> str:
+    encoded = json.dumps(canonical(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class WorkloadRecorder:
+    def __init__(self, path: str, capture_results: bool = CAPTURE_RESULTS):
+        self.path = path
+        self.capture_results = capture_results
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        params: Dict[str, Any],
+        started: float,
+        seconds: float,
+        status: Any,
+        result_bytes: int,
+        sha: str,
+        result: Any = None,
+    ):
+        entry = {
+            "ts": round(started, 3),
+            "kind": kind,
+            "name": name,
+            "params": params,
+            "status": status,
+            "ms": round(seconds * 1000, 2),
+            "bytes": result_bytes,
+            "sha": sha,
+        }
+        if self.capture_results and result is not None:
+            entry["result"] = result
+        line = (json.dumps(entry, separators=(",", ":"), default=str) + "\n").encode()
+        with self._lock:
+            os.write(self._fd, line)
+
+
+recorder: Optional[WorkloadRecorder] = WorkloadRecorder(CAPTURE_PATH) if CAPTURE_PATH else None
+
+
+def captured_tool(func):
+    """
+    Records each call of an MCP tool handler. Apply it below `@traced_tool`;
+    without WORKLOAD_CAPTURE_PATH the handler is returned unchanged.
+    """
+    if recorder is None:
+        return func
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started, clock = time.time(), time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - clock
+        try:
+            bound = signature.bind(*args, **kwargs)
+            value = canonical(result)
+            recorder.record(
+                "tool", func.__name__, dict(bound.arguments), started, seconds,
+                "error" if _is_error_payload(result) else "ok",
+                len(json.dumps(value, separators=(",", ":"))), result_hash(result), value,
+            )
+        except Exception:
+            # Capture must never break the tool
+            pass
+        return result
+
+    return wrapper
+
+
+def _is_error_payload(result) -> bool:
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and len(result) == 1 and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
+
+
+class WorkloadCaptureMiddleware:
+    """
+    ASGI middleware recording each HTTP request. Add it before the
+    compression middleware (i.e. inside it) so bodies are hashed uncompressed.
+    """
+
+    def __init__(self, app, recorder: WorkloadRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started, clock = time.time(), time.perf_counter()
+        request_body = bytearray()
+        # JSON bodies are kept to hash (and store) their canonical form; others are hashed as they pass
+        response: Dict[str, Any] = {"status": None, "json": False, "body": bytearray(), "bytes": 0,
+                                    "sha": hashlib.sha256()}
+
+        async def receive_and_keep():
+            message = await receive()
+            if message["type"] == "http.request" and len(request_body) <= MAX_REQUEST_BODY_BYTES:
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_keep(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for key, value in message.get("headers", []):
+                    if key == b"content-type":
+                        response["json"] = value.decode("latin-1").startswith("application/json")
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                response["bytes"] += len(body)
+                if response["json"]:
+                    response["body"].extend(body)
+                else:
+                    response["sha"].update(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_keep, send_and_keep)
+        finally:
+            try:
+                self._record(scope, request_body, response, started, time.perf_counter() - clock)
+            except Exception:
+                pass
+
+    def _record(self, scope, request_body: bytearray, response: Dict[str, Any], started: float, seconds: float):
+        params: Dict[str, Any] = {"query": parse_qsl(scope.get("query_string", b"").decode("latin-1"))}
+        for key, value in scope.get("headers", []):
+            if key == b"accept":
+                params["accept"] = value.decode("latin-1")
+        if request_body and len(request_body) <= MAX_REQUEST_BODY_BYTES:
+            params["body"] = request_body.decode("utf-8", errors="replace")
+
+        result = None
+        if response["json"] and response["body"]:
+            result = canonical(json.loads(response["body"]))
+            sha = result_hash(result)
+        else:
+            sha = response["sha"].hexdigest()[:16]
+        self.recorder.record(
+            "http", f"{scope['method']} {scope['path']}", params, started, seconds,
+            response["status"], response["bytes"], sha, result,
+        )